@@ -3,6 +3,9 @@ API de Descargas - Consolidador T25
 ===================================
 
 Endpoints para listar y descargar archivos generados.
+🆕 v15.4: Además de los archivos sueltos en OUTPUT_FOLDER se listan los de
+cada job (OUTPUT_FOLDER/jobs/<job_id>, según su manifiesto artefactos.json);
+se descargan por su ruta relativa, p. ej. jobs/<job_id>/Resumen_....xlsx.
 """
 
 from fastapi import APIRouter, HTTPException
@@ -12,10 +15,38 @@ import zipfile
 from typing import List
 
 from app.config import CONFIG
+from app.services.artefactos import rutas_artefactos
 
 router = APIRouter()
 
 
+def carpetas_jobs() -> List[str]:
+    """Carpetas de salida de los jobs (OUTPUT_FOLDER/jobs/*)."""
+    raiz = os.path.join(CONFIG.OUTPUT_FOLDER, "jobs")
+    if not os.path.isdir(raiz):
+        return []
+    return [os.path.join(raiz, nombre) for nombre in os.listdir(raiz)
+            if os.path.isdir(os.path.join(raiz, nombre))]
+
+
+def resolver_archivo(filename: str) -> str:
+    """Ruta de un archivo de OUTPUT_FOLDER a partir de su ruta relativa.
+
+    Lanza 404 si no existe o queda fuera de OUTPUT_FOLDER o en una carpeta
+    interna (.cache, .logs...).
+    """
+    base = os.path.realpath(CONFIG.OUTPUT_FOLDER)
+    filepath = os.path.realpath(os.path.join(base, filename))
+    relativa = os.path.relpath(filepath, base)
+    if (relativa.startswith("..") or any(parte.startswith(".") for parte in relativa.split(os.sep))
+            or not os.path.isfile(filepath)):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Archivo no encontrado: {filename}"
+        )
+    return filepath
+
+
 def formatear_tamaño(tamaño_bytes: int) -> str:
     """Formatea el tamaño en bytes a una cadena legible."""
     for unidad in ['B', 'KB', 'MB', 'GB']:
@@ -35,8 +66,12 @@ async def listar_archivos_disponibles():
         if not os.path.exists(CONFIG.OUTPUT_FOLDER):
             os.makedirs(CONFIG.OUTPUT_FOLDER, exist_ok=True)
 
-        for filename in os.listdir(CONFIG.OUTPUT_FOLDER):
-            filepath = os.path.join(CONFIG.OUTPUT_FOLDER, filename)
+        rutas = [os.path.join(CONFIG.OUTPUT_FOLDER, filename) for filename in os.listdir(CONFIG.OUTPUT_FOLDER)]
+        for carpeta in carpetas_jobs():
+            rutas.extend(rutas_artefactos(carpeta))
+
+        for filepath in rutas:
+            filename = os.path.relpath(filepath, CONFIG.OUTPUT_FOLDER).replace(os.sep, "/")
 
             if os.path.isfile(filepath):
                 tamaño = os.path.getsize(filepath)
@@ -68,16 +103,10 @@ async def listar_archivos_disponibles():
         )
 
 
-@router.get("/descargas/archivo/{filename}")
+@router.get("/descargas/archivo/{filename:path}")
 async def descargar_archivo(filename: str):
     """Descarga un archivo específico."""
-    filepath = os.path.join(CONFIG.OUTPUT_FOLDER, filename)
-    
-    if not os.path.exists(filepath):
-        raise HTTPException(
-            status_code=404,
-            detail=f"Archivo no encontrado: {filename}"
-        )
+    filepath = resolver_archivo(filename)
     
     # Determinar tipo MIME
     if filename.endswith('.xlsx'):
@@ -93,7 +122,7 @@ async def descargar_archivo(filename: str):
     
     return FileResponse(
         path=filepath,
-        filename=filename,
+        filename=os.path.basename(filepath),
         media_type=media_type
     )
 
@@ -108,13 +137,7 @@ async def descargar_multiples(archivos: List[str]):
         )
     
     # Verificar que todos los archivos existen
-    for filename in archivos:
-        filepath = os.path.join(CONFIG.OUTPUT_FOLDER, filename)
-        if not os.path.exists(filepath):
-            raise HTTPException(
-                status_code=404,
-                detail=f"Archivo no encontrado: {filename}"
-            )
+    rutas = {filename: resolver_archivo(filename) for filename in archivos}
     
     # Crear ZIP
     from datetime import datetime
@@ -124,8 +147,7 @@ async def descargar_multiples(archivos: List[str]):
     
     try:
         with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for filename in archivos:
-                filepath = os.path.join(CONFIG.OUTPUT_FOLDER, filename)
+            for filename, filepath in rutas.items():
                 zipf.write(filepath, filename)
         
         return FileResponse(
@@ -141,16 +163,10 @@ async def descargar_multiples(archivos: List[str]):
         )
 
 
-@router.delete("/descargas/archivo/{filename}")
+@router.delete("/descargas/archivo/{filename:path}")
 async def eliminar_archivo(filename: str):
     """Elimina un archivo del servidor."""
-    filepath = os.path.join(CONFIG.OUTPUT_FOLDER, filename)
-    
-    if not os.path.exists(filepath):
-        raise HTTPException(
-            status_code=404,
-            detail=f"Archivo no encontrado: {filename}"
-        )
+    filepath = resolver_archivo(filename)
     
     try:
         os.remove(filepath)
@@ -167,7 +183,9 @@ async def eliminar_archivo(filename: str):
 
 @router.delete("/descargas/limpiar")
 async def limpiar_archivos():
-    """Elimina todos los archivos de la carpeta de salida."""
+    """Elimina todos los archivos de la carpeta de salida y las carpetas y logs de los jobs terminados."""
+    from app.api.process import limpiar_jobs_terminados
+    
     try:
         eliminados = 0
         for filename in os.listdir(CONFIG.OUTPUT_FOLDER):
@@ -176,6 +194,10 @@ async def limpiar_archivos():
                 os.remove(filepath)
                 eliminados += 1
         
+        # Completados, con error o cancelados (incluye sus puntos de control y
+        # OUTPUT_FOLDER/.logs/<job_id>); los pendientes o en proceso se conservan
+        eliminados += limpiar_jobs_terminados()
+        
         return JSONResponse(content={
             "success": True,
             "mensaje": f"{eliminados} archivos eliminados"
@@ -3,24 +3,53 @@ API de Procesamiento - Consolidador T25
 =======================================
 
 Endpoints para ejecutar el procesamiento de contratos.
-Ejecuta el consolidador como subproceso y captura logs en tiempo real.
-FILTRADO: Solo muestra logs desde "PROCESAMIENTO" - oculta rutas y pruebas.
+Ejecuta el consolidador en el servicio pre-calentado (o como subproceso si no
+está disponible) y captura logs en tiempo real.
+El estado del job (contrato actual, progreso, archivos generados) se actualiza
+con los eventos JSON-lines del consolidador (app.services.eventos); el log
+para humanos llega por stdout ya filtrado por nivel y solo se muestra desde
+"PROCESAMIENTO". Los logs de cada job se guardan en un RegistroLogs (últimos
+en memoria, todos en disco bajo OUTPUT_FOLDER/.logs) y se leen paginados.
+Los jobs pasan por una cola persistente (app.services.cola_jobs): se ejecutan
+como máximo MAX_JOBS_CONCURRENTES a la vez, los ESPECIFICO antes que los
+POR_ANO y COMPLETO, y al reiniciar la API los que quedaron en proceso vuelven
+a la cola. Cancelar un job en proceso crea su archivo CONSOLIDADOR_CANCELAR:
+el consolidador se detiene en la siguiente frontera de archivo y libera SFTP,
+carpeta de trabajo y temporales; si no termina en TIMEOUT_CANCELACION
+segundos se mata su grupo de procesos y la API borra lo que haya quedado.
+Un job que la API reencola al reiniciar se retoma con CONSOLIDADOR_RESUME
+desde el último contrato integrado (punto de control del consolidador).
+Cada job escribe en su propia carpeta (OUTPUT_FOLDER/jobs/<job_id>) y solo
+comparte las cachés de OUTPUT_FOLDER/.cache; sus archivos generados son los
+del manifiesto artefactos.json (app.services.artefactos), así varios jobs
+pueden correr a la vez sin mezclar resultados.
 """
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Set
+import glob
+import shutil
+import signal
 import subprocess
+import tempfile
 import threading
+import time
 import uuid
 import os
 import sys
-import re
 from datetime import datetime
-from queue import Queue
 
 from app.config import CONFIG
+from app.services.artefactos import rutas_artefactos
+from app.services.cola_jobs import ColaJobs, ESTADOS_TERMINALES, PRIORIDAD_MODO
+from app.services.eventos import leer_eventos
+from app.services.registro_logs import RegistroLogs
+from app.websockets.logs import manager
+from app.services.servicio_consolidador import (
+    ServicioConsolidador, ServicioNoDisponible, servicio_disponible
+)
 
 router = APIRouter()
 
@@ -28,6 +57,29 @@ router = APIRouter()
 jobs: Dict[str, Dict[str, Any]] = {}
 jobs_lock = threading.Lock()
 
+# Cola persistente de jobs y los que se están ejecutando ahora
+cola = ColaJobs(os.path.join(CONFIG.OUTPUT_FOLDER, ".cache", "jobs.db"))
+jobs_ejecutando: Set[str] = set()
+despacho_lock = threading.Lock()
+
+# Proceso (Popen o ProcesoServicio) de cada job en ejecución
+procesos: Dict[str, Any] = {}
+
+SCRIPT_CONSOLIDADOR = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "core", "consolidador_t25_parametrizado.py"
+))
+
+# Servicio pre-calentado del consolidador (None = un subproceso por job)
+servicio: Optional[ServicioConsolidador] = None
+if CONFIG.CONSOLIDADOR_SERVICIO and servicio_disponible():
+    servicio = ServicioConsolidador(
+        SCRIPT_CONSOLIDADOR,
+        ruta_socket=os.path.join(tempfile.gettempdir(), f"consolidador_t25_{os.getpid()}.sock"),
+        directorio_backend=os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")),
+        archivo_log=os.path.join(tempfile.gettempdir(), f"consolidador_t25_{os.getpid()}.log"),
+        espera_precarga=CONFIG.CONSOLIDADOR_SERVICIO_ESPERA
+    )
+
 
 class ProcesamientoRequest(BaseModel):
     año: Optional[int] = None
@@ -35,175 +87,373 @@ class ProcesamientoRequest(BaseModel):
     procesar_todo: Optional[bool] = False
 
 
-def debe_mostrar_log(linea: str, procesamiento_iniciado: bool) -> tuple[bool, bool]:
+# Separadores que el consolidador imprime entre secciones (no se muestran)
+CARACTERES_SEPARADOR = '═─━-= '
+
+# Segundos entre lecturas del archivo de eventos cuando no hay eventos nuevos
+INTERVALO_EVENTOS = 0.2
+
+# Máximo de logs por respuesta de /procesar/logs (el cliente pagina con `desde`)
+LIMITE_LOGS_PAGINA = 1000
+
+
+def mensaje_estado(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Estado de un job tal como lo recibe el WebSocket (con jobs_lock tomado)."""
+    return {
+        "estado": job["estado"],
+        "progreso": job["progreso"],
+        "mensaje": job["mensaje"],
+        "contrato_actual": job.get("contrato_actual", ""),
+        "contratos_procesados": job.get("contratos_procesados", 0),
+        "contratos_total": job.get("contratos_total", 0),
+        "metricas": job.get("metricas")
+    }
+
+
+def mensaje_fin(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Mensaje final del WebSocket para un job terminado (con jobs_lock tomado)."""
+    return {
+        "estado": job["estado"],
+        "archivos_generados": list(job.get("archivos_generados", [])),
+        "errores": list(job.get("errores", []))
+    }
+
+
+def publicar_estado(job_id: str, fin: bool = False):
+    """Publica el estado (y el fin, si terminó) a los WebSockets suscritos al job."""
+    if not manager.tiene_suscriptores(job_id):
+        return
+    with jobs_lock:
+        if job_id not in jobs:
+            return
+        job = jobs[job_id]
+        estado = mensaje_estado(job)
+        final = mensaje_fin(job) if fin else None
+    manager.publicar_desde_hilo(manager.broadcast_progress, job_id, estado["progreso"], estado["mensaje"])
+    manager.publicar_desde_hilo(manager.broadcast_estado, job_id, estado)
+    if final is not None:
+        manager.publicar_desde_hilo(manager.broadcast_fin, job_id, final)
+
+
+def crear_registro_logs(job_id: str) -> RegistroLogs:
+    """Registro de logs del job en OUTPUT_FOLDER/.logs/{job_id}."""
+    return RegistroLogs(
+        os.path.abspath(os.path.join(CONFIG.OUTPUT_FOLDER, ".logs", job_id)),
+        en_memoria=CONFIG.LOGS_EN_MEMORIA,
+        por_segmento=CONFIG.LOGS_POR_SEGMENTO
+    )
+
+
+def agregar_log(job_id: str, log: Dict[str, Any]):
+    """Guarda un log del job y lo publica a los WebSockets suscritos."""
+    with jobs_lock:
+        if job_id not in jobs:
+            return
+        registro = jobs[job_id]["logs"]
+    indice = registro.agregar(log)
+
+    if manager.tiene_suscriptores(job_id):
+        manager.publicar_desde_hilo(manager.send_log, job_id, log, indice)
+
+
+def ruta_eventos_job(job_id: str) -> str:
+    """Archivo JSON-lines del canal de eventos de un job."""
+    return os.path.join(tempfile.gettempdir(), f"consolidador_eventos_{job_id}.jsonl")
+
+
+def carpeta_job(job_id: str) -> str:
+    """Carpeta de salida propia del job (OUTPUT_FOLDER/jobs/{job_id})."""
+    return os.path.abspath(os.path.join(CONFIG.OUTPUT_FOLDER, "jobs", job_id))
+
+
+def nombre_publico(ruta: str) -> str:
+    """Ruta relativa a OUTPUT_FOLDER con la que se descarga un archivo (/api/descargas/archivo/...)."""
+    return os.path.relpath(ruta, os.path.abspath(CONFIG.OUTPUT_FOLDER)).replace(os.sep, "/")
+
+
+def ruta_cancelacion_job(job_id: str) -> str:
+    """Archivo cuya existencia pide al consolidador cancelar el job."""
+    return os.path.join(tempfile.gettempdir(), f"consolidador_cancelar_{job_id}")
+
+
+def forzar_detencion(proceso):
+    """Mata el consolidador y sus workers (el subproceso corre en su propia sesión)."""
+    if isinstance(proceso, subprocess.Popen) and hasattr(os, "killpg"):
+        try:
+            os.killpg(proceso.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        proceso.kill()
+
+
+def vigilar_cancelacion(job_id: str):
+    """Si el job no se detiene solo en TIMEOUT_CANCELACION segundos, lo mata.
+
+    Un job en proceso puede no tener todavía su proceso (p. ej. mientras
+    espera al servicio): se sigue vigilando hasta que el job termine o se
+    cumpla el plazo.
     """
-    Determina si una línea de log debe mostrarse.
-    Retorna (mostrar, procesamiento_iniciado)
+    limite = time.time() + CONFIG.TIMEOUT_CANCELACION
+    while time.time() < limite:
+        with jobs_lock:
+            proceso = procesos.get(job_id)
+            terminado = jobs.get(job_id, {}).get("estado", "cancelado") in ESTADOS_TERMINALES
+        if terminado or (proceso is not None and proceso.poll() is not None):
+            return
+        time.sleep(0.5)
     
-    Oculta:
-    - Rutas de archivos con información sensible
-    - Pruebas unitarias
-    - Configuración inicial
-    - Parámetros recibidos
+    with jobs_lock:
+        proceso = procesos.get(job_id)
+    if proceso is not None and proceso.poll() is None:
+        print(f"⚠️ El job {job_id} no se detuvo en {CONFIG.TIMEOUT_CANCELACION}s; se fuerza su detención")
+        forzar_detencion(proceso)
+
+
+def limpiar_restos_job(job: Dict[str, Any]):
+    """Borra la carpeta del job, la de trabajo y los temporales anunciados por el consolidador."""
+    if job.get("carpeta_salida"):
+        shutil.rmtree(job["carpeta_salida"], ignore_errors=True)
+    if job.get("carpeta_trabajo"):
+        shutil.rmtree(job["carpeta_trabajo"], ignore_errors=True)
+    for ruta in job.get("temporales", []):
+        if os.path.isdir(ruta):
+            shutil.rmtree(ruta, ignore_errors=True)
+            continue
+        # El almacén Parquet se parte en <raiz>.parquet, <raiz>_0001.parquet...
+        for parte in glob.glob(glob.escape(os.path.splitext(ruta)[0]) + "*"):
+            try:
+                os.remove(parte)
+            except OSError:
+                pass
+
+
+def limpiar_jobs_terminados() -> int:
+    """Borra carpeta, restos y logs de los jobs terminados y de los que ya no están en la cola.
+
+    Los jobs pendientes o en proceso no se tocan: pueden estar corriendo o
+    esperando retomarse desde su punto de control. Los terminados siguen en
+    el historial, sin archivos ni logs. Retorna los archivos generados que
+    se eliminaron.
     """
-    linea_upper = linea.upper()
-    
-    # Detectar inicio de procesamiento real
-    if "PROCESAMIENTO V" in linea_upper or "PROCESAMIENTO" in linea_upper and "MODO:" in linea_upper:
-        return True, True
-    
-    # Si no ha iniciado el procesamiento, no mostrar nada
-    if not procesamiento_iniciado:
-        # Excepción: mostrar línea de inicio
-        if "PROCESAMIENTO V" in linea_upper:
-            return True, True
-        return False, False
-    
-    # Patrones a OCULTAR (información sensible o irrelevante)
-    patrones_ocultar = [
-        r'C:\\Users\\',           # Rutas de Windows
-        r'/home/',                # Rutas de Linux
-        r'OneDrive',              # OneDrive paths
-        r'Documentos',            # Documentos folder
-        r'\.xlsx$',               # Rutas de archivos Excel
-        r'\.xlsb$',
-        r'Maestra:.*\\',          # Línea de maestra con ruta
-        r'Output:.*\\',           # Línea de output con ruta
-        r'PRUEBA \d+:',           # Pruebas unitarias
-        r'EJECUTANDO PRUEBAS',    # Inicio de pruebas
-        r'RESUMEN DE PRUEBAS',    # Resumen de pruebas
-        r'Exitosas:.*Fallidas:',  # Resultados de pruebas
-        r'esperado:',             # Resultados de pruebas
-        r'Porcentaje:.*%',        # Porcentaje de pruebas
-        r'ERRORES ENCONTRADOS',   # Errores de pruebas
-        r'retornó.*esperado',     # Resultados de pruebas
-        r'Parámetros recibidos',  # Parámetros (contiene rutas)
-        r'• Maestra:',            # Detalle de maestra
-        r'• Output:',             # Detalle de output
-        r'• Modo:',               # Ya se muestra en el header
-        r'• Año:',                # Ya se muestra en el header
-        r'• Contrato:',           # Ya se muestra en el header
-        r'FUNCIONES CORREGIDAS',  # Info técnica
-        r'contiene_anexo1\(\)',   # Info técnica
-        r'es_telefono_celular',   # Info técnica
-        r'validar_cups\(\)',      # Info técnica
-        r'validar_tarifa\(\)',    # Info técnica
-        r'es_fila_de_traslados',  # Info técnica
-        r'buscar_hoja_servicios', # Info técnica
-        r'generar_mensaje_hojas', # Info técnica
-        r'es_formato_propio',     # Info técnica
-        r'SistemaAlertas',        # Info técnica
-        r'CORRECCIONES ESPECÍFICAS', # Info técnica
-        r'Alerta PAQUETES:',      # Info técnica
-        r'Teléfonos: Detecta',    # Info técnica
-        r'Inicializando CONSOLIDADOR', # Ya mostrado
-        r'uploads\\',             # Rutas de uploads
-        r'backend\\',             # Rutas de backend
-        r'consolidador-t25-app',  # Nombre del proyecto
-    ]
-    
-    for patron in patrones_ocultar:
-        if re.search(patron, linea, re.IGNORECASE):
-            return False, procesamiento_iniciado
-    
-    # Líneas vacías o solo con separadores
-    if not linea.strip() or linea.strip() in ['', '─' * 10, '═' * 10, '━' * 10]:
-        return False, procesamiento_iniciado
+    with jobs_lock:
+        terminados = [(job_id, job) for job_id, job in jobs.items() if job["estado"] in ESTADOS_TERMINALES]
     
-    # Líneas que son solo separadores
-    if re.match(r'^[═─━\-=\s]+$', linea.strip()):
-        return False, procesamiento_iniciado
+    eliminados = 0
+    for job_id, job in terminados:
+        carpeta = carpeta_job(job_id)
+        eliminados += len(rutas_artefactos(carpeta))
+        limpiar_restos_job(job)
+        shutil.rmtree(carpeta, ignore_errors=True)
+        job["logs"].eliminar()
     
-    return True, procesamiento_iniciado
+    # Carpetas de salida y de logs huérfanas (jobs que ya no están en la cola)
+    for raiz in (os.path.join(CONFIG.OUTPUT_FOLDER, "jobs"), os.path.join(CONFIG.OUTPUT_FOLDER, ".logs")):
+        if not os.path.isdir(raiz):
+            continue
+        for nombre in os.listdir(raiz):
+            with jobs_lock:
+                if nombre in jobs:
+                    continue
+            ruta = os.path.join(raiz, nombre)
+            eliminados += len(rutas_artefactos(ruta))
+            shutil.rmtree(ruta, ignore_errors=True)
+    return eliminados
 
 
-def limpiar_log(linea: str) -> str:
-    """Limpia información sensible de una línea de log."""
-    # Remover rutas completas, dejar solo nombre de archivo
-    linea = re.sub(r'C:\\[^│\n]+\\([^\\│\n]+\.(xlsx|xlsb|xls))', r'\1', linea)
-    linea = re.sub(r'/[^│\n]+/([^/│\n]+\.(xlsx|xlsb|xls))', r'\1', linea)
-    
-    # Remover referencias a OneDrive
-    linea = re.sub(r'OneDrive[^│\n]*\\', '', linea)
-    
-    return linea
+def clasificar_log(linea: str) -> str:
+    """Tipo de log para la UI según los íconos del Logger del consolidador."""
+    linea_lower = linea.lower()
+    if "✓" in linea or "✅" in linea or "éxito" in linea_lower or "completado" in linea_lower:
+        return "success"
+    if "✗" in linea or "❌" in linea or "error" in linea_lower:
+        return "error"
+    if "⚠" in linea or "advertencia" in linea_lower or "WARNING" in linea:
+        return "warning"
+    if "⬇" in linea or "↓" in linea or "descargando" in linea_lower:
+        return "download"
+    if "📄" in linea or "archivo" in linea_lower:
+        return "file"
+    if "📋" in linea or "contrato" in linea_lower:
+        return "contract"
+    if "⚙" in linea or "🔄" in linea or "procesando" in linea_lower:
+        return "process"
+    return "info"
+
 
+def leer_output_proceso(proceso, job_id: str):
+    """Lee el log para humanos (stdout) del consolidador y lo agrega al job.
 
-def leer_output_proceso(proceso, job_id: str, output_queue: Queue):
-    """Lee la salida del proceso línea por línea y actualiza el job."""
+    El consolidador ya filtra por nivel (CONSOLIDADOR_LOG_NIVEL); aquí solo se
+    omite el arranque (pruebas, configuración, rutas de la maestra) hasta el
+    encabezado de PROCESAMIENTO y las líneas vacías o de separadores. El
+    progreso y el contrato actual llegan por el canal de eventos.
+    """
     procesamiento_iniciado = False
-    
+
     try:
         for linea in iter(proceso.stdout.readline, ''):
             if not linea:
                 break
-            
+
             linea = linea.strip()
-            if not linea:
-                continue
-            
-            # Verificar si debemos mostrar este log
-            mostrar, procesamiento_iniciado = debe_mostrar_log(linea, procesamiento_iniciado)
-            
-            if not mostrar:
+            if not linea or not linea.strip(CARACTERES_SEPARADOR):
                 continue
-            
-            # Limpiar información sensible
-            linea = limpiar_log(linea)
-            
-            # Determinar tipo de log basado en contenido
-            tipo = "info"
-            if "✓" in linea or "éxito" in linea.lower() or "completado" in linea.lower() or "✅" in linea:
-                tipo = "success"
-            elif "✗" in linea or "error" in linea.lower() or "ERROR" in linea or "❌" in linea:
-                tipo = "error"
-            elif "⚠" in linea or "advertencia" in linea.lower() or "WARNING" in linea:
-                tipo = "warning"
-            elif "descargando" in linea.lower() or "↓" in linea or "⬇" in linea:
-                tipo = "download"
-            elif "archivo" in linea.lower() or "📄" in linea:
-                tipo = "file"
-            elif "contrato" in linea.lower() or "📋" in linea:
-                tipo = "contract"
-            elif "procesando" in linea.lower() or "🔄" in linea or "⚙" in linea:
-                tipo = "process"
-            
-            # Extraer progreso si está disponible
-            progreso = None
-            if "[" in linea and "/" in linea and "]" in linea:
-                try:
-                    # Buscar patrón [N/M]
-                    match = re.search(r'\[(\d+)/(\d+)\]', linea)
-                    if match:
-                        actual = int(match.group(1))
-                        total = int(match.group(2))
-                        progreso = (actual / total) * 100
-                except:
-                    pass
-            
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            
+
+            if not procesamiento_iniciado:
+                if "PROCESAMIENTO V" not in linea.upper():
+                    continue
+                procesamiento_iniciado = True
+
+            log = {
+                "timestamp": datetime.now().strftime("%H:%M:%S"),
+                "tipo": clasificar_log(linea),
+                "mensaje": linea
+            }
+
             with jobs_lock:
                 if job_id in jobs:
-                    jobs[job_id]["logs"].append({
-                        "timestamp": timestamp,
-                        "tipo": tipo,
-                        "mensaje": linea
-                    })
-                    
-                    if progreso is not None:
-                        jobs[job_id]["progreso"] = progreso
-                    
                     jobs[job_id]["mensaje"] = linea[:100]
-                    
-                    # Actualizar contrato actual si se detecta
-                    if "contrato" in linea.lower() and ("procesando" in linea.lower() or "iniciando" in linea.lower() or "[" in linea):
-                        jobs[job_id]["contrato_actual"] = linea
-                        
+            agregar_log(job_id, log)
+
     except Exception as e:
         print(f"Error leyendo output: {e}")
 
 
+def aplicar_evento(job: Dict[str, Any], evento: Dict[str, Any]):
+    """Actualiza el estado de un job con un evento del consolidador (con jobs_lock tomado)."""
+    tipo = evento.get("evento")
+    estadisticas = job["estadisticas"]
+
+    if tipo == "job_start":
+        job["contratos_total"] = evento.get("contratos", job["contratos_total"])
+        job["carpeta_trabajo"] = evento.get("carpeta_trabajo")
+        job["run_id"] = evento.get("run_id") or job.get("run_id")
+    elif tipo == "temporales":
+        job["temporales"] = list(evento.get("rutas") or [])
+    elif tipo == "contract_start":
+        job["contrato_actual"] = evento.get("contrato", "")
+    elif tipo == "contract_end":
+        job["contratos_procesados"] += 1
+        if evento.get("exito"):
+            estadisticas["contratos_exitosos"] = estadisticas.get("contratos_exitosos", 0) + 1
+    elif tipo == "progress":
+        if "reanudados" in evento:
+            # Job retomado: los contratos del punto de control ya están procesados
+            job["contratos_procesados"] = evento["reanudados"]
+        total = evento.get("total") or 0
+        if total:
+            job["progreso"] = round(100 * evento.get("hechos", 0) / total, 1)
+        # Ritmo y ETA calculados por el consolidador (ver app/core/t25/progreso.py)
+        job["metricas"] = {k: v for k, v in evento.items() if k not in ("evento", "ts", "pid")}
+    elif tipo == "file_downloaded":
+        estadisticas["descargas"] = estadisticas.get("descargas", 0) + 1
+    elif tipo == "rows_extracted":
+        estadisticas["registros_extraidos"] = estadisticas.get("registros_extraidos", 0) + evento.get("filas", 0)
+    elif tipo == "alert":
+        estadisticas["alertas"] = estadisticas.get("alertas", 0) + 1
+    elif tipo == "artifact":
+        nombre = nombre_publico(evento["ruta"]) if evento.get("ruta") else evento.get("nombre")
+        if nombre and nombre not in job["archivos_generados"]:
+            job["archivos_generados"].append(nombre)
+    elif tipo == "job_end":
+        job["resultado"] = {k: v for k, v in evento.items() if k not in ("evento", "ts", "pid")}
+
+
+def seguir_eventos(ruta: str, job_id: str, terminado: threading.Event):
+    """Sigue el archivo de eventos del job (como `tail -f`) hasta que el proceso termina."""
+    archivo = None
+    try:
+        while True:
+            fin = terminado.is_set()
+
+            if archivo is None and os.path.exists(ruta):
+                archivo = open(ruta, 'rb')
+
+            eventos = list(leer_eventos(archivo)) if archivo is not None else []
+            if eventos:
+                with jobs_lock:
+                    if job_id in jobs:
+                        for evento in eventos:
+                            aplicar_evento(jobs[job_id], evento)
+                publicar_estado(job_id)
+                if any(evento.get("evento") == "job_start" for evento in eventos):
+                    # El run_id queda en la cola para retomar el job si la API se reinicia
+                    persistir_job(job_id)
+            elif fin:
+                break
+            else:
+                terminado.wait(INTERVALO_EVENTOS)
+    except Exception as e:
+        print(f"Error leyendo eventos: {e}")
+    finally:
+        if archivo is not None:
+            archivo.close()
+
+
+def construir_env_consolidador(
+    archivo_maestra_absoluto: str,
+    modo: str,
+    año: Optional[str] = None,
+    numero_contrato: Optional[str] = None,
+    ruta_eventos: Optional[str] = None,
+    ruta_cancelacion: Optional[str] = None,
+    reanudar: Optional[str] = None,
+    carpeta_salida: Optional[str] = None
+) -> Dict[str, str]:
+    """Variables de entorno con las que corre el consolidador (salida por defecto: OUTPUT_FOLDER)."""
+    env = os.environ.copy()
+    env["CONSOLIDADOR_MAESTRA"] = archivo_maestra_absoluto
+    env["CONSOLIDADOR_MODO"] = modo
+    env["CONSOLIDADOR_OUTPUT"] = carpeta_salida or os.path.abspath(CONFIG.OUTPUT_FOLDER)
+    env["CONSOLIDADOR_CACHE"] = os.path.abspath(os.path.join(CONFIG.OUTPUT_FOLDER, ".cache"))
+    env["PYTHONIOENCODING"] = "utf-8"
+    env["PYTHONUTF8"] = "1"
+    env["CONSOLIDADOR_WORKERS"] = str(CONFIG.CONSOLIDADOR_WORKERS)
+    env["CONSOLIDADOR_INCREMENTAL"] = "1" if CONFIG.CONSOLIDADOR_INCREMENTAL else "0"
+    env["CONSOLIDADOR_LOG_NIVEL"] = CONFIG.CONSOLIDADOR_LOG_NIVEL
+    if ruta_eventos:
+        env["CONSOLIDADOR_EVENTOS"] = ruta_eventos
+    if ruta_cancelacion:
+        env["CONSOLIDADOR_CANCELAR"] = ruta_cancelacion
+    if reanudar:
+        env["CONSOLIDADOR_RESUME"] = reanudar
+    
+    if año:
+        env["CONSOLIDADOR_ANO"] = str(año)
+    if numero_contrato:
+        env["CONSOLIDADOR_NUMERO"] = str(numero_contrato)
+    
+    # Credenciales SFTP
+    env["SFTP_HOST"] = CONFIG.HOST
+    env["SFTP_PORT"] = str(CONFIG.PORT)
+    env["SFTP_USERNAME"] = CONFIG.USERNAME
+    env["SFTP_PASSWORD"] = CONFIG.PASSWORD
+    env["SFTP_CARPETA_PRINCIPAL"] = CONFIG.CARPETA_PRINCIPAL
+    return env
+
+
+def precargar_servicio(archivo_maestra: Optional[str]):
+    """Deja el servicio con la maestra y el clasificador cargados (en segundo plano)."""
+    if servicio is None or not archivo_maestra:
+        return
+    
+    def _precargar():
+        try:
+            env = construir_env_consolidador(os.path.abspath(archivo_maestra), "COMPLETO")
+            resultado = servicio.precargar(env)
+            print(f"✅ Servicio del consolidador precargado: {resultado}")
+        except Exception as e:
+            print(f"⚠️ No se pudo precargar el servicio del consolidador: {e}")
+    
+    threading.Thread(target=_precargar, daemon=True).start()
+
+
+def detener_servicio():
+    if servicio is not None:
+        servicio.detener()
+
+
 def ejecutar_consolidador_subproceso(
     job_id: str,
     archivo_maestra: str,
@@ -211,7 +461,10 @@ def ejecutar_consolidador_subproceso(
     año: Optional[str],
     numero_contrato: Optional[str]
 ):
-    """Ejecuta el consolidador como subproceso."""
+    """Ejecuta el consolidador (servicio pre-calentado o subproceso)."""
+    ruta_eventos = ruta_eventos_job(job_id)
+    ruta_cancelacion = ruta_cancelacion_job(job_id)
+    carpeta_salida = carpeta_job(job_id)
     try:
         # Convertir ruta de maestra a absoluta
         archivo_maestra_absoluto = os.path.abspath(archivo_maestra)
@@ -219,32 +472,19 @@ def ejecutar_consolidador_subproceso(
         if not os.path.exists(archivo_maestra_absoluto):
             raise FileNotFoundError(f"Archivo de maestra no encontrado")
         
-        # Configurar variables de entorno
-        env = os.environ.copy()
-        env["CONSOLIDADOR_MAESTRA"] = archivo_maestra_absoluto
-        env["CONSOLIDADOR_MODO"] = modo
-        env["CONSOLIDADOR_OUTPUT"] = os.path.abspath(CONFIG.OUTPUT_FOLDER)
-        env["PYTHONIOENCODING"] = "utf-8"
-        env["PYTHONUTF8"] = "1"
-        
-        if año:
-            env["CONSOLIDADOR_ANO"] = str(año)
-        if numero_contrato:
-            env["CONSOLIDADOR_NUMERO"] = str(numero_contrato)
+        os.makedirs(carpeta_salida, exist_ok=True)
+        with jobs_lock:
+            reanudar = jobs[job_id].get("reanudar")
+            jobs[job_id]["carpeta_salida"] = carpeta_salida
         
-        # Credenciales SFTP
-        env["SFTP_HOST"] = CONFIG.HOST
-        env["SFTP_PORT"] = str(CONFIG.PORT)
-        env["SFTP_USERNAME"] = CONFIG.USERNAME
-        env["SFTP_PASSWORD"] = CONFIG.PASSWORD
-        env["SFTP_CARPETA_PRINCIPAL"] = CONFIG.CARPETA_PRINCIPAL
+        # Configurar variables de entorno
+        env = construir_env_consolidador(
+            archivo_maestra_absoluto, modo, año, numero_contrato, ruta_eventos, ruta_cancelacion, reanudar,
+            carpeta_salida
+        )
         
         # Ruta al script
-        script_path = os.path.join(
-            os.path.dirname(__file__),
-            "..", "core", "consolidador_t25_parametrizado.py"
-        )
-        script_path = os.path.abspath(script_path)
+        script_path = SCRIPT_CONSOLIDADOR
         
         if not os.path.exists(script_path):
             raise FileNotFoundError(f"Script del consolidador no encontrado")
@@ -253,44 +493,80 @@ def ejecutar_consolidador_subproceso(
             jobs[job_id]["mensaje"] = "Iniciando consolidador..."
             jobs[job_id]["estado"] = "en_proceso"
         
-        # Ejecutar proceso
-        proceso = subprocess.Popen(
-            [sys.executable, "-u", script_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            env=env,
-            cwd=os.path.dirname(script_path),
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            bufsize=1
-        )
+        # Ejecutar en el servicio pre-calentado; si no está disponible, subproceso
+        proceso = None
+        if servicio is not None:
+            try:
+                proceso = servicio.ejecutar(env, cwd=os.path.dirname(script_path))
+            except (OSError, ValueError, ServicioNoDisponible) as e:
+                print(f"⚠️ Servicio del consolidador no disponible, usando subproceso: {e}")
+        
+        if proceso is None:
+            proceso = subprocess.Popen(
+                [sys.executable, "-u", script_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=env,
+                cwd=os.path.dirname(script_path),
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                bufsize=1,
+                # Grupo propio para poder matar también a los workers al cancelar
+                start_new_session=hasattr(os, "killpg")
+            )
         
-        # Leer output
-        output_queue = Queue()
+        with jobs_lock:
+            procesos[job_id] = proceso
+        
+        # Leer output (log para humanos) y eventos
         lector_thread = threading.Thread(
             target=leer_output_proceso,
-            args=(proceso, job_id, output_queue)
+            args=(proceso, job_id)
         )
         lector_thread.start()
         
+        proceso_terminado = threading.Event()
+        eventos_thread = threading.Thread(
+            target=seguir_eventos,
+            args=(ruta_eventos, job_id, proceso_terminado),
+            daemon=True
+        )
+        eventos_thread.start()
+        
         proceso.wait()
+        proceso_terminado.set()
         lector_thread.join(timeout=5)
+        eventos_thread.join(timeout=5)
         
         exit_code = proceso.returncode
         
-        # Buscar archivos generados
-        archivos_generados = []
-        output_folder = os.path.abspath(CONFIG.OUTPUT_FOLDER)
+        with jobs_lock:
+            procesos.pop(job_id, None)
+            cancelado = jobs[job_id].get("cancelacion_solicitada", False)
         
-        if os.path.exists(output_folder):
-            ahora = datetime.now()
-            for archivo in os.listdir(output_folder):
-                filepath = os.path.join(output_folder, archivo)
-                if os.path.isfile(filepath):
-                    mtime = datetime.fromtimestamp(os.path.getmtime(filepath))
-                    if (ahora - mtime).total_seconds() < 600:
-                        archivos_generados.append(archivo)
+        if cancelado:
+            # El consolidador ya limpió si se detuvo solo; si se mató, quedan restos
+            with jobs_lock:
+                job = jobs[job_id]
+                job["estado"] = "cancelado"
+                job["mensaje"] = "Cancelado por el usuario"
+                job["fin"] = datetime.now().isoformat()
+                job["archivos_generados"] = []
+                restos = {"carpeta_salida": carpeta_salida, "carpeta_trabajo": job.get("carpeta_trabajo"),
+                          "temporales": job.get("temporales", [])}
+                registro = job["logs"]
+            limpiar_restos_job(restos)
+            registro.cerrar()
+            publicar_estado(job_id, fin=True)
+            return
+        
+        # Archivos generados: los del manifiesto de artefactos del job; si no
+        # alcanzó a escribirse, los anunciados con eventos "artifact"
+        archivos_generados = [nombre_publico(ruta) for ruta in rutas_artefactos(carpeta_salida)]
+        with jobs_lock:
+            if not archivos_generados:
+                archivos_generados = list(jobs[job_id]["archivos_generados"])
         
         with jobs_lock:
             if exit_code == 0:
@@ -304,13 +580,15 @@ def ejecutar_consolidador_subproceso(
             jobs[job_id]["fin"] = datetime.now().isoformat()
             jobs[job_id]["archivos_generados"] = archivos_generados
             
-            logs = jobs[job_id]["logs"]
-            jobs[job_id]["estadisticas"] = {
-                "total_logs": len(logs),
-                "errores": len([l for l in logs if l["tipo"] == "error"]),
-                "advertencias": len([l for l in logs if l["tipo"] == "warning"]),
-                "descargas": len([l for l in logs if l["tipo"] == "download"])
-            }
+            registro = jobs[job_id]["logs"]
+            jobs[job_id]["estadisticas"].update({
+                "total_logs": registro.total,
+                "errores": registro.por_tipo.get("error", 0),
+                "advertencias": registro.por_tipo.get("warning", 0)
+            })
+        registro.cerrar()
+        
+        publicar_estado(job_id, fin=True)
         
     except Exception as e:
         import traceback
@@ -321,11 +599,142 @@ def ejecutar_consolidador_subproceso(
             jobs[job_id]["mensaje"] = error_msg
             jobs[job_id]["errores"].append(error_msg)
             jobs[job_id]["fin"] = datetime.now().isoformat()
-            jobs[job_id]["logs"].append({
+        agregar_log(job_id, {
+            "timestamp": datetime.now().strftime("%H:%M:%S"),
+            "tipo": "error",
+            "mensaje": f"Error: {error_msg}"
+        })
+        jobs[job_id]["logs"].cerrar()
+        
+        publicar_estado(job_id, fin=True)
+    
+    finally:
+        with jobs_lock:
+            procesos.pop(job_id, None)
+        for ruta in (ruta_eventos, ruta_cancelacion):
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+
+def copia_persistible(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Información del job que se guarda en la cola (sin el registro de logs)."""
+    return {clave: valor for clave, valor in job.items() if clave != "logs"}
+
+
+def persistir_job(job_id: str):
+    """Guarda en la cola el estado actual del job."""
+    with jobs_lock:
+        if job_id not in jobs:
+            return
+        datos = copia_persistible(jobs[job_id])
+    cola.guardar(job_id, datos["estado"], datos)
+
+
+def actualizar_posiciones_cola():
+    """Pone en el mensaje de cada job pendiente su posición en la cola (con jobs_lock tomado)."""
+    pendientes = sorted(
+        (job for job in jobs.values() if job["estado"] == "pendiente"),
+        key=lambda job: (job.get("prioridad", 0), job["inicio"])
+    )
+    for posicion, job in enumerate(pendientes, 1):
+        job["mensaje"] = f"En cola (posición {posicion} de {len(pendientes)})"
+
+
+def despachar_jobs():
+    """Arranca jobs pendientes mientras haya cupo (MAX_JOBS_CONCURRENTES)."""
+    with despacho_lock:
+        while len(jobs_ejecutando) < max(1, CONFIG.MAX_JOBS_CONCURRENTES):
+            siguiente = cola.tomar_siguiente()
+            if siguiente is None:
+                break
+            job_id, parametros = siguiente
+            
+            with jobs_lock:
+                iniciar = job_id in jobs and jobs[job_id]["estado"] == "pendiente"
+                if iniciar:
+                    jobs[job_id]["estado"] = "en_proceso"
+                    jobs[job_id]["mensaje"] = "Iniciando..."
+            if not iniciar:
+                # Cancelado mientras esperaba: la cola toma el estado en memoria
+                persistir_job(job_id)
+                continue
+            
+            jobs_ejecutando.add(job_id)
+            threading.Thread(
+                target=ejecutar_job_en_cola,
+                args=(job_id, parametros),
+                daemon=True
+            ).start()
+    
+    with jobs_lock:
+        actualizar_posiciones_cola()
+
+
+def ejecutar_job_en_cola(job_id: str, parametros: Dict[str, Any]):
+    """Ejecuta un job tomado de la cola y al terminar libera su cupo."""
+    try:
+        ejecutar_consolidador_subproceso(
+            job_id,
+            parametros["archivo_maestra"],
+            parametros["modo"],
+            parametros.get("año"),
+            parametros.get("numero_contrato")
+        )
+    finally:
+        persistir_job(job_id)
+        with despacho_lock:
+            jobs_ejecutando.discard(job_id)
+        despachar_jobs()
+
+
+def recuperar_jobs():
+    """Carga los jobs de la cola al arrancar; los que estaban en proceso se reencolan.
+
+    Los terminados hace más de DIAS_HISTORIAL_JOBS días se borran de la cola
+    junto con sus logs (sus carpetas de salida quedan huérfanas y las borra
+    limpiar_jobs_terminados).
+    """
+    for job_id in cola.purgar(CONFIG.DIAS_HISTORIAL_JOBS):
+        crear_registro_logs(job_id).eliminar()
+    reencolados = set(cola.reencolar_en_proceso())
+    cancelados = []
+    
+    for job_id, estado, parametros, datos in cola.cargar(CONFIG.DIAS_HISTORIAL_JOBS):
+        job = dict(datos)
+        job["estado"] = estado
+        job["logs"] = crear_registro_logs(job_id)
+        if job_id in reencolados and job.get("cancelacion_solicitada"):
+            # Se estaba cancelando cuando la API se detuvo: no se vuelve a ejecutar
+            job.update({"estado": "cancelado", "mensaje": "Cancelado por el usuario"})
+            job["fin"] = job.get("fin") or datetime.now().isoformat()
+            limpiar_restos_job(job)
+            cancelados.append(job_id)
+        elif job_id in reencolados:
+            job.update({
+                "progreso": 0,
+                "contratos_procesados": 0,
+                "contrato_actual": "",
+                "metricas": None,
+                # Se retoma desde el punto de control del consolidador (si alcanzó a arrancar)
+                "reanudar": job.get("run_id")
+            })
+            job["logs"].agregar({
                 "timestamp": datetime.now().strftime("%H:%M:%S"),
-                "tipo": "error",
-                "mensaje": f"Error: {error_msg}"
+                "tipo": "warning",
+                "mensaje": "La API se reinició con el job en proceso; se vuelve a encolar"
+                           + (" y se retoma desde su último punto de control" if job.get("run_id") else "")
             })
+        with jobs_lock:
+            jobs[job_id] = job
+    
+    for job_id in cancelados:
+        persistir_job(job_id)
+    
+    if len(reencolados) > len(cancelados):
+        print(f"🔁 Jobs reencolados tras el reinicio: {len(reencolados) - len(cancelados)}")
+    despachar_jobs()
 
 
 @router.post("/procesar")
@@ -371,8 +780,9 @@ async def iniciar_procesamiento(request: ProcesamientoRequest):
             "job_id": job_id,
             "estado": "pendiente",
             "progreso": 0,
-            "mensaje": "Iniciando...",
+            "mensaje": "En cola",
             "modo": modo,
+            "prioridad": PRIORIDAD_MODO.get(modo, 0),
             "año": año,
             "numero_contrato": numero,
             "contratos_total": len(contratos),
@@ -382,22 +792,30 @@ async def iniciar_procesamiento(request: ProcesamientoRequest):
             "fin": None,
             "archivos_generados": [],
             "errores": [],
-            "logs": [],
-            "estadisticas": {}
+            "logs": crear_registro_logs(job_id),
+            "estadisticas": {},
+            "metricas": None
         }
+        datos = copia_persistible(jobs[job_id])
     
-    thread = threading.Thread(
-        target=ejecutar_consolidador_subproceso,
-        args=(job_id, ruta_absoluta, modo, año, numero)
-    )
-    thread.daemon = True
-    thread.start()
+    cola.encolar(job_id, {
+        "archivo_maestra": ruta_absoluta,
+        "modo": modo,
+        "año": año,
+        "numero_contrato": numero
+    }, datos)
+    despachar_jobs()
+    
+    with jobs_lock:
+        estado = jobs[job_id]["estado"]
+        mensaje = jobs[job_id]["mensaje"]
     
     return JSONResponse(content={
         "success": True,
         "job_id": job_id,
         "modo": modo,
-        "mensaje": f"Procesamiento iniciado para {len(contratos)} contratos",
+        "estado": estado,
+        "mensaje": f"Procesamiento iniciado para {len(contratos)} contratos" if estado != "pendiente" else mensaje,
         "contratos_estimados": len(contratos)
     })
 
@@ -410,47 +828,74 @@ async def get_estado_job(job_id: str):
             raise HTTPException(status_code=404, detail="Job no encontrado")
         
         job = jobs[job_id].copy()
-        job["total_logs"] = len(job["logs"])
-        del job["logs"]
+        job["total_logs"] = job.pop("logs").total
         
         return JSONResponse(content=job)
 
 
 @router.get("/procesar/logs/{job_id}")
-async def get_logs_job(job_id: str, desde: int = 0):
-    """Obtiene los logs de un job desde un índice específico."""
+async def get_logs_job(job_id: str, desde: int = 0, limite: int = LIMITE_LOGS_PAGINA):
+    """Obtiene los logs de un job desde un índice específico (paginados)."""
     with jobs_lock:
         if job_id not in jobs:
             raise HTTPException(status_code=404, detail="Job no encontrado")
         
         job = jobs[job_id]
-        logs = job["logs"][desde:]
-        
-        return JSONResponse(content={
+        registro = job["logs"]
+        respuesta = {
             "success": True,
             "job_id": job_id,
             "estado": job["estado"],
             "progreso": job["progreso"],
             "mensaje": job["mensaje"],
             "contrato_actual": job.get("contrato_actual", ""),
-            "total_logs": len(job["logs"]),
-            "logs": logs,
-            "archivos_generados": job.get("archivos_generados", [])
-        })
+            "metricas": job.get("metricas"),
+            "total_logs": registro.total,
+            "archivos_generados": list(job.get("archivos_generados", []))
+        }
+    
+    # Los logs viejos se leen del disco, fuera del lock
+    respuesta["logs"] = registro.leer(desde, min(max(limite, 0), LIMITE_LOGS_PAGINA))
+    return JSONResponse(content=respuesta)
 
 
 @router.delete("/procesar/cancelar/{job_id}")
 async def cancelar_job(job_id: str):
-    """Cancela un job en ejecución."""
+    """Cancela un job en cola o en ejecución.
+    
+    Un job en cola se cancela de inmediato. A uno en ejecución se le pide
+    detenerse (archivo CONSOLIDADOR_CANCELAR): pasa a "cancelado" cuando el
+    consolidador termina de liberar sus recursos.
+    """
     with jobs_lock:
         if job_id not in jobs:
             raise HTTPException(status_code=404, detail="Job no encontrado")
         
-        jobs[job_id]["estado"] = "cancelado"
-        jobs[job_id]["mensaje"] = "Cancelado por el usuario"
-        jobs[job_id]["fin"] = datetime.now().isoformat()
+        job = jobs[job_id]
+        if job["estado"] in ["completado", "error", "cancelado"]:
+            return JSONResponse(content={"success": False, "mensaje": f"El job ya terminó ({job['estado']})"})
         
-        return JSONResponse(content={"success": True, "mensaje": "Job cancelado"})
+        en_cola = job["estado"] == "pendiente"
+        if en_cola:
+            job["estado"] = "cancelado"
+            job["mensaje"] = "Cancelado por el usuario"
+            job["fin"] = datetime.now().isoformat()
+            actualizar_posiciones_cola()
+        else:
+            job["cancelacion_solicitada"] = True
+            job["mensaje"] = "Cancelando: se detiene al terminar el archivo actual..."
+    
+    if not en_cola:
+        with open(ruta_cancelacion_job(job_id), "w"):
+            pass
+        threading.Thread(target=vigilar_cancelacion, args=(job_id,), daemon=True).start()
+    
+    persistir_job(job_id)
+    publicar_estado(job_id, fin=en_cola)
+    return JSONResponse(content={
+        "success": True,
+        "mensaje": "Job cancelado" if en_cola else "Cancelación solicitada"
+    })
 
 
 @router.get("/procesar/historial")
@@ -487,7 +932,8 @@ async def get_archivos_job(job_id: str):
             filepath = os.path.join(CONFIG.OUTPUT_FOLDER, archivo)
             if os.path.exists(filepath):
                 archivos_info.append({
-                    "nombre": archivo,
+                    "nombre": os.path.basename(archivo),
+                    "ruta": archivo,
                     "tamaño": os.path.getsize(filepath),
                     "ruta_descarga": f"/api/descargas/archivo/{archivo}"
                 })
@@ -4,6 +4,10 @@ API SFTP - Consolidador T25
 
 Endpoints para conectar, navegar y descargar del servidor SFTP de GoAnywhere.
 Incluye navegación completa por carpetas y descarga de archivos.
+
+🆕 v15.4: Los endpoints que hablan con el SFTP son funciones normales (no
+async): FastAPI los corre en su pool de hilos y cada uno toma su propio canal
+del pool de sesiones, así varias peticiones avanzan a la vez.
 """
 
 from fastapi import APIRouter, HTTPException, Query
@@ -18,7 +22,7 @@ router = APIRouter()
 
 
 @router.get("/sftp/conectar")
-async def conectar_sftp():
+def conectar_sftp():
     """Establece conexión con el servidor SFTP de GoAnywhere."""
     try:
         exito = sftp_client.conectar()
@@ -42,7 +46,7 @@ async def conectar_sftp():
 
 
 @router.get("/sftp/desconectar")
-async def desconectar_sftp():
+def desconectar_sftp():
     """Cierra la conexión SFTP."""
     try:
         sftp_client.desconectar()
@@ -58,24 +62,49 @@ async def desconectar_sftp():
 
 
 @router.get("/sftp/estado")
-async def estado_conexion():
+def estado_conexion():
     """Verifica el estado de la conexión SFTP."""
     conectado = sftp_client.esta_conectado()
     
     return JSONResponse(content={
         "conectado": conectado,
-        "servidor": f"{CONFIG.HOST}:{CONFIG.PORT}" if conectado else None
+        "servidor": f"{CONFIG.HOST}:{CONFIG.PORT}" if conectado else None,
+        "cache": sftp_client.cache.estadisticas,
+        "pool": sftp_client.pool.estadisticas,
+        "transferencias": sftp_client.transferencias.instantanea()
+    })
+
+
+@router.post("/sftp/cache/invalidar")
+async def invalidar_cache(ruta: Optional[str] = Query(default=None, description="Ruta a invalidar (vacío = toda la caché)")):
+    """Invalida los listados cacheados de una ruta (y sus subcarpetas) o de todo el SFTP."""
+    from app.services.cache_directorios import ruta_absoluta
+    
+    if ruta:
+        ruta_abs = ruta_absoluta(ruta)
+        sftp_client.cache.invalidar(ruta_abs, recursivo=True)
+    else:
+        ruta_abs = None
+        sftp_client.cache.invalidar()
+    
+    return JSONResponse(content={
+        "success": True,
+        "ruta": ruta_abs,
+        "cache": sftp_client.cache.estadisticas
     })
 
 
 @router.get("/sftp/listar")
-async def listar_directorio(ruta: str = Query(default=".", description="Ruta del directorio")):
+def listar_directorio(
+    ruta: str = Query(default=".", description="Ruta del directorio"),
+    refrescar: bool = Query(default=False, description="Ignorar la caché y consultar el servidor")
+):
     """Lista el contenido de un directorio en el SFTP."""
     try:
         if not sftp_client.esta_conectado():
             sftp_client.conectar()
         
-        items = sftp_client.listar_directorio(ruta)
+        items = sftp_client.listar_directorio(ruta, usar_cache=not refrescar)
         
         return JSONResponse(content={
             "success": True,
@@ -101,7 +130,7 @@ async def listar_directorio(ruta: str = Query(default=".", description="Ruta del
 
 
 @router.get("/sftp/navegar")
-async def navegar_directorio(ruta: str = Query(..., description="Ruta del directorio a navegar")):
+def navegar_directorio(ruta: str = Query(..., description="Ruta del directorio a navegar")):
     """
     Navega a un directorio específico y lista su contenido.
     Devuelve también la ruta padre para navegación hacia atrás.
@@ -160,7 +189,7 @@ async def navegar_directorio(ruta: str = Query(..., description="Ruta del direct
 
 
 @router.get("/sftp/carpeta-principal")
-async def listar_carpeta_principal():
+def listar_carpeta_principal():
     """Lista el contenido de la carpeta principal de contratos."""
     try:
         if not sftp_client.esta_conectado():
@@ -192,7 +221,7 @@ async def listar_carpeta_principal():
 
 
 @router.get("/sftp/buscar-contrato")
-async def buscar_contrato(
+def buscar_contrato(
     numero: str = Query(..., description="Número del contrato (ej: 45, 662, 946)"),
     año: str = Query(..., description="Año del contrato (ej: 2024, 2025)")
 ):
@@ -328,7 +357,7 @@ async def buscar_contrato(
 
 
 @router.get("/sftp/descargar")
-async def descargar_archivo_sftp(ruta: str = Query(..., description="Ruta del archivo a descargar")):
+def descargar_archivo_sftp(ruta: str = Query(..., description="Ruta del archivo a descargar")):
     """
     Descarga un archivo del servidor SFTP.
     El archivo se descarga temporalmente al servidor y se envía al cliente.
@@ -382,7 +411,7 @@ async def descargar_archivo_sftp(ruta: str = Query(..., description="Ruta del ar
 
 
 @router.get("/sftp/años-disponibles")
-async def obtener_años_disponibles():
+def obtener_años_disponibles():
     """Obtiene los años de contratos disponibles en el SFTP."""
     try:
         if not sftp_client.esta_conectado():
@@ -154,6 +154,10 @@ async def upload_maestra(file: UploadFile = File(...)):
         if guardar_estado():
             print(f"✅ Maestra guardada y persistida: {filepath}")
         
+        # Dejar la nueva maestra cargada en el servicio del consolidador
+        from app.api.process import precargar_servicio
+        precargar_servicio(filepath)
+        
         return JSONResponse(content={
             "success": True,
             "filename": filename,
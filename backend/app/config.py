@@ -32,11 +32,49 @@ class Config:
     BACKOFF_BASE: float = float(os.getenv('BACKOFF_BASE', 2.0))
     KEEPALIVE_INTERVAL: int = int(os.getenv('KEEPALIVE_INTERVAL', 5))
     
+    # Caché de listados SFTP (segundos; 0 desactiva)
+    SFTP_CACHE_TTL: int = int(os.getenv('SFTP_CACHE_TTL', 300))
+
+    # Transferencias SFTP (ver app/services/transferencias_sftp.py): ventana y paquete del
+    # canal en KB y lecturas adelantadas en vuelo por descarga
+    SFTP_VENTANA_KB: int = int(os.getenv('SFTP_VENTANA_KB', 16384))
+    SFTP_PAQUETE_KB: int = int(os.getenv('SFTP_PAQUETE_KB', 32))
+    SFTP_LECTURAS_PENDIENTES: int = int(os.getenv('SFTP_LECTURAS_PENDIENTES', 128))
+
+    # Pool de sesiones SFTP de la API (ver app/services/pool_sftp.py): conexiones SSH
+    # simultáneas al servidor, canales por conexión y segundos sin uso antes de cerrarlos
+    SFTP_MAX_CONEXIONES: int = int(os.getenv('SFTP_MAX_CONEXIONES', 2))
+    SFTP_CANALES_POR_CONEXION: int = int(os.getenv('SFTP_CANALES_POR_CONEXION', 4))
+    SFTP_INACTIVIDAD_S: int = int(os.getenv('SFTP_INACTIVIDAD_S', 300))
+    # Segundos sin operaciones exitosas tras los que un canal se sondea antes de usarlo
+    SFTP_SONDEO_S: int = int(os.getenv('SFTP_SONDEO_S', 30))
+    
     # Carpetas
     CARPETA_PRINCIPAL: str = os.getenv('CARPETA_PRINCIPAL', 'R.A-ABASTECIMIENTO RED ASISTENCIAL')
     UPLOAD_FOLDER: str = os.getenv('UPLOAD_FOLDER', 'uploads')
     OUTPUT_FOLDER: str = os.getenv('OUTPUT_FOLDER', 'outputs')
     
+    # Procesamiento
+    CONSOLIDADOR_WORKERS: int = int(os.getenv('CONSOLIDADOR_WORKERS', 1))
+    CONSOLIDADOR_INCREMENTAL: bool = os.getenv('CONSOLIDADOR_INCREMENTAL', 'True').lower() not in ('false', '0', 'no')
+    # Nivel mínimo del log del consolidador que la API muestra (DEBUG, INFO, WARNING, ERROR)
+    CONSOLIDADOR_LOG_NIVEL: str = os.getenv('CONSOLIDADOR_LOG_NIVEL', 'INFO')
+    # Servicio pre-calentado (fork por trabajo); si no está disponible se lanza un subproceso
+    CONSOLIDADOR_SERVICIO: bool = os.getenv('CONSOLIDADOR_SERVICIO', 'True').lower() not in ('false', '0', 'no')
+    # Segundos que un job espera a que el servicio termine de precargar antes de ir a subproceso
+    CONSOLIDADOR_SERVICIO_ESPERA: float = float(os.getenv('CONSOLIDADOR_SERVICIO_ESPERA', 30))
+    # Jobs que se ejecutan a la vez, cada uno en OUTPUT_FOLDER/jobs/<job_id>; el resto espera en
+    # la cola (OUTPUT_FOLDER/.cache/jobs.db)
+    MAX_JOBS_CONCURRENTES: int = int(os.getenv('MAX_JOBS_CONCURRENTES', 1))
+    # Segundos que un job cancelado tiene para detenerse solo antes de matarlo
+    TIMEOUT_CANCELACION: int = int(os.getenv('TIMEOUT_CANCELACION', 60))
+    # Días que un job terminado se conserva en el historial (y en jobs.db); 0 = sin límite
+    DIAS_HISTORIAL_JOBS: float = float(os.getenv('DIAS_HISTORIAL_JOBS', 30))
+    # Logs por job: últimos N en memoria, el resto en disco (OUTPUT_FOLDER/.logs) por segmentos
+    # (un registro ya escrito conserva el por_segmento guardado en su registro.json)
+    LOGS_EN_MEMORIA: int = int(os.getenv('LOGS_EN_MEMORIA', 2000))
+    LOGS_POR_SEGMENTO: int = int(os.getenv('LOGS_POR_SEGMENTO', 50000))
+    
     # Otros
     MAX_SEDES: int = int(os.getenv('MAX_SEDES', 50))
     DEBUG: bool = os.getenv('DEBUG', 'True').lower() == 'true'
@@ -2,11 +2,11 @@
 import sys
 import os
 
-# Agregamos el directorio actual al path para importar el módulo
-sys.path.append(os.getcwd())
+# Agregamos la raíz del backend al path para importar la librería del consolidador
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')))
 
-# Importamos las funciones necesarias del script principal
-from consolidador_t25_parametrizado import es_archivo_tarifas_valido, validar_cups, es_telefono_celular, es_telefono_celular_colombiano
+# Importamos las funciones necesarias de la librería del consolidador
+from app.core.t25.validacion import es_archivo_tarifas_valido, validar_cups, es_telefono_celular, es_telefono_celular_colombiano
 
 def test_nombres_archivos():
     print("\n--- TEST VALIDACIÓN NOMBRES DE ARCHIVO ---")
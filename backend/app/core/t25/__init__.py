@@ -0,0 +1,47 @@
+"""
+Consolidador T25
+================
+
+Librería del consolidador de tarifas T25 (POSITIVA). Importarla no tiene
+efectos: no lee variables de entorno, no cambia el directorio de trabajo ni
+se conecta al SFTP.
+
+    from app.core.t25 import JobParams, run_job
+
+    resultado = run_job(JobParams(maestra='maestra.xlsx', modo='POR_ANO', ano='2024'))
+
+Los scripts consolidador_t25_parametrizado.py (API, parámetros por variables
+de entorno) y consolidador_t25_local.py (interactivo) son puntos de entrada
+sobre esta librería.
+"""
+
+from .buscador import BuscadorAnexos
+from .cancelacion import Cancelacion, TrabajoCancelado
+from .config import Alerta, ArchivoAnexo, Config, OrigenTarifa, TipoAlerta
+from .job import JobParams, JobResult, precargar, run_job
+from .logger import Logger, LogLevel
+from .maestra import Maestra, MaestraIndex, cargar_maestra
+from .procesador import ProcesadorAnexo
+from .sftp import SFTPClient
+
+__all__ = [
+    'Alerta',
+    'ArchivoAnexo',
+    'BuscadorAnexos',
+    'Cancelacion',
+    'Config',
+    'JobParams',
+    'JobResult',
+    'LogLevel',
+    'Logger',
+    'Maestra',
+    'MaestraIndex',
+    'OrigenTarifa',
+    'ProcesadorAnexo',
+    'SFTPClient',
+    'TipoAlerta',
+    'TrabajoCancelado',
+    'cargar_maestra',
+    'precargar',
+    'run_job',
+]
@@ -0,0 +1,511 @@
+"""
+Buscador de anexos
+==================
+
+Navega la carpeta del contrato en GoAnywhere (con la búsqueda con cero
+inicial de v14.1), selecciona los ANEXO 1 de tarifas inicial, otrosíes y
+actas, y los descarga; las alertas de contrato o carpeta faltante quedan en
+BuscadorAnexos.alertas.
+"""
+
+import os
+import posixpath
+import re
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from .cancelacion import Cancelacion
+from .config import Alerta, ArchivoAnexo, Config, OrigenTarifa, TipoAlerta
+from .logger import Logger
+from .sftp import SFTPClient
+from .utilidades import es_extension_excel
+from .validacion import clasificar_tipo_archivo, contiene_anexo1
+
+class BuscadorAnexos:
+    """🆕 v14.1: Buscador de anexos con búsqueda mejorada."""
+
+    def __init__(self, cliente: SFTPClient, config: Config, logger: Logger):
+        self.cliente = cliente
+        self.config = config
+        self.log = logger
+        self.alertas: List[Alerta] = []
+        self._contrato_actual = ""
+
+    def limpiar_alertas(self):
+        self.alertas = []
+
+    def set_contrato(self, contrato: str):
+        self._contrato_actual = contrato
+
+    def agregar_alerta(self, tipo: TipoAlerta, mensaje: str, archivo: str = ""):
+        self.alertas.append(Alerta(
+            tipo=tipo,
+            mensaje=mensaje,
+            contrato=self._contrato_actual,
+            archivo=archivo
+        ))
+        self.log.alert(tipo.value, mensaje, archivo)
+
+    def extraer_numero_otrosi(self, nombre: str) -> Optional[int]:
+        """🆕 v15.0: Extrae número de otrosí con patrones expandidos."""
+        if not nombre:
+            return None
+        nombre_upper = nombre.upper()
+
+        # Patrones expandidos v15.0
+        patrones = [
+            r'OTRO\s*S[IÍ]\s*[_#\-\s]*N?[OÚº°]?\.?\s*(\d+)',
+            r'OTROS[IÍ]\s*[_#\-\s]*(\d+)',
+            r'OTRO[\s_\-]?SI[\s_\-#]*(\d+)',
+            r'OT\s*[_\-\s]?\s*(\d+)',
+            r'ADICI[OÓ]N\s*[_#\-\s]*N?[OÚº°]?\.?\s*(\d+)',
+            r'MODIFICA(?:CI[OÓ]N)?\s*[_#\-\s]*(\d+)',
+        ]
+
+        for patron in patrones:
+            match = re.search(patron, nombre_upper)
+            if match:
+                try:
+                    return int(match.group(1))
+                except (ValueError, IndexError):
+                    continue
+        return None
+
+    def extraer_numero_acta(self, nombre: str, nombre_carpeta: str = None) -> Optional[int]:
+        """🆕 v14.1: Extrae número de acta del nombre o carpeta."""
+        if not nombre:
+            nombre = ""
+
+        nombre_upper = nombre.upper()
+
+        patrones = [
+            r'ACTA\s*(?:DE\s*)?(?:NEGOCIACI[OÓ]N\s*)?(?:N[OÚº°]?\.?\s*)?#?\s*(\d+)',
+            r'ACT[_\-\s]?(\d+)',
+            r'\bAN\s*[_\-]?\s*(\d+)',
+            r'ACTA\s*#?\s*(\d+)',
+            r'ACTA\s*N[OÚº°]?\s*(\d+)',
+        ]
+
+        for patron in patrones:
+            match = re.search(patron, nombre_upper)
+            if match:
+                return int(match.group(1))
+
+        if nombre_carpeta:
+            carpeta_upper = nombre_carpeta.upper()
+            for patron in patrones:
+                match = re.search(patron, carpeta_upper)
+                if match:
+                    return int(match.group(1))
+
+        return None
+
+    def buscar_carpeta(self, carpetas: List[str], texto: str) -> Optional[str]:
+        texto_l = texto.lower()
+        for c in carpetas:
+            if c.lower() == texto_l: return c
+        for c in carpetas:
+            if texto_l in c.lower(): return c
+        return None
+
+    def buscar_carpeta_contrato(self, carpetas: List[str], numero: str, nombre_proveedor: str = None,
+                                indice: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """🆕 v14.1: Búsqueda mejorada con cero inicial.
+
+        🆕 v15.4: Con `indice` (numero -> carpeta de CacheDirectorios) cada
+        variante es una búsqueda en diccionario.
+        """
+        num = ''.join(filter(str.isdigit, str(numero)))
+
+        variantes = [
+            num,
+            num.zfill(4),
+            num.zfill(3),
+            num.zfill(5),
+            num.lstrip('0') or '0',
+            '0' + num,
+        ]
+
+        variantes_unicas = list(dict.fromkeys(variantes))
+
+        self.log.debug(f"Buscando contrato con variantes: {variantes_unicas}")
+
+        if indice is not None:
+            # El índice guarda el primer segmento del nombre; cubre también la
+            # búsqueda por prefijo 'variante-', 'variante_' y 'variante '
+            for variante in variantes_unicas:
+                carpeta = indice.get(variante)
+                if carpeta:
+                    self.log.debug(f"Encontrado con variante '{variante}': {carpeta}")
+                    return carpeta
+        else:
+            for variante in variantes_unicas:
+                for carpeta in carpetas:
+                    partes = re.split(r'[\s\-_]', carpeta)
+                    if partes and partes[0] == variante:
+                        self.log.debug(f"Encontrado con variante '{variante}': {carpeta}")
+                        return carpeta
+
+            for variante in variantes_unicas:
+                for carpeta in carpetas:
+                    if carpeta.startswith(variante + '-') or carpeta.startswith(variante + '_') or carpeta.startswith(variante + ' '):
+                        self.log.debug(f"Encontrado por prefijo '{variante}': {carpeta}")
+                        return carpeta
+
+        if nombre_proveedor:
+            nombre_limpio = nombre_proveedor.upper().strip()
+            for carpeta in carpetas:
+                if nombre_limpio in carpeta.upper():
+                    self.log.debug(f"Encontrado por nombre proveedor: {carpeta}")
+                    return carpeta
+
+        return None
+
+    def navegar_a_contrato(self, ano: str, numero: str, nombre_proveedor: str = None) -> Tuple[bool, str, Optional[str]]:
+        """🆕 v14.1: Navega con búsqueda mejorada.
+
+        🆕 v15.4: Resuelve la ruta con listados absolutos cacheados (raíz,
+        carpeta principal, carpeta del año) y un índice numero -> carpeta,
+        sin hacer cd en cada nivel. Retorna la ruta absoluta del contrato.
+        """
+        try:
+            self.log.info("Navegando a contrato...")
+            self.log.indent()
+
+            cache = self.cliente.cache
+
+            items = self.cliente.listar('/')
+            carpetas = [i['nombre'] for i in items if i['es_directorio']]
+
+            cp = self.buscar_carpeta(carpetas, self.config.CARPETA_PRINCIPAL)
+            if not cp:
+                self.log.error("No encontrada", "carpeta principal")
+                self.log.dedent()
+                return False, "Sin carpeta principal", None
+
+            items = self.cliente.listar(f"/{cp}")
+            carpetas = [i['nombre'] for i in items if i['es_directorio']]
+            ca = self.buscar_carpeta(carpetas, f'contratos {ano}')
+            if not ca:
+                self.log.error("No encontrada", f"carpeta año {ano}")
+                self.log.dedent()
+                return False, f"Sin año {ano}", None
+
+            ruta_ano = f"/{cp}/{ca}"
+            items = self.cliente.listar(ruta_ano)
+            carpetas = [i['nombre'] for i in items if i['es_directorio']]
+            indice = cache.indice_carpetas(ruta_ano, carpetas)
+
+            cc = self.buscar_carpeta_contrato(carpetas, numero, nombre_proveedor, indice)
+
+            if not cc and cache.habilitada:
+                # Puede ser una carpeta creada después de cachear el listado del año
+                items = self.cliente.listar(ruta_ano, usar_cache=False)
+                carpetas = [i['nombre'] for i in items if i['es_directorio']]
+                indice = cache.indice_carpetas(ruta_ano, carpetas)
+                cc = self.buscar_carpeta_contrato(carpetas, numero, nombre_proveedor, indice)
+
+            if not cc:
+                self.log.error("No encontrada", f"carpeta contrato {numero}")
+                self.log.warning("🆕 Variantes buscadas", f"{numero}, 0{numero}, {numero.zfill(4)}")
+                self.log.nav_tree(carpetas[:10], "carpetas")
+
+                self.agregar_alerta(
+                    TipoAlerta.CONTRATO_NO_ENCONTRADO_GO,
+                    f"CONTRATO NO SE ENCUENTRA EN EL GO ANYWHERE. Buscado: {numero}, 0{numero}, {numero.zfill(4)}"
+                )
+
+                self.log.dedent()
+                return False, f"CONTRATO NO SE ENCUENTRA EN EL GO ANYWHERE", None
+
+            ruta_contrato = f"{ruta_ano}/{cc}"
+            self.log.nav(ruta_contrato)
+            self.log.success("Contrato encontrado", cc)
+            self.log.dedent()
+
+            return True, "OK", ruta_contrato
+
+        except Exception as e:
+            self.log.error("Error de navegación", str(e)[:40])
+            self.log.dedent()
+            return False, str(e)[:40], None
+
+    def descargar_anexos(self, carpeta_destino: str, id_contrato: str, ruta_contrato: Optional[str] = None) -> Dict:
+        """Descarga ANEXO 1 con logging detallado.
+
+        🆕 v15.4: Trabaja con rutas absolutas bajo `ruta_contrato` (la que
+        retorna navegar_a_contrato) en lugar de hacer cd en cada carpeta.
+        Equivale a seleccionar_anexos() + descargar_seleccion().
+        """
+        seleccion = self.seleccionar_anexos(id_contrato, ruta_contrato)
+        if not seleccion['exito']:
+            return seleccion
+        return self.descargar_seleccion(seleccion, carpeta_destino)
+
+    def seleccionar_anexos(self, id_contrato: str, ruta_contrato: Optional[str] = None) -> Dict:
+        """🆕 v15.4: Decide qué ANEXO 1 / actas procesar SIN descargarlos.
+
+        Los ArchivoAnexo retornados traen ruta_remota, tamano y
+        fecha_modificacion (lo que compara el manifiesto incremental) y
+        ruta_local vacía hasta que descargar_seleccion() los baja.
+        """
+        resultado = {
+            'exito': False,
+            'archivos': [],
+            'mensaje': '',
+            'actas_encontradas': [],
+            'otrosis_encontrados': [],
+            'ruta_contrato': ruta_contrato
+        }
+
+        try:
+            self.log.info("Buscando archivos ANEXO 1...")
+            self.log.indent()
+
+            if ruta_contrato is None:
+                ruta_contrato = self.cliente.path_actual
+                resultado['ruta_contrato'] = ruta_contrato
+
+            items = self.cliente.listar(ruta_contrato)
+            carpetas = [i['nombre'] for i in items if i['es_directorio']]
+            archivos = [i['nombre'] for i in items if not i['es_directorio']]
+
+            self.log.debug(f"Contenido: {len(carpetas)} carpetas, {len(archivos)} archivos")
+
+            carpeta_tarifas = None
+            for c in carpetas:
+                if 'tarifa' in c.lower():
+                    carpeta_tarifas = c
+                    break
+
+            if not carpeta_tarifas:
+                self.log.error("Carpeta TARIFAS no encontrada")
+                self.log.nav_tree(carpetas, "carpetas")
+                self.agregar_alerta(TipoAlerta.SIN_CARPETA_TARIFAS, "No existe carpeta TARIFAS")
+                self.log.dedent()
+                resultado['mensaje'] = "Sin TARIFAS"
+                return resultado
+
+            ruta_tarifas = f"{ruta_contrato.rstrip('/')}/{carpeta_tarifas}"
+            items_tarifas = self.cliente.listar(ruta_tarifas)
+
+            archivos_excel = [i for i in items_tarifas if not i['es_directorio'] and es_extension_excel(i['nombre'])]
+            subcarpetas = [i for i in items_tarifas if i['es_directorio']]
+
+            self.log.info(f"En TARIFAS: {len(archivos_excel)} Excel, {len(subcarpetas)} subcarpetas")
+
+            anexos_iniciales = []
+            anexos_otrosi = []
+            archivos_ignorados = []
+
+            # 🆕 v15.0: Usar clasificar_tipo_archivo para mejor detección
+            for item in archivos_excel:
+                nombre = item['nombre']
+
+                # Clasificar el archivo
+                info = clasificar_tipo_archivo(nombre)
+
+                if not info['es_valido']:
+                    archivos_ignorados.append((nombre, info.get('motivo_exclusion', 'N/A')))
+                    self.log.debug(f"Archivo ignorado: {nombre} ({info.get('motivo_exclusion', 'N/A')})")
+                    continue
+
+                self.log.debug(f"✓ Archivo válido: {nombre} → tipo={info['tipo']}")
+
+                num_otrosi = self.extraer_numero_otrosi(nombre)
+                if num_otrosi:
+                    anexos_otrosi.append({'item': item, 'numero': num_otrosi, 'tipo': info['tipo']})
+                    self.log.file_found(nombre, f"Otrosí {num_otrosi} ({info['tipo']})")
+                else:
+                    anexos_iniciales.append({'item': item, 'tipo': info['tipo']})
+                    self.log.file_found(nombre, f"Inicial ({info['tipo']})")
+
+            if archivos_ignorados and len(archivos_ignorados) <= 5:
+                for nombre_ign, motivo in archivos_ignorados:
+                    self.log.debug(f"  ↳ Ignorado: {nombre_ign[:40]}... - {motivo}")
+
+            resultado['otrosis_encontrados'] = [a['numero'] for a in anexos_otrosi]
+
+            archivo_principal = None
+            origen_principal = None
+            numero_principal = None
+            fecha_referencia = None
+
+            if anexos_otrosi:
+                anexos_otrosi.sort(key=lambda x: x['numero'], reverse=True)
+                archivo_principal = anexos_otrosi[0]['item']
+                numero_principal = anexos_otrosi[0]['numero']
+                origen_principal = OrigenTarifa.OTROSI
+                self.log.info(f"Seleccionado: Otrosí {numero_principal} (mayor)")
+            elif anexos_iniciales:
+                archivo_principal = anexos_iniciales[0]['item']
+                origen_principal = OrigenTarifa.INICIAL
+                self.log.info("Seleccionado: Anexo inicial")
+            else:
+                self.log.warning("No hay ANEXO 1 ni TARIFAS en carpeta")
+                msg_extra = ""
+                if archivos_ignorados:
+                    nombres_ignorados = [n for n, m in archivos_ignorados[:3]]
+                    msg_extra = f" | Archivos ignorados: {', '.join(nombres_ignorados)}"
+                self.agregar_alerta(TipoAlerta.SIN_ANEXO1, f"No hay anexo 1, otrosí ni archivo TARIFAS válido{msg_extra}")
+                resultado['mensaje'] = "Sin ANEXO 1"
+
+            if archivo_principal:
+                fecha_referencia = archivo_principal.get('fecha_modificacion')
+                resultado['archivos'].append(ArchivoAnexo(
+                    nombre=archivo_principal['nombre'],
+                    ruta_local='',
+                    origen=origen_principal,
+                    numero=numero_principal,
+                    fecha_modificacion=fecha_referencia,
+                    origen_completo=f"/{carpeta_tarifas}/{archivo_principal['nombre']}",
+                    ruta_remota=f"{ruta_tarifas}/{archivo_principal['nombre']}",
+                    tamano=archivo_principal.get('tamano')
+                ))
+
+            carpetas_actas = [item for item in subcarpetas if 'acta' in item['nombre'].lower()]
+
+            if carpetas_actas:
+                self.log.info(f"Buscando en {len(carpetas_actas)} carpeta(s) de actas...")
+
+            todas_las_actas = []
+
+            for carpeta_acta in carpetas_actas:
+                try:
+                    ruta_actas = f"{ruta_tarifas}/{carpeta_acta['nombre']}"
+                    self.log.debug(f"Entrando a: {carpeta_acta['nombre']}")
+
+                    items_actas = self.cliente.listar(ruta_actas)
+                    actas_excel = [i for i in items_actas if not i['es_directorio'] and es_extension_excel(i['nombre'])]
+                    actas_en_carpeta = []
+
+                    for ia in actas_excel:
+                        if not contiene_anexo1(ia['nombre']):
+                            continue
+
+                        num_acta = self.extraer_numero_acta(ia['nombre'], carpeta_acta['nombre'])
+                        fecha_acta = ia.get('fecha_modificacion')
+
+                        descargar = False
+                        if not archivo_principal:
+                            descargar = True
+                        elif fecha_referencia and fecha_acta and fecha_acta > fecha_referencia:
+                            descargar = True
+
+                        if descargar:
+                            nombre_local = f"ACTA_{carpeta_acta['nombre']}_{ia['nombre']}"
+                            nombre_local = re.sub(r'[<>:"/\\|?*]', '_', nombre_local)
+                            self.log.file_found(ia['nombre'], f"Acta {num_acta or '?'}")
+
+                            resultado['archivos'].append(ArchivoAnexo(
+                                nombre=nombre_local,
+                                ruta_local='',
+                                origen=OrigenTarifa.ACTA,
+                                numero=num_acta,
+                                fecha_modificacion=fecha_acta,
+                                origen_completo=f"/{carpeta_tarifas}/{carpeta_acta['nombre']}/{ia['nombre']}",
+                                ruta_remota=f"{ruta_actas}/{ia['nombre']}",
+                                tamano=ia.get('tamano')
+                            ))
+
+                        if num_acta:
+                            actas_en_carpeta.append(num_acta)
+                            todas_las_actas.append(num_acta)
+
+                    if not actas_en_carpeta and actas_excel:
+                        self.log.warning(f"Carpeta '{carpeta_acta['nombre']}' sin ANEXO 1")
+                        self.agregar_alerta(
+                            TipoAlerta.CARPETA_ACTAS_SIN_ANEXO,
+                            f"Carpeta sin anexo 1",
+                            carpeta_acta['nombre']
+                        )
+
+                except Exception as e_acta:
+                    self.log.error(f"Error en carpeta actas", str(e_acta)[:30])
+                    self.agregar_alerta(
+                        TipoAlerta.ERROR_PROCESAMIENTO,
+                        f"Error procesando: {str(e_acta)[:30]}",
+                        carpeta_acta['nombre']
+                    )
+
+            resultado['actas_encontradas'] = sorted(set(todas_las_actas))
+
+            if todas_las_actas:
+                max_acta = max(todas_las_actas)
+                faltantes = [i for i in range(1, max_acta + 1) if i not in todas_las_actas]
+                for f in faltantes:
+                    self.log.warning(f"Acta {f} faltante en secuencia")
+                    self.agregar_alerta(TipoAlerta.ACTA_FALTANTE, f"Falta anexo 1 del acta {f}")
+
+            if resultado['archivos']:
+                resultado['exito'] = True
+                resultado['mensaje'] = f"{len(resultado['archivos'])} archivo(s)"
+                self.log.success(f"Total archivos a procesar: {len(resultado['archivos'])}")
+
+            self.log.dedent()
+            return resultado
+
+        except Exception as e:
+            # El listado cacheado puede estar desactualizado: forzar relectura
+            if ruta_contrato:
+                self.cliente.cache.invalidar(ruta_contrato, recursivo=True)
+            self.log.error("Error en descarga", str(e)[:40])
+            self.agregar_alerta(TipoAlerta.ERROR_PROCESAMIENTO, str(e)[:50])
+            self.log.dedent()
+            resultado['mensaje'] = str(e)[:40]
+            return resultado
+
+    def descargar_seleccion(self, seleccion: Dict, carpeta_destino: str,
+                            cancelacion: Optional[Cancelacion] = None) -> Dict:
+        """🆕 v15.4: Descarga los archivos de una selección de seleccionar_anexos().
+
+        Si falla un acta se alerta por su carpeta y se sigue con el resto;
+        si falla el archivo principal el contrato queda sin éxito. Con
+        `cancelacion`, antes de cada descarga se revisa si se pidió cancelar.
+
+        Los anexos de hasta Config.DESCARGA_MEMORIA_MB se bajan a memoria
+        (ArchivoAnexo.contenido) sin pasar por `carpeta_destino`, salvo que
+        resulten más grandes y se desborden ahí; quien los procesa los
+        libera con ArchivoAnexo.liberar().
+        """
+        resultado = dict(seleccion, archivos=[])
+        limite_memoria = self.config.DESCARGA_MEMORIA_MB * 1024 * 1024
+
+        for arch in seleccion['archivos']:
+            if cancelacion is not None:
+                cancelacion.verificar()
+            ruta_local = os.path.join(carpeta_destino, arch.nombre)
+            contenido = transferencia = None
+            try:
+                if arch.origen != OrigenTarifa.ACTA:
+                    self.log.download(arch.nombre)
+                if limite_memoria and (arch.tamano or 0) <= limite_memoria:
+                    contenido, transferencia = self.cliente.descargar_en_memoria(
+                        arch.ruta_remota, limite_memoria, carpeta_destino, log_download=False
+                    )
+                else:
+                    transferencia = self.cliente.descargar(arch.ruta_remota, ruta_local, log_download=False)
+            except Exception as e:
+                if resultado.get('ruta_contrato'):
+                    self.cliente.cache.invalidar(resultado['ruta_contrato'], recursivo=True)
+                if arch.origen == OrigenTarifa.ACTA:
+                    self.log.error(f"Error en carpeta actas", str(e)[:30])
+                    self.agregar_alerta(
+                        TipoAlerta.ERROR_PROCESAMIENTO,
+                        f"Error procesando: {str(e)[:30]}",
+                        posixpath.basename(posixpath.dirname(arch.ruta_remota))
+                    )
+                    continue
+                self.log.error("Error en descarga", str(e)[:40])
+                self.agregar_alerta(TipoAlerta.ERROR_PROCESAMIENTO, str(e)[:50])
+                resultado['exito'] = False
+                resultado['mensaje'] = str(e)[:40]
+                return resultado
+
+            resultado['archivos'].append(replace(arch, ruta_local=ruta_local, contenido=contenido,
+                                                  transferencia=transferencia))
+
+        resultado['exito'] = bool(resultado['archivos'])
+        if not resultado['exito']:
+            resultado['mensaje'] = "Sin ANEXO 1"
+        return resultado
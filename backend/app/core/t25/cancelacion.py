@@ -0,0 +1,57 @@
+"""
+Cancelación de un trabajo
+=========================
+
+Quien lanza el trabajo (la API) pide cancelarlo creando el archivo indicado
+en JobParams.cancelar (CONSOLIDADOR_CANCELAR). El consolidador lo revisa en
+cada frontera de archivo (antes de cada contrato, de cada descarga y de cada
+extracción) y se detiene con TrabajoCancelado; como es un archivo, lo ven
+también los workers (fork) y funciona igual en el servicio pre-calentado, en
+un subproceso o en Windows.
+
+Al cancelarse, run_job() ejecuta las limpiezas registradas con
+al_cancelar(): cerrar la sesión SFTP y borrar la carpeta de trabajo y los
+temporales del consolidado y de las alertas.
+"""
+
+import os
+from typing import Callable, List, Optional
+
+# Código de salida del script cuando el trabajo se cancela
+CODIGO_CANCELADO = 3
+
+
+class TrabajoCancelado(Exception):
+    """Se pidió cancelar el trabajo."""
+
+
+class Cancelacion:
+    """Consulta la petición de cancelación y guarda las limpiezas del trabajo."""
+
+    def __init__(self, ruta: Optional[str] = None):
+        self.ruta = ruta or None
+        self._solicitada = False
+        self._limpiezas: List[Callable[[], None]] = []
+
+    def solicitada(self) -> bool:
+        if not self._solicitada and self.ruta is not None:
+            self._solicitada = os.path.exists(self.ruta)
+        return self._solicitada
+
+    def verificar(self):
+        """Lanza TrabajoCancelado si se pidió cancelar."""
+        if self.solicitada():
+            raise TrabajoCancelado("Trabajo cancelado")
+
+    def al_cancelar(self, limpieza: Callable[[], None]):
+        """Registra una limpieza para cuando el trabajo se cancele."""
+        self._limpiezas.append(limpieza)
+
+    def limpiar(self):
+        """Ejecuta las limpiezas registradas (en orden inverso); ignora sus errores."""
+        while self._limpiezas:
+            limpieza = self._limpiezas.pop()
+            try:
+                limpieza()
+            except Exception:
+                pass
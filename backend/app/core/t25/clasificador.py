@@ -0,0 +1,853 @@
+"""
+Clasificador ML y ETL del consolidado
+=====================================
+
+ClasificadorTextoMedico (TF-IDF: manual tarifario vs. descripción médica),
+ETLConsolidadoT25_ML, que corrige columnas intercambiadas y normaliza
+manuales y porcentajes, y la persistencia de sus cachés entre ejecuciones.
+
+scikit-learn es opcional: sin él crear_etl_ml() retorna None y el
+consolidado se exporta sin la limpieza ML.
+"""
+
+import gc
+import hashlib
+import io
+import json
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import chardet
+import numpy as np
+import pandas as pd
+
+# Machine Learning
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+except ImportError:
+    TfidfVectorizer = None
+    cosine_similarity = None
+
+class CacheLRU:
+    """🆕 v15.4: Caché LRU acotada con contadores de aciertos/fallos.
+
+    Memoiza funciones puras de texto (clasificación ML, porcentajes,
+    normalización de manuales) cuyos valores se repiten miles de veces.
+    """
+
+    _FALTA = object()
+
+    def __init__(self, max_entradas: int = 50000):
+        self.max_entradas = max_entradas
+        self._datos: "OrderedDict[Any, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def buscar(self, clave) -> Tuple[bool, Any]:
+        valor = self._datos.get(clave, self._FALTA)
+        if valor is self._FALTA:
+            self.misses += 1
+            return False, None
+        self._datos.move_to_end(clave)
+        self.hits += 1
+        return True, valor
+
+    def guardar(self, clave, valor):
+        self._datos[clave] = valor
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+
+    def obtener(self, clave, calcular):
+        """Valor cacheado de `clave` o `calcular(clave)` (que se guarda)."""
+        encontrado, valor = self.buscar(clave)
+        if not encontrado:
+            valor = calcular(clave)
+            self.guardar(clave, valor)
+        return valor
+
+    def items(self) -> List[Tuple[Any, Any]]:
+        return list(self._datos.items())
+
+    def cargar(self, items):
+        for clave, valor in items:
+            self.guardar(clave, valor)
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+class ClasificadorTextoMedico:
+    """
+    Clasificador ML para detectar si un texto es:
+    - Manual tarifario (SOAT, ISS, PROPIO)
+    - Descripción de procedimiento médico
+    - Porcentaje o valor numérico
+    """
+
+    # Vocabulario de referencia para manuales tarifarios
+    VOCABULARIO_MANUAL = [
+        'SOAT', 'SOAT VIGENTE', 'SOAT UVT', 'SOAT UVB', 'TARIFARIO SOAT',
+        'ISS', 'ISS 2001', 'ISS2001', 'TARIFARIOS ISS', 'TARIFA ISS',
+        'TARIFA PROPIA', 'TARIFAS PROPIAS', 'PROPIA', 'PROPIO', 'PROPIAS',
+        'INSTITUCIONAL', 'TARIFAS INSTITUCIONALES', 'TARIFA INSTITUCIONAL',
+        'DECRETO 2423', 'DECRETO 2644', 'UVT', 'UVB', 'TARIFA PLENA',
+        'MENOS', 'PLENO', 'VIGENTE', 'MANUAL TARIFARIO'
+    ]
+
+    # Vocabulario de procedimientos médicos
+    VOCABULARIO_MEDICO = [
+        'CONSULTA', 'TERAPIA', 'NEURAL', 'CIRUGIA', 'PROCEDIMIENTO',
+        'TRATAMIENTO', 'EVALUACION', 'VALORACION', 'DIAGNOSTICO',
+        'EXAMEN', 'BIOPSIA', 'ECOGRAFIA', 'RADIOGRAFIA', 'TOMOGRAFIA',
+        'RESONANCIA', 'LABORATORIO', 'HEMOGRAMA', 'CURACION', 'SUTURA',
+        'INYECCION', 'APLICACION', 'NEBULIZACION', 'HOSPITALIZACION',
+        'CONTROL', 'SEGUIMIENTO', 'ESPECIALISTA', 'MEDICINA', 'GENERAL',
+        'PEDIATRIA', 'GINECOLOGIA', 'ORTOPEDIA', 'CARDIOLOGIA', 'NEUROLOGIA',
+        'PSIQUIATRIA', 'PSICOLOGIA', 'FISIOTERAPIA', 'FONOAUDIOLOGIA',
+        'ODONTOLOGIA', 'OPTOMETRIA', 'ANESTESIA', 'URGENCIA', 'AMBULANCIA',
+        'SANGRE', 'ORINA', 'GLUCOSA', 'COLESTEROL', 'TRIGLICERIDOS',
+        'ELECTROCARDIOGRAMA', 'ENDOSCOPIA', 'COLONOSCOPIA', 'MAMOGRAFIA',
+        'QUIMIOTERAPIA', 'RADIOTERAPIA', 'DIALISIS', 'TRASPLANTE', 'PROTESIS',
+        'IMPLANTE', 'REHABILITACION', 'TERAPIA OCUPACIONAL', 'TERAPIA FISICA',
+        'CONSULTA DE', 'VISITA DE', 'ATENCION DE', 'SERVICIO DE'
+    ]
+
+    def __init__(self):
+        """Inicializa el clasificador y entrena el vectorizador."""
+        # Crear corpus de entrenamiento
+        self.corpus_manual = self.VOCABULARIO_MANUAL
+        self.corpus_medico = self.VOCABULARIO_MEDICO
+
+        # Entrenar vectorizador TF-IDF
+        self.vectorizer = TfidfVectorizer(
+            analyzer='char_wb',
+            ngram_range=(2, 4),
+            lowercase=True,
+            max_features=1000
+        )
+
+        # Entrenar con todo el vocabulario
+        todo_corpus = self.corpus_manual + self.corpus_medico
+        self.vectorizer.fit(todo_corpus)
+
+        # Vectores de referencia
+        self.vec_manual = self.vectorizer.transform(self.corpus_manual)
+        self.vec_medico = self.vectorizer.transform(self.corpus_medico)
+
+        # Centroide de cada clase
+        self.centroide_manual = np.asarray(self.vec_manual.mean(axis=0)).flatten()
+        self.centroide_medico = np.asarray(self.vec_medico.mean(axis=0)).flatten()
+
+        # 🆕 v15.4: Centroides normalizados (filas) para puntuar lotes con un solo producto
+        centroides = np.vstack([self.centroide_manual, self.centroide_medico])
+        normas = np.linalg.norm(centroides, axis=1, keepdims=True)
+        normas[normas == 0] = 1.0
+        self._centroides_norm = centroides / normas
+
+        # 🆕 v15.4: Resultados memoizados por texto (persistibles entre ejecuciones)
+        self.cache = CacheLRU()
+
+        print("✅ Clasificador ML entrenado")
+        print(f"   • Vocabulario manual: {len(self.corpus_manual)} términos")
+        print(f"   • Vocabulario médico: {len(self.corpus_medico)} términos")
+
+    def clasificar(self, texto: str) -> Dict[str, Any]:
+        """
+        Clasifica un texto y retorna probabilidades.
+
+        Returns:
+            Dict con:
+            - 'tipo': 'MANUAL', 'MEDICO', 'PORCENTAJE', 'DESCONOCIDO'
+            - 'confianza': 0.0 a 1.0
+            - 'scores': diccionario con scores de cada clase
+        """
+        return self.clasificar_lote([texto])[texto]
+
+    def clasificar_lote(self, textos) -> Dict[Any, Dict[str, Any]]:
+        """
+        🆕 v15.4: Clasifica varios textos a la vez (cada valor distinto una sola vez).
+
+        Aplica las mismas reglas que clasificar() y, para los textos que
+        llegan a la fase ML, hace UN transform TF-IDF disperso y puntúa los
+        dos centroides con un único producto de matrices.
+
+        Returns:
+            Dict valor original -> resultado de clasificar()
+        """
+        resultados: Dict[Any, Dict[str, Any]] = {}
+        pendientes_ml: Dict[str, List[Any]] = {}
+
+        for valor in dict.fromkeys(textos):
+            if pd.isna(valor):
+                resultados[valor] = self._clasificar_por_reglas(valor)
+                continue
+
+            clave = str(valor).strip()
+            encontrado, resultado = self.cache.buscar(clave)
+            if not encontrado:
+                resultado = self._clasificar_por_reglas(valor)
+                if resultado is None:
+                    pendientes_ml.setdefault(clave.upper(), []).append((valor, clave))
+                    continue
+                self.cache.guardar(clave, resultado)
+            resultados[valor] = resultado
+
+        if pendientes_ml:
+            for texto_upper, resultado in zip(pendientes_ml, self._clasificar_ml(list(pendientes_ml))):
+                for valor, clave in pendientes_ml[texto_upper]:
+                    if resultado['tipo'] != 'ERROR':
+                        self.cache.guardar(clave, resultado)
+                    resultados[valor] = resultado
+
+        return resultados
+
+    def _clasificar_por_reglas(self, texto) -> Optional[Dict[str, Any]]:
+        """Reglas rápidas de clasificar(); None si el texto requiere la fase ML."""
+        if pd.isna(texto) or str(texto).strip() == '':
+            return {'tipo': 'VACIO', 'confianza': 1.0, 'scores': {}}
+
+        texto = str(texto).strip()
+        texto_upper = texto.upper()
+
+        # 1. Reglas rápidas basadas en patrones
+        # ─────────────────────────────────────────────────────────────────────
+
+        # Es un porcentaje o número
+        if re.match(r'^[+-]?[\d,\.%\s]+$', texto):
+            return {'tipo': 'PORCENTAJE', 'confianza': 0.95, 'scores': {'porcentaje': 0.95}}
+
+        # Contiene palabras clave de manual tarifario
+        palabras_manual = ['SOAT', 'ISS', 'TARIFA', 'DECRETO', 'UVT', 'UVB', 'PROPIA', 'PROPIO', 'INSTITUCIONAL']
+        for palabra in palabras_manual:
+            if palabra in texto_upper:
+                return {'tipo': 'MANUAL', 'confianza': 0.9, 'scores': {'manual': 0.9}}
+
+        # Contiene palabras clave médicas
+        palabras_medicas = ['CONSULTA', 'TERAPIA', 'CIRUGIA', 'PROCEDIMIENTO', 'EXAMEN',
+                           'TRATAMIENTO', 'BIOPSIA', 'ECOGRAFIA', 'LABORATORIO']
+        for palabra in palabras_medicas:
+            if palabra in texto_upper:
+                return {'tipo': 'MEDICO', 'confianza': 0.85, 'scores': {'medico': 0.85}}
+
+        return None
+
+    def _clasificar_ml(self, textos_upper: List[str]) -> List[Dict[str, Any]]:
+        """2. Clasificación ML con TF-IDF de un lote de textos (ya en mayúsculas)."""
+        try:
+            # Las filas de TF-IDF ya salen normalizadas (l2): el producto con
+            # los centroides normalizados es la similitud coseno
+            matriz = self.vectorizer.transform(textos_upper)
+            similitudes = np.asarray(matriz @ self._centroides_norm.T)
+        except Exception as e:
+            return [{'tipo': 'ERROR', 'confianza': 0.0, 'scores': {}, 'error': str(e)}] * len(textos_upper)
+
+        resultados = []
+        for sim_manual, sim_medico in similitudes:
+            # Normalizar scores
+            total = sim_manual + sim_medico + 0.001
+            score_manual = sim_manual / total
+            score_medico = sim_medico / total
+
+            scores = {'manual': score_manual, 'medico': score_medico}
+
+            if score_manual > score_medico and score_manual > 0.4:
+                resultados.append({'tipo': 'MANUAL', 'confianza': score_manual, 'scores': scores})
+            elif score_medico > score_manual and score_medico > 0.4:
+                resultados.append({'tipo': 'MEDICO', 'confianza': score_medico, 'scores': scores})
+            else:
+                resultados.append({'tipo': 'DESCONOCIDO', 'confianza': max(score_manual, score_medico), 'scores': scores})
+        return resultados
+
+    def es_descripcion_medica(self, texto: str) -> Tuple[bool, float]:
+        """
+        Verifica si un texto parece ser una descripción médica.
+
+        Returns:
+            (es_medico, confianza)
+        """
+        resultado = self.clasificar(texto)
+        return resultado['tipo'] == 'MEDICO', resultado['confianza']
+
+    def es_manual_tarifario(self, texto: str) -> Tuple[bool, float]:
+        """
+        Verifica si un texto parece ser un manual tarifario válido.
+
+        Returns:
+            (es_manual, confianza)
+        """
+        resultado = self.clasificar(texto)
+        return resultado['tipo'] == 'MANUAL', resultado['confianza']
+
+
+class ETLConsolidadoT25_ML:
+    """
+    ═══════════════════════════════════════════════════════════════════════════
+    ETL CONSOLIDADO T25 - VERSIÓN CON MACHINE LEARNING
+    ═══════════════════════════════════════════════════════════════════════════
+    Sistema inteligente que detecta y corrige automáticamente cuando:
+    - manual_tarifario contiene descripciones médicas
+    - porcentaje_manual_tarifario contiene el manual real
+    - Los valores están intercambiados entre columnas
+    ═══════════════════════════════════════════════════════════════════════════
+    """
+
+    ANOS_IGNORAR = {'1996', '2001', '2016', '2022', '2023', '2024', '2025', '2644', '2423', '780'}
+
+    PATRON_NUMERO = re.compile(r'[+-]?\d+(?:[,\.]\d+)?')
+    PATRON_PORCENTAJE_FINAL = re.compile(r'[+-]\s*(\d+(?:[,\.]\d+)?)\s*$')
+    PATRON_MENOS = re.compile(r'MENOS\s*(\d+(?:[,\.]\d+)?)', re.IGNORECASE)
+    PATRON_MAS = re.compile(r'(?:MAS|\+)\s*(\d+(?:[,\.]\d+)?)', re.IGNORECASE)
+    PATRON_DECIMAL = re.compile(r'^(-?0\.\d+)$')
+
+    def __init__(self, clasificador: ClasificadorTextoMedico, chunk_size: int = 50000):
+        """Inicializa el ETL con el clasificador ML."""
+        self.clasificador = clasificador
+        self.chunk_size = chunk_size
+        self.stats = {
+            'total_registros': 0,
+            'columnas_intercambiadas': 0,
+            'manuales_normalizados': 0,
+            'porcentajes_extraidos': 0,
+            'anomalias_detectadas': [],
+            'correcciones_ml': []
+        }
+        self.resultados = {}
+        # 🆕 v15.4: Memoización por texto de porcentajes y manuales normalizados
+        self.cache_porcentaje = CacheLRU()
+        self.cache_manual = CacheLRU()
+
+    def _detectar_y_corregir_anomalia(self, row: pd.Series) -> Dict[str, Any]:
+        """
+        Detecta si hay anomalía en la fila y sugiere corrección.
+
+        Anomalías detectadas:
+        1. manual_tarifario tiene descripción médica
+        2. porcentaje_manual_tarifario tiene el manual real
+        3. Valores intercambiados
+
+        Returns:
+            Dict con correcciones sugeridas
+        """
+        manual = str(row.get('manual_tarifario', '')).strip()
+        porcentaje = str(row.get('porcentaje_manual_tarifario', '')).strip()
+        descripcion = str(row.get('descripcion_del_cups', '')).strip()
+
+        correccion = {
+            'necesita_correccion': False,
+            'nuevo_manual': manual,
+            'nuevo_porcentaje': porcentaje,
+            'razon': None,
+            'confianza': 0.0
+        }
+
+        if not manual:
+            return correccion
+
+        # Clasificar el contenido de manual_tarifario
+        clasif_manual = self.clasificador.clasificar(manual)
+        clasif_porcentaje = self.clasificador.clasificar(porcentaje)
+
+        # CASO 1: manual_tarifario tiene descripción médica
+        if clasif_manual['tipo'] == 'MEDICO' and clasif_manual['confianza'] > 0.6:
+            # Verificar si porcentaje tiene el manual real
+            if clasif_porcentaje['tipo'] == 'MANUAL' and clasif_porcentaje['confianza'] > 0.5:
+                correccion['necesita_correccion'] = True
+                correccion['nuevo_manual'] = porcentaje
+                correccion['nuevo_porcentaje'] = '0'  # Extraer del nuevo manual si hay
+                correccion['razon'] = f"ML detectó descripción médica en manual_tarifario (conf: {clasif_manual['confianza']:.2f})"
+                correccion['confianza'] = clasif_manual['confianza']
+                return correccion
+
+        # CASO 2: manual_tarifario es similar a descripcion_del_cups
+        if descripcion and len(manual) > 20:
+            manual_words = set(manual.upper().split())
+            desc_words = set(descripcion.upper().split())
+            if len(manual_words) > 0 and len(desc_words) > 0:
+                similitud = len(manual_words & desc_words) / min(len(manual_words), len(desc_words))
+                if similitud > 0.5:  # Más del 50% de palabras en común
+                    if clasif_porcentaje['tipo'] == 'MANUAL':
+                        correccion['necesita_correccion'] = True
+                        correccion['nuevo_manual'] = porcentaje
+                        correccion['nuevo_porcentaje'] = '0'
+                        correccion['razon'] = f"manual_tarifario similar a descripción ({similitud:.0%})"
+                        correccion['confianza'] = similitud
+                        return correccion
+
+        # CASO 3: manual_tarifario tiene formato de tarifa (número grande)
+        try:
+            valor_manual = float(manual.replace(',', '.').replace('$', '').strip())
+            if valor_manual > 1000:  # Parece una tarifa, no un manual
+                if clasif_porcentaje['tipo'] == 'MANUAL':
+                    correccion['necesita_correccion'] = True
+                    correccion['nuevo_manual'] = porcentaje
+                    correccion['nuevo_porcentaje'] = '0'
+                    correccion['razon'] = f"manual_tarifario contiene tarifa ({valor_manual:,.0f})"
+                    correccion['confianza'] = 0.9
+                    return correccion
+        except:
+            pass
+
+        return correccion
+
+    def _extraer_porcentaje(self, texto: str) -> Optional[float]:
+        """Extrae porcentaje de forma inteligente. 🆕 v15.4: memoizado por texto."""
+        if pd.isna(texto):
+            return None
+        return self.cache_porcentaje.obtener(str(texto), self._calcular_porcentaje)
+
+    def _calcular_porcentaje(self, texto: str) -> Optional[float]:
+        if str(texto).strip() == '':
+            return None
+
+        texto = str(texto).strip()
+        texto_upper = texto.upper()
+
+        if 'PLENA' in texto_upper or 'PLENO' in texto_upper:
+            if not re.search(r'[+-]\s*\d+', texto_upper):
+                return 0.0
+
+        texto_sin_pct = texto.replace('%', '')
+
+        match = self.PATRON_PORCENTAJE_FINAL.search(texto_sin_pct)
+        if match:
+            try:
+                valor = float(match.group(1).replace(',', '.'))
+                if '-' in texto_sin_pct:
+                    valor = -abs(valor)
+                if -100 <= valor <= 200:
+                    return valor
+            except:
+                pass
+
+        match = self.PATRON_MENOS.search(texto_sin_pct)
+        if match:
+            try:
+                return -float(match.group(1).replace(',', '.'))
+            except:
+                pass
+
+        match = self.PATRON_MAS.search(texto_sin_pct)
+        if match:
+            try:
+                return float(match.group(1).replace(',', '.'))
+            except:
+                pass
+
+        match = self.PATRON_DECIMAL.match(texto_sin_pct.strip())
+        if match:
+            try:
+                return round(float(match.group(1)) * 100, 2)
+            except:
+                pass
+
+        numeros = self.PATRON_NUMERO.findall(texto_sin_pct)
+        for num_str in reversed(numeros):
+            try:
+                num = float(num_str.replace(',', '.'))
+                if str(int(abs(num))) in self.ANOS_IGNORAR:
+                    continue
+                if num > 1000:
+                    continue
+                if -100 <= num <= 200:
+                    if 'MENOS' in texto_upper or f'-{num_str}' in texto:
+                        num = -abs(num)
+                    return num
+            except:
+                continue
+
+        return None
+
+    def _normalizar_manual(self, texto: str) -> str:
+        """Normaliza el manual tarifario. 🆕 v15.4: memoizado por texto."""
+        if pd.isna(texto):
+            return 'PROPIO'
+        return self.cache_manual.obtener(str(texto), self._calcular_manual)
+
+    def _calcular_manual(self, texto: str) -> str:
+        if str(texto).strip() == '':
+            return 'PROPIO'
+
+        texto = str(texto).strip()
+        texto_upper = texto.upper()
+
+        # PROPIO
+        if re.search(r'\bPROPIA?S?\b|INSTITUCIONAL|TARIA\s*PROPIA', texto_upper):
+            return 'PROPIO'
+
+        # ISS
+        if re.search(r'\bISS\b', texto_upper) and not re.search(r'\bSOAT\b', texto_upper):
+            return 'ISS'
+
+        # SOAT
+        if re.search(r'\bSOAT\b|\bUVT\b|\bUVB\b|DECRETO\s*2423|DECRETO\s*2644', texto_upper):
+            return 'SOAT'
+
+        # Números puros -> PROPIO
+        if re.match(r'^[\d,\.\s]+$', texto):
+            return 'PROPIO'
+
+        return texto
+
+    def _procesar_fila(self, row: pd.Series) -> Dict[str, Any]:
+        """
+        Procesa una fila completa con detección ML.
+        """
+        resultado = {
+            'manual_tarifario': '',
+            'porcentaje_manual_tarifario': 0.0,
+            'correccion_aplicada': False,
+            'log': None
+        }
+
+        # 1. Detectar anomalías
+        correccion = self._detectar_y_corregir_anomalia(row)
+
+        if correccion['necesita_correccion']:
+            # Usar valores corregidos
+            manual_raw = correccion['nuevo_manual']
+            porcentaje_raw = correccion['nuevo_porcentaje']
+            resultado['correccion_aplicada'] = True
+            resultado['log'] = correccion['razon']
+        else:
+            manual_raw = str(row.get('manual_tarifario', '')).strip()
+            porcentaje_raw = str(row.get('porcentaje_manual_tarifario', '')).strip()
+
+        # 2. Normalizar manual
+        resultado['manual_tarifario'] = self._normalizar_manual(manual_raw)
+
+        # 3. Extraer porcentaje
+        tarifa = row.get('tarifa_unitaria_en_pesos', '0')
+        try:
+            tarifa_num = float(str(tarifa).replace(',', '.'))
+        except:
+            tarifa_num = 0
+
+        # Si porcentaje es texto de manual o propio -> 0
+        porcentaje_upper = porcentaje_raw.upper()
+        if any(p in porcentaje_upper for p in ['PROPIO', 'PROPIA', 'INSTITUCIONAL', 'PLENA', 'PLENO']):
+            resultado['porcentaje_manual_tarifario'] = 0.0
+        else:
+            # Extraer porcentaje
+            pct = self._extraer_porcentaje(porcentaje_raw)
+            if pct is not None:
+                # Verificar que no sea igual a la tarifa
+                if tarifa_num > 0 and abs(pct - tarifa_num) < 1:
+                    resultado['porcentaje_manual_tarifario'] = 0.0
+                elif pct > 1000:  # Probable tarifa duplicada
+                    resultado['porcentaje_manual_tarifario'] = 0.0
+                else:
+                    resultado['porcentaje_manual_tarifario'] = round(pct, 2)
+            else:
+                resultado['porcentaje_manual_tarifario'] = 0.0
+
+        return resultado
+
+    @staticmethod
+    def _a_float(valor: str) -> Optional[float]:
+        try:
+            return float(valor)
+        except (TypeError, ValueError):
+            return None
+
+    def _procesar_lote(self, df: pd.DataFrame) -> Tuple[pd.Series, pd.Series, List[Dict[str, Any]]]:
+        """
+        🆕 v15.4: Equivalente por lotes de aplicar _procesar_fila a cada fila.
+
+        Clasifica cada valor distinto de manual/porcentaje una sola vez
+        (clasificar_lote), normaliza manuales y extrae porcentajes por valor
+        único, y resuelve los casos de corrección con máscaras de pandas.
+
+        Returns:
+            (manuales, porcentajes, correcciones)
+        """
+        df = df.reset_index(drop=True)
+        vacia = pd.Series([''] * len(df), dtype=object)
+
+        def texto(col: str) -> pd.Series:
+            # str(valor).strip() como en _procesar_fila ('nan'/'None' incluidos)
+            return df[col].map(str).str.strip() if col in df.columns else vacia
+
+        manual = texto('manual_tarifario')
+        porcentaje = texto('porcentaje_manual_tarifario')
+        descripcion = texto('descripcion_del_cups')
+
+        # 1. Detectar anomalías (mismo orden de casos que _detectar_y_corregir_anomalia)
+        clasif = self.clasificador.clasificar_lote(pd.unique(pd.concat([manual, porcentaje], ignore_index=True)))
+        tipo_m = manual.map(lambda v: clasif[v]['tipo'])
+        conf_m = manual.map(lambda v: clasif[v]['confianza'])
+        tipo_p = porcentaje.map(lambda v: clasif[v]['tipo'])
+        conf_p = porcentaje.map(lambda v: clasif[v]['confianza'])
+
+        con_manual = manual != ''
+        p_es_manual = tipo_p == 'MANUAL'
+
+        caso1 = con_manual & (tipo_m == 'MEDICO') & (conf_m > 0.6) & p_es_manual & (conf_p > 0.5)
+
+        candidatos2 = con_manual & ~caso1 & p_es_manual & (descripcion != '') & (manual.str.len() > 20)
+        similitud = pd.Series(0.0, index=df.index)
+        for i in candidatos2[candidatos2].index:
+            manual_words = set(manual[i].upper().split())
+            desc_words = set(descripcion[i].upper().split())
+            similitud[i] = len(manual_words & desc_words) / min(len(manual_words), len(desc_words))
+        caso2 = candidatos2 & (similitud > 0.5)
+
+        valores_manual = {
+            v: self._a_float(v.replace(',', '.').replace('$', '').strip())
+            for v in pd.unique(manual[con_manual & p_es_manual])
+        }
+        valor_manual = manual.map(valores_manual)
+        caso3 = con_manual & ~caso1 & ~caso2 & p_es_manual & (valor_manual.astype(float) > 1000)
+
+        corregir = caso1 | caso2 | caso3
+        manual_raw = manual.where(~corregir, porcentaje)
+        porcentaje_raw = porcentaje.where(~corregir, '0')
+
+        # 2. Normalizar manual (una vez por valor distinto)
+        normalizados = {v: self._normalizar_manual(v) for v in pd.unique(manual_raw)}
+        manuales = manual_raw.map(normalizados)
+
+        # 3. Extraer porcentaje (una vez por valor distinto)
+        tarifas = {v: self._a_float(str(v).replace(',', '.')) for v in pd.unique(df['tarifa_unitaria_en_pesos'])}
+        tarifa_num = df['tarifa_unitaria_en_pesos'].map(tarifas).astype(float).fillna(0)
+
+        extraidos = {v: self._extraer_porcentaje(v) for v in pd.unique(porcentaje_raw)}
+        pct = porcentaje_raw.map(extraidos).astype(float)
+        pct_redondeado = porcentaje_raw.map(
+            {v: round(p, 2) for v, p in extraidos.items() if p is not None}
+        ).astype(float)
+
+        es_texto_manual = porcentaje_raw.str.upper().str.contains(
+            'PROPIO|PROPIA|INSTITUCIONAL|PLENA|PLENO', regex=True
+        )
+        a_cero = (
+            es_texto_manual
+            | pct.isna()
+            | ((tarifa_num > 0) & ((pct - tarifa_num).abs() < 1))
+            | (pct > 1000)
+        )
+        porcentajes = pct_redondeado.where(~a_cero, 0.0)
+
+        # Registro de correcciones
+        correcciones = []
+        for i in corregir[corregir].index:
+            if caso1[i]:
+                razon = f"ML detectó descripción médica en manual_tarifario (conf: {conf_m[i]:.2f})"
+            elif caso2[i]:
+                razon = f"manual_tarifario similar a descripción ({similitud[i]:.0%})"
+            else:
+                razon = f"manual_tarifario contiene tarifa ({valor_manual[i]:,.0f})"
+            correcciones.append({
+                'indice': i,
+                'original_manual': df['manual_tarifario'][i],
+                'original_porcentaje': df['porcentaje_manual_tarifario'][i],
+                'nuevo_manual': manuales[i],
+                'log': razon
+            })
+
+        return manuales, porcentajes, correcciones
+
+    def procesar_dataframe(self, df: pd.DataFrame, nombre: str = "Datos") -> pd.DataFrame:
+        """Procesa un DataFrame completo."""
+        print(f"\n{'═'*70}")
+        print(f"🧠 PROCESANDO CON ML: {nombre}")
+        print(f"{'═'*70}")
+
+        inicio = datetime.now()
+        total = len(df)
+        print(f"📊 Total registros: {total:,}")
+
+        # Normalizar columnas
+        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+
+        # Asegurar columnas
+        for col in ['manual_tarifario', 'porcentaje_manual_tarifario', 'tarifa_unitaria_en_pesos']:
+            if col not in df.columns:
+                df[col] = ''
+
+        # Procesar
+        print(f"\n🔄 Fase 1: Detección de anomalías con ML...")
+
+        # 🆕 v15.4: Por lotes (valores únicos + un transform TF-IDF) en vez de fila a fila
+        nuevos_manuales, nuevos_porcentajes, correcciones = self._procesar_lote(df)
+
+        df['manual_tarifario'] = nuevos_manuales.tolist()
+        df['porcentaje_manual_tarifario'] = nuevos_porcentajes.tolist()
+
+        # Corregir tarifas
+        print(f"\n🔄 Fase 2: Corrigiendo tarifas...")
+        tarifa = pd.to_numeric(
+            df['tarifa_unitaria_en_pesos'].astype(str).str.replace(',', '.'),
+            errors='coerce'
+        ).fillna(0)
+        mask_pequena = (tarifa > 0) & (tarifa < 100)
+        tarifa.loc[mask_pequena] = tarifa.loc[mask_pequena] * 1000
+        df['tarifa_unitaria_en_pesos'] = tarifa.round(2)
+
+        # Estadísticas
+        duracion = (datetime.now() - inicio).total_seconds()
+
+        print(f"\n{'─'*70}")
+        print(f"📈 RESULTADOS - {nombre}")
+        print(f"{'─'*70}")
+        print(f"⏱️ Tiempo: {duracion:.1f} segundos")
+        print(f"🔧 Correcciones ML aplicadas: {len(correcciones):,}")
+
+        if correcciones:
+            print(f"\n📝 Muestra de correcciones aplicadas:")
+            for c in correcciones[:10]:
+                print(f"   • Fila {c['indice']}: {c['log']}")
+                print(f"     Original: '{str(c['original_manual'])[:40]}...'")
+                print(f"     Corregido: '{c['nuevo_manual']}'")
+
+        print(f"\n📊 Distribución de Manuales:")
+        for manual, count in df['manual_tarifario'].value_counts().head(10).items():
+            pct = count / total * 100
+            print(f"   {manual:15} │ {count:>10,} │ {pct:5.1f}%")
+
+        self.stats['total_registros'] += total
+        self.stats['columnas_intercambiadas'] += len(correcciones)
+        self.stats['correcciones_ml'].extend(correcciones)
+
+        gc.collect()
+        return df
+
+    def ejecutar(self, contenido: bytes, nombre: str) -> Dict[str, pd.DataFrame]:
+        """Ejecuta el ETL completo."""
+        print("\n" + "═"*70)
+        print("🚀 ETL CONSOLIDADO T25 - ML EDITION")
+        print("═"*70)
+        print(f"📁 Archivo: {nombre}")
+        print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+        inicio = datetime.now()
+
+        # Cargar archivo
+        dataframes = self._cargar_archivo(contenido, nombre)
+
+        # Procesar cada hoja
+        for nombre_hoja, df in dataframes.items():
+            self.resultados[nombre_hoja] = self.procesar_dataframe(df, nombre_hoja)
+
+        duracion = (datetime.now() - inicio).total_seconds()
+
+        print("\n" + "═"*70)
+        print("✅ ETL ML COMPLETADO")
+        print("═"*70)
+        print(f"📊 Total registros: {self.stats['total_registros']:,}")
+        print(f"🔧 Correcciones ML: {self.stats['columnas_intercambiadas']:,}")
+        print(f"⏱️ Tiempo: {duracion:.1f} segundos")
+
+        return self.resultados
+
+    def _cargar_archivo(self, contenido: bytes, nombre: str) -> Dict[str, pd.DataFrame]:
+        """Carga archivo Excel o CSV."""
+        dataframes = {}
+
+        if nombre.endswith('.csv'):
+            resultado = chardet.detect(contenido[:10000])
+            encoding = resultado['encoding'] or 'utf-8'
+
+            for sep in [';', ',', '\t']:
+                try:
+                    df = pd.read_csv(io.BytesIO(contenido), sep=sep, encoding=encoding,
+                                    dtype=str, low_memory=False)
+                    if len(df.columns) > 1:
+                        dataframes['Datos'] = df
+                        break
+                except:
+                    continue
+        else:
+            excel = pd.ExcelFile(io.BytesIO(contenido))
+            for hoja in excel.sheet_names:
+                df = pd.read_excel(excel, sheet_name=hoja, dtype=str)
+                if len(df) > 0:
+                    dataframes[hoja] = df
+
+        return dataframes
+
+    def exportar_log_correcciones(self, archivo: str = 'correcciones_ml.csv'):
+        """Exporta log de correcciones ML."""
+        if self.stats['correcciones_ml']:
+            df_log = pd.DataFrame(self.stats['correcciones_ml'])
+            df_log.to_csv(archivo, index=False, encoding='utf-8-sig')
+            print(f"✅ Log exportado: {archivo}")
+            return df_log
+        else:
+            print("ℹ️ No hay correcciones ML para exportar")
+            return None
+
+def crear_etl_ml(obtener_clasificador: Callable[[], ClasificadorTextoMedico] = ClasificadorTextoMedico
+                 ) -> Optional[ETLConsolidadoT25_ML]:
+    """ETL ML listo para usar, o None si scikit-learn no está disponible.
+
+    Entrenar el clasificador es lo costoso: `obtener_clasificador` puede
+    retornar uno ya entrenado (p. ej. desde app.services.precarga).
+    """
+    try:
+        if TfidfVectorizer is None:
+            raise ImportError("scikit-learn no está instalado")
+
+        print("🤖 Inicializando Machine Learning (Modo Robusto)...")
+        return ETLConsolidadoT25_ML(obtener_clasificador())
+    except Exception as e:
+        print(f"⚠️ Error inicializando Clasificador ML: {e}")
+        return None
+
+# 🆕 v15.4: Persistencia de las cachés del clasificador entre ejecuciones
+def _version_cache_ml() -> str:
+    """Cambia si cambian los vocabularios o los años ignorados (invalida la caché)."""
+    base = [
+        "15.4",
+        ClasificadorTextoMedico.VOCABULARIO_MANUAL,
+        ClasificadorTextoMedico.VOCABULARIO_MEDICO,
+        sorted(ETLConsolidadoT25_ML.ANOS_IGNORAR)
+    ]
+    return hashlib.sha256(json.dumps(base).encode('utf-8')).hexdigest()[:16]
+
+def _clasificacion_a_json(resultado: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'tipo': resultado['tipo'],
+        'confianza': float(resultado['confianza']),
+        'scores': {k: float(v) for k, v in resultado['scores'].items()}
+    }
+
+def cargar_caches_ml(etl: Optional[ETLConsolidadoT25_ML], ruta: str) -> int:
+    """Carga las cachés guardadas por una ejecución anterior. Retorna las entradas cargadas."""
+    if etl is None or not os.path.exists(ruta):
+        return 0
+    clasificador = etl.clasificador
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        if datos.get('version') != _version_cache_ml():
+            return 0
+        clasificador.cache.cargar(datos.get('clasificar', []))
+        etl.cache_porcentaje.cargar(datos.get('porcentaje', []))
+        etl.cache_manual.cargar(datos.get('manual', []))
+    except Exception as e:
+        print(f"⚠️ No se pudo cargar la caché del clasificador: {e}")
+        return 0
+    return len(clasificador.cache) + len(etl.cache_porcentaje) + len(etl.cache_manual)
+
+def guardar_caches_ml(etl: Optional[ETLConsolidadoT25_ML], ruta: str):
+    """Guarda las cachés del clasificador (escritura atómica)."""
+    if etl is None:
+        return
+    datos = {
+        'version': _version_cache_ml(),
+        'clasificar': [[k, _clasificacion_a_json(v)] for k, v in etl.clasificador.cache.items()],
+        'porcentaje': etl.cache_porcentaje.items(),
+        'manual': etl.cache_manual.items()
+    }
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        tmp = f"{ruta}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False)
+        os.replace(tmp, ruta)
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar la caché del clasificador: {e}")
@@ -0,0 +1,258 @@
+"""
+Configuración y modelos del consolidador
+========================================
+
+Config (conexión SFTP, timeouts y opciones v15.4), enumeraciones de origen
+y tipo de alerta, y las clases de datos Alerta y ArchivoAnexo.
+"""
+
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import IO, Dict, Mapping, Optional
+
+from app.services.cache_parseo import DIAS_MAXIMO_DEFECTO, MB_MAXIMO_DEFECTO
+from app.services.pool_sftp import CANALES_POR_CONEXION_DEFECTO, INACTIVIDAD_DEFECTO, SONDEO_DEFECTO
+from app.services.transferencias_sftp import (
+    LECTURAS_PENDIENTES_DEFECTO,
+    PAQUETE_DEFECTO,
+    VENTANA_DEFECTO,
+    Transferencia
+)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CONFIGURACIÓN GLOBAL
+# ══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class Config:
+    """Configuración centralizada del sistema."""
+    HOST: str = 'mft.positiva.gov.co'
+    PORT: int = 2243
+    USERNAME: str = 'G_medica'
+    PASSWORD: str = 'Uhnbru0sgnpit]'
+    TIMEOUT_CONEXION: int = 30
+    TIMEOUT_OPERACION: int = 20
+    TIMEOUT_ARCHIVO: int = 60
+    MAX_REINTENTOS_CONEXION: int = 5
+    MAX_REINTENTOS_OPERACION: int = 3
+    BACKOFF_BASE: float = 2.0
+    KEEPALIVE_INTERVAL: int = 5
+    CARPETA_PRINCIPAL: str = 'R.A-ABASTECIMIENTO RED ASISTENCIAL'
+    CARPETA_TRABAJO: str = './trabajo_temp'
+    CONTRATOS_PROBLEMATICOS: set = field(default_factory=lambda: {'572-2023'})
+    TIMEOUT_CONTRATOS_PROBLEMATICOS: int = 30
+    MAX_SEDES: int = 50
+    # 🆕 v15.4: Vigencia (s) de los listados SFTP cacheados; 0 desactiva la caché
+    TTL_CACHE_DIRECTORIOS: int = 300
+    # 🆕 v15.4: Reutilizar filas de contratos cuya selección de anexos no cambió
+    INCREMENTAL: bool = True
+    # 🆕 v15.4: Límites de la caché de parseo de anexos (MB y días sin uso); 0 = sin límite
+    MB_CACHE_ANEXOS: int = MB_MAXIMO_DEFECTO
+    DIAS_CACHE_ANEXOS: int = DIAS_MAXIMO_DEFECTO
+    # 🆕 v15.4: Formato del almacén intermedio (auto = Parquet si hay pyarrow) y exportación Parquet
+    FORMATO_INTERMEDIO: str = 'auto'
+    EXPORTAR_PARQUET: bool = False
+    # 🆕 v15.4: Contratos que se descargan por adelantado mientras se parsea el actual; 0 desactiva
+    CONTRATOS_ADELANTADOS: int = 2
+    # 🆕 v15.4: Anexos de hasta este tamaño (MB) se descargan y parsean en memoria; 0 = siempre a disco
+    DESCARGA_MEMORIA_MB: int = 32
+    # 🆕 v15.4: Transferencias SFTP (app.services.transferencias_sftp): ventana y paquete del
+    # canal, tamaño de cada lectura y lecturas en vuelo
+    VENTANA_SFTP: int = VENTANA_DEFECTO
+    PAQUETE_SFTP: int = PAQUETE_DEFECTO
+    LECTURAS_PENDIENTES_SFTP: int = LECTURAS_PENDIENTES_DEFECTO
+    # 🆕 v15.4: Pool de sesiones SFTP (app.services.pool_sftp) de cada proceso
+    MAX_CONEXIONES_SFTP: int = 1
+    CANALES_POR_CONEXION_SFTP: int = CANALES_POR_CONEXION_DEFECTO
+    INACTIVIDAD_SFTP: int = INACTIVIDAD_DEFECTO
+    # 🆕 v15.4: Segundos sin operaciones exitosas tras los que se sondea la sesión
+    SONDEO_SFTP: int = SONDEO_DEFECTO
+
+    @classmethod
+    def desde_entorno(cls, entorno: Optional[Mapping[str, str]] = None) -> "Config":
+        """Configuración con los ajustes opcionales tomados de variables de entorno."""
+        entorno = os.environ if entorno is None else entorno
+        return cls(
+            TTL_CACHE_DIRECTORIOS=int(entorno.get('SFTP_CACHE_TTL', 300)),
+            INCREMENTAL=entorno.get('CONSOLIDADOR_INCREMENTAL', '1').strip().lower() not in ('0', 'false', 'no'),
+            MB_CACHE_ANEXOS=max(0, int(entorno.get('CONSOLIDADOR_CACHE_ANEXOS_MB', MB_MAXIMO_DEFECTO))),
+            DIAS_CACHE_ANEXOS=max(0, int(entorno.get('CONSOLIDADOR_CACHE_ANEXOS_DIAS', DIAS_MAXIMO_DEFECTO))),
+            FORMATO_INTERMEDIO=entorno.get('CONSOLIDADOR_INTERMEDIO', 'auto').strip().lower(),
+            EXPORTAR_PARQUET=entorno.get('CONSOLIDADOR_EXPORTAR_PARQUET', '0').strip().lower() in ('1', 'true', 'si', 'yes'),
+            CONTRATOS_ADELANTADOS=max(0, int(entorno.get('CONSOLIDADOR_PREFETCH', 2))),
+            DESCARGA_MEMORIA_MB=max(0, int(entorno.get('CONSOLIDADOR_DESCARGA_MEMORIA_MB', 32))),
+            VENTANA_SFTP=int(entorno.get('SFTP_VENTANA_KB', VENTANA_DEFECTO // 1024)) * 1024,
+            PAQUETE_SFTP=int(entorno.get('SFTP_PAQUETE_KB', PAQUETE_DEFECTO // 1024)) * 1024,
+            LECTURAS_PENDIENTES_SFTP=max(1, int(entorno.get('SFTP_LECTURAS_PENDIENTES', LECTURAS_PENDIENTES_DEFECTO))),
+            MAX_CONEXIONES_SFTP=max(1, int(entorno.get('SFTP_MAX_CONEXIONES', 1))),
+            CANALES_POR_CONEXION_SFTP=max(1, int(entorno.get('SFTP_CANALES_POR_CONEXION', CANALES_POR_CONEXION_DEFECTO))),
+            INACTIVIDAD_SFTP=int(entorno.get('SFTP_INACTIVIDAD_S', INACTIVIDAD_DEFECTO)),
+            SONDEO_SFTP=int(entorno.get('SFTP_SONDEO_S', SONDEO_DEFECTO))
+        )
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ENUMERACIONES Y CLASES DE DATOS
+# ══════════════════════════════════════════════════════════════════════════════
+
+class OrigenTarifa(Enum):
+    INICIAL = "Inicial"
+    OTROSI = "Otrosí"
+    ACTA = "Acta"
+
+class TipoAlerta(Enum):
+    SIN_ANEXO1 = "SIN_ANEXO1"
+    SIN_CARPETA_TARIFAS = "SIN_CARPETA_TARIFAS"
+    ACTA_FALTANTE = "ACTA_FALTANTE"
+    CARPETA_ACTAS_SIN_ANEXO = "CARPETA_ACTAS_SIN_ANEXO"
+    SIN_FORMATO_POSITIVA = "SIN_FORMATO_POSITIVA"
+    FORMATO_PROPIO = "FORMATO_PROPIO"  # 🆕 v15.0
+    HOJA_NO_ENCONTRADA = "HOJA_NO_ENCONTRADA"
+    COLUMNAS_NO_DETECTADAS = "COLUMNAS_NO_DETECTADAS"
+    SEDES_NO_DETECTADAS = "SEDES_NO_DETECTADAS"
+    FECHA_NO_ENCONTRADA = "FECHA_NO_ENCONTRADA"
+    ERROR_PROCESAMIENTO = "ERROR_PROCESAMIENTO"
+    TIMEOUT = "TIMEOUT"
+    CONEXION = "CONEXION"
+    ERROR_LECTURA = "ERROR_LECTURA"
+    SOLO_TRASLADOS = "SOLO_TRASLADOS"
+    CONTRATO_AMBULANCIA = "CONTRATO_AMBULANCIA"
+    CONTRATO_AMBULANCIA_MAESTRA = "CONTRATO_AMBULANCIA_MAESTRA"
+    ARCHIVO_SOLO_AMBULANCIAS = "ARCHIVO_SOLO_AMBULANCIAS"
+    ARCHIVO_SOLO_TRASLADOS = "ARCHIVO_SOLO_TRASLADOS"
+    TARIFA_SERVICIOS_NO_ENCONTRADA = "TARIFA_SERVICIOS_NO_ENCONTRADA"
+    # 🆕 v14.1
+    CONTRATO_NO_ENCONTRADO_GO = "CONTRATO_NO_ENCONTRADO_GO"
+    FECHA_FALTANTE_MAESTRA = "FECHA_FALTANTE_MAESTRA"
+    # 🆕 v15.3: Archivos de paquetes (no van a No_Positiva)
+    ARCHIVO_PAQUETE = "ARCHIVO_PAQUETE"
+
+class PrioridadAlerta(Enum):
+    CRITICA = 1
+    ALTA = 2
+    MEDIA = 3
+    BAJA = 4
+
+ALERTAS_CONFIG = {
+    TipoAlerta.SIN_ANEXO1: {
+        'prioridad': PrioridadAlerta.CRITICA,
+        'sugerencia': 'Verificar que el archivo ANEXO 1 esté cargado en TARIFAS'
+    },
+    TipoAlerta.SIN_CARPETA_TARIFAS: {
+        'prioridad': PrioridadAlerta.CRITICA,
+        'sugerencia': 'Crear carpeta TARIFAS en el contrato'
+    },
+    TipoAlerta.ACTA_FALTANTE: {
+        'prioridad': PrioridadAlerta.ALTA,
+        'sugerencia': 'Solicitar acta de negociación faltante'
+    },
+    TipoAlerta.SIN_FORMATO_POSITIVA: {
+        'prioridad': PrioridadAlerta.MEDIA,
+        'sugerencia': 'Verificar formato del archivo'
+    },
+    TipoAlerta.FECHA_NO_ENCONTRADA: {
+        'prioridad': PrioridadAlerta.MEDIA,
+        'sugerencia': 'Verificar registro en maestra de contratos'
+    },
+    TipoAlerta.TIMEOUT: {
+        'prioridad': PrioridadAlerta.ALTA,
+        'sugerencia': 'Archivo muy grande, considerar procesamiento manual'
+    },
+    TipoAlerta.SOLO_TRASLADOS: {
+        'prioridad': PrioridadAlerta.BAJA,
+        'sugerencia': 'Archivo contiene solo servicios de traslados'
+    },
+    TipoAlerta.CONTRATO_AMBULANCIA: {
+        'prioridad': PrioridadAlerta.BAJA,
+        'sugerencia': 'Contrato de ambulancias - verificar si requiere ANEXO 1 de servicios'
+    },
+    TipoAlerta.CONTRATO_AMBULANCIA_MAESTRA: {
+        'prioridad': PrioridadAlerta.BAJA,
+        'sugerencia': 'Contrato identificado como ambulancias desde la maestra'
+    },
+    TipoAlerta.ARCHIVO_SOLO_AMBULANCIAS: {
+        'prioridad': PrioridadAlerta.BAJA,
+        'sugerencia': 'Archivo contiene solo hojas de ambulancias/traslados asistenciales'
+    },
+    TipoAlerta.ARCHIVO_SOLO_TRASLADOS: {
+        'prioridad': PrioridadAlerta.BAJA,
+        'sugerencia': 'Archivo contiene solo hojas de traslados genéricos'
+    },
+    TipoAlerta.TARIFA_SERVICIOS_NO_ENCONTRADA: {
+        'prioridad': PrioridadAlerta.ALTA,
+        'sugerencia': 'Verificar si el archivo corresponde a servicios o solo traslados/ambulancias'
+    },
+    TipoAlerta.CONTRATO_NO_ENCONTRADO_GO: {
+        'prioridad': PrioridadAlerta.CRITICA,
+        'sugerencia': 'El contrato no existe en GoAnywhere - verificar número y año'
+    },
+}
+
+@dataclass
+class Alerta:
+    """Representa una alerta generada durante el procesamiento."""
+    tipo: TipoAlerta
+    mensaje: str
+    contrato: str
+    archivo: str = ""
+    sugerencia: str = ""
+    prioridad: PrioridadAlerta = PrioridadAlerta.MEDIA
+    timestamp: str = field(default_factory=lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+    def __post_init__(self):
+        if not self.sugerencia and self.tipo in ALERTAS_CONFIG:
+            self.sugerencia = ALERTAS_CONFIG[self.tipo]['sugerencia']
+        if self.tipo in ALERTAS_CONFIG:
+            self.prioridad = ALERTAS_CONFIG[self.tipo]['prioridad']
+
+    def to_dict(self) -> Dict:
+        return {
+            'tipo': self.tipo.value,
+            'prioridad': self.prioridad.value,
+            'mensaje': self.mensaje,
+            'contrato': self.contrato,
+            'archivo': self.archivo,
+            'sugerencia': self.sugerencia,
+            'timestamp': self.timestamp
+        }
+
+    def __hash__(self):
+        return hash((self.tipo, self.mensaje, self.contrato, self.archivo))
+
+    def __eq__(self, other):
+        if not isinstance(other, Alerta):
+            return False
+        return (self.tipo == other.tipo and
+                self.mensaje == other.mensaje and
+                self.contrato == other.contrato and
+                self.archivo == other.archivo)
+
+@dataclass
+class ArchivoAnexo:
+    """Representa un archivo ANEXO 1 descargado."""
+    nombre: str
+    ruta_local: str
+    origen: OrigenTarifa
+    numero: Optional[int] = None
+    fecha_modificacion: Optional[float] = None
+    origen_completo: str = ""  # 🆕 v14.1
+    ruta_remota: str = ""  # 🆕 v15.4: para el manifiesto incremental
+    tamano: Optional[int] = None
+    # 🆕 v15.4: Buffer de la descarga en memoria (ruta_local es entonces solo el nombre de referencia)
+    contenido: Optional[IO[bytes]] = field(default=None, repr=False, compare=False)
+    # 🆕 v15.4: Métricas de la descarga (bytes, segundos, reanudaciones)
+    transferencia: Optional[Transferencia] = field(default=None, repr=False, compare=False)
+
+    def liberar(self):
+        """Cierra el buffer de la descarga en memoria, si lo hay."""
+        if self.contenido is not None:
+            self.contenido.close()
+            self.contenido = None
+
+    @property
+    def origen_texto(self) -> str:
+        if self.numero:
+            return f"{self.origen.value} {self.numero}"
+        return self.origen.value
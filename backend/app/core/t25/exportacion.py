@@ -0,0 +1,333 @@
+"""
+Exportación de resultados
+=========================
+
+Consolidado final (XLSX por bloques en modo write_only, CSV y Parquet desde
+el almacén intermedio) y libro de alertas separado por categorías. Los
+archivos se escriben en `carpeta` y las funciones retornan su ruta.
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+from app.services.almacen_intermedio import crear_almacen_intermedio, parquet_disponible
+
+MAX_FILAS_POR_HOJA = 500_000
+
+def exportar_consolidado_multisheet(df: pd.DataFrame, nombre_base: str, log=None, nombre_legible: str = None,
+                                    carpeta: str = '.') -> str:
+    """Exporta consolidado dividiendo en múltiples hojas si es necesario."""
+    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M')
+    if nombre_legible:
+        archivo = f'{nombre_legible}_{timestamp}.xlsx'
+    else:
+        archivo = f'{nombre_base}_{timestamp}.xlsx'
+    ruta = os.path.join(carpeta, archivo)
+
+    def _log(msg, level='info'):
+        if log:
+            getattr(log, level, log.info)(msg)
+        else:
+            print(msg)
+
+    total_filas = len(df)
+    num_hojas = (total_filas // MAX_FILAS_POR_HOJA) + (1 if total_filas % MAX_FILAS_POR_HOJA > 0 else 0)
+
+    _log(f'Exportando {total_filas:,} registros a {num_hojas} hoja(s)...')
+
+    try:
+        with pd.ExcelWriter(ruta, engine='openpyxl') as writer:
+            for i in range(num_hojas):
+                inicio = i * MAX_FILAS_POR_HOJA
+                fin = min((i + 1) * MAX_FILAS_POR_HOJA, total_filas)
+                registros_hoja = fin - inicio
+
+                if num_hojas == 1:
+                    hoja_nombre = 'CONSOLIDADO'
+                else:
+                    hoja_nombre = f'CONSOLIDADO_{i + 1}'
+
+                _log(f'   📊 Hoja \'{hoja_nombre}\': filas {inicio + 1:,} a {fin:,} ({registros_hoja:,} registros)')
+
+                df.iloc[inicio:fin].to_excel(
+                    writer,
+                    sheet_name=hoja_nombre,
+                    index=False,
+                    freeze_panes=(1, 0)
+                )
+
+        tamaño = os.path.getsize(ruta)
+        tamaño_str = f'{tamaño/1024/1024:.1f} MB' if tamaño > 1024*1024 else f'{tamaño/1024:.1f} KB'
+
+        _log(f'✅ Exportado: {archivo}')
+        _log(f'   • Tamaño: {tamaño_str}')
+        _log(f'   • Hojas: {num_hojas}')
+        _log(f'   • Total registros: {total_filas:,}')
+
+        return ruta
+
+    except Exception as e:
+        _log(f'❌ Error exportando: {str(e)}', 'error')
+        raise
+
+# 🆕 v15.4: EXPORTACIÓN POR BLOQUES DESDE EL ALMACÉN INTERMEDIO (memoria constante)
+FILAS_POR_BLOQUE_EXPORTACION = 50_000
+
+def exportar_consolidado_streaming(almacen, nombre_base: str, log=None, nombre_legible: str = None,
+                                   total_filas: Optional[int] = None, carpeta: str = '.') -> str:
+    """🆕 v15.4: Exporta el consolidado leyendo el almacén intermedio (Parquet o
+    CSV temporal) por bloques y escribiendo en un libro write_only de openpyxl.
+
+    Produce las mismas hojas que exportar_consolidado_multisheet (CONSOLIDADO o
+    CONSOLIDADO_n cada MAX_FILAS_POR_HOJA filas, encabezado con el estilo de
+    pandas y panel congelado) sin cargar nunca el consolidado completo.
+    """
+    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M')
+    if nombre_legible:
+        archivo = f'{nombre_legible}_{timestamp}.xlsx'
+    else:
+        archivo = f'{nombre_base}_{timestamp}.xlsx'
+    ruta = os.path.join(carpeta, archivo)
+
+    def _log(msg, level='info'):
+        if log:
+            getattr(log, level, log.info)(msg)
+        else:
+            print(msg)
+
+    if total_filas is None:
+        total_filas = almacen.contar_filas()
+    num_hojas = (total_filas // MAX_FILAS_POR_HOJA) + (1 if total_filas % MAX_FILAS_POR_HOJA > 0 else 0)
+
+    _log(f'Exportando {total_filas:,} registros a {num_hojas} hoja(s)...')
+
+    # Mismo estilo de encabezado que pandas.DataFrame.to_excel
+    lado = Side(style='thin')
+    fuente_enc = Font(bold=True)
+    borde_enc = Border(left=lado, right=lado, top=lado, bottom=lado)
+    alineacion_enc = Alignment(horizontal='center', vertical='top')
+
+    try:
+        wb = Workbook(write_only=True)
+        hoja = None
+        filas_en_hoja = 0
+        n_hoja = 0
+        escritas = 0
+
+        for bloque in almacen.leer_bloques(FILAS_POR_BLOQUE_EXPORTACION):
+            bloque = bloque.replace({'nan': '', 'NaN': ''}).fillna('')
+            encabezado = [str(c) for c in bloque.columns]
+
+            for fila in bloque.itertuples(index=False, name=None):
+                if hoja is None or filas_en_hoja >= MAX_FILAS_POR_HOJA:
+                    n_hoja += 1
+                    hoja_nombre = 'CONSOLIDADO' if num_hojas <= 1 else f'CONSOLIDADO_{n_hoja}'
+                    inicio = (n_hoja - 1) * MAX_FILAS_POR_HOJA
+                    fin = min(n_hoja * MAX_FILAS_POR_HOJA, total_filas)
+                    _log(f'   📊 Hoja \'{hoja_nombre}\': filas {inicio + 1:,} a {fin:,} ({fin - inicio:,} registros)')
+
+                    hoja = wb.create_sheet(title=hoja_nombre)
+                    hoja.freeze_panes = 'A2'
+                    celdas = []
+                    for nombre_col in encabezado:
+                        celda = WriteOnlyCell(hoja, value=nombre_col)
+                        celda.font = fuente_enc
+                        celda.border = borde_enc
+                        celda.alignment = alineacion_enc
+                        celdas.append(celda)
+                    hoja.append(celdas)
+                    filas_en_hoja = 0
+
+                hoja.append(fila)
+                filas_en_hoja += 1
+                escritas += 1
+
+            del bloque
+
+        wb.save(ruta)
+
+        tamaño = os.path.getsize(ruta)
+        tamaño_str = f'{tamaño/1024/1024:.1f} MB' if tamaño > 1024*1024 else f'{tamaño/1024:.1f} KB'
+
+        _log(f'✅ Exportado: {archivo}')
+        _log(f'   • Tamaño: {tamaño_str}')
+        _log(f'   • Hojas: {n_hoja}')
+        _log(f'   • Total registros: {escritas:,}')
+
+        return ruta
+
+    except Exception as e:
+        _log(f'❌ Error exportando: {str(e)}', 'error')
+        raise
+
+def exportar_consolidado_csv_streaming(almacen, nombre_base: str, log=None, nombre_legible: str = None,
+                                       carpeta: str = '.') -> str:
+    """🆕 v15.4: Alternativa CSV de exportar_consolidado_streaming (también por bloques)."""
+    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M')
+    if nombre_legible:
+        archivo = f'{nombre_legible}_{timestamp}.csv'
+    else:
+        archivo = f'{nombre_base}_{timestamp}.csv'
+    ruta = os.path.join(carpeta, archivo)
+
+    total = 0
+    for i, bloque in enumerate(almacen.leer_bloques(FILAS_POR_BLOQUE_EXPORTACION)):
+        bloque = bloque.replace({'nan': '', 'NaN': ''})
+        bloque.to_csv(ruta, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                      encoding='utf-8-sig' if i == 0 else 'utf-8')
+        total += len(bloque)
+
+    tamaño = os.path.getsize(ruta)
+    tamaño_str = f'{tamaño/1024/1024:.1f} MB' if tamaño > 1024*1024 else f'{tamaño/1024:.1f} KB'
+
+    if log:
+        log.success(f'Exportado CSV: {archivo} ({tamaño_str}, {total:,} registros)')
+
+    return ruta
+
+def exportar_consolidado_parquet(almacen, nombre_base: str, log=None, nombre_legible: str = None,
+                                 carpeta: str = '.') -> Optional[str]:
+    """🆕 v15.4: Exporta el consolidado en Parquet (tipos del almacén intermedio).
+
+    Con almacén Parquet basta copiar el archivo (o unir sus partes); con el
+    CSV temporal se convierte por bloques. Retorna None si pyarrow no está instalado.
+    """
+    if not parquet_disponible():
+        if log:
+            log.warning('Exportación Parquet omitida: pyarrow no está instalado')
+        return None
+
+    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M')
+    if nombre_legible:
+        archivo = f'{nombre_legible}_{timestamp}.parquet'
+    else:
+        archivo = f'{nombre_base}_{timestamp}.parquet'
+    ruta = os.path.join(carpeta, archivo)
+
+    almacen.cerrar()
+    if almacen.formato == 'parquet':
+        almacen.copiar_a(ruta)
+    else:
+        destino = crear_almacen_intermedio(os.path.splitext(ruta)[0], 'parquet')
+        for bloque in almacen.leer_bloques(FILAS_POR_BLOQUE_EXPORTACION):
+            destino.agregar_lote(bloque)
+        destino.cerrar()
+
+    tamaño = os.path.getsize(ruta)
+    tamaño_str = f'{tamaño/1024/1024:.1f} MB' if tamaño > 1024*1024 else f'{tamaño/1024:.1f} KB'
+
+    if log:
+        log.success(f'Exportado Parquet: {archivo} ({tamaño_str})')
+
+    return ruta
+
+def exportar_consolidado_csv(df: pd.DataFrame, nombre_base: str, log=None, nombre_legible: str = None,
+                             carpeta: str = '.') -> str:
+    """Exporta consolidado a CSV."""
+    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M')
+    if nombre_legible:
+        archivo = f'{nombre_legible}_{timestamp}.csv'
+    else:
+        archivo = f'{nombre_base}_{timestamp}.csv'
+    ruta = os.path.join(carpeta, archivo)
+
+    df.to_csv(ruta, index=False, encoding='utf-8-sig')
+
+    tamaño = os.path.getsize(ruta)
+    tamaño_str = f'{tamaño/1024/1024:.1f} MB' if tamaño > 1024*1024 else f'{tamaño/1024:.1f} KB'
+
+    if log:
+        log.success(f'Exportado CSV: {archivo} ({tamaño_str}, {len(df):,} registros)')
+
+    return ruta
+
+# 🆕 v14.1: ALERTAS SEPARADAS POR HOJAS
+CATEGORIAS_ALERTAS = {
+    'CONTRATOS_NO_ENCONTRADOS': [
+        'CONTRATO_NO_ENCONTRADO_GO',
+        'SIN_CARPETA_TARIFAS',
+        'CONEXION'
+    ],
+    'HOJAS_SIN_SERVICIOS': [
+        'HOJA_NO_ENCONTRADA',
+        'TARIFA_SERVICIOS_NO_ENCONTRADA',
+        'COLUMNAS_NO_DETECTADAS',
+        'SEDES_NO_DETECTADAS'
+    ],
+    'FECHAS_FALTANTES': [
+        'FECHA_NO_ENCONTRADA',
+        'FECHA_FALTANTE_MAESTRA'
+    ],
+    'AMBULANCIAS_TRASLADOS': [
+        'CONTRATO_AMBULANCIA_MAESTRA',
+        'ARCHIVO_SOLO_AMBULANCIAS',
+        'ARCHIVO_SOLO_TRASLADOS',
+        'SOLO_TRASLADOS',
+        'CONTRATO_AMBULANCIA'
+    ],
+    'ANEXOS_FALTANTES': [
+        'SIN_ANEXO1',
+        'ACTA_FALTANTE',
+        'CARPETA_ACTAS_SIN_ANEXO'
+    ],
+    # 🆕 v15.0: Nueva categoría para formatos propios
+    'FORMATO_PROPIO': [
+        'FORMATO_PROPIO',
+        'SIN_FORMATO_POSITIVA'
+    ],
+    'ERRORES_PROCESAMIENTO': [
+        'ERROR_PROCESAMIENTO',
+        'ERROR_LECTURA',
+        'TIMEOUT'
+    ]
+}
+
+def exportar_alertas(todas_alertas: List[Dict], log, timestamp: str, carpeta: str = '.') -> str:
+    """Libro de alertas: TODAS_ALERTAS más una hoja por categoría y OTRAS_ALERTAS."""
+    nombre_alertas = f"Alertas_{timestamp}.xlsx"
+    ruta = os.path.join(carpeta, nombre_alertas)
+
+    try:
+        df_alertas = pd.DataFrame(todas_alertas)
+
+        with pd.ExcelWriter(ruta, engine='openpyxl') as writer:
+            if 'prioridad' in df_alertas.columns:
+                df_alertas_sorted = df_alertas.sort_values(['prioridad', 'tipo', 'contrato'])
+            else:
+                df_alertas_sorted = df_alertas.sort_values(['tipo', 'contrato'])
+
+            df_alertas_sorted.to_excel(writer, sheet_name='TODAS_ALERTAS', index=False)
+
+            for nombre_hoja, tipos in CATEGORIAS_ALERTAS.items():
+                df_categoria = df_alertas[df_alertas['tipo'].isin(tipos)]
+                if len(df_categoria) > 0:
+                    df_categoria.to_excel(writer, sheet_name=nombre_hoja[:31], index=False)
+
+            todos_tipos_categorizados = [t for tipos in CATEGORIAS_ALERTAS.values() for t in tipos]
+            df_otras = df_alertas[~df_alertas['tipo'].isin(todos_tipos_categorizados)]
+            if len(df_otras) > 0:
+                df_otras.to_excel(writer, sheet_name='OTRAS_ALERTAS', index=False)
+
+        log.success(f"Generado: {nombre_alertas}", f"{len(todas_alertas)} alertas en múltiples hojas")
+
+        print(f"\n📋 RESUMEN DE ALERTAS POR CATEGORÍA:")
+        for nombre_hoja, tipos in CATEGORIAS_ALERTAS.items():
+            count = len(df_alertas[df_alertas['tipo'].isin(tipos)])
+            if count > 0:
+                print(f"   • {nombre_hoja}: {count}")
+
+    except Exception as e:
+        log.error(f"Error generando alertas separadas: {str(e)}")
+        df_alertas = pd.DataFrame(todas_alertas)
+        if 'prioridad' in df_alertas.columns:
+            df_alertas = df_alertas.sort_values(['prioridad', 'tipo', 'contrato'])
+        df_alertas.to_excel(ruta, index=False)
+        log.warning(f"Generado archivo simple: {nombre_alertas}")
+
+    return ruta
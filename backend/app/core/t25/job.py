@@ -0,0 +1,1431 @@
+"""
+Ejecución de un trabajo del consolidador
+========================================
+
+run_job(JobParams) -> JobResult ejecuta un trabajo completo: arranque
+(pruebas v14.1, clasificador ML, maestra), selección de contratos, conexión
+SFTP, procesamiento (secuencial o con workers por fork), ETL ML por lotes y
+generación de archivos.
+
+Importar este módulo no tiene efectos: no lee variables de entorno, no
+cambia el directorio de trabajo ni se conecta a nada. Todo lo que escribe el
+trabajo (consolidado, alertas, resumen, temporales y carpetas de trabajo)
+queda dentro de JobParams.carpeta_salida, junto con el manifiesto
+artefactos.json de los archivos generados (app.services.artefactos). Las
+cachés van a JobParams.carpeta_cache (por defecto <carpeta_salida>/.cache) y
+pueden compartirse entre trabajos que corren a la vez.
+"""
+
+import gc
+import os
+import shutil
+import sys
+import time
+import warnings
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from app.services import precarga
+from app.services.almacen_intermedio import EsquemaIncompatible, crear_almacen_intermedio
+from app.services.artefactos import escribir_manifiesto
+from app.services.cache_parseo import CacheParseo
+from app.services.eventos import CanalEventos
+from app.services.manifiesto_ejecuciones import ManifiestoEjecuciones
+from app.services.transferencias_sftp import MetricasTransferencias
+
+from .buscador import BuscadorAnexos
+from .cancelacion import Cancelacion, TrabajoCancelado
+from .clasificador import (
+    ClasificadorTextoMedico,
+    ETLConsolidadoT25_ML,
+    cargar_caches_ml,
+    crear_etl_ml,
+    guardar_caches_ml
+)
+from .config import Alerta, ArchivoAnexo, Config, TipoAlerta
+from .exportacion import (
+    MAX_FILAS_POR_HOJA,
+    exportar_alertas,
+    exportar_consolidado_csv_streaming,
+    exportar_consolidado_parquet,
+    exportar_consolidado_streaming
+)
+from .logger import Logger, LoggerDiferido
+from .maestra import Maestra, cargar_maestra, obtener_fecha_acuerdo
+from .procesador import ProcesadorAnexo, version_extraccion
+from .pipeline import AdelantoContratos
+from .progreso import ETAPAS, MedidorEtapas, MedidorProgreso
+from .punto_control import PuntoControl
+from .pruebas import ejecutar_pruebas_v14_1, mostrar_funciones_corregidas
+from .sftp import SFTPClient
+
+MODOS = ('ESPECIFICO', 'POR_ANO', 'COMPLETO')
+
+# 🆕 v15.1: BATCH PROCESSING PARA EVITAR OOM
+BATCH_SIZE = 500  # Reducido a 500 (Ultra-conservative mode)
+# 🆕 v15.2: Flushing de alertas
+ALERT_BATCH_SIZE = 2000
+
+
+@dataclass
+class JobParams:
+    """Parámetros de un trabajo del consolidador."""
+    maestra: str
+    modo: str = 'COMPLETO'  # ESPECIFICO, POR_ANO o COMPLETO
+    ano: str = ''
+    numero: str = ''
+    carpeta_salida: str = './outputs'
+    workers: int = 1
+    config: Config = field(default_factory=Config)
+    eventos: str = ''  # 🆕 v15.4: archivo JSON-lines del canal de eventos (vacío = sin eventos)
+    nivel_log: str = 'DEBUG'  # 🆕 v15.4: DEBUG, INFO, WARNING o ERROR
+    cancelar: str = ''  # 🆕 v15.4: archivo cuya existencia cancela el trabajo (vacío = no cancelable)
+    reanudar: str = ''  # 🆕 v15.4: run_id de un trabajo interrumpido a retomar desde su punto de control
+    carpeta_cache: str = ''  # 🆕 v15.4: cachés compartidas entre trabajos (vacío = <carpeta_salida>/.cache)
+
+    @classmethod
+    def desde_entorno(cls, entorno: Optional[Mapping[str, str]] = None) -> "JobParams":
+        """Parámetros desde las variables CONSOLIDADOR_* (ver consolidador_t25_parametrizado.py)."""
+        entorno = os.environ if entorno is None else entorno
+        try:
+            workers = max(1, int(entorno.get('CONSOLIDADOR_WORKERS', '1') or 1))
+        except ValueError:
+            workers = 1
+        return cls(
+            maestra=entorno.get('CONSOLIDADOR_MAESTRA', ''),
+            modo=entorno.get('CONSOLIDADOR_MODO', 'COMPLETO'),
+            ano=entorno.get('CONSOLIDADOR_ANO', ''),
+            numero=entorno.get('CONSOLIDADOR_NUMERO', ''),
+            carpeta_salida=entorno.get('CONSOLIDADOR_OUTPUT', './outputs'),
+            workers=workers,
+            config=Config.desde_entorno(entorno),
+            eventos=entorno.get('CONSOLIDADOR_EVENTOS', ''),
+            nivel_log=entorno.get('CONSOLIDADOR_LOG_NIVEL', 'DEBUG') or 'DEBUG',
+            cancelar=entorno.get('CONSOLIDADOR_CANCELAR', ''),
+            reanudar=entorno.get('CONSOLIDADOR_RESUME', ''),
+            carpeta_cache=entorno.get('CONSOLIDADOR_CACHE', '')
+        )
+
+    def validar(self):
+        """Lanza ValueError o FileNotFoundError si faltan parámetros obligatorios."""
+        if not self.maestra:
+            raise ValueError("Variable CONSOLIDADOR_MAESTRA no definida")
+        if not os.path.exists(self.maestra.strip('"\'')):
+            raise FileNotFoundError(f"Archivo de maestra no encontrado: {self.maestra}")
+        if self.modo not in MODOS:
+            raise ValueError(f"Modo no válido: {self.modo}")
+
+    def ruta_cache(self, *partes: str) -> str:
+        """Ruta dentro de la carpeta de cachés del trabajo."""
+        carpeta = self.carpeta_cache or os.path.join(self.carpeta_salida, '.cache')
+        return os.path.join(os.path.abspath(carpeta), *partes)
+
+
+@dataclass
+class JobResult:
+    """Resultado de run_job()."""
+    modo: str
+    contratos: int = 0
+    contratos_exitosos: int = 0
+    registros: int = 0
+    alertas: int = 0
+    archivos: List[str] = field(default_factory=list)
+    resumen: List[Dict[str, Any]] = field(default_factory=list)
+    duracion: float = 0.0
+    manifiesto: str = ''  # 🆕 v15.4: ruta de artefactos.json
+
+    @property
+    def exito(self) -> bool:
+        return self.contratos > 0 and self.contratos_exitosos > 0
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ARRANQUE: PRUEBAS, CONFIGURACIÓN, CLASIFICADOR ML Y MAESTRA
+# ══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class _Arranque:
+    etl_ml: Optional[ETLConsolidadoT25_ML]
+    maestra: Maestra
+
+
+def _arrancar(params: JobParams, log: Logger, salida: str) -> _Arranque:
+    """Pasos 1-3: lo que el servicio pre-calentado deja cargado (ver precargar)."""
+    config = params.config
+
+    mostrar_funciones_corregidas()
+    # 🆕 v15.4: Una vez por proceso (en el servicio pre-calentado, una sola vez)
+    precarga.obtener('pruebas_v14_1', ejecutar_pruebas_v14_1)
+
+    log.header("CONSOLIDADOR T25 v14.1", "Sistema de Consolidación de Tarifas - POSITIVA")
+    log.success("Sistema de logging inicializado")
+
+    log.step(1, 6, "CARGANDO CONFIGURACIÓN")
+    log.indent()
+    log.success("Librerías importadas correctamente")
+    log.info("Configuración SFTP", f"{config.HOST}:{config.PORT}")
+    log.info("Timeout por archivo", f"{config.TIMEOUT_ARCHIVO}s")
+    log.info("Máximo de sedes", f"{config.MAX_SEDES}")
+    log.success("Clases y configuración definidas")
+    log.dedent()
+
+    # 🆕 v15.4: Clasificador entrenado una vez por proceso
+    etl_ml = crear_etl_ml(lambda: precarga.obtener('clasificador_ml', ClasificadorTextoMedico))
+
+    # 🆕 v15.4: Persistencia de las cachés del clasificador entre ejecuciones
+    if etl_ml is not None and config.INCREMENTAL:
+        n_cache_ml = cargar_caches_ml(etl_ml, params.ruta_cache('clasificador_ml.json'))
+        if n_cache_ml:
+            log.info("♻️ Caché del clasificador cargada", f"{n_cache_ml:,} entradas")
+
+    log.step(2, 6, "CARGANDO UTILIDADES v14.1")
+    log.indent()
+    log.success("🆕 Función detectar_formato_real agregada")
+    log.success("Funciones de lectura Excel")
+    log.success("Funciones de clasificación de hojas")
+    log.success("Funciones de normalización")
+    log.success("Funciones de detección de patrones")
+
+    log.success("Validación semántica v14.1 cargada")
+    log.dedent()
+
+    log.step(3, 6, "CARGAR MAESTRA DE CONTRATOS")
+
+    maestra = cargar_maestra(params.maestra, log)
+
+    return _Arranque(etl_ml, maestra)
+
+
+def precargar(params: JobParams, log: Optional[Logger] = None):
+    """Ejecuta solo el arranque (pruebas, clasificador ML, maestra e índice).
+
+    Lo usa el servicio pre-calentado: los objetos quedan en
+    app.services.precarga y los trabajos que corren en un fork del proceso
+    los encuentran ya construidos.
+    """
+    params.validar()
+    log = log or Logger(verbose=True)
+    salida = os.path.abspath(params.carpeta_salida)
+    os.makedirs(salida, exist_ok=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        _arrancar(params, log, salida)
+    log.success("Precarga completada")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SELECCIÓN DE CONTRATOS
+# ══════════════════════════════════════════════════════════════════════════════
+
+def seleccionar_contratos(params: JobParams, maestra: Maestra) -> Tuple[List[Dict[str, str]], str]:
+    """Contratos a procesar según el modo y nombre de su carpeta de trabajo."""
+    cols = maestra.cols
+    df_prestadores = maestra.df_prestadores
+    contratos: List[Dict[str, str]] = []
+
+    if params.modo == "ESPECIFICO":
+        contratos = [{'numero': params.numero, 'ano': params.ano}]
+        return contratos, f"trabajo_{params.numero}_{params.ano}"
+
+    if params.modo == "POR_ANO":
+        if cols.numero_contrato and cols.ano_contrato:
+            df_filtrado = df_prestadores[
+                df_prestadores[cols.ano_contrato].astype(str).str.replace('.0', '', regex=False) == params.ano
+            ]
+            for _, row in df_filtrado.iterrows():
+                n = row[cols.numero_contrato]
+                if pd.notna(n):
+                    contratos.append({'numero': str(int(n)), 'ano': params.ano})
+        return contratos, f"trabajo_ano_{params.ano}"
+
+    if cols.numero_contrato and cols.ano_contrato:
+        for _, row in df_prestadores.iterrows():
+            n, a = row[cols.numero_contrato], row[cols.ano_contrato]
+            if pd.notna(n) and pd.notna(a):
+                contratos.append({'numero': str(int(n)), 'ano': str(int(a))})
+    return contratos, "trabajo_completo"
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PROCESAMIENTO
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _liberar_descargas(archivos: List, carpeta: Optional[str]):
+    """🆕 v15.4: Cierra los buffers de las descargas en memoria y borra la carpeta del contrato."""
+    for arch in archivos:
+        if isinstance(arch, ArchivoAnexo):
+            arch.liberar()
+    if carpeta:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+class _Ejecucion:
+    """Estado de un trabajo en curso: componentes compartidos y acumuladores.
+
+    Los workers (fork) heredan la instancia activa en _EJECUCION y solo usan
+    procesar_contrato(); la integración de resultados ocurre siempre en el
+    proceso principal y en el orden de los contratos.
+    """
+
+    def __init__(self, params: JobParams, log: Logger, salida: str, arranque: _Arranque,
+                 contratos: List[Dict[str, str]], carpeta_trabajo: str, eventos: CanalEventos,
+                 cancelacion: Cancelacion, run_id: str):
+        self.params = params
+        self.eventos = eventos
+        self.cancelacion = cancelacion
+        self.config = params.config
+        self.log = log
+        self.salida = salida
+        self.etl_ml = arranque.etl_ml
+        self.maestra = arranque.maestra
+        self.contratos = contratos
+        self.carpeta_trabajo = carpeta_trabajo
+
+        # 🆕 v15.4: Punto de control tras cada contrato (CONSOLIDADOR_RESUME=run_id)
+        self.run_id = run_id
+        self.firma = PuntoControl.firma(params.modo, params.ano, params.numero, contratos)
+        self.punto_control = PuntoControl(os.path.join(salida, '.checkpoints', run_id))
+        self.contratos_integrados = 0
+
+        # 🆕 v15.4: Caché de parseo compartida (también por los workers); se
+        # desactiva junto con el modo incremental
+        self.cache_parseo = (
+            CacheParseo(params.ruta_cache('anexos'), version_extraccion(self.config))
+            if self.config.INCREMENTAL else None
+        )
+        self.manifiesto: Optional[ManifiestoEjecuciones] = None
+
+        self.almacen = None
+        self.batch_buffer: List[Dict] = []
+        self.total_registros_procesados = 0
+        self.temp_alertas_file = ""
+        self.alertas_header_written = False
+        self.todas_alertas: List[Dict] = []  # Se usa como buffer
+        self.alertas_set = set()
+        self.resumen_contratos: List[Dict] = []
+        self.archivos_no_positiva: List[Dict] = []
+        self.contratos_sin_fecha = set()
+        self.fechas_ok = 0
+        self.fechas_no = 0
+        self.contratos_reutilizados = 0
+        self.medidor: Optional[MedidorProgreso] = None
+        self.etapas = MedidorEtapas()
+        self.worker: Dict[str, Any] = {}
+
+    def procesar_y_guardar_batch(self, buffer: List[Dict]) -> Tuple[bool, int]:
+        if not buffer: return False, 0
+
+        try:
+            df_batch = pd.DataFrame(buffer)
+
+            # Aplicar ETL ML si está disponible
+            if self.etl_ml:
+                # Usar un nombre genérico para el log por batch
+                df_batch = self.etl_ml.procesar_dataframe(df_batch, f"Batch Procesamiento")
+
+            # Guardar (un row group por batch en Parquet; la limpieza de formatos
+            # numéricos - quitar .0 y nulos - la aplica el almacén)
+            self.almacen.agregar_lote(df_batch)
+
+            # Limpieza agresiva de memoria
+            del df_batch
+            gc.collect()
+
+            return True, len(buffer)
+        except EsquemaIncompatible:
+            # 🆕 v15.4: Descartar el lote perdería columnas del consolidado
+            raise
+        except Exception as e:
+            self.log.error(f"Error guardando batch: {e}")
+            return False, 0
+
+    def guardar_alertas_batch(self, alertas_lista: List[Dict], es_primer_batch: bool):
+        if not alertas_lista: return
+        try:
+            df_a = pd.DataFrame(alertas_lista)
+            modo = 'w' if es_primer_batch else 'a'
+            header = es_primer_batch
+            df_a.to_csv(self.temp_alertas_file, mode=modo, header=header, index=False, encoding='utf-8-sig')
+        except Exception as e:
+            self.log.error(f"Error guardando batch de alertas: {e}")
+
+    def agregar_alerta_unica(self, alerta_dict: dict) -> Optional[Tuple]:
+        """Agrega la alerta si no estaba; retorna su clave si era nueva."""
+        clave = (alerta_dict['tipo'], alerta_dict['mensaje'], alerta_dict['contrato'], alerta_dict['archivo'])
+        if clave in self.alertas_set:
+            return None
+        self.alertas_set.add(clave)
+        self.todas_alertas.append(alerta_dict)
+        self.eventos.emitir('alert', tipo=alerta_dict['tipo'], mensaje=alerta_dict['mensaje'],
+                            contrato=alerta_dict['contrato'], archivo=alerta_dict['archivo'])
+        return clave
+
+    def guardar_punto_control(self, resultado: Dict, claves_alertas: List[Tuple]):
+        """🆕 v15.4: Registra el contrato integrado y el estado para poder retomar el trabajo.
+
+        El estado solo se reemplaza cuando el almacén puede fijar su posición
+        sin partir su archivo (ver conviene_posicion); mientras tanto la línea
+        del contrato queda en el diario a la espera del próximo estado.
+        """
+        linea = {
+            'contrato': resultado['contrato'],
+            'resumen': resultado['resumen'],
+            'no_positiva': resultado['no_positiva'],
+            'sin_fecha': resultado['sin_fecha'],
+            'alertas': [list(clave) for clave in claves_alertas]
+        }
+        if not self.almacen.conviene_posicion():
+            try:
+                self.punto_control.guardar(linea)
+            except OSError as e:
+                self.log.warning("No se pudo guardar el punto de control", str(e)[:40])
+            return
+
+        estado = {
+            'run_id': self.run_id,
+            'firma': self.firma,
+            'completados': self.contratos_integrados,
+            'total': len(self.contratos),
+            'almacen': self.almacen.posicion(),
+            'alertas_bytes': os.path.getsize(self.temp_alertas_file) if os.path.exists(self.temp_alertas_file) else 0,
+            'alertas_header_written': self.alertas_header_written,
+            'batch_buffer': self.batch_buffer,
+            'todas_alertas': self.todas_alertas,
+            'total_registros_procesados': self.total_registros_procesados,
+            'fechas_ok': self.fechas_ok,
+            'fechas_no': self.fechas_no,
+            'contratos_reutilizados': self.contratos_reutilizados,
+            'stats': dict(self.log.stats)
+        }
+        try:
+            self.punto_control.guardar(linea, estado)
+        except OSError as e:
+            self.log.warning("No se pudo guardar el punto de control", str(e)[:40])
+
+    def reanudar_punto_control(self) -> int:
+        """🆕 v15.4: Restaura el estado del último punto de control; retorna los contratos ya integrados.
+
+        Lanza ValueError si el punto de control es de otros parámetros o contratos.
+        """
+        cargado = self.punto_control.cargar()
+        if cargado is None:
+            self.log.warning(f"Sin punto de control para {self.run_id}", "se procesa desde el inicio")
+            return 0
+
+        estado, lineas = cargado
+        if estado['firma'] != self.firma:
+            raise ValueError(f"El punto de control {self.run_id} es de otros parámetros o contratos")
+
+        for linea in lineas:
+            if linea['resumen']:
+                self.resumen_contratos.append(linea['resumen'])
+            self.archivos_no_positiva.extend(linea['no_positiva'])
+            if linea['sin_fecha']:
+                self.contratos_sin_fecha.add(linea['contrato'])
+            self.alertas_set.update(tuple(clave) for clave in linea['alertas'])
+
+        # Lo escrito después del punto de control se descarta
+        self.almacen.reanudar(estado['almacen'])
+        if os.path.exists(self.temp_alertas_file):
+            if estado['alertas_bytes']:
+                os.truncate(self.temp_alertas_file, estado['alertas_bytes'])
+            else:
+                os.remove(self.temp_alertas_file)
+
+        self.alertas_header_written = estado['alertas_header_written']
+        self.batch_buffer = estado['batch_buffer']
+        self.todas_alertas = estado['todas_alertas']
+        self.total_registros_procesados = estado['total_registros_procesados']
+        self.fechas_ok = estado['fechas_ok']
+        self.fechas_no = estado['fechas_no']
+        self.contratos_reutilizados = estado['contratos_reutilizados']
+        self.log.stats.update(estado['stats'])
+        self.contratos_integrados = estado['completados']
+
+        self.log.success(f"Reanudando ejecución {self.run_id}",
+                         f"{self.contratos_integrados}/{len(self.contratos)} contratos ya integrados")
+        return self.contratos_integrados
+
+    def fin_contrato(self, resultado: Dict, exito: bool, registros: int, segundos: float, mensaje: str = ""):
+        """Cierra el contrato en el log y el canal de eventos; guarda su duración para el ETA."""
+        resultado['segundos'] = segundos
+        self.log.contract_end(exito, registros, segundos, mensaje)
+        self.eventos.emitir('contract_end', contrato=resultado['contrato'], exito=exito, registros=registros,
+                            segundos=round(segundos, 2), mensaje=mensaje)
+
+    def procesar_contrato(self, idx: int, contrato: Dict, cliente: SFTPClient, buscador: BuscadorAnexos,
+                          procesador: ProcesadorAnexo, carpeta_base: str) -> Dict:
+        """🆕 v15.4: Procesa UN contrato y retorna su resultado sin tocar el estado compartido.
+
+        El resultado (filas estampadas, alertas en orden, resumen, archivos no
+        POSITIVA y contadores de fechas) se integra después con
+        integrar_resultado_contrato(), igual en modo secuencial que con workers.
+        """
+        preparado = self.adquirir_contrato(idx, contrato, cliente, buscador, carpeta_base)
+        return self.extraer_contrato(preparado, procesador)
+
+    def adquirir_contrato(self, idx: int, contrato: Dict, cliente: SFTPClient, buscador: BuscadorAnexos,
+                          carpeta_base: str, diferido: bool = False) -> Dict:
+        """🆕 v15.4: Etapas SFTP de un contrato (navegar, listar, descargar).
+
+        Retorna el contrato preparado para extraer_contrato(). Loguea con el
+        logger del buscador; con `diferido` (descarga adelantada, ver
+        pipeline.py) sus eventos se guardan en el preparado en vez de emitirse.
+        """
+        LOG = buscador.log
+        indice = self.maestra.indice
+        manifiesto = self.manifiesto
+        numero, ano = contrato['numero'], contrato['ano']
+        id_c = f"{numero}-{ano}"
+
+        eventos_diferidos: List[Tuple[str, Dict]] = []
+
+        def emitir(evento: str, **datos):
+            if diferido:
+                eventos_diferidos.append((evento, datos))
+            else:
+                self.eventos.emitir(evento, **datos)
+
+        resultado = {
+            'contrato': id_c,
+            'filas': [],
+            'alertas': [],
+            'resumen': None,
+            'no_positiva': [],
+            'fechas_ok': 0,
+            'fechas_no': 0,
+            'sin_fecha': False,
+            'segundos': 0.0,
+            'archivos': 0,
+            'bytes_descargados': 0,
+            'etapas': dict.fromkeys(ETAPAS, 0.0)
+        }
+        alertas = resultado['alertas']
+        etapas = resultado['etapas']
+        preparado = {
+            'idx': idx,
+            'contrato': contrato,
+            'resultado': resultado,
+            'eventos': eventos_diferidos,
+            'fallo': None,
+            'segundos_adquisicion': 0.0
+        }
+
+        # 🆕 v15.4: Frontera de cancelación antes de cada contrato
+        self.cancelacion.verificar()
+
+        LOG.contract_start(idx, len(self.contratos), id_c)
+        emitir('contract_start', idx=idx, total=len(self.contratos), contrato=id_c)
+
+        registro = indice.buscar(numero, ano)
+        es_ambulancia, col_ambulancia, valor_ambulancia = registro.ambulancia if registro is not None else (False, "", "")
+        categoria_cuentas_medicas = registro.categoria_cuentas_medicas if registro is not None else ""
+        preparado['es_ambulancia'] = es_ambulancia
+        preparado['categoria_cuentas_medicas'] = categoria_cuentas_medicas
+
+        if es_ambulancia:
+            LOG.info(f"📋 Contrato identificado como AMBULANCIAS desde maestra")
+            LOG.info(f"   Columna: '{col_ambulancia}' → '{valor_ambulancia[:50]}...'")
+
+            alertas.append(Alerta(
+                tipo=TipoAlerta.CONTRATO_AMBULANCIA_MAESTRA,
+                mensaje=f"Identificado como contrato de ambulancias - Columna '{col_ambulancia}' contiene '{valor_ambulancia[:30]}'",
+                contrato=id_c
+            ).to_dict())
+
+        t_c = time.time()
+
+        # 🆕 v15.4: Se reconecta solo si la sesión falló (antes se forzaba cada N contratos)
+        LOG.indent()
+        LOG.info("🔄 Verificando conexión SFTP...")
+
+        conexion_ok = cliente.esta_activo()
+
+        if not conexion_ok:
+            LOG.debug(f"Sesión SFTP caída (contrato #{idx})")
+            if cliente.reconectar_forzado(silencioso=True):
+                conexion_ok = True
+                LOG.success("Conexión renovada")
+            else:
+                for intento in range(3):
+                    if cliente.conectar(True):
+                        conexion_ok = True
+                        break
+                    LOG.warning(f"Reintento de conexión {intento + 1}/3...")
+                    time.sleep(2)
+
+        etapas['navegar'] += time.time() - t_c
+
+        if not conexion_ok:
+            LOG.error("Sin conexión al servidor")
+            resultado['resumen'] = {
+                'contrato': id_c, 'exito': 'NO', 'registros': 0,
+                'mensaje': 'Sin conexión (Socket closed)', 'tiempo': 0
+            }
+            alertas.append(Alerta(
+                tipo=TipoAlerta.CONEXION,
+                mensaje='No se pudo conectar - Socket is closed',
+                contrato=id_c
+            ).to_dict())
+            LOG.dedent()
+            preparado['fallo'] = "Sin conexión"
+            preparado['segundos_adquisicion'] = time.time() - t_c
+            return preparado
+
+        carpeta = os.path.join(carpeta_base, f"t_{numero}_{ano}")
+        os.makedirs(carpeta, exist_ok=True)
+
+        buscador.limpiar_alertas()
+        buscador.set_contrato(id_c)
+
+        res = {'exito': False, 'archivos': [], 'mensaje': 'Error'}
+        contexto_manifiesto = categoria_cuentas_medicas or ""
+        seleccion_manifiesto = []
+        previos = None
+
+        for intento in range(3):
+            try:
+                t_etapa = time.time()
+                ok, msg, ruta = buscador.navegar_a_contrato(ano, numero)
+                etapas['navegar'] += time.time() - t_etapa
+                if ok:
+                    # 🆕 v15.4: Seleccionar primero; descargar solo si cambió algo
+                    t_etapa = time.time()
+                    res = buscador.seleccionar_anexos(id_c, ruta)
+                    if res['exito']:
+                        seleccion_manifiesto = [
+                            (a.ruta_remota, a.tamano, a.fecha_modificacion) for a in res['archivos']
+                        ]
+                        previos = None
+                        if manifiesto is not None:
+                            try:
+                                previos = manifiesto.buscar(id_c, seleccion_manifiesto, contexto_manifiesto)
+                            except Exception as e_man:
+                                LOG.warning("Manifiesto incremental no disponible", str(e_man)[:40])
+                    etapas['listar'] += time.time() - t_etapa
+                    if res['exito']:
+                        if previos is None:
+                            t_etapa = time.time()
+                            res = buscador.descargar_seleccion(res, carpeta, self.cancelacion)
+                            etapas['descargar'] += time.time() - t_etapa
+                            for a in res['archivos']:
+                                resultado['bytes_descargados'] += a.tamano or 0
+                                metricas = a.transferencia.to_dict() if a.transferencia is not None else {}
+                                emitir('file_downloaded', contrato=id_c, archivo=a.nombre,
+                                       **dict(metricas, bytes=a.tamano))
+                        else:
+                            LOG.info("♻️ Sin cambios desde la última ejecución", "se reutilizan las filas guardadas")
+                else:
+                    res = {'exito': False, 'archivos': [], 'mensaje': msg}
+                break
+            except TrabajoCancelado:
+                raise
+            except Exception as e:
+                if 'socket' in str(e).lower() and intento < 2:
+                    LOG.warning("Error de socket, reconectando...")
+                    cliente.reconectar_forzado(silencioso=True)
+                else:
+                    res['mensaje'] = str(e)[:30]
+                    break
+
+        for alerta in buscador.alertas:
+            alertas.append(alerta.to_dict())
+
+        preparado.update({
+            'res': res,
+            'previos': previos,
+            'seleccion_manifiesto': seleccion_manifiesto,
+            'contexto_manifiesto': contexto_manifiesto,
+            'carpeta': carpeta
+        })
+
+        if not res['exito']:
+            resultado['resumen'] = {
+                'contrato': id_c, 'exito': 'NO', 'registros': 0,
+                'mensaje': res['mensaje'], 'tiempo': round(time.time() - t_c, 1)
+            }
+
+            _liberar_descargas(res['archivos'], carpeta)
+
+            LOG.dedent()
+            preparado['fallo'] = res['mensaje']
+
+        preparado['segundos_adquisicion'] = time.time() - t_c
+        return preparado
+
+    def extraer_contrato(self, preparado: Dict, procesador: ProcesadorAnexo) -> Dict:
+        """🆕 v15.4: Etapas de CPU de un contrato adquirido (parsear y estampar).
+
+        Cierra el contrato (log y evento contract_end) y retorna su resultado.
+        """
+        LOG = self.log
+        resultado = preparado['resultado']
+
+        # Log y eventos de la descarga adelantada, en el orden de los contratos
+        if preparado.get('log') is not None:
+            LOG.volcar(preparado['log'])
+        for evento, datos in preparado['eventos']:
+            self.eventos.emitir(evento, **datos)
+
+        if preparado['fallo'] is not None:
+            self.fin_contrato(resultado, False, 0, preparado['segundos_adquisicion'], preparado['fallo'])
+            return resultado
+
+        t_e = time.time()
+        config = self.config
+        indice = self.maestra.indice
+        manifiesto = self.manifiesto
+        numero, ano = preparado['contrato']['numero'], preparado['contrato']['ano']
+        id_c = resultado['contrato']
+        alertas = resultado['alertas']
+        etapas = resultado['etapas']
+        res = preparado['res']
+        previos = preparado['previos']
+        seleccion_manifiesto = preparado['seleccion_manifiesto']
+
+        procesador.limpiar_alertas()
+        procesador.set_contrato(id_c)
+        procesador.set_categoria_cuentas_medicas(preparado['categoria_cuentas_medicas'])
+
+        regs = 0
+        es_prob = id_c in config.CONTRATOS_PROBLEMATICOS
+        timeout = config.TIMEOUT_CONTRATOS_PROBLEMATICOS if es_prob else config.TIMEOUT_ARCHIVO
+
+        resultados_manifiesto = []
+        resultado['archivos'] = len(res['archivos'])
+
+        for i_arch, arch in enumerate(res['archivos']):
+            nombre = arch.nombre if hasattr(arch, 'nombre') else arch.get('nombre', '')
+            ruta = arch.ruta_local if hasattr(arch, 'ruta_local') else arch.get('ruta_local', '')
+            origen = arch.origen_completo if hasattr(arch, 'origen_completo') else arch.get('origen', '')
+            fecha_mod = arch.fecha_modificacion if hasattr(arch, 'fecha_modificacion') else arch.get('fecha_modificacion')
+            contenido = getattr(arch, 'contenido', None)
+
+            self.cancelacion.verificar()
+
+            try:
+                t_etapa = time.time()
+                if previos is not None:
+                    previo = previos[i_arch]
+                    ok, servs, msg = previo['ok'], previo['filas'], previo['mensaje']
+                    for tipo_a, mensaje_a, archivo_a in previo['alertas']:
+                        procesador.agregar_alerta(TipoAlerta[tipo_a], mensaje_a, archivo_a)
+                else:
+                    n_alertas = len(procesador.alertas)
+                    ok, servs, msg = procesador.extraer_con_timeout(ruta, nombre, timeout, contenido)
+                    if contenido is not None:
+                        if str(msg).startswith('Timeout'):
+                            # El hilo del timeout puede seguir leyendo el buffer; lo cierra el GC
+                            arch.contenido = None
+                        else:
+                            arch.liberar()
+                    # Copia SIN estampar para el manifiesto
+                    resultados_manifiesto.append({
+                        'ok': ok,
+                        'mensaje': msg,
+                        'filas': [dict(s) for s in servs] if ok and servs else [],
+                        'alertas': [(a.tipo.name, a.mensaje, a.archivo) for a in procesador.alertas[n_alertas:]]
+                    })
+                etapas['parsear'] += time.time() - t_etapa
+
+                t_etapa = time.time()
+                if ok and servs:
+                    fecha, f_ok = obtener_fecha_acuerdo(indice, numero, ano, origen, fecha_mod)
+
+                    if f_ok:
+                        resultado['fechas_ok'] += 1
+                    else:
+                        resultado['fechas_no'] += 1
+                        resultado['sin_fecha'] = True
+                        alertas.append(Alerta(
+                            tipo=TipoAlerta.FECHA_NO_ENCONTRADA,
+                            mensaje=f"Sin fecha para {origen}",
+                            contrato=id_c,
+                            archivo=nombre
+                        ).to_dict())
+
+                    for s in servs:
+                        s['contrato'] = id_c
+                        s['origen_tarifa'] = origen
+                        s['fecha_de_acuerdo'] = fecha if fecha else ''
+                        resultado['filas'].append(s)
+
+                    regs += len(servs)
+                    self.eventos.emitir('rows_extracted', contrato=id_c, archivo=nombre, filas=len(servs))
+                    etapas['estampar'] += time.time() - t_etapa
+                else:
+                    # Verificar si es un archivo de paquetes (no incluir en No_Positiva, solo en alertas)
+                    es_paquete = 'PAQUETE' in msg.upper() if msg else False
+
+                    if es_paquete:
+                        # Solo agregar alerta, no a archivos_no_positiva
+                        alertas.append(Alerta(
+                            tipo=TipoAlerta.ARCHIVO_PAQUETE,
+                            mensaje=f"Archivo de paquetes: {msg}",
+                            contrato=id_c,
+                            archivo=nombre
+                        ).to_dict())
+                    else:
+                        resultado['no_positiva'].append({
+                            'contrato': id_c,
+                            'archivo': nombre,
+                            'motivo': msg
+                        })
+
+            except Exception as e:
+                resultado['no_positiva'].append({
+                    'contrato': id_c,
+                    'archivo': nombre,
+                    'motivo': str(e)[:50]
+                })
+
+        for alerta in procesador.alertas:
+            alertas.append(alerta.to_dict())
+
+        # 🆕 v15.4: Registrar la selección si se procesó completa y sin timeouts
+        resultado['reutilizado'] = previos is not None
+        if (manifiesto is not None and previos is None and seleccion_manifiesto
+                and len(resultados_manifiesto) == len(seleccion_manifiesto)
+                and not any(str(r['mensaje'] or '').startswith('Timeout') for r in resultados_manifiesto)):
+            try:
+                manifiesto.registrar(id_c, seleccion_manifiesto, resultados_manifiesto, preparado['contexto_manifiesto'])
+            except Exception as e_man:
+                LOG.warning("No se pudo actualizar el manifiesto", str(e_man)[:40])
+
+        exito = regs > 0
+        segundos = preparado['segundos_adquisicion'] + (time.time() - t_e)
+        resultado['resumen'] = {
+            'contrato': id_c,
+            'exito': 'SI' if exito else 'NO',
+            'registros': regs,
+            'mensaje': f'{regs} servicios' if exito else 'Sin servicios',
+            'tiempo': round(segundos, 1),
+            'es_ambulancia': 'SI' if preparado['es_ambulancia'] else 'NO'
+        }
+
+        _liberar_descargas(res['archivos'], preparado['carpeta'])
+
+        LOG.dedent()
+        LOG.dedent()
+        self.fin_contrato(resultado, exito, regs, segundos, '' if exito else 'Sin servicios')
+
+        return resultado
+
+    def integrar_resultado_contrato(self, resultado: Dict):
+        """🆕 v15.4: Integra el resultado de un contrato en los acumuladores.
+
+        Se llama SIEMPRE en el orden de los contratos, por lo que el almacén
+        intermedio, las alertas y el resumen salen en orden determinista
+        aunque los contratos se hayan procesado en paralelo.
+        """
+        t_integrar = time.time()
+        if resultado.get('reutilizado'):
+            self.contratos_reutilizados += 1
+
+        claves_nuevas = []
+        for alerta_dict in resultado['alertas']:
+            clave = self.agregar_alerta_unica(alerta_dict)
+            if clave is not None:
+                claves_nuevas.append(clave)
+
+        # Flush alertas si es necesario
+        if len(self.todas_alertas) >= ALERT_BATCH_SIZE:
+            self.guardar_alertas_batch(self.todas_alertas, not self.alertas_header_written)
+            self.alertas_header_written = True
+            self.todas_alertas = []
+            gc.collect()
+
+        for s in resultado['filas']:
+            self.batch_buffer.append(s)
+
+            # Procesar batch si está lleno
+            if len(self.batch_buffer) >= BATCH_SIZE:
+                self.log.info(f"💾 Guardando batch intermedio ({len(self.batch_buffer)} registros)...")
+                ok_batch, n_regs = self.procesar_y_guardar_batch(self.batch_buffer)
+                if ok_batch:
+                    self.total_registros_procesados += n_regs
+                self.batch_buffer = []  # Limpiar memoria
+                gc.collect()
+
+        self.fechas_ok += resultado['fechas_ok']
+        self.fechas_no += resultado['fechas_no']
+        if resultado['sin_fecha']:
+            self.contratos_sin_fecha.add(resultado['contrato'])
+
+        self.archivos_no_positiva.extend(resultado['no_positiva'])
+        if resultado['resumen']:
+            self.resumen_contratos.append(resultado['resumen'])
+
+        # 🆕 v15.4: Ritmo y ETA (media móvil de las duraciones por contrato)
+        self.medidor.registrar(resultado.get('segundos', 0.0), len(resultado['filas']),
+                               resultado.get('archivos', 0), resultado.get('bytes_descargados', 0))
+
+        self.contratos_integrados += 1
+        self.guardar_punto_control(resultado, claves_nuevas)
+
+        # 🆕 v15.4: Tiempo por etapa (el de integrar incluye el punto de control)
+        etapas = dict(resultado.get('etapas') or {})
+        etapas['integrar'] = time.time() - t_integrar
+        self.etapas.registrar(etapas)
+
+        self.eventos.emitir('progress', etapas=self.etapas.instantanea(), **self.medidor.instantanea())
+
+
+# 🆕 v15.4: MODO PARALELO - cada worker tiene su propio SFTPClient/BuscadorAnexos/ProcesadorAnexo.
+# El pool se crea con fork, así que los workers heredan la ejecución activa.
+_EJECUCION: Optional[_Ejecucion] = None
+
+
+def _inicializar_worker():
+    """Crea la sesión SFTP y los componentes propios del proceso worker."""
+    import multiprocessing.util as mp_util
+
+    ejecucion = _EJECUCION
+    log = ejecucion.log
+
+    # Líneas completas por escritura para que no se mezclen entre workers
+    try:
+        sys.stdout.reconfigure(line_buffering=True, write_through=False)
+    except Exception:
+        pass
+
+    cliente_w = SFTPClient(ejecucion.config, log)
+    cliente_w.conectar(silencioso=True)
+
+    carpeta_w = os.path.join(ejecucion.carpeta_trabajo, f"w{os.getpid()}")
+    os.makedirs(carpeta_w, exist_ok=True)
+
+    ejecucion.worker.update({
+        'cliente': cliente_w,
+        'buscador': BuscadorAnexos(cliente_w, ejecucion.config, log),
+        'procesador': ProcesadorAnexo(log, ejecucion.cache_parseo, ejecucion.config),
+        'carpeta': carpeta_w
+    })
+
+    mp_util.Finalize(cliente_w, cliente_w._cerrar, exitpriority=10)
+    mp_util.Finalize(None, shutil.rmtree, args=(carpeta_w, True), exitpriority=5)
+
+
+def _procesar_contrato_worker(tarea: Tuple[int, Dict]) -> Dict:
+    """Ejecuta procesar_contrato dentro de un worker y adjunta sus contadores."""
+    idx, contrato = tarea
+    ejecucion = _EJECUCION
+    log = ejecucion.log
+    cache_parseo = ejecucion.cache_parseo
+    w = ejecucion.worker
+
+    stats_antes = dict(log.stats)
+    reconexiones_antes = w['cliente'].reconexiones
+    cache_antes = (w['cliente'].cache.hits, w['cliente'].cache.misses)
+    parseo_antes = (cache_parseo.hits, cache_parseo.misses) if cache_parseo else (0, 0)
+    transferencias_antes = w['cliente'].transferencias.instantanea()
+
+    try:
+        resultado = ejecucion.procesar_contrato(
+            idx, contrato, w['cliente'], w['buscador'], w['procesador'], w['carpeta']
+        )
+    except TrabajoCancelado:
+        # Llega al proceso principal por imap, que termina el pool
+        raise
+    except Exception as e:
+        id_c = f"{contrato['numero']}-{contrato['ano']}"
+        log.error(f"Error inesperado en contrato {id_c}", str(e)[:60])
+        resultado = {
+            'contrato': id_c, 'filas': [], 'alertas': [], 'no_positiva': [],
+            'fechas_ok': 0, 'fechas_no': 0, 'sin_fecha': False,
+            'resumen': {
+                'contrato': id_c, 'exito': 'NO', 'registros': 0,
+                'mensaje': str(e)[:40], 'tiempo': 0
+            }
+        }
+
+    resultado['stats'] = {k: v - stats_antes.get(k, 0) for k, v in log.stats.items()}
+    resultado['reconexiones'] = w['cliente'].reconexiones - reconexiones_antes
+    transferencias = w['cliente'].transferencias.instantanea()
+    resultado['transferencias'] = {
+        k: transferencias[k] - transferencias_antes[k] for k in ('archivos', 'bytes', 'segundos', 'reanudaciones')
+    }
+    resultado['cache_directorios'] = (
+        w['cliente'].cache.hits - cache_antes[0],
+        w['cliente'].cache.misses - cache_antes[1]
+    )
+    if cache_parseo is not None:
+        resultado['cache_parseo'] = (
+            cache_parseo.hits - parseo_antes[0],
+            cache_parseo.misses - parseo_antes[1]
+        )
+    return resultado
+
+
+def obtener_contexto_paralelo():
+    """Retorna el contexto 'fork' de multiprocessing o None si no está disponible."""
+    import multiprocessing as mp
+    if 'fork' not in mp.get_all_start_methods():
+        return None
+    return mp.get_context('fork')
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# TRABAJO COMPLETO
+# ══════════════════════════════════════════════════════════════════════════════
+
+def run_job(params: JobParams, log: Optional[Logger] = None) -> JobResult:
+    """Ejecuta un trabajo del consolidador y retorna su resultado.
+
+    Lanza ValueError/FileNotFoundError si los parámetros no son válidos y
+    TrabajoCancelado si se pidió cancelarlo (ver cancelacion.py).
+    """
+    params.validar()
+    log = log or Logger(verbose=True, nivel=params.nivel_log)
+    inicio = time.time()
+    salida = os.path.abspath(params.carpeta_salida)
+    os.makedirs(salida, exist_ok=True)
+    eventos = CanalEventos(params.eventos)
+    cancelacion = Cancelacion(params.cancelar)
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            resultado = _ejecutar(params, log, salida, eventos, cancelacion)
+    except TrabajoCancelado:
+        # 🆕 v15.4: Cerrar SFTP y borrar carpeta de trabajo y temporales
+        cancelacion.limpiar()
+        log.warning("Trabajo cancelado", "se liberaron la sesión SFTP y los temporales")
+        eventos.emitir('job_end', exito=False, cancelado=True, segundos=round(time.time() - inicio, 1))
+        eventos.cerrar()
+        raise
+    except BaseException as e:
+        eventos.emitir('job_end', exito=False, error=str(e)[:200] or type(e).__name__,
+                       segundos=round(time.time() - inicio, 1))
+        eventos.cerrar()
+        raise
+
+    resultado.duracion = round(time.time() - inicio, 1)
+    eventos.emitir('job_end', exito=resultado.exito, contratos=resultado.contratos,
+                   exitosos=resultado.contratos_exitosos, registros=resultado.registros,
+                   alertas=resultado.alertas, segundos=resultado.duracion,
+                   manifiesto=resultado.manifiesto)
+    eventos.cerrar()
+    return resultado
+
+
+def _ejecutar(params: JobParams, log: Logger, salida: str, eventos: CanalEventos,
+              cancelacion: Cancelacion) -> JobResult:
+    global _EJECUCION
+
+    LOG = log
+    config = params.config
+    arranque = _arrancar(params, log, salida)
+
+    LOG.step(4, 6, "CONFIGURANDO CLIENTE SFTP v14.1")
+    LOG.indent()
+    LOG.success("Cliente SFTP v14.1 configurado")
+    LOG.success(f"🆕 Pool SFTP: hasta {config.MAX_CONEXIONES_SFTP} conexión(es) × {config.CANALES_POR_CONEXION_SFTP} canales")
+    LOG.dedent()
+
+    LOG.step(5, 6, "CONFIGURANDO BUSCADOR DE ANEXOS v14.1")
+    LOG.indent()
+    LOG.success("Buscador de anexos v14.1 configurado")
+    LOG.success("🆕 Búsqueda con cero inicial habilitada")
+    LOG.dedent()
+
+    LOG.step(6, 6, "CONFIGURANDO PROCESADOR DE ANEXOS v14.1")
+    LOG.indent()
+    LOG.success("Procesador de anexos v14.1 configurado")
+    LOG.success("🆕 Detección de columnas con prioridad estricta")
+    LOG.dedent()
+
+    LOG.success("Función obtener_fecha_acuerdo cargada")
+    LOG.success("Generador Excel cargado")
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # SELECCIÓN DE CONTRATOS
+    # ══════════════════════════════════════════════════════════════════════════
+
+    LOG.header("SELECCIÓN DE CONTRATOS")
+
+    CONTRATOS_A_PROCESAR, nombre_trabajo = seleccionar_contratos(params, arranque.maestra)
+    MODO_OPERACION = params.modo
+    CARPETA_TRABAJO = os.path.join(salida, nombre_trabajo)
+    RUN_ID = params.reanudar or f"{nombre_trabajo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    resultado_job = JobResult(modo=MODO_OPERACION, contratos=len(CONTRATOS_A_PROCESAR))
+    eventos.emitir('job_start', modo=MODO_OPERACION, contratos=len(CONTRATOS_A_PROCESAR),
+                   carpeta_trabajo=CARPETA_TRABAJO, run_id=RUN_ID)
+
+    LOG.indent()
+    if MODO_OPERACION == "ESPECIFICO":
+        LOG.success(f"Contrato seleccionado: {params.numero}-{params.ano}")
+    elif MODO_OPERACION == "POR_ANO":
+        LOG.success(f"Año seleccionado: {params.ano}", f"{len(CONTRATOS_A_PROCESAR)} contratos")
+    else:
+        LOG.success(f"Procesamiento completo", f"{len(CONTRATOS_A_PROCESAR)} contratos")
+
+    if CONTRATOS_A_PROCESAR:
+        os.makedirs(CARPETA_TRABAJO, exist_ok=True)
+        cancelacion.al_cancelar(lambda: shutil.rmtree(CARPETA_TRABAJO, ignore_errors=True))
+        LOG.info("Carpeta de trabajo", CARPETA_TRABAJO)
+        LOG.info("Ejecución (CONSOLIDADOR_RESUME)", RUN_ID)
+    LOG.dedent()
+
+    if not CONTRATOS_A_PROCESAR:
+        LOG.warning("No hay contratos seleccionados")
+        LOG.warning("No hay contratos para procesar")
+        return resultado_job
+
+    ejecucion = _Ejecucion(params, log, salida, arranque, CONTRATOS_A_PROCESAR, CARPETA_TRABAJO, eventos,
+                           cancelacion, RUN_ID)
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # CONEXIÓN AL SERVIDOR
+    # ══════════════════════════════════════════════════════════════════════════
+
+    LOG.header("CONEXIÓN AL SERVIDOR SFTP")
+
+    cliente = SFTPClient(config, LOG)
+    cancelacion.al_cancelar(cliente.desconectar)
+    buscador = BuscadorAnexos(cliente, config, LOG)
+    procesador = ProcesadorAnexo(LOG, ejecucion.cache_parseo, config)
+
+    if cliente.conectar():
+        LOG.info(f"Contratos a procesar: {len(CONTRATOS_A_PROCESAR)}")
+        LOG.info(f"Timeout por archivo: {config.TIMEOUT_ARCHIVO}s")
+    else:
+        # Cada contrato reintenta la conexión antes de procesarse
+        LOG.error("No se pudo conectar. Verifica la red y credenciales.")
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # PROCESAMIENTO PRINCIPAL v14.1 - RECONEXIÓN SOLO ANTE FALLOS (v15.4)
+    # ══════════════════════════════════════════════════════════════════════════
+
+    LOG.header("PROCESAMIENTO v14.1", f"Modo: {MODO_OPERACION} | {len(CONTRATOS_A_PROCESAR)} contratos")
+
+    LOG.start_time = time.time()
+    LOG.stats = {
+        'contratos_procesados': 0,
+        'contratos_exitosos': 0,
+        'archivos_descargados': 0,
+        'servicios_extraidos': 0,
+        'alertas_generadas': 0
+    }
+
+    # 🆕 v15.4: Temporales con el run_id para poder retomarlos
+    ejecucion.temp_alertas_file = os.path.join(salida, f"temp_alertas_{RUN_ID}.csv")
+
+    # 🆕 v15.4: Almacén intermedio columnar (Parquet) o CSV temporal si no hay pyarrow
+    ejecucion.almacen = crear_almacen_intermedio(
+        os.path.join(salida, f"temp_consolidado_{RUN_ID}"), config.FORMATO_INTERMEDIO
+    )
+    LOG.debug("Almacén intermedio", ejecucion.almacen.ruta)
+    eventos.emitir('temporales', rutas=[ejecucion.temp_alertas_file, ejecucion.almacen.ruta,
+                                        ejecucion.punto_control.carpeta])
+
+    def _borrar_temporales():
+        ejecucion.almacen.cerrar()
+        for ruta_temporal in [ejecucion.temp_alertas_file] + ejecucion.almacen.archivos():
+            if os.path.isfile(ruta_temporal):
+                os.remove(ruta_temporal)
+        ejecucion.punto_control.eliminar()
+    cancelacion.al_cancelar(_borrar_temporales)
+
+    # 🆕 v15.4: MANIFIESTO INCREMENTAL - contratos sin cambios reutilizan sus filas
+    if config.INCREMENTAL:
+        ejecucion.manifiesto = ManifiestoEjecuciones(
+            params.ruta_cache('manifiesto_t25.sqlite'),
+            version_extraccion(config)
+        )
+        LOG.debug("Modo incremental", ejecucion.manifiesto.ruta_db)
+
+    reconexiones_workers = 0
+    cache_hits_workers = cache_misses_workers = 0
+    parseo_hits_workers = parseo_misses_workers = 0
+    transferencias = MetricasTransferencias()
+    n_workers = min(params.workers, len(CONTRATOS_A_PROCESAR))
+    ctx_paralelo = obtener_contexto_paralelo() if n_workers > 1 else None
+
+    if n_workers > 1 and ctx_paralelo is None:
+        LOG.warning("Modo paralelo no disponible en esta plataforma", "procesando en secuencia")
+
+    ejecucion.medidor = MedidorProgreso(len(CONTRATOS_A_PROCESAR), n_workers if ctx_paralelo is not None else 1)
+
+    # 🆕 v15.4: Retomar un trabajo interrumpido (solo faltan los contratos sin integrar)
+    contratos_previos = ejecucion.reanudar_punto_control() if params.reanudar else 0
+    if contratos_previos:
+        ejecucion.medidor.hechos = contratos_previos
+        eventos.emitir('progress', reanudados=contratos_previos, **ejecucion.medidor.instantanea())
+
+    if ctx_paralelo is not None:
+        LOG.info(f"⚡ Modo paralelo: {n_workers} workers (una sesión SFTP por worker)")
+
+        # La sesión del proceso principal no se hereda: cada worker abre la suya
+        try: cliente.desconectar()
+        except: pass
+
+        tareas = list(enumerate(CONTRATOS_A_PROCESAR, 1))[contratos_previos:]
+        _EJECUCION = ejecucion
+        pool = ctx_paralelo.Pool(processes=n_workers, initializer=_inicializar_worker)
+        try:
+            # imap conserva el orden de CONTRATOS_A_PROCESAR
+            for resultado in pool.imap(_procesar_contrato_worker, tareas, chunksize=1):
+                for k, v in resultado.get('stats', {}).items():
+                    LOG.stats[k] = LOG.stats.get(k, 0) + v
+                reconexiones_workers += resultado.get('reconexiones', 0)
+                hits_w, misses_w = resultado.get('cache_directorios', (0, 0))
+                cache_hits_workers += hits_w
+                cache_misses_workers += misses_w
+                hits_p, misses_p = resultado.get('cache_parseo', (0, 0))
+                parseo_hits_workers += hits_p
+                parseo_misses_workers += misses_p
+                transferencias.sumar(resultado.get('transferencias', {}))
+                ejecucion.integrar_resultado_contrato(resultado)
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            _EJECUCION = None
+    else:
+        tareas = list(enumerate(CONTRATOS_A_PROCESAR, 1))[contratos_previos:]
+        if config.CONTRATOS_ADELANTADOS > 0 and len(tareas) > 1:
+            # 🆕 v15.4: Descarga adelantada - el SFTP avanza con N+1 (y N+2) mientras se parsea N
+            LOG.info(f"⏩ Descarga adelantada: hasta {config.CONTRATOS_ADELANTADOS} contratos en cola")
+            log_descarga = LoggerDiferido(LOG)
+
+            def _adquirir(idx, contrato):
+                return ejecucion.adquirir_contrato(
+                    idx, contrato, cliente, buscador, CARPETA_TRABAJO, diferido=True
+                )
+
+            def _descartar(preparado):
+                _liberar_descargas((preparado.get('res') or {}).get('archivos', []), preparado.get('carpeta'))
+
+            cliente.log = buscador.log = log_descarga
+            try:
+                with AdelantoContratos(tareas, _adquirir, LOG, log_descarga, config.CONTRATOS_ADELANTADOS,
+                                       ejecucion.etapas, _descartar) as adelanto:
+                    for preparado in adelanto:
+                        ejecucion.integrar_resultado_contrato(ejecucion.extraer_contrato(preparado, procesador))
+            finally:
+                cliente.log = buscador.log = LOG
+        else:
+            for idx, contrato in tareas:
+                resultado = ejecucion.procesar_contrato(
+                    idx, contrato, cliente, buscador, procesador, CARPETA_TRABAJO
+                )
+                ejecucion.integrar_resultado_contrato(resultado)
+
+    # Procesar remanentes al final del loop
+    if ejecucion.batch_buffer:
+        LOG.info(f"💾 Guardando últimos {len(ejecucion.batch_buffer)} registros...")
+        ok_batch, n_regs = ejecucion.procesar_y_guardar_batch(ejecucion.batch_buffer)
+        if ok_batch:
+            ejecucion.total_registros_procesados += n_regs
+        ejecucion.batch_buffer = []
+        gc.collect()
+
+    LOG.stats_summary()
+
+    # 🆕 v15.4: El resumen pasa por el Logger (y su CONSOLIDADOR_LOG_NIVEL)
+    LOG.subheader("📊 RESUMEN DE PROCESAMIENTO")
+    LOG.indent()
+    LOG.info("Registros consolidados", f"{ejecucion.total_registros_procesados:,}")
+
+    # Flush final de alertas
+    if ejecucion.todas_alertas:
+        ejecucion.guardar_alertas_batch(ejecucion.todas_alertas, not ejecucion.alertas_header_written)
+        ejecucion.alertas_header_written = True
+        ejecucion.todas_alertas = []
+    LOG.info("Alertas generadas", f"{len(ejecucion.alertas_set)} (únicas)")
+    LOG.info("Archivos sin formato POSITIVA", f"{len(ejecucion.archivos_no_positiva)}")
+    LOG.info("Contratos sin fecha en maestra", f"{len(ejecucion.contratos_sin_fecha)}")
+    LOG.info("Fechas encontradas", f"{ejecucion.fechas_ok} | No encontradas: {ejecucion.fechas_no}")
+    LOG.info("Reconexiones SFTP", f"{cliente.reconexiones + reconexiones_workers}")
+    LOG.info("Caché de directorios SFTP", f"{cliente.cache.hits + cache_hits_workers} aciertos"
+                                          f" | {cliente.cache.misses + cache_misses_workers} consultas al servidor")
+    transferencias.sumar(cliente.transferencias.instantanea())
+    total_transferencias = transferencias.instantanea()
+    if total_transferencias['archivos']:
+        LOG.info("Descargas SFTP", f"{total_transferencias['archivos']} archivos"
+                                   f" | {total_transferencias['bytes'] / 1024 / 1024:,.1f} MB en {total_transferencias['segundos']:,.1f} s"
+                                   f" ({total_transferencias['kb_s']:,.1f} KB/s) | {total_transferencias['reanudaciones']} reanudadas")
+    if ejecucion.manifiesto is not None:
+        LOG.info("Contratos sin cambios (filas reutilizadas)", f"{ejecucion.contratos_reutilizados}")
+    if ejecucion.cache_parseo is not None:
+        LOG.info("Caché de parseo de anexos", f"{ejecucion.cache_parseo.hits + parseo_hits_workers} aciertos"
+                                              f" | {ejecucion.cache_parseo.misses + parseo_misses_workers} archivos parseados")
+        # 🆕 v15.4: Sin esto la caché crece con cada anexo distinto y cada versión del parser
+        poda = ejecucion.cache_parseo.podar(config.MB_CACHE_ANEXOS, config.DIAS_CACHE_ANEXOS)
+        if poda['eliminadas']:
+            LOG.info("Caché de parseo podada", f"{poda['eliminadas']} entradas eliminadas"
+                                               f" | {poda['conservadas']} conservadas ({poda['bytes'] / 1024 / 1024:,.1f} MB)")
+    etl_ml = ejecucion.etl_ml
+    if etl_ml is not None:
+        for nombre_cache, cache_ml in (('clasificación', etl_ml.clasificador.cache),
+                                       ('porcentajes', etl_ml.cache_porcentaje),
+                                       ('manuales', etl_ml.cache_manual)):
+            LOG.info(f"Caché ML ({nombre_cache})", f"{cache_ml.hits:,} aciertos | {cache_ml.misses:,} cálculos")
+        if config.INCREMENTAL:
+            guardar_caches_ml(etl_ml, params.ruta_cache('clasificador_ml.json'))
+
+    ritmo = ejecucion.medidor.instantanea()
+    LOG.info("Ritmo", f"{ritmo['filas_por_s']:,} filas/s | {ritmo['archivos_por_s']} archivos/s"
+                      f" | {ritmo['bytes_sftp_por_s'] / 1024:,.1f} KB/s SFTP")
+
+    # 🆕 v15.4: Tiempo por etapa y ocupación de la cola de descargas adelantadas
+    etapas = ejecucion.etapas.instantanea()
+    if etapas['segundos']:
+        LOG.info("Etapas (s)", " | ".join(f"{etapa} {segundos:,.1f}" for etapa, segundos in etapas['segundos'].items()))
+    if 'cola' in etapas:
+        cola = etapas['cola']
+        LOG.info("Cola de descargas", f"{cola['media']} contratos en promedio (máx. {cola['max']})"
+                                      f" | parseo esperando {cola['espera_parseo_s']:,.1f} s"
+                                      f" | descarga esperando {cola['espera_descarga_s']:,.1f} s")
+
+    contratos_ambulancia = sum(1 for r in ejecucion.resumen_contratos if r.get('es_ambulancia') == 'SI')
+    if contratos_ambulancia > 0:
+        LOG.info("Contratos de ambulancias detectados", f"{contratos_ambulancia}")
+    LOG.dedent()
+
+    resultado_job.contratos_exitosos = LOG.stats['contratos_exitosos']
+    resultado_job.alertas = len(ejecucion.alertas_set)
+    resultado_job.resumen = ejecucion.resumen_contratos
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # GENERACIÓN DE ARCHIVOS v14.1 - ALERTAS SEPARADAS POR HOJAS
+    # ══════════════════════════════════════════════════════════════════════════
+
+    # Última frontera de cancelación: no se generan archivos de un trabajo cancelado
+    cancelacion.verificar()
+
+    LOG.header("GENERACIÓN DE ARCHIVOS v14.1")
+
+    archivos_generados = resultado_job.archivos
+
+    sufijos = {
+        'ESPECIFICO': f"{CONTRATOS_A_PROCESAR[0]['numero']}_{CONTRATOS_A_PROCESAR[0]['ano']}",
+        'POR_ANO': f"ANO_{CONTRATOS_A_PROCESAR[0]['ano']}",
+        'COMPLETO': 'COMPLETO'
+    }
+    suf = sufijos.get(MODO_OPERACION, 'X')
+    ts = datetime.now().strftime('%Y-%m-%d_%H-%M')
+
+    # Nombres legibles para archivos
+    nombres_legibles = {
+        'ESPECIFICO': f"Consolidado_Contrato_{CONTRATOS_A_PROCESAR[0]['numero']}",
+        'POR_ANO': f"Consolidado_Año_{CONTRATOS_A_PROCESAR[0]['ano']}",
+        'COMPLETO': 'Consolidado_Completo'
+    }
+    nombre_consolidado = nombres_legibles.get(MODO_OPERACION, 'Consolidado')
+
+    LOG.indent()
+
+    LOG.indent()
+
+    # 🆕 v15.4: El consolidado final se exporta por bloques desde el almacén
+    # intermedio (sin cargarlo completo en memoria)
+    almacen_intermedio = ejecucion.almacen
+    total_registros = 0
+    almacen_intermedio.cerrar()
+    if almacen_intermedio.existe():
+        try:
+            if ejecucion.total_registros_procesados > 0:
+                LOG.info("🔄 Preparando exportación por bloques...")
+                total_registros = almacen_intermedio.contar_filas()
+        except Exception as e:
+            LOG.error(f"Error leyendo almacén intermedio: {e}")
+    resultado_job.registros = total_registros
+
+    if total_registros > 0:
+        LOG.info(f"Total de registros a exportar: {total_registros:,}")
+
+        if total_registros > MAX_FILAS_POR_HOJA:
+            LOG.warning(f"⚠️ El consolidado tiene {total_registros:,} registros")
+            LOG.warning(f"   Se dividirá en múltiples hojas (máx {MAX_FILAS_POR_HOJA:,} por hoja)")
+
+        try:
+            archivo = exportar_consolidado_streaming(
+                almacen_intermedio,
+                f"CONSOLIDADO_{suf}",
+                log=LOG,
+                nombre_legible=nombre_consolidado,
+                total_filas=total_registros,
+                carpeta=salida
+            )
+            archivos_generados.append(archivo)
+        except Exception as e:
+            LOG.error(f"Error exportando consolidado: {str(e)}")
+            LOG.info("Intentando exportar a CSV como alternativa...")
+            try:
+                archivo_csv = exportar_consolidado_csv_streaming(
+                    almacen_intermedio, f"CONSOLIDADO_{suf}", log=LOG,
+                    nombre_legible=nombre_consolidado, carpeta=salida
+                )
+                archivos_generados.append(archivo_csv)
+            except Exception as e2:
+                LOG.error(f"Error exportando CSV: {str(e2)}")
+
+        if config.EXPORTAR_PARQUET:
+            try:
+                archivo_parquet = exportar_consolidado_parquet(
+                    almacen_intermedio, f"CONSOLIDADO_{suf}", log=LOG,
+                    nombre_legible=nombre_consolidado, carpeta=salida
+                )
+                if archivo_parquet:
+                    archivos_generados.append(archivo_parquet)
+            except Exception as e:
+                LOG.error(f"Error exportando Parquet: {str(e)}")
+
+    # 🆕 v14.1: ALERTAS SEPARADAS POR HOJAS
+    # Cargar alertas desde CSV temporal si existe
+    todas_alertas = ejecucion.todas_alertas
+    if os.path.exists(ejecucion.temp_alertas_file):
+        try:
+            df_alertas_full = pd.read_csv(ejecucion.temp_alertas_file, dtype=str)
+            todas_alertas = df_alertas_full.to_dict('records')  # Convertir para el proceso de separación
+        except:
+            pass
+
+    if todas_alertas:
+        archivos_generados.append(exportar_alertas(todas_alertas, LOG, ts, carpeta=salida))
+
+    if ejecucion.resumen_contratos:
+        nombre = f"Resumen_{ts}.xlsx"
+        pd.DataFrame(ejecucion.resumen_contratos).to_excel(os.path.join(salida, nombre), index=False)
+        LOG.success(f"Generado: {nombre}", f"{len(ejecucion.resumen_contratos)} contratos")
+        archivos_generados.append(os.path.join(salida, nombre))
+
+    if ejecucion.archivos_no_positiva:
+        nombre = f"Archivos_No_Positiva_{ts}.xlsx"
+        pd.DataFrame(ejecucion.archivos_no_positiva).to_excel(os.path.join(salida, nombre), index=False)
+        LOG.success(f"Generado: {nombre}", f"{len(ejecucion.archivos_no_positiva)} archivos")
+        archivos_generados.append(os.path.join(salida, nombre))
+
+    LOG.dedent()
+    LOG.info(f"Total archivos generados: {len(archivos_generados)}")
+
+    for ruta_archivo in archivos_generados:
+        eventos.emitir('artifact', nombre=os.path.basename(ruta_archivo), ruta=ruta_archivo,
+                       bytes=os.path.getsize(ruta_archivo) if os.path.exists(ruta_archivo) else None)
+
+    # 🆕 v15.4: Manifiesto de artefactos (la API lo lee en vez de buscar por fecha)
+    try:
+        resultado_job.manifiesto = escribir_manifiesto(salida, archivos_generados, run_id=RUN_ID,
+                                                       modo=MODO_OPERACION)
+    except OSError as e:
+        LOG.warning("No se pudo escribir el manifiesto de artefactos", str(e)[:40])
+
+    # Cerrar conexión SFTP
+    try:
+        cliente.desconectar()
+    except:
+        pass
+
+    # 🆕 v15.4: Trabajo terminado: en la carpeta quedan solo los artefactos
+    _borrar_temporales()
+
+    LOG.header("✅ CONSOLIDADOR T25 + ETL ML - PROCESO COMPLETO FINALIZADO",
+               f"{len(archivos_generados)} archivos generados (artefactos.json)")
+
+    return resultado_job
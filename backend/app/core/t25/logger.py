@@ -0,0 +1,271 @@
+"""
+Logging visual del consolidador
+===============================
+
+Logger con íconos, sangría por nivel y estadísticas de ejecución. Escribe
+en stdout, que es lo que la API muestra en vivo.
+"""
+
+import time
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🎨 SISTEMA DE LOGGING VISUAL
+# ══════════════════════════════════════════════════════════════════════════════
+
+class LogLevel(Enum):
+    """Niveles de logging con sus estilos visuales."""
+    INFO = ("ℹ️", "#2196F3", "info")
+    SUCCESS = ("✅", "#4CAF50", "success")
+    WARNING = ("⚠️", "#FF9800", "warning")
+    ERROR = ("❌", "#F44336", "error")
+    DEBUG = ("🔍", "#9E9E9E", "debug")
+    STEP = ("📌", "#673AB7", "step")
+    NAV = ("📂", "#795548", "nav")
+    FILE = ("📄", "#607D8B", "file")
+    DOWNLOAD = ("⬇️", "#00BCD4", "download")
+    PROCESS = ("⚙️", "#FF5722", "process")
+    ALERT = ("🔔", "#E91E63", "alert")
+
+# 🆕 v15.4: Severidad de cada nivel para filtrar el log (CONSOLIDADOR_LOG_NIVEL)
+SEVERIDAD_NIVELES = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+SEVERIDAD_LOG = {
+    LogLevel.DEBUG: 10,
+    LogLevel.WARNING: 30,
+    LogLevel.ALERT: 30,
+    LogLevel.ERROR: 40
+}
+
+
+class Logger:
+    """Sistema de logging visual para el Consolidador T25."""
+
+    def __init__(self, verbose: bool = True, nivel: str = 'DEBUG'):
+        self.verbose = verbose
+        # Mensajes por debajo de este nivel no se escriben (encabezados,
+        # pasos e inicio/fin de contrato se escriben siempre)
+        self.severidad_minima = SEVERIDAD_NIVELES.get((nivel or 'DEBUG').upper(), 10)
+        self.indent_level = 0
+        self.logs: List[Dict] = []
+        self.start_time = time.time()
+        self.current_contract = ""
+        self.stats = {
+            'contratos_procesados': 0,
+            'contratos_exitosos': 0,
+            'archivos_descargados': 0,
+            'servicios_extraidos': 0,
+            'alertas_generadas': 0
+        }
+
+    def _get_timestamp(self) -> str:
+        # Ajustar a hora Colombia (UTC-5) si el sistema está en UTC
+        # Detectado: 20:05 en sistema vs 15:00 real -> diferencia de 5 horas
+        return (datetime.now() - timedelta(hours=5)).strftime("%H:%M:%S")
+
+    def _get_elapsed(self) -> str:
+        elapsed = time.time() - self.start_time
+        if elapsed < 60:
+            return f"{elapsed:.1f}s"
+        return f"{elapsed/60:.1f}m"
+
+    def _format_indent(self) -> str:
+        return "│   " * self.indent_level
+
+    def _escribir(self, texto: str = ""):
+        """Escribe una línea del log (stdout)."""
+        print(texto)
+
+    def _print(self, level: LogLevel, message: str, details: str = "",
+               show_time: bool = True, indent_override: int = None):
+        if not self.verbose and level == LogLevel.DEBUG:
+            return
+        if SEVERIDAD_LOG.get(level, 20) < self.severidad_minima:
+            return
+
+        indent = "│   " * (indent_override if indent_override is not None else self.indent_level)
+        icon = level.value[0]
+        time_str = f"[{self._get_timestamp()}] " if show_time else ""
+        detail_str = f" → {details}" if details else ""
+
+        line = f"{indent}{icon} {time_str}{message}{detail_str}"
+        self._escribir(line)
+
+        self.logs.append({
+            'time': self._get_timestamp(),
+            'level': level.name,
+            'message': message,
+            'details': details
+        })
+
+    def volcar(self, diferido: Dict[str, Any]):
+        """🆕 v15.4: Escribe lo guardado por un LoggerDiferido (ver LoggerDiferido.tomar)."""
+        for linea in diferido['lineas']:
+            self._escribir(linea)
+        self.logs.extend(diferido['logs'])
+        for k, v in diferido['stats'].items():
+            self.stats[k] = self.stats.get(k, 0) + v
+        self.indent_level = diferido['indent']
+        self.current_contract = diferido['contrato'] or self.current_contract
+
+    def set_contract(self, contract_id: str):
+        self.current_contract = contract_id
+
+    def indent(self):
+        self.indent_level += 1
+
+    def dedent(self):
+        self.indent_level = max(0, self.indent_level - 1)
+
+    def reset_indent(self):
+        self.indent_level = 0
+
+    def header(self, title: str, subtitle: str = ""):
+        self._escribir("\n" + "═" * 70)
+        self._escribir(f"  {title}")
+        if subtitle:
+            self._escribir(f"  {subtitle}")
+        self._escribir("═" * 70)
+
+    def subheader(self, title: str):
+        self._escribir(f"\n{'─' * 50}")
+        self._escribir(f"  {title}")
+        self._escribir('─' * 50)
+
+    def step(self, step_num: int, total: int, description: str):
+        progress = "█" * int(step_num/total * 20) + "░" * (20 - int(step_num/total * 20))
+        self._escribir(f"\n📌 PASO {step_num}/{total}: {description}")
+        self._escribir(f"   [{progress}] {step_num/total*100:.0f}%")
+
+    def contract_start(self, idx: int, total: int, contract_id: str):
+        self.reset_indent()
+        self.current_contract = contract_id
+        self.stats['contratos_procesados'] += 1
+
+        progress_pct = (idx / total) * 100
+        bar_filled = int(progress_pct / 5)
+        bar = "█" * bar_filled + "░" * (20 - bar_filled)
+
+        self._escribir(f"\n┌{'─' * 68}┐")
+        self._escribir(f"│ 📋 CONTRATO [{idx}/{total}] {contract_id:<20} [{bar}] {progress_pct:>5.1f}% │")
+        self._escribir(f"└{'─' * 68}┘")
+
+    def contract_end(self, success: bool, registros: int, tiempo: float, mensaje: str = ""):
+        self.reset_indent()
+        icon = "✅" if success else "❌"
+        status = "ÉXITO" if success else "FALLO"
+
+        if success:
+            self.stats['contratos_exitosos'] += 1
+            self.stats['servicios_extraidos'] += registros
+
+        self._escribir(f"    ├── {icon} {status}: {registros:,} servicios en {tiempo:.1f}s")
+        if mensaje and not success:
+            self._escribir(f"    └── 💬 {mensaje}")
+        self._escribir()
+
+    def nav(self, path: str, found: bool = True):
+        icon = "📂" if found else "📁"
+        status = "" if found else " (no encontrado)"
+        self._print(LogLevel.NAV, f"Navegando a: {path}{status}", show_time=False)
+
+    def nav_tree(self, items: List[str], item_type: str = "carpetas"):
+        if not items:
+            self._print(LogLevel.DEBUG, f"(vacío - sin {item_type})", show_time=False)
+            return
+
+        count = len(items)
+        shown = items[:5]
+
+        for i, item in enumerate(shown):
+            prefix = "├──" if i < len(shown) - 1 else "└──"
+            icon = "📁" if item_type == "carpetas" else "📄"
+            self._escribir(f"    {self._format_indent()}{prefix} {icon} {item}")
+
+        if count > 5:
+            self._escribir(f"    {self._format_indent()}    ... y {count - 5} más")
+
+    def file_found(self, filename: str, file_type: str = ""):
+        type_str = f"[{file_type}] " if file_type else ""
+        self._print(LogLevel.FILE, f"Encontrado: {type_str}{filename}", show_time=False)
+        self.stats['archivos_descargados'] += 1
+
+    def download(self, filename: str, size: str = ""):
+        size_str = f" ({size})" if size else ""
+        self._print(LogLevel.DOWNLOAD, f"Descargando: {filename}{size_str}", show_time=False)
+
+    def process(self, action: str, detail: str = ""):
+        self._print(LogLevel.PROCESS, action, detail, show_time=False)
+
+    def success(self, message: str, detail: str = ""):
+        self._print(LogLevel.SUCCESS, message, detail, show_time=False)
+
+    def warning(self, message: str, detail: str = ""):
+        self._print(LogLevel.WARNING, message, detail, show_time=False)
+
+    def error(self, message: str, detail: str = ""):
+        self._print(LogLevel.ERROR, message, detail, show_time=False)
+
+    def info(self, message: str, detail: str = ""):
+        self._print(LogLevel.INFO, message, detail, show_time=False)
+
+    def debug(self, message: str, detail: str = ""):
+        self._print(LogLevel.DEBUG, message, detail, show_time=False)
+
+    def alert(self, alert_type: str, message: str, archivo: str = ""):
+        self.stats['alertas_generadas'] += 1
+        archivo_str = f" en {archivo}" if archivo else ""
+        self._print(LogLevel.ALERT, f"[{alert_type}] {message}{archivo_str}", show_time=False)
+
+    def stats_summary(self):
+        elapsed = time.time() - self.start_time
+
+        self._escribir(f"\n{'═' * 70}")
+        self._escribir("  📊 ESTADÍSTICAS DE EJECUCIÓN")
+        self._escribir('═' * 70)
+        self._escribir(f"""
+    ⏱️  Tiempo total: {elapsed/60:.1f} minutos
+
+    📋 Contratos:
+       • Procesados: {self.stats['contratos_procesados']}
+       • Exitosos: {self.stats['contratos_exitosos']}
+       • Tasa de éxito: {100*self.stats['contratos_exitosos']/max(1,self.stats['contratos_procesados']):.1f}%
+
+    📄 Archivos descargados: {self.stats['archivos_descargados']}
+
+    📊 Servicios extraídos: {self.stats['servicios_extraidos']:,}
+
+    🔔 Alertas generadas: {self.stats['alertas_generadas']}
+""")
+        self._escribir('═' * 70)
+
+
+class LoggerDiferido(Logger):
+    """🆕 v15.4: Logger que guarda las líneas en vez de escribirlas.
+
+    Lo usa el hilo de descarga adelantada (ver pipeline.py): lo que loguea
+    un contrato se vuelca en el log principal con Logger.volcar() cuando le
+    toca a ese contrato, así el log sale en el orden de los contratos.
+    """
+
+    def __init__(self, base: Logger):
+        super().__init__(base.verbose)
+        self.severidad_minima = base.severidad_minima
+        self.lineas: List[str] = []
+
+    def _escribir(self, texto: str = ""):
+        self.lineas.append(texto)
+
+    def tomar(self) -> Dict[str, Any]:
+        """Retorna lo guardado desde la última llamada y lo descarta."""
+        diferido = {
+            'lineas': self.lineas,
+            'logs': self.logs,
+            'stats': self.stats,
+            'indent': self.indent_level,
+            'contrato': self.current_contract
+        }
+        self.lineas, self.logs = [], []
+        self.stats = dict.fromkeys(self.stats, 0)
+        return diferido
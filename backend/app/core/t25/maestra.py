@@ -0,0 +1,385 @@
+"""
+Maestra de contratos
+====================
+
+Carga de la maestra (hoja de contratos vigentes, columnas clave y filtro
+de prestadores de servicios de salud), MaestraIndex para las búsquedas por
+contrato y obtener_fecha_acuerdo().
+
+Hojas, DataFrame e índice se registran en app.services.precarga con la
+clave del archivo: el servicio pre-calentado los reutiliza mientras la
+maestra no cambie.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from app.services import precarga
+
+from .logger import Logger
+from .utilidades import leer_excel, obtener_hojas, timestamp_a_fecha
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CELDA 4: CARGAR MAESTRA DE CONTRATOS v14.1
+# ══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class ColumnasIdentificadas:
+    tipo_proveedor: Optional[str] = None
+    cto: Optional[str] = None
+    numero_contrato: Optional[str] = None
+    ano_contrato: Optional[str] = None
+
+# 🆕 v15.4: ÍNDICE DE LA MAESTRA (búsquedas O(1) por contrato)
+PALABRAS_AMBULANCIA_MAESTRA = [
+    'AMBULANCIA', 'AMBULANCIAS',
+    'TRASLADO ASISTENCIAL', 'TRASLADOS ASISTENCIALES',
+    'TAM', 'TAB',
+    'TRANSPORTE ASISTENCIAL', 'TRANSPORTES ASISTENCIALES',
+    'SERVICIO DE AMBULANCIA', 'SERVICIOS DE AMBULANCIA',
+]
+
+COLUMNAS_REVISAR_AMBULANCIA = [
+    'CATEGORÍA CUENTAS MEDICAS', 'CATEGORIA CUENTAS MEDICAS',
+    'OBJETO', 'DESCRIPCION', 'DESCRIPCIÓN',
+    'TIPO', 'TIPO_SERVICIO', 'SERVICIO'
+]
+
+@dataclass
+class RegistroMaestra:
+    """Datos de un contrato extraídos una sola vez de su fila en la maestra."""
+    categoria_cuentas_medicas: str = ""
+    ambulancia: Tuple[bool, str, str] = (False, "", "")
+    fecha_inicial: Any = None
+    fechas_otrosi: Dict[str, Any] = field(default_factory=dict)  # columna -> valor
+    fechas_acta: Dict[int, Any] = field(default_factory=dict)    # número de acta -> valor
+
+class MaestraIndex:
+    """🆕 v15.4: Índice de la maestra por (número, año) normalizados.
+
+    Se construye una vez tras cargar df_maestra/df_prestadores. Las claves se
+    normalizan igual que las máscaras que reemplaza (CTO exacto 'NNNN-AAAA' y,
+    si no aparece, número/año sin '.0' con número a 4 dígitos) y se conserva la
+    primera fila de cada clave. Categoría y ambulancia salen de df_maestra;
+    las fechas (inicial, otrosíes y actas) de df_prestadores.
+    """
+
+    def __init__(self, df_maestra: pd.DataFrame, df_prestadores: pd.DataFrame, cols: ColumnasIdentificadas):
+        self.cols = cols
+        columnas = list(df_maestra.columns)
+        self._cols_categoria = [
+            c for c in columnas
+            if 'CATEGOR' in str(c).upper().strip() and 'CUENTA' in str(c).upper().strip()
+        ]
+        self._cols_ambulancia = [
+            c for c in columnas
+            if any(t in str(c).upper().strip() or str(c).upper().strip() in t for t in COLUMNAS_REVISAR_AMBULANCIA)
+        ]
+
+        columnas_p = list(df_prestadores.columns)
+        self._col_inicial = next((
+            c for c in columnas_p
+            if 'fecha' in str(c).lower() and 'inicial' in str(c).lower()
+            and 'otrosi' not in str(c).lower() and 'otrosí' not in str(c).lower()
+        ), None)
+        self._cols_otrosi = [c for c in columnas_p if re.search(r'fecha.*otros[ií]', str(c).lower())]
+        self._cols_acta = [
+            (c, columnas_p[i + 1]) for i, c in enumerate(columnas_p)
+            if ('no. acta' in str(c).lower() or 'no acta' in str(c).lower()) and i + 1 < len(columnas_p)
+        ]
+        self._columna_por_otrosi: Dict[int, Optional[str]] = {}
+
+        self._maestra = self._indexar(df_maestra, self._extraer_maestra)
+        self._prestadores = self._indexar(df_prestadores, self._extraer_prestador)
+
+    def _indexar(self, df: pd.DataFrame, extraer) -> Tuple[Dict[str, RegistroMaestra], Dict[Tuple[str, str], RegistroMaestra]]:
+        posiciones_cto: Dict[str, int] = {}
+        posiciones_num: Dict[Tuple[str, str], int] = {}
+        cols = self.cols
+
+        if cols.cto:
+            for pos, valor in enumerate(df[cols.cto].tolist()):
+                if isinstance(valor, str):
+                    posiciones_cto.setdefault(valor, pos)
+
+        if cols.numero_contrato and cols.ano_contrato:
+            try:
+                numeros = df[cols.numero_contrato].astype(str).str.replace('.0', '', regex=False).str.zfill(4)
+                anos = df[cols.ano_contrato].astype(str).str.replace('.0', '', regex=False)
+                for pos, clave in enumerate(zip(numeros.tolist(), anos.tolist())):
+                    posiciones_num.setdefault(clave, pos)
+            except Exception:
+                pass
+
+        registros: Dict[int, RegistroMaestra] = {}
+        for pos in set(posiciones_cto.values()) | set(posiciones_num.values()):
+            registros[pos] = extraer(df.iloc[pos])
+
+        return (
+            {k: registros[p] for k, p in posiciones_cto.items()},
+            {k: registros[p] for k, p in posiciones_num.items()}
+        )
+
+    def _extraer_maestra(self, fila: pd.Series) -> RegistroMaestra:
+        registro = RegistroMaestra()
+
+        for col in self._cols_categoria:
+            valor = fila[col]
+            if pd.notna(valor):
+                registro.categoria_cuentas_medicas = str(valor).strip()
+                break
+
+        for col in self._cols_ambulancia:
+            valor = fila[col]
+            if pd.isna(valor) or valor is None:
+                continue
+            valor_str = str(valor).upper().strip()
+            if any(palabra in valor_str for palabra in PALABRAS_AMBULANCIA_MAESTRA):
+                registro.ambulancia = (True, col, valor_str)
+                break
+
+        return registro
+
+    def _extraer_prestador(self, fila: pd.Series) -> RegistroMaestra:
+        registro = RegistroMaestra()
+
+        if self._col_inicial is not None:
+            registro.fecha_inicial = fila[self._col_inicial]
+
+        for col in self._cols_otrosi:
+            registro.fechas_otrosi[col] = fila[col]
+
+        for col, col_fecha in self._cols_acta:
+            val = fila[col]
+            if pd.notna(val):
+                ma = re.search(r'#?(\d+)', str(val))
+                if ma:
+                    registro.fechas_acta.setdefault(int(ma.group(1)), fila[col_fecha])
+
+        return registro
+
+    def __len__(self) -> int:
+        por_cto, por_numero = self._maestra
+        return len({id(r) for r in por_cto.values()} | {id(r) for r in por_numero.values()})
+
+    @staticmethod
+    def _buscar(indice, numero: str, ano: str) -> Optional[RegistroMaestra]:
+        por_cto, por_numero = indice
+        numero4 = str(numero).zfill(4)
+        registro = por_cto.get(f"{numero4}-{ano}")
+        if registro is None:
+            registro = por_numero.get((numero4, str(ano)))
+        return registro
+
+    def buscar(self, numero: str, ano: str) -> Optional[RegistroMaestra]:
+        """Registro del contrato en la maestra completa (categoría, ambulancia)."""
+        return self._buscar(self._maestra, numero, ano)
+
+    def buscar_prestador(self, numero: str, ano: str) -> Optional[RegistroMaestra]:
+        """Registro del contrato entre los prestadores (fechas de acuerdo)."""
+        return self._buscar(self._prestadores, numero, ano)
+
+    def fecha_otrosi(self, registro: RegistroMaestra, num: int) -> Any:
+        """Fecha del otrosí `num`: primera columna 'fecha...otrosí...<num>'."""
+        if num not in self._columna_por_otrosi:
+            patron = f"fecha.*otros[ií].*{num}"
+            self._columna_por_otrosi[num] = next(
+                (c for c in self._cols_otrosi if re.search(patron, str(c).lower())), None
+            )
+        col = self._columna_por_otrosi[num]
+        return registro.fechas_otrosi.get(col) if col is not None else None
+
+@dataclass
+class Maestra:
+    """Maestra cargada: archivo, hoja usada, DataFrames, columnas e índice."""
+    archivo: str
+    hoja: Optional[str]
+    df_maestra: pd.DataFrame
+    df_prestadores: pd.DataFrame
+    cols: ColumnasIdentificadas
+    indice: MaestraIndex
+
+
+def identificar_columnas(df_maestra: pd.DataFrame) -> ColumnasIdentificadas:
+    cols = ColumnasIdentificadas()
+    for col in df_maestra.columns:
+        col_upper = str(col).upper().strip()
+        if 'TIPO' in col_upper and 'PROVEEDOR' in col_upper:
+            cols.tipo_proveedor = col
+        elif col_upper == 'CTO':
+            cols.cto = col
+        elif ('NUMERO' in col_upper or 'NÚMERO' in col_upper) and 'CONTRATO' in col_upper:
+            cols.numero_contrato = col
+        elif ('AÑO' in col_upper or 'ANO' in col_upper) and 'CONTRATO' in col_upper:
+            cols.ano_contrato = col
+    return cols
+
+
+def seleccionar_hoja_contratos(hojas) -> Optional[str]:
+    """Prefiere 'CONTRATOS VIGENTES', luego cualquier hoja 'CONTRATO', luego la primera."""
+    for hoja in hojas:
+        hoja_upper = hoja.upper()
+        if 'CONTRATO' in hoja_upper and 'VIGENTE' in hoja_upper:
+            return hoja
+
+    for hoja in hojas:
+        if 'CONTRATO' in hoja.upper():
+            return hoja
+
+    return hojas[0] if hojas else None
+
+
+def cargar_maestra(ruta_maestra: str, log: Logger) -> Maestra:
+    """Carga la maestra, aplica los filtros e indexa los contratos."""
+    if ruta_maestra.startswith('"') or ruta_maestra.startswith("'"):
+        ruta_maestra = ruta_maestra[1:-1]
+    if not os.path.exists(ruta_maestra):
+        raise FileNotFoundError(ruta_maestra)
+    archivo = ruta_maestra
+
+    log.indent()
+    log.success(f"Archivo cargado", archivo)
+
+    # 🆕 v15.4: Hojas, maestra e índice se reutilizan mientras el archivo no cambie
+    clave = precarga.clave_archivo(archivo)
+    hojas = precarga.obtener(clave + ('hojas',), lambda: obtener_hojas(archivo), grupo='hojas_maestra')
+    log.info(f"Hojas encontradas", f"{len(hojas)} hojas")
+
+    hoja_contratos = seleccionar_hoja_contratos(hojas)
+    log.info("Hoja seleccionada", hoja_contratos)
+
+    df_maestra = precarga.obtener(
+        clave + (hoja_contratos,),
+        lambda: leer_excel(archivo, sheet_name=hoja_contratos),
+        grupo='maestra'
+    )
+    log.success(f"Maestra cargada", f"{len(df_maestra):,} registros totales")
+
+    COLS = identificar_columnas(df_maestra)
+
+    log.info("Columnas identificadas:")
+    log.indent()
+    if COLS.tipo_proveedor: log.info("Tipo proveedor", COLS.tipo_proveedor)
+    if COLS.numero_contrato: log.info("Número contrato", COLS.numero_contrato)
+    if COLS.ano_contrato: log.info("Año contrato", COLS.ano_contrato)
+    if COLS.cto: log.info("CTO", COLS.cto)
+    log.dedent()
+
+    # 🆕 v14.1: MOSTRAR FILTROS APLICADOS
+    print("\n" + "─" * 50)
+    print("📋 FILTROS APLICADOS A LA MAESTRA:")
+    print("─" * 50)
+
+    registros_iniciales = len(df_maestra)
+    print(f"   • Registros iniciales: {registros_iniciales:,}")
+
+    if COLS.tipo_proveedor:
+        tipos_unicos = df_maestra[COLS.tipo_proveedor].dropna().unique()
+        print(f"\n   📌 FILTRO 1: Columna '{COLS.tipo_proveedor}'")
+        print(f"      Valores encontrados: {list(tipos_unicos)[:5]}...")
+        print(f"      Filtrando por: 'PRESTADOR DE SERVICIOS DE SALUD'")
+
+        df_prestadores = df_maestra[
+            df_maestra[COLS.tipo_proveedor] == 'PRESTADOR DE SERVICIOS DE SALUD'
+        ].copy()
+
+        registros_filtrados = len(df_prestadores)
+        registros_excluidos = registros_iniciales - registros_filtrados
+        print(f"      ✅ Registros después del filtro: {registros_filtrados:,}")
+        print(f"      ❌ Registros excluidos: {registros_excluidos:,}")
+
+        log.success(f"Prestadores filtrados", f"{len(df_prestadores):,} registros")
+    else:
+        df_prestadores = df_maestra.copy()
+        print(f"\n   ⚠️ Sin columna TIPO PROVEEDOR - usando todos los registros")
+        log.warning("Sin columna TIPO PROVEEDOR", "usando todos los registros")
+
+    if COLS.ano_contrato:
+        anos = sorted([int(a) for a in df_prestadores[COLS.ano_contrato].dropna().unique()])
+        print(f"\n   📌 AÑOS DISPONIBLES EN LA MAESTRA:")
+        print(f"      {anos}")
+
+        print(f"\n   📊 CONTRATOS POR AÑO:")
+        for ano in anos:
+            count = len(df_prestadores[df_prestadores[COLS.ano_contrato] == ano])
+            print(f"      • {ano}: {count:,} contratos")
+
+        log.info("Años disponibles", str(anos))
+
+    print("─" * 50)
+
+    indice = precarga.obtener(
+        clave + (hoja_contratos, 'indice'),
+        lambda: MaestraIndex(df_maestra, df_prestadores, COLS),
+        grupo='indice_maestra'
+    )
+    log.success("Índice de maestra", f"{len(indice):,} contratos")
+    log.dedent()
+
+    return Maestra(archivo, hoja_contratos, df_maestra, df_prestadores, COLS, indice)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CELDA 8: FUNCIÓN OBTENER FECHA DE ACUERDO
+# ══════════════════════════════════════════════════════════════════════════════
+
+def obtener_fecha_acuerdo(indice: MaestraIndex, numero: str, ano: str, origen: str,
+                          fecha_archivo: float = None) -> Tuple[Optional[str], bool]:
+    """Obtiene fecha de acuerdo de forma inteligente."""
+    try:
+        # 🆕 v15.4: Búsqueda O(1) en el índice de la maestra
+        registro = indice.buscar_prestador(numero, ano)
+        fecha = None
+
+        if origen == 'Inicial' and registro is not None:
+            fecha = registro.fecha_inicial
+
+        elif ('Otrosí' in origen or 'Otrosi' in origen) and registro is not None:
+            m = re.search(r'\d+', origen)
+            if m:
+                fecha = indice.fecha_otrosi(registro, int(m.group()))
+
+        elif 'Acta' in origen and registro is not None:
+            m = re.search(r'\d+', origen)
+            if m:
+                fecha = registro.fechas_acta.get(int(m.group()))
+
+        if fecha is None and fecha_archivo is not None:
+            fecha_sftp = timestamp_a_fecha(fecha_archivo)
+            if fecha_sftp:
+                return fecha_sftp, True
+
+        if fecha is not None and pd.notna(fecha):
+            if isinstance(fecha, (int, float)):
+                try:
+                    dias = int(fecha)
+                    if 30000 < dias < 60000:
+                        fecha_dt = datetime(1899, 12, 30) + timedelta(days=dias)
+                        return fecha_dt.strftime('%d/%m/%Y'), True
+                except:
+                    pass
+            elif isinstance(fecha, datetime):
+                return fecha.strftime('%d/%m/%Y'), True
+            elif isinstance(fecha, str):
+                fs = fecha.strip()
+                if fs and fs.lower() not in ('nan', 'none', 'nat', ''):
+                    return fs, True
+
+        if fecha_archivo is not None:
+            fecha_sftp = timestamp_a_fecha(fecha_archivo)
+            if fecha_sftp:
+                return fecha_sftp, True
+
+        return None, False
+
+    except Exception as e:
+        if fecha_archivo is not None:
+            fecha_sftp = timestamp_a_fecha(fecha_archivo)
+            if fecha_sftp:
+                return fecha_sftp, True
+        return None, False
@@ -0,0 +1,114 @@
+"""
+Descarga adelantada de contratos
+================================
+
+En modo secuencial cada contrato pasa por dos etapas que corren en hilos
+distintos, unidas por una cola acotada:
+
+    hilo de descarga:  navegar → listar → descargar      (SFTP)
+    hilo principal:    parsear → estampar → integrar     (CPU)
+
+Mientras el hilo principal parsea el contrato N, el de descarga ya navega y
+descarga N+1 (y N+2, según la profundidad de la cola), así el enlace SFTP no
+queda ocioso durante el parseo ni la CPU durante las descargas. El hilo de
+descarga loguea en un LoggerDiferido y guarda sus eventos; el principal los
+vuelca cuando le toca al contrato, de modo que el log y los eventos salen en
+el orden de los contratos, igual que sin adelanto.
+
+Con workers (fork) cada proceso hace las dos etapas de su contrato y el
+solapamiento lo dan los demás workers.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Sequence, Tuple
+
+from .logger import Logger, LoggerDiferido
+from .progreso import MedidorEtapas
+
+# Segundos entre revisiones de la señal de detener mientras la cola está llena
+_INTERVALO_ESPERA = 0.2
+
+
+class AdelantoContratos:
+    """Hilo que adquiere (navega, lista y descarga) los contratos antes de que se parseen.
+
+    Se usa como context manager; al iterarlo entrega los contratos preparados
+    en orden. Un error del hilo (incluida la cancelación) se relanza en el
+    hilo principal al llegar a ese contrato.
+    """
+
+    def __init__(self, tareas: Sequence[Tuple[int, Dict]], adquirir: Callable[[int, Dict], Dict],
+                 log: Logger, log_descarga: LoggerDiferido, profundidad: int, etapas: MedidorEtapas,
+                 descartar: Callable[[Dict], Any]):
+        self.tareas = list(tareas)
+        self.adquirir = adquirir
+        self.log = log
+        self.log_descarga = log_descarga
+        self.etapas = etapas
+        self.descartar = descartar
+        self.cola: queue.Queue = queue.Queue(maxsize=max(1, profundidad))
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name='descarga-adelantada', daemon=True)
+
+    def _ejecutar(self):
+        for idx, contrato in self.tareas:
+            if self._detener.is_set():
+                return
+            try:
+                preparado = self.adquirir(idx, contrato)
+            except BaseException as e:
+                self._poner(('error', e, self.log_descarga.tomar()))
+                return
+            preparado['log'] = self.log_descarga.tomar()
+            if not self._poner(('ok', preparado, None)):
+                self.descartar(preparado)
+                return
+
+    def _poner(self, item: Tuple) -> bool:
+        inicio = time.time()
+        while not self._detener.is_set():
+            try:
+                self.cola.put(item, timeout=_INTERVALO_ESPERA)
+            except queue.Full:
+                continue
+            self.etapas.espera_descarga += time.time() - inicio
+            return True
+        return False
+
+    def __enter__(self) -> "AdelantoContratos":
+        self._hilo.start()
+        return self
+
+    def __iter__(self) -> Iterator[Dict]:
+        for _ in self.tareas:
+            self.etapas.registrar_cola(self.cola.qsize())
+            inicio = time.time()
+            tipo, dato, log = self.cola.get()
+            self.etapas.espera_parseo += time.time() - inicio
+            if tipo == 'error':
+                # Lo que alcanzó a loguear el contrato que falló
+                self.log.volcar(log)
+                raise dato
+            yield dato
+
+    def __exit__(self, *exc) -> bool:
+        self.detener()
+        return False
+
+    def detener(self):
+        """Detiene el hilo y descarta lo ya descargado que no se alcanzó a procesar."""
+        self._detener.set()
+        self._vaciar()
+        self._hilo.join(timeout=30)
+        self._vaciar()
+
+    def _vaciar(self):
+        while True:
+            try:
+                tipo, dato, _ = self.cola.get_nowait()
+            except queue.Empty:
+                return
+            if tipo == 'ok':
+                self.descartar(dato)
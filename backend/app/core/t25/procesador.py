@@ -0,0 +1,592 @@
+"""
+Procesador de anexos
+====================
+
+Extrae los servicios de un ANEXO 1: elige la hoja de servicios, detecta
+encabezados, columnas y sedes (hasta Config.MAX_SEDES) y valida cada fila
+con las reglas de validacion.py. Usa la caché de parseo por contenido
+(app.services.cache_parseo) cuando se le pasa una.
+"""
+
+import functools
+import hashlib
+import os
+import re
+import threading
+from typing import IO, Dict, List, Optional, Tuple
+
+from app.services.cache_parseo import CacheParseo, hash_archivo
+
+from .config import Alerta, Config, TipoAlerta
+from .logger import Logger
+from .utilidades import (
+    WorkbookSession,
+    es_archivo_solo_traslados,
+    formatear_habilitacion,
+    limpiar_codigo,
+    limpiar_tarifa,
+    limpiar_texto,
+    normalizar_texto
+)
+from .validacion import (
+    buscar_hoja_servicios_inteligente,
+    es_dato_de_sede,
+    es_direccion,
+    es_encabezado_seccion_sedes,
+    es_encabezado_seccion_servicios,
+    es_municipio_o_departamento,
+    validar_cups,
+    validar_descripcion,
+    validar_manual_tarifario,
+    validar_tarifa
+)
+
+# 🆕 v15.4: Versión de la extracción de filas; clave del manifiesto incremental
+# y de la caché de parseo. Además de esta constante (subirla si cambia el
+# formato de lo guardado) entra el código de los módulos que deciden las
+# filas extraídas, así cualquier cambio en ellos invalida lo guardado.
+VERSION_PARSER = "15.4"
+MODULOS_EXTRACCION = ('procesador.py', 'utilidades.py', 'validacion.py')
+
+@functools.lru_cache(maxsize=None)
+def _huella_modulos_extraccion() -> str:
+    h = hashlib.sha256()
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    for nombre in MODULOS_EXTRACCION:
+        with open(os.path.join(carpeta, nombre), 'rb') as f:
+            h.update(nombre.encode('utf-8') + b'\0' + f.read())
+    return h.hexdigest()[:16]
+
+def version_extraccion(config: Config) -> str:
+    """Versión del parser, huella del código de extracción y ajustes de Config que cambian las filas."""
+    return f"{VERSION_PARSER}|{_huella_modulos_extraccion()}|sedes={config.MAX_SEDES}"
+
+class ProcesadorAnexo:
+    """🆕 v14.1: Procesador de anexos con detección de columnas mejorada."""
+
+    def __init__(self, logger: Logger, cache_parseo: Optional[CacheParseo] = None,
+                 config: Optional[Config] = None):
+        self.log = logger
+        self.config = config or Config()
+        self._alertas_set: set = set()
+        self.alertas: List[Alerta] = []
+        self._contrato_actual = ""
+        self._categoria_cuentas_medicas = ""
+        # 🆕 v15.4: Caché de parseo por contenido y captura de alertas por hilo
+        self.cache_parseo = cache_parseo
+        self._captura = threading.local()
+
+    def limpiar_alertas(self):
+        self._alertas_set = set()
+        self.alertas = []
+
+    def set_contrato(self, contrato: str):
+        self._contrato_actual = contrato
+
+    def set_categoria_cuentas_medicas(self, categoria: str):
+        self._categoria_cuentas_medicas = categoria if categoria else ""
+
+    def agregar_alerta(self, tipo: TipoAlerta, mensaje: str, archivo: str = ""):
+        nueva_alerta = Alerta(
+            tipo=tipo,
+            mensaje=mensaje,
+            contrato=self._contrato_actual,
+            archivo=archivo
+        )
+
+        captura = getattr(self._captura, 'alertas', None)
+        if captura is not None:
+            captura.append((tipo, mensaje, archivo))
+
+        clave = (tipo, mensaje, self._contrato_actual, archivo)
+        if clave not in self._alertas_set:
+            self._alertas_set.add(clave)
+            self.alertas.append(nueva_alerta)
+            self.log.alert(tipo.value, mensaje, archivo)
+
+    def buscar_hoja_servicios(self, archivo: str, sesion: Optional[WorkbookSession] = None) -> Optional[str]:
+        """🆕 v14.1: Busca la hoja de servicios - CORREGIDO.
+        Las hojas de PAQUETES NO generan alerta individual, solo se mencionan
+        si no hay hoja de servicios válida.
+
+        🆕 v15.4: Reutiliza la WorkbookSession del llamador si se entrega.
+        """
+        if sesion is None:
+            with WorkbookSession(archivo) as sesion_propia:
+                return self.buscar_hoja_servicios(archivo, sesion_propia)
+
+        formato_real = sesion.formato
+        ext_declarada = sesion.ext
+
+        if formato_real == 'xlsb' and ext_declarada != '.xlsb':
+            self.log.debug(f"⚠️ Formato real: XLSB (extensión: {ext_declarada})")
+
+        hojas = sesion.hojas
+
+        if not hojas:
+            motivo = f"No se pudo leer archivo (formato: {formato_real})"
+            self.agregar_alerta(TipoAlerta.ERROR_LECTURA, motivo, os.path.basename(archivo))
+            return None
+
+        # 🆕 v14.1: Usar nueva función que retorna info de hojas excluidas
+        hoja_encontrada, hojas_excluidas_info = buscar_hoja_servicios_inteligente(hojas)
+
+        if hoja_encontrada:
+            # ✅ Encontró hoja de servicios - NO genera alerta de PAQUETES
+            self.log.debug(f"Hoja seleccionada: '{hoja_encontrada}' de {len(hojas)} disponibles")
+            return hoja_encontrada
+
+        # ❌ NO encontró hoja de servicios - verificar tipo de archivo
+        es_solo_traslados, msg_traslados, tipo_archivo = es_archivo_solo_traslados(hojas)
+
+        if es_solo_traslados:
+            self.log.warning(f"Archivo de {tipo_archivo.lower()}", msg_traslados)
+
+            if tipo_archivo == "AMBULANCIAS":
+                self.agregar_alerta(
+                    TipoAlerta.ARCHIVO_SOLO_AMBULANCIAS,
+                    msg_traslados,
+                    os.path.basename(archivo)
+                )
+            elif tipo_archivo == "TRASLADOS":
+                self.agregar_alerta(
+                    TipoAlerta.ARCHIVO_SOLO_TRASLADOS,
+                    msg_traslados,
+                    os.path.basename(archivo)
+                )
+            else:
+                self.agregar_alerta(
+                    TipoAlerta.SOLO_TRASLADOS,
+                    msg_traslados,
+                    os.path.basename(archivo)
+                )
+            return None
+
+        # 🆕 v14.1: Generar mensaje con TODAS las hojas disponibles
+        # AQUÍ es donde se mencionan las hojas de PAQUETES (no antes)
+        hojas_str = ", ".join([f"'{h}'" for h in hojas])
+        mensaje = f"No se encontró hoja de servicios válida. Hojas disponibles: [{hojas_str}]"
+
+        # Agregar info de hojas excluidas si existen (PAQUETES, COSTO VIAJE)
+        if hojas_excluidas_info:
+            excluidas_str = ", ".join([f"'{h[0]}'" for h in hojas_excluidas_info])
+            mensaje += f". Hojas excluidas (no aplican para T25): [{excluidas_str}]"
+
+        if self._categoria_cuentas_medicas:
+            mensaje += f". Categoría cuentas médicas: '{self._categoria_cuentas_medicas}'"
+
+        self.agregar_alerta(TipoAlerta.HOJA_NO_ENCONTRADA, mensaje, os.path.basename(archivo))
+
+        return None
+
+    def detectar_columnas(self, fila: List) -> Dict[str, int]:
+        """🆕 v14.1: Detecta índices de columnas con prioridad estricta."""
+        idx = {
+            'cups': -1,
+            'homologo': -1,
+            'descripcion': -1,
+            'tarifa': -1,
+            'tarifario': -1,
+            'porcentaje': -1,
+            'observaciones': -1
+        }
+
+        columnas_usadas = set()
+
+        PATRONES_ORDENADOS = [
+            ('cups', [
+                'CODIGO CUPS', 'CÓDIGO CUPS', 'COD CUPS', 'COD. CUPS',
+                'CODIGO CUP', 'COD CUP', 'COD. CUP'
+            ]),
+            ('homologo', [
+                'CODIGO HOMOLOGO', 'CÓDIGO HOMÓLOGO', 'COD HOMOLOGO',
+                'HOMOLOGO MANUAL', 'CÓDIGO HOMOLOGO MANUAL', 'CODIGO HOMOLOGO MANUAL'
+            ]),
+            ('descripcion', [
+                'DESCRIPCION DEL CUPS', 'DESCRIPCIÓN DEL CUPS',
+                'DESCRIPCION CUPS', 'DESCRIPCIÓN CUPS',
+                'DESCRIPCION DEL CUP', 'DESCRIPCIÓN DEL CUP'
+            ]),
+            ('tarifa', [
+                'TARIFA UNITARIA EN PESOS', 'TARIFA UNITARIA PESOS',
+                'TARIFA EN PESOS', 'TARIFA UNITARIA',
+                'VALOR UNITARIO', 'PRECIO UNITARIO'
+            ]),
+            ('tarifario', [
+                'MANUAL TARIFARIO', 'TARIFARIO', 'MANUAL TAR',
+                'TIPO TARIFARIO', 'TIPO DE TARIFARIO'
+            ]),
+            ('porcentaje', [
+                'TARIFA SEGUN TARIFARIO', 'TARIFA SEGÚN TARIFARIO',
+                'PORCENTAJE TARIFARIO', 'PORCENTAJE',
+                '% TARIFARIO', '% DEL TARIFARIO'
+            ]),
+            ('observaciones', [
+                'OBSERVACIONES', 'OBSERVACION', 'OBS', 'NOTAS'
+            ]),
+        ]
+
+        for i, celda in enumerate(fila):
+            t = normalizar_texto(celda)
+            if not t:
+                continue
+
+            if i in columnas_usadas:
+                continue
+
+            for campo, patrones in PATRONES_ORDENADOS:
+                if idx[campo] != -1:
+                    continue
+
+                for patron in patrones:
+                    patron_norm = normalizar_texto(patron)
+
+                    if patron_norm in t or patron_norm == t:
+                        if campo == 'cups' and 'HOMOLOGO' in t:
+                            continue
+
+                        if campo == 'tarifa':
+                            if 'TARIFARIO' in t or 'SEGUN' in t or 'SEGÚN' in t:
+                                continue
+                            if 'MANUAL' in t and 'UNITARIA' not in t:
+                                continue
+
+                        if campo == 'tarifario':
+                            if 'UNITARIA' in t or 'EN PESOS' in t or 'PESOS' in t:
+                                continue
+
+                        if campo == 'porcentaje':
+                            if 'UNITARIA' in t:
+                                continue
+
+                        idx[campo] = i
+                        columnas_usadas.add(i)
+                        break
+
+                if idx[campo] != -1:
+                    break
+
+        return idx
+
+    def extraer_sedes_de_bloque(self, datos: List[List], inicio: int, idx_hab: int, idx_sede: int) -> List[Dict]:
+        """Extrae las sedes de un bloque de datos de sedes."""
+        sedes = []
+        k = inicio
+
+        while k < len(datos) and len(sedes) < self.config.MAX_SEDES:
+            fila = datos[k]
+            if not fila:
+                k += 1
+                continue
+
+            if es_encabezado_seccion_sedes(fila) or es_encabezado_seccion_servicios(fila):
+                break
+
+            if es_dato_de_sede(fila):
+                if idx_hab >= 0 and idx_hab < len(fila):
+                    codigo_hab = fila[idx_hab]
+                    if codigo_hab:
+                        codigo_str = str(codigo_hab).strip()
+                        if codigo_str.endswith('.0'):
+                            codigo_str = codigo_str[:-2]
+                        codigo_clean = re.sub(r'[^\d]', '', codigo_str)
+
+                        if codigo_clean and codigo_clean.isdigit() and 5 <= len(codigo_clean) <= 12:
+                            num_sede = fila[idx_sede] if idx_sede >= 0 and idx_sede < len(fila) else len(sedes) + 1
+                            sedes.append({'codigo': codigo_hab, 'sede': num_sede})
+                            k += 1
+                            continue
+
+            if fila[0] is not None:
+                primera = str(fila[0]).upper().strip()
+                if not es_municipio_o_departamento(primera) and not es_direccion(primera):
+                    if primera and not primera.isspace():
+                        break
+
+            k += 1
+
+        return sedes
+
+    def _sufijo_categoria(self) -> str:
+        if self._categoria_cuentas_medicas:
+            return f". Categoría cuentas médicas: '{self._categoria_cuentas_medicas}'"
+        return ""
+
+    def _alertas_a_cache(self, alertas: List[Tuple], archivo: str, nombre: str) -> List[Dict]:
+        """Alertas capturadas -> forma independiente del contrato y del nombre local."""
+        sufijo = self._sufijo_categoria()
+        resultado = []
+        for tipo, mensaje, arch in alertas:
+            if tipo == TipoAlerta.HOJA_NO_ENCONTRADA and sufijo and mensaje.endswith(sufijo):
+                mensaje = mensaje[:-len(sufijo)]
+            ref = 'nombre' if arch == nombre else 'base' if arch == os.path.basename(archivo) else ''
+            resultado.append({'tipo': tipo.name, 'mensaje': mensaje, 'archivo': '' if ref else arch, 'ref': ref})
+        return resultado
+
+    def _alertas_desde_cache(self, alertas: List[Dict], archivo: str, nombre: str):
+        for a in alertas:
+            tipo = TipoAlerta[a['tipo']]
+            mensaje = a['mensaje']
+            if tipo == TipoAlerta.HOJA_NO_ENCONTRADA:
+                mensaje += self._sufijo_categoria()
+            arch = {'nombre': nombre, 'base': os.path.basename(archivo)}.get(a['ref'], a['archivo'])
+            self.agregar_alerta(tipo, mensaje, arch)
+
+    def extraer_servicios(self, archivo: str, nombre: str,
+                          contenido: Optional[IO[bytes]] = None) -> Tuple[bool, List[Dict], str]:
+        """Extrae servicios del archivo ANEXO 1.
+
+        🆕 v15.4: Consulta primero la caché de parseo (hash de los bytes +
+        VERSION_EXTRACCION). Un acierto evita abrir el Excel: se devuelven las
+        filas guardadas y se repiten sus alertas para este contrato. Con
+        `contenido` (descarga en memoria) los bytes se leen de ahí y no de
+        `archivo`.
+        """
+        if self.cache_parseo is None:
+            return self._extraer_servicios_libro(archivo, nombre, contenido)
+
+        try:
+            clave = hash_archivo(archivo if contenido is None else contenido)
+        except OSError:
+            return self._extraer_servicios_libro(archivo, nombre, contenido)
+
+        previo = self.cache_parseo.obtener(clave)
+        if previo is not None:
+            self.log.process(f"Procesando: {nombre[:50]}...")
+            self.log.indent()
+            self.log.info("♻️ Anexo ya parseado (caché por contenido)", f"{len(previo['filas']):,} filas")
+            self._alertas_desde_cache(previo['alertas'], archivo, nombre)
+            self.log.dedent()
+            return previo['ok'], previo['filas'], previo['mensaje']
+
+        self._captura.alertas = []
+        try:
+            ok, servicios, mensaje = self._extraer_servicios_libro(archivo, nombre, contenido)
+            capturadas = self._captura.alertas
+        finally:
+            self._captura.alertas = None
+
+        # Los errores inesperados pueden ser transitorios: no se cachean
+        if not any(t == TipoAlerta.ERROR_PROCESAMIENTO for t, _, _ in capturadas):
+            self.cache_parseo.guardar(
+                clave, ok, mensaje, servicios if ok else [],
+                self._alertas_a_cache(capturadas, archivo, nombre)
+            )
+        return ok, servicios, mensaje
+
+    def _extraer_servicios_libro(self, archivo: str, nombre: str,
+                                 contenido: Optional[IO[bytes]] = None) -> Tuple[bool, List[Dict], str]:
+        """Extrae servicios abriendo el libro.
+
+        🆕 v15.4: El libro se abre UNA vez (WorkbookSession) y se comparte
+        entre la búsqueda de hoja y la lectura de filas.
+        """
+        try:
+            self.log.process(f"Procesando: {nombre[:50]}...")
+            self.log.indent()
+
+            with WorkbookSession(archivo, contenido) as sesion:
+                hoja = self.buscar_hoja_servicios(archivo, sesion)
+                if not hoja:
+                    self.log.error("No se encontró hoja de servicios")
+                    self.log.dedent()
+                    # Obtener hojas disponibles para incluir en el mensaje
+                    hojas = sesion.hojas
+                    if hojas:
+                        hojas_str = ", ".join([f"'{h}'" for h in hojas])
+                        return False, [], f"Sin hoja de servicios. Hojas disponibles: [{hojas_str}]"
+                    return False, [], "Sin hoja de servicios"
+
+                self.log.info(f"Hoja encontrada: '{hoja}' (formato: {sesion.formato})")
+
+                datos = sesion.leer_hoja(hoja, max_filas=20000)
+
+            if not datos:
+                self.log.error("Hoja vacía o no legible")
+                self.agregar_alerta(TipoAlerta.ERROR_LECTURA, "Hoja vacía", nombre)
+                self.log.dedent()
+                return False, [], "Hoja vacía"
+
+            self.log.debug(f"Filas leídas: {len(datos)}")
+
+            servicios = []
+            sedes_activas = []
+            sedes_pendientes = []  # 🆕 Sedes que esperan su bloque de servicios
+            idx_columnas = None
+            encontro_encabezado_servicios = False
+            encontro_sedes = False
+
+            estado = 'buscando'
+
+            i = 0
+            while i < len(datos):
+                fila = datos[i]
+
+                if not fila or all(c is None for c in fila):
+                    i += 1
+                    continue
+
+                if es_encabezado_seccion_sedes(fila):
+                    self.log.debug(f"Fila {i+1}: Encabezado de SEDES detectado")
+                    encontro_sedes = True
+                    estado = 'en_sedes'
+
+                    idx_hab = -1
+                    idx_sede = -1
+                    for j, c in enumerate(fila):
+                        t = normalizar_texto(c) if c else ''
+                        if 'HABILITACION' in t or 'HABIITACION' in t:
+                            idx_hab = j
+                        if 'NUMERO DE SEDE' in t or 'NUMERO SEDE' in t or 'N SEDE' in t or 'N° SEDE' in t:
+                            idx_sede = j
+
+                    if idx_sede == -1 and idx_hab >= 0:
+                        idx_sede = idx_hab + 1
+
+                    nuevas_sedes = self.extraer_sedes_de_bloque(datos, i + 1, idx_hab, idx_sede)
+                    if nuevas_sedes:
+                        # 🆕 Guardar sedes pendientes para el próximo bloque de servicios
+                        sedes_pendientes = nuevas_sedes
+                        self.log.debug(f"  Sedes detectadas: {len(sedes_pendientes)}, esperando encabezado de servicios",
+                                       str([s['sede'] for s in nuevas_sedes]))
+
+                    i += 1
+                    continue
+
+                if es_encabezado_seccion_servicios(fila):
+                    self.log.debug(f"Fila {i+1}: Encabezado de SERVICIOS detectado")
+                    idx_columnas = self.detectar_columnas(fila)
+                    encontro_encabezado_servicios = True
+                    estado = 'en_servicios'
+
+                    # 🆕 Activar las sedes pendientes para este bloque de servicios
+                    if sedes_pendientes:
+                        sedes_activas = sedes_pendientes
+                        sedes_pendientes = []
+                        self.log.debug(f"  Sedes activadas para este bloque: {len(sedes_activas)}")
+                        for sede in sedes_activas:
+                            self.log.debug(f"    - Sede {sede['sede']}: {sede['codigo']}")
+
+                    cols_detectadas = [k for k, v in idx_columnas.items() if v >= 0]
+                    self.log.debug(f"  Columnas: {cols_detectadas}")
+
+                    i += 1
+                    continue
+
+                if estado == 'en_sedes':
+                    if es_dato_de_sede(fila):
+                        i += 1
+                        continue
+                    i += 1
+                    continue
+
+                if estado == 'en_servicios' and idx_columnas and sedes_activas:
+                    if es_dato_de_sede(fila):
+                        self.log.debug(f"Fila {i+1}: Saltando (es dato de sede)")
+                        i += 1
+                        continue
+
+                    if idx_columnas['cups'] >= 0 and idx_columnas['cups'] < len(fila):
+                        cups_raw = fila[idx_columnas['cups']]
+                        cups = limpiar_codigo(cups_raw)
+
+                        if cups and validar_cups(cups, fila):
+                            def get_valor(campo: str):
+                                col_idx = idx_columnas.get(campo, -1)
+                                return fila[col_idx] if 0 <= col_idx < len(fila) else None
+
+                            tarifa = get_valor('tarifa')
+                            manual = get_valor('tarifario')
+                            descripcion = get_valor('descripcion')
+
+                            if not validar_tarifa(tarifa):
+                                self.log.debug(f"Fila {i+1}: Tarifa rechazada (parece teléfono)", str(tarifa))
+                                i += 1
+                                continue
+
+                            if not validar_manual_tarifario(manual):
+                                self.log.debug(f"Fila {i+1}: Manual rechazado (parece dirección)", str(manual))
+                                i += 1
+                                continue
+
+                            if not validar_descripcion(descripcion):
+                                self.log.debug(f"Fila {i+1}: Descripción rechazada (es número de sede)", str(descripcion))
+                                i += 1
+                                continue
+
+                            base = {
+                                'codigo_cups': cups,
+                                'codigo_homologo_manual': limpiar_codigo(get_valor('homologo')),
+                                'descripcion_del_cups': limpiar_texto(descripcion),
+                                'tarifa_unitaria_en_pesos': limpiar_tarifa(tarifa),
+                                'manual_tarifario': limpiar_texto(manual),
+                                'porcentaje_manual_tarifario': limpiar_texto(get_valor('porcentaje')),
+                                'observaciones': limpiar_texto(get_valor('observaciones'))
+                            }
+
+                            for sede in sedes_activas:
+                                s = base.copy()
+                                s['codigo_de_habilitacion'] = formatear_habilitacion(sede['codigo'], sede['sede'])
+                                servicios.append(s)
+                        else:
+                            # Debug por qué falló validar_cups
+                            if cups:
+                                pass # print(f"    ⚠️ CUPS inválido o fila rechazada por validador: {cups} en fila {i+1}")
+
+                i += 1
+
+            if not encontro_encabezado_servicios:
+                self.log.warning("No se encontró encabezado de servicios")
+                self.agregar_alerta(TipoAlerta.COLUMNAS_NO_DETECTADAS, "Sin encabezado de servicios", nombre)
+
+            if not encontro_sedes:
+                self.log.warning("No se encontró sección de sedes")
+                self.agregar_alerta(TipoAlerta.SEDES_NO_DETECTADAS, "Sin sección de sedes", nombre)
+
+            # 🆕 Si hay sedes pendientes que nunca se activaron, activarlas ahora
+            if sedes_pendientes and not sedes_activas:
+                self.log.debug(f"Activando {len(sedes_pendientes)} sedes pendientes que no tuvieron encabezado de servicios explícito")
+                sedes_activas = sedes_pendientes
+
+            if servicios:
+                self.log.success(f"Servicios extraídos: {len(servicios):,}")
+                self.log.dedent()
+                return True, servicios, f"{len(servicios)} servicios"
+            else:
+                self.log.warning("No se extrajeron servicios")
+                self.log.dedent()
+                return False, [], "Sin servicios extraídos"
+
+        except Exception as e:
+            self.log.error(f"Error procesando archivo: {str(e)[:50]}")
+            self.agregar_alerta(TipoAlerta.ERROR_PROCESAMIENTO, str(e)[:50], nombre)
+            self.log.dedent()
+            return False, [], str(e)[:50]
+
+    def extraer_con_timeout(self, archivo: str, nombre: str, timeout: int = 60,
+                            contenido: Optional[IO[bytes]] = None) -> Tuple[bool, List[Dict], str]:
+        """Extrae servicios con timeout."""
+        resultado = [False, [], "Timeout"]
+        error_msg = [None]
+
+        def worker():
+            try:
+                resultado[0], resultado[1], resultado[2] = self.extraer_servicios(archivo, nombre, contenido)
+            except Exception as e:
+                error_msg[0] = str(e)
+                resultado[0] = False
+                resultado[2] = str(e)[:50]
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join(timeout)
+
+        if thread.is_alive():
+            self.log.warning(f"Timeout ({timeout}s) procesando archivo")
+            self.agregar_alerta(TipoAlerta.TIMEOUT, f"Archivo tardó más de {timeout}s", nombre)
+            return False, [], f"Timeout ({timeout}s)"
+
+        if error_msg[0]:
+            self.agregar_alerta(TipoAlerta.ERROR_PROCESAMIENTO, error_msg[0][:50], nombre)
+
+        return resultado[0], resultado[1], resultado[2]
@@ -0,0 +1,108 @@
+"""
+Progreso y ETA del trabajo
+==========================
+
+MedidorProgreso acumula lo que aporta cada contrato terminado (duración,
+filas, archivos y bytes descargados por SFTP) y calcula el ritmo del trabajo
+y el tiempo restante estimado. El ETA usa la media móvil de las duraciones
+de los últimos contratos (las que reporta Logger.contract_end), dividida
+entre los workers que procesan en paralelo.
+
+🆕 v15.4: MedidorEtapas acumula el tiempo de cada etapa del pipeline de un
+contrato (navegar, listar, descargar, parsear, estampar, integrar) y la
+profundidad de la cola entre la descarga adelantada y el parseo.
+"""
+
+import time
+from collections import deque
+from typing import Any, Dict, Mapping, Optional
+
+# Contratos que entran en la media móvil del ETA
+VENTANA_ETA = 20
+
+# Etapas de un contrato, en orden (ver _Ejecucion.adquirir_contrato / extraer_contrato)
+ETAPAS = ('navegar', 'listar', 'descargar', 'parsear', 'estampar', 'integrar')
+
+
+class MedidorProgreso:
+    """Contratos hechos/total, filas/s, archivos/s, bytes SFTP/s y ETA."""
+
+    def __init__(self, total: int, workers: int = 1, ventana: int = VENTANA_ETA):
+        self.total = total
+        self.workers = max(1, workers)
+        self.inicio = time.time()
+        self.hechos = 0
+        self.filas = 0
+        self.archivos = 0
+        self.bytes_sftp = 0
+        self.duraciones = deque(maxlen=ventana)
+
+    def registrar(self, segundos: float, filas: int = 0, archivos: int = 0, bytes_sftp: int = 0):
+        self.hechos += 1
+        self.filas += filas
+        self.archivos += archivos
+        self.bytes_sftp += bytes_sftp
+        self.duraciones.append(max(0.0, segundos))
+
+    def eta_segundos(self) -> Optional[float]:
+        """Tiempo restante estimado; None hasta que termina el primer contrato."""
+        if not self.duraciones:
+            return None
+        restantes = max(0, self.total - self.hechos)
+        media = sum(self.duraciones) / len(self.duraciones)
+        return restantes * media / min(self.workers, max(1, restantes))
+
+    def instantanea(self) -> Dict[str, Any]:
+        transcurrido = max(time.time() - self.inicio, 1e-6)
+        eta = self.eta_segundos()
+        return {
+            'hechos': self.hechos,
+            'total': self.total,
+            'transcurrido_s': round(transcurrido, 1),
+            'filas_por_s': round(self.filas / transcurrido, 1),
+            'archivos_por_s': round(self.archivos / transcurrido, 2),
+            'bytes_sftp_por_s': round(self.bytes_sftp / transcurrido),
+            'segundos_por_contrato': round(sum(self.duraciones) / len(self.duraciones), 2) if self.duraciones else None,
+            'eta_s': round(eta, 1) if eta is not None else None
+        }
+
+
+class MedidorEtapas:
+    """Segundos por etapa, contratos listos en la cola de descargas y esperas entre etapas."""
+
+    def __init__(self):
+        self.segundos = dict.fromkeys(ETAPAS, 0.0)
+        self.contratos = 0
+        self.muestras_cola = 0
+        self.suma_cola = 0
+        self.max_cola = 0
+        # Parseo esperando una descarga (la descarga es el cuello de botella)
+        self.espera_parseo = 0.0
+        # Descarga esperando lugar en la cola (el parseo es el cuello de botella)
+        self.espera_descarga = 0.0
+
+    def registrar(self, etapas: Mapping[str, float]):
+        self.contratos += 1
+        for etapa, segundos in etapas.items():
+            self.segundos[etapa] = self.segundos.get(etapa, 0.0) + segundos
+
+    def registrar_cola(self, profundidad: int):
+        """Contratos ya descargados cuando el parseo pide el siguiente."""
+        self.muestras_cola += 1
+        self.suma_cola += profundidad
+        self.max_cola = max(self.max_cola, profundidad)
+
+    def instantanea(self) -> Dict[str, Any]:
+        n = max(1, self.contratos)
+        datos = {
+            'segundos': {etapa: round(s, 1) for etapa, s in self.segundos.items()},
+            'por_contrato': {etapa: round(s / n, 2) for etapa, s in self.segundos.items()}
+        }
+        if self.muestras_cola:
+            datos['cola'] = {
+                'media': round(self.suma_cola / self.muestras_cola, 2),
+                'max': self.max_cola,
+                'espera_parseo_s': round(self.espera_parseo, 1),
+                'espera_descarga_s': round(self.espera_descarga, 1)
+            }
+        return datos
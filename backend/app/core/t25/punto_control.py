@@ -0,0 +1,106 @@
+"""
+Puntos de control de un trabajo
+===============================
+
+Después de integrar cada contrato el consolidador guarda, en
+<carpeta_salida>/.checkpoints/<run_id>/, lo necesario para retomar el
+trabajo con CONSOLIDADOR_RESUME=<run_id> sin repetir los contratos ya
+integrados:
+
+    diario.jsonl     una línea por contrato integrado: resumen, archivos no
+                     POSITIVA, si quedó sin fecha y las claves de alertas nuevas
+    estado.json      contratos integrados, dónde termina el diario, posición
+                     del almacén intermedio y del CSV de alertas, lotes aún en
+                     memoria y contadores; se reemplaza de forma atómica
+
+Lo que crece con el trabajo va al diario (append-only) y el estado se
+mantiene pequeño, así guardar un punto de control no depende de cuántos
+contratos lleve el trabajo. Al retomar se descarta lo escrito después del
+último estado (líneas del diario, filas del almacén y alertas).
+
+El estado no tiene que reemplazarse con cada contrato: guardar(linea) sin
+estado solo agrega la línea, que cuenta recién cuando un estado posterior
+la cubre (el almacén Parquet, por ejemplo, solo fija su posición cada
+varios lotes; al retomar se repiten los contratos desde el último estado).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+VERSION_PUNTO_CONTROL = 1
+
+
+def _a_json(datos: Any) -> str:
+    return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class PuntoControl:
+    """Diario + estado de un trabajo en <carpeta>."""
+
+    def __init__(self, carpeta: str):
+        self.carpeta = carpeta
+        self.ruta_diario = os.path.join(carpeta, 'diario.jsonl')
+        self.ruta_estado = os.path.join(carpeta, 'estado.json')
+
+    @staticmethod
+    def firma(modo: str, ano: str, numero: str, contratos: Sequence[Dict[str, str]]) -> str:
+        """Huella de los parámetros y la lista de contratos del trabajo."""
+        datos = json.dumps([modo, ano, numero, [f"{c['numero']}-{c['ano']}" for c in contratos]],
+                           separators=(',', ':'))
+        return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+    def existe(self) -> bool:
+        return os.path.exists(self.ruta_estado)
+
+    def guardar(self, linea_diario: Dict[str, Any], estado: Optional[Dict[str, Any]] = None):
+        """Agrega la línea del contrato al diario y, si se entrega, reemplaza el estado."""
+        os.makedirs(self.carpeta, exist_ok=True)
+        with open(self.ruta_diario, 'ab') as f:
+            f.write((_a_json(linea_diario) + '\n').encode('utf-8'))
+            if estado is None:
+                return
+            f.flush()
+            os.fsync(f.fileno())
+            fin_diario = f.tell()
+
+        estado = dict(estado, version=VERSION_PUNTO_CONTROL, diario_bytes=fin_diario)
+        temporal = self.ruta_estado + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(_a_json(estado))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta_estado)
+
+    def cargar(self) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """Retorna (estado, líneas del diario) o None si no hay punto de control.
+
+        Lanza ValueError si el punto de control es de otra versión.
+        """
+        if not self.existe():
+            # Líneas que ningún estado alcanzó a cubrir: no cuentan
+            if os.path.exists(self.ruta_diario):
+                os.remove(self.ruta_diario)
+            return None
+        with open(self.ruta_estado, encoding='utf-8') as f:
+            estado = json.load(f)
+        if estado.get('version') != VERSION_PUNTO_CONTROL:
+            raise ValueError(f"Punto de control de otra versión: {estado.get('version')}")
+
+        lineas = []
+        if os.path.exists(self.ruta_diario):
+            # Lo escrito después del último estado no cuenta
+            os.truncate(self.ruta_diario, estado['diario_bytes'])
+            with open(self.ruta_diario, encoding='utf-8') as f:
+                lineas = [json.loads(linea) for linea in f if linea.strip()]
+        return estado, lineas
+
+    def eliminar(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+        try:
+            # .checkpoints/ solo queda si hay otros trabajos por retomar
+            os.rmdir(os.path.dirname(self.carpeta))
+        except OSError:
+            pass
@@ -0,0 +1,271 @@
+"""
+Cliente SFTP del consolidador
+=============================
+
+Sesión paramiko contra GoAnywhere con keepalive, reintentos con backoff,
+reconexión ante fallos sobre un pool de sesiones (app.services.pool_sftp),
+caché TTL de listados de directorio (app.services.cache_directorios) y
+descargas con lecturas adelantadas, reanudación y métricas
+(app.services.transferencias_sftp).
+"""
+
+import stat
+import tempfile
+import time
+from typing import IO, Callable, Dict, List, Optional, Tuple
+
+import paramiko
+
+from app.services.cache_directorios import CacheDirectorios, ruta_absoluta
+from app.services.pool_sftp import PoolSFTP, Prestamo
+from app.services.transferencias_sftp import (
+    ERRORES_DEFINITIVOS,
+    MetricasTransferencias,
+    Transferencia,
+    descargar_reanudable,
+)
+
+from .config import Config
+from .logger import Logger
+
+class SFTPClient:
+    """🆕 v14.1: Cliente SFTP con reconexión ante fallos.
+
+    🆕 v15.4: La sesión es un canal prestado por un PoolSFTP
+    (app.services.pool_sftp); ya no se reconecta cada N contratos, solo
+    cuando la sesión falla.
+    """
+
+    def __init__(self, config: Config, logger: Logger):
+        self.config = config
+        self.log = logger
+        self._prestamo: Optional[Prestamo] = None
+        self._reconexiones = 0
+        self._current_path = "/"
+        # 🆕 v15.4: Caché de listados por ruta absoluta (sobrevive a reconexiones)
+        self.cache = CacheDirectorios(config.TTL_CACHE_DIRECTORIOS)
+        # 🆕 v15.4: Totales de las descargas de esta sesión
+        self.transferencias = MetricasTransferencias()
+        # 🆕 v15.4: Conexiones SSH con varios canales SFTP, reemplazadas solo si fallan
+        self.pool = PoolSFTP(
+            self._abrir_conexion, self._abrir_canal,
+            max_conexiones=config.MAX_CONEXIONES_SFTP,
+            canales_por_conexion=config.CANALES_POR_CONEXION_SFTP,
+            inactividad=config.INACTIVIDAD_SFTP,
+            sondeo=config.SONDEO_SFTP,
+            espera=config.TIMEOUT_CONEXION
+        )
+
+    @property
+    def _sftp(self):
+        return self._prestamo.sftp if self._prestamo is not None else None
+
+    @property
+    def _transport(self):
+        return self._prestamo.transporte if self._prestamo is not None else None
+
+    def _abrir_conexion(self) -> paramiko.SSHClient:
+        cliente_ssh = paramiko.SSHClient()
+        cliente_ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            cliente_ssh.connect(
+                hostname=self.config.HOST,
+                port=self.config.PORT,
+                username=self.config.USERNAME,
+                password=self.config.PASSWORD,
+                timeout=self.config.TIMEOUT_CONEXION,
+                banner_timeout=self.config.TIMEOUT_CONEXION,
+                auth_timeout=self.config.TIMEOUT_CONEXION,
+                allow_agent=False,
+                look_for_keys=False
+            )
+            cliente_ssh.get_transport().set_keepalive(self.config.KEEPALIVE_INTERVAL)
+        except BaseException:
+            cliente_ssh.close()
+            raise
+        return cliente_ssh
+
+    def _abrir_canal(self, cliente_ssh: paramiko.SSHClient) -> paramiko.SFTPClient:
+        # 🆕 v15.4: Ventana y paquete del canal configurables (Config.VENTANA_SFTP / PAQUETE_SFTP)
+        sftp = paramiko.SFTPClient.from_transport(
+            cliente_ssh.get_transport(),
+            window_size=self.config.VENTANA_SFTP,
+            max_packet_size=self.config.PAQUETE_SFTP
+        )
+        sftp.get_channel().settimeout(self.config.TIMEOUT_OPERACION)
+        return sftp
+
+    def _cerrar(self):
+        """Descarta la sesión actual junto con su conexión SSH (falló o se fuerza una nueva)."""
+        prestamo, self._prestamo = self._prestamo, None
+        if prestamo is not None:
+            prestamo.descartar(cerrar_conexion=True)
+
+    def conectar(self, silencioso: bool = False) -> bool:
+        self._cerrar()
+
+        for intento in range(self.config.MAX_REINTENTOS_CONEXION):
+            try:
+                if not silencioso:
+                    self.log.info(f"Conectando a {self.config.HOST}:{self.config.PORT}...")
+
+                self._prestamo = self.pool.prestar()
+                self._current_path = "/"
+
+                if not silencioso:
+                    self.log.success("Conexión establecida")
+                return True
+
+            except Exception as e:
+                self._cerrar()
+                if intento < self.config.MAX_REINTENTOS_CONEXION - 1:
+                    espera = self.config.BACKOFF_BASE ** intento
+                    if not silencioso:
+                        self.log.warning(f"Intento {intento + 1} fallido", f"reintentando en {espera:.1f}s")
+                    time.sleep(espera)
+
+        if not silencioso:
+            self.log.error("No se pudo conectar después de varios intentos")
+        return False
+
+    def reconectar_forzado(self, silencioso: bool = True) -> bool:
+        """🆕 v14.1: Fuerza reconexión."""
+        self._reconexiones += 1
+        self._cerrar()
+        time.sleep(0.5)
+        return self.conectar(silencioso)
+
+    def esta_activo(self) -> bool:
+        """🆕 v15.4: Transporte activo y uso reciente; solo sondea si la sesión lleva
+        más de Config.SONDEO_SFTP segundos sin operaciones exitosas."""
+        return self._prestamo is not None and self._prestamo.vigente()
+
+    def _transporte_activo(self) -> bool:
+        transporte = self._transport
+        return transporte is not None and transporte.is_active()
+
+    def _ejecutar(self, operacion: Callable, descripcion: str = "operación"):
+        """🆕 v15.4: Corre la operación sin verificar antes la sesión.
+
+        La falla la delata el error de la propia operación: si la sesión ya
+        no responde se descarta, se reconecta y se reintenta una vez. Los
+        errores del archivo remoto (no existe, sin permiso) no se reintentan.
+        """
+        for intento in range(2):
+            if not self._transporte_activo():
+                self._reconectar()
+            try:
+                resultado = operacion()
+            except ERRORES_DEFINITIVOS:
+                self._prestamo.marcar_uso()
+                raise
+            except Exception as e:
+                if intento == 1:
+                    raise
+                self.log.debug(f"Falló {descripcion}", str(e)[:40])
+                if not self._prestamo.vigente(forzar=True):
+                    self._cerrar()
+                continue
+            self._prestamo.marcar_uso()
+            return resultado
+
+    def _reconectar(self):
+        self._reconexiones += 1
+        self.log.warning("Reconectando...", f"intento {self._reconexiones}")
+        if not self.conectar(True):
+            raise ConnectionError("Reconexión fallida")
+
+    def listar(self, ruta: str = '.', usar_cache: bool = True) -> List[Dict]:
+        """Lista un directorio. 🆕 v15.4: servido desde la caché si está vigente."""
+        ruta_abs = ruta_absoluta(ruta, self._current_path)
+
+        def _op():
+            return [
+                {
+                    'nombre': a.filename,
+                    'tamano': a.st_size,
+                    'es_directorio': stat.S_ISDIR(a.st_mode),
+                    'fecha_modificacion': a.st_mtime
+                }
+                for a in self._sftp.listdir_attr(ruta_abs)
+            ]
+
+        if not usar_cache:
+            items = self._ejecutar(_op, f"listar {ruta_abs}")
+            self.cache.guardar(ruta_abs, items)
+            return items
+        return self.cache.obtener_o_listar(ruta_abs, lambda: self._ejecutar(_op, f"listar {ruta_abs}"))
+
+    def cd(self, ruta: str, log_nav: bool = True):
+        def _op():
+            self._sftp.chdir(ruta)
+            self._current_path = self._sftp.getcwd() or ruta
+        self._ejecutar(_op, f"cd {ruta}")
+        if log_nav:
+            self.log.nav(self._current_path)
+
+    def _sesion_activa(self):
+        """Sesión SFTP vigente; reconecta si se cayó (sin ir al servidor si se usó hace poco)."""
+        if not self.esta_activo():
+            self._reconectar()
+        return self._sftp
+
+    def _descargar_a(self, remoto: str, destino: IO[bytes]) -> Transferencia:
+        """🆕 v15.4: Descarga con lecturas adelantadas; tras un corte sigue desde el último byte."""
+        def _al_reanudar(posicion: int, error: Exception):
+            self.log.warning("Descarga interrumpida", f"se reanuda desde el byte {posicion:,} ({str(error)[:30]})")
+            self._cerrar()
+
+        transferencia = descargar_reanudable(
+            self._sesion_activa, remoto, destino,
+            tamano_lectura=self.config.PAQUETE_SFTP,
+            pendientes=self.config.LECTURAS_PENDIENTES_SFTP,
+            reintentos=self.config.MAX_REINTENTOS_OPERACION,
+            al_reanudar=_al_reanudar
+        )
+        self.transferencias.registrar(transferencia)
+        if self._prestamo is not None:
+            self._prestamo.marcar_uso()
+        self.log.debug("Transferencia", f"{transferencia.bytes:,} bytes en {transferencia.segundos:.2f}s"
+                                        f" ({transferencia.kb_por_segundo:,.1f} KB/s)")
+        return transferencia
+
+    def descargar(self, remoto: str, local: str, log_download: bool = True) -> Transferencia:
+        if log_download:
+            self.log.download(remoto)
+        with open(local, 'wb') as destino:
+            return self._descargar_a(remoto, destino)
+
+    def descargar_en_memoria(self, remoto: str, limite: int, carpeta_desborde: Optional[str] = None,
+                             log_download: bool = True) -> Tuple[IO[bytes], Transferencia]:
+        """🆕 v15.4: Descarga a un buffer en memoria (SpooledTemporaryFile).
+
+        Hasta `limite` bytes el archivo queda en RAM; si es más grande el
+        buffer pasa solo a un temporal en `carpeta_desborde`. Se retorna
+        posicionado al inicio, junto con las métricas de la descarga; quien
+        lo recibe debe cerrarlo.
+        """
+        if log_download:
+            self.log.download(remoto)
+
+        buffer = tempfile.SpooledTemporaryFile(max_size=limite, dir=carpeta_desborde)
+        try:
+            transferencia = self._descargar_a(remoto, buffer)
+            buffer.seek(0)
+        except BaseException:
+            buffer.close()
+            raise
+        return buffer, transferencia
+
+    def desconectar(self):
+        self._cerrar()
+        self.pool.cerrar()
+        self.log.info("Conexión SFTP cerrada")
+
+    @property
+    def path_actual(self) -> str:
+        return self._current_path
+
+    @property
+    def reconexiones(self) -> int:
+        return self._reconexiones
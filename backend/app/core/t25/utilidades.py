@@ -0,0 +1,443 @@
+"""
+Utilidades de lectura y normalización
+=====================================
+
+Lectura de libros Excel (detección del formato real, WorkbookSession con
+las hojas cacheadas por archivo), clasificación de hojas de ambulancias y
+traslados, y limpieza de códigos, tarifas, textos y fechas.
+"""
+
+import os
+import re
+import zipfile
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import IO, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+def detectar_formato_real(filepath: Union[str, IO[bytes]]) -> str:
+    """Detecta el formato REAL de un archivo Excel.
+
+    🆕 v15.4: Acepta también un archivo abierto en binario (descarga en memoria).
+    """
+    try:
+        if isinstance(filepath, str):
+            with open(filepath, 'rb') as f:
+                header = f.read(8)
+        else:
+            filepath.seek(0)
+            header = filepath.read(8)
+            filepath.seek(0)
+
+        if header[:4] == b'PK\x03\x04':
+            try:
+                with zipfile.ZipFile(filepath, 'r') as z:
+                    names = z.namelist()
+                    if any('workbook.bin' in n.lower() for n in names):
+                        return 'xlsb'
+                    elif any('.xml' in n.lower() for n in names):
+                        return 'xlsx'
+                return 'xlsx'
+            except zipfile.BadZipFile:
+                return 'zip_corrupt'
+
+        if header[:8] == b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1':
+            return 'xls_old'
+
+        return 'unknown'
+
+    except Exception:
+        return 'error'
+
+def leer_excel(ruta: str, sheet_name=0, header=0, engine=None):
+    """Lee archivo Excel con manejo automático de motor."""
+    if engine:
+        return pd.read_excel(ruta, engine=engine, sheet_name=sheet_name, header=header)
+
+    formato = detectar_formato_real(ruta)
+
+    try:
+        if formato == 'xlsb':
+            return pd.read_excel(ruta, engine='pyxlsb', sheet_name=sheet_name, header=header)
+        elif formato == 'xlsx':
+            return pd.read_excel(ruta, engine='openpyxl', sheet_name=sheet_name, header=header)
+        elif formato == 'xls_old':
+            return pd.read_excel(ruta, engine='xlrd', sheet_name=sheet_name, header=header)
+    except:
+        pass
+
+    for eng in ['openpyxl', 'pyxlsb', 'xlrd']:
+        try:
+            return pd.read_excel(ruta, engine=eng, sheet_name=sheet_name, header=header)
+        except:
+            continue
+    raise Exception(f"No se pudo leer: {ruta}")
+
+class WorkbookSession:
+    """🆕 v15.4: Sesión de lectura sobre UN libro Excel.
+
+    Detecta el formato real una sola vez, abre un único handle
+    (openpyxl read_only, pyxlsb u xlrd on_demand) y sirve desde él los
+    nombres de hojas, la lectura de encabezados y la iteración de filas.
+    Evita reabrir el libro y reparsear el zip en cada consulta.
+
+    Uso:
+        with WorkbookSession(ruta) as sesion:
+            hoja = ...elegir entre sesion.hojas...
+            datos = sesion.leer_hoja(hoja, max_filas=20000)
+
+    Con `contenido` (archivo binario abierto, p. ej. una descarga en
+    memoria) el libro se lee de ahí y `ruta` solo aporta la extensión.
+    """
+
+    MOTOR_POR_FORMATO = {'xlsb': 'pyxlsb', 'xlsx': 'openpyxl', 'xls_old': 'xlrd'}
+    MOTOR_POR_EXTENSION = {'.xlsb': 'pyxlsb', '.xls': 'xlrd'}
+
+    def __init__(self, ruta: str, contenido: Optional[IO[bytes]] = None):
+        self.ruta = ruta
+        self.contenido = contenido
+        self.formato = detectar_formato_real(ruta if contenido is None else contenido)
+        self.ext = os.path.splitext(ruta)[1].lower()
+        self.motor: Optional[str] = None
+        self._wb = None
+        self._hojas: Optional[List[str]] = None
+        self._abrir()
+
+    def _abrir(self):
+        """Abre el libro con el motor del formato real y, si falla, con el de la extensión."""
+        motores = []
+        if self.formato in self.MOTOR_POR_FORMATO:
+            motores.append(self.MOTOR_POR_FORMATO[self.formato])
+        motores.append(self.MOTOR_POR_EXTENSION.get(self.ext, 'openpyxl'))
+
+        for motor in dict.fromkeys(motores):
+            try:
+                fuente = self.ruta
+                if self.contenido is not None:
+                    self.contenido.seek(0)
+                    fuente = self.contenido
+                if motor == 'pyxlsb':
+                    from pyxlsb import open_workbook
+                    self._wb = open_workbook(fuente)
+                    hojas = list(self._wb.sheets)
+                elif motor == 'xlrd':
+                    import xlrd
+                    if self.contenido is not None:
+                        # xlrd no lee de archivos abiertos, solo de bytes
+                        self._wb = xlrd.open_workbook(file_contents=self.contenido.read(), on_demand=True)
+                    else:
+                        self._wb = xlrd.open_workbook(self.ruta, on_demand=True)
+                    hojas = self._wb.sheet_names()
+                else:
+                    from openpyxl import load_workbook
+                    if self.contenido is not None:
+                        # Con una ruta openpyxl rechaza las extensiones que no son suyas;
+                        # desde memoria se aplica el mismo criterio
+                        from openpyxl.reader.excel import SUPPORTED_FORMATS
+                        if self.ext not in SUPPORTED_FORMATS:
+                            raise ValueError(f"Extensión no soportada por openpyxl: {self.ext}")
+                    self._wb = load_workbook(fuente, read_only=True, data_only=True)
+                    hojas = self._wb.sheetnames
+                self.motor = motor
+                self._hojas = list(hojas)
+                return
+            except Exception:
+                self.cerrar()
+
+    @property
+    def abierto(self) -> bool:
+        return self._wb is not None
+
+    @property
+    def hojas(self) -> List[str]:
+        return list(self._hojas) if self._hojas else []
+
+    def iterar_filas(self, hoja: str, max_filas: Optional[int] = None):
+        """Genera las filas de una hoja como listas (sin reabrir el libro)."""
+        if not self.abierto:
+            return
+
+        if self.motor == 'pyxlsb':
+            with self._wb.get_sheet(hoja) as sheet:
+                for i, row in enumerate(sheet.rows()):
+                    if max_filas is not None and i >= max_filas:
+                        break
+                    yield [cell.v for cell in row]
+
+        elif self.motor == 'xlrd':
+            sheet = self._wb.sheet_by_name(hoja)
+            n = sheet.nrows if max_filas is None else min(sheet.nrows, max_filas)
+            for r in range(n):
+                yield [sheet.cell_value(r, c) for c in range(sheet.ncols)]
+
+        else:
+            sheet = self._wb[hoja]
+            for i, row in enumerate(sheet.iter_rows(values_only=True)):
+                if max_filas is not None and i >= max_filas:
+                    break
+                yield list(row)
+
+    def leer_hoja(self, hoja: str, max_filas: int = 50000) -> List[List]:
+        """Lee hoja como lista de listas. Retorna [] si no es legible."""
+        try:
+            return list(self.iterar_filas(hoja, max_filas))
+        except Exception:
+            return []
+
+    def leer_encabezado(self, hoja: str, n_filas: int = 15) -> List[List]:
+        """Lee solo las primeras filas de una hoja (sondeo de encabezados)."""
+        return self.leer_hoja(hoja, max_filas=n_filas)
+
+    def cerrar(self):
+        wb, self._wb = self._wb, None
+        if wb is None:
+            return
+        try:
+            if hasattr(wb, 'release_resources'):
+                wb.release_resources()
+            else:
+                wb.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+def obtener_hojas(ruta: str) -> List[str]:
+    """Obtiene lista de hojas de un archivo Excel."""
+    with WorkbookSession(ruta) as sesion:
+        return sesion.hojas
+
+def leer_hoja_raw(ruta: str, hoja: str, max_filas: int = 50000) -> List[List]:
+    """Lee hoja como lista de listas."""
+    with WorkbookSession(ruta) as sesion:
+        return sesion.leer_hoja(hoja, max_filas)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CLASIFICACIÓN DE HOJAS PARA ALERTAS
+# ══════════════════════════════════════════════════════════════════════════════
+
+def clasificar_hojas(hojas: List[str]) -> Dict[str, List[str]]:
+    """Clasifica las hojas disponibles para generar alertas más descriptivas."""
+    clasificacion = {
+        'servicios': [],
+        'medicamentos': [],
+        'traslados': [],
+        'ambulancias': [],
+        'paquetes': [],
+        'otras': []
+    }
+
+    PALABRAS_AMBULANCIA = ['AMBULANCIA', 'TAM', 'TAB', 'TRASLADO ASISTENCIAL',
+                           'TRANSPORTE ASISTENCIAL', 'SERVICIO AMBULANCIA']
+
+    for hoja in hojas:
+        h = hoja.upper()
+
+        if any(x in h for x in ['TARIFA DE SERV', 'TARIFAS DE SERV', 'TARIFAS SERV']):
+            if 'MEDICAMENTO' not in h and 'TRASLADO' not in h and 'AMBULANCIA' not in h:
+                clasificacion['servicios'].append(hoja)
+                continue
+
+        es_ambulancia = False
+        for palabra in PALABRAS_AMBULANCIA:
+            if palabra in h:
+                es_ambulancia = True
+                break
+
+        if es_ambulancia:
+            clasificacion['ambulancias'].append(hoja)
+        elif 'MEDICAMENTO' in h or 'INSUMO' in h:
+            clasificacion['medicamentos'].append(hoja)
+        elif 'TRASLADO' in h:
+            clasificacion['traslados'].append(hoja)
+        elif 'PAQUETE' in h:
+            clasificacion['paquetes'].append(hoja)
+        elif 'SERVICIO' in h and 'MEDICAMENTO' not in h:
+            clasificacion['servicios'].append(hoja)
+        else:
+            clasificacion['otras'].append(hoja)
+
+    return clasificacion
+
+def generar_mensaje_alerta_hojas(hojas: List[str], categoria_cuentas_medicas: str = None) -> str:
+    """Genera un mensaje de alerta descriptivo basado en las hojas disponibles."""
+    if not hojas:
+        return "No se pudieron leer las hojas del archivo"
+
+    cls = clasificar_hojas(hojas)
+    partes = []
+
+    if cls['ambulancias']:
+        partes.append(f"Ambulancias: {cls['ambulancias'][0]}")
+    if cls['medicamentos']:
+        partes.append(f"Medicamentos: {cls['medicamentos'][0]}")
+    if cls['traslados']:
+        partes.append(f"Traslados: {cls['traslados'][0]}")
+    if cls['paquetes']:
+        partes.append(f"Paquetes: {cls['paquetes'][0]}")
+
+    mensaje = ""
+    if partes:
+        mensaje = f"No se encontró hoja TARIFA SERVICIOS. Hojas encontradas: [{'; '.join(partes)}]"
+    else:
+        todas = ', '.join(hojas[:3])
+        if len(hojas) > 3:
+            todas += f" (+{len(hojas)-3} más)"
+        mensaje = f"No se encontró hoja TARIFA SERVICIOS. Hojas disponibles: [{todas}]"
+
+    if categoria_cuentas_medicas:
+        mensaje += f". Categoría cuentas médicas: '{categoria_cuentas_medicas}'"
+
+    return mensaje
+
+def es_archivo_solo_traslados(hojas: List[str]) -> Tuple[bool, str, str]:
+    """Verifica si un archivo SOLO contiene hojas de traslados/ambulancias."""
+    if not hojas:
+        return False, "", ""
+
+    cls = clasificar_hojas(hojas)
+
+    if cls['servicios']:
+        return False, "", ""
+
+    tiene_ambulancias = bool(cls['ambulancias'])
+    tiene_traslados = bool(cls['traslados'])
+
+    if tiene_ambulancias and not tiene_traslados:
+        hojas_amb = ', '.join(cls['ambulancias'][:3])
+        if len(cls['ambulancias']) > 3:
+            hojas_amb += f" (+{len(cls['ambulancias'])-3} más)"
+        mensaje = f"Archivo contiene solo hojas de ambulancias: [{hojas_amb}]"
+        return True, mensaje, "AMBULANCIAS"
+
+    if tiene_traslados and not tiene_ambulancias:
+        hojas_traslado = ', '.join(cls['traslados'][:3])
+        if len(cls['traslados']) > 3:
+            hojas_traslado += f" (+{len(cls['traslados'])-3} más)"
+        mensaje = f"Archivo contiene solo hojas de traslados: [{hojas_traslado}]"
+        return True, mensaje, "TRASLADOS"
+
+    if tiene_ambulancias and tiene_traslados:
+        todas = cls['ambulancias'] + cls['traslados']
+        hojas_str = ', '.join(todas[:3])
+        if len(todas) > 3:
+            hojas_str += f" (+{len(todas)-3} más)"
+        mensaje = f"Archivo contiene solo hojas de ambulancias/traslados: [{hojas_str}]"
+        return True, mensaje, "MIXTO"
+
+    return False, "", ""
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FUNCIONES DE NORMALIZACIÓN Y LIMPIEZA
+# ══════════════════════════════════════════════════════════════════════════════
+
+def normalizar_texto(texto) -> str:
+    """Normaliza texto: mayúsculas, sin tildes, sin especiales."""
+    if texto is None:
+        return ""
+    t = str(texto).upper().strip()
+    for k, v in {'Á':'A','É':'E','Í':'I','Ó':'O','Ú':'U','Ñ':'N','Ü':'U'}.items():
+        t = t.replace(k, v)
+    return re.sub(r'[^A-Z0-9\s]', ' ', t).strip()
+
+def similitud_texto(a: str, b: str) -> float:
+    """Calcula similitud entre dos textos (0.0 a 1.0)."""
+    return SequenceMatcher(None, a.upper(), b.upper()).ratio()
+
+def limpiar_codigo(valor) -> Optional[str]:
+    """Limpia código eliminando decimales y espacios."""
+    if valor is None:
+        return None
+    texto = str(valor).strip()
+    if texto.endswith('.0'):
+        texto = texto[:-2]
+    return None if not texto or texto.lower() in ('none', 'nan', '') else texto
+
+def limpiar_tarifa(valor) -> Optional[object]:
+    """Convierte tarifa a número (int si no tiene decimales)."""
+    if valor is None:
+        return None
+    try:
+        if isinstance(valor, (int, float)):
+            if pd.isna(valor): return None
+            val = float(valor)
+            return int(val) if val.is_integer() else val
+            
+        texto = str(valor).replace('$', '').replace(',', '').replace(' ', '').strip()
+        if not texto: return None
+        val = float(texto)
+        return int(val) if val.is_integer() else val
+    except:
+        return None
+
+def limpiar_texto(valor) -> Optional[str]:
+    """Limpia texto eliminando espacios extras y sufijos .0"""
+    if valor is None:
+        return None
+    texto = str(valor).strip()
+    if not texto or texto.lower() in ('none', 'nan'):
+        return None
+    
+    if texto.endswith('.0'):
+        texto = texto[:-2]
+        
+    return texto
+
+def formatear_habilitacion(codigo, sede) -> str:
+    """Formatea código de habilitación con sede."""
+    if not codigo:
+        return "0000000000-01"
+
+    c = str(codigo).strip()
+    if c.endswith('.0'):
+        c = c[:-2]
+
+    if re.match(r'^\d{8,12}-\d{1,2}$', c):
+        return c
+
+    c_limpio = re.sub(r'[^\d]', '', c)
+
+    try:
+        if sede is None:
+            s = 1
+        else:
+            sede_str = str(sede).strip()
+            if sede_str.endswith('.0'):
+                sede_str = sede_str[:-2]
+            sede_limpia = re.sub(r'[^\d]', '', sede_str)
+            if sede_limpia == c_limpio or len(sede_limpia) > 5:
+                s = 1
+            else:
+                s = int(float(sede_str)) if sede_str else 1
+    except:
+        s = 1
+
+    return f"{c_limpio}-{str(s).zfill(2)}"
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FUNCIONES DE DETECCIÓN DE PATRONES
+# ══════════════════════════════════════════════════════════════════════════════
+
+def es_extension_excel(nombre: str) -> bool:
+    """Verifica si es archivo Excel."""
+    return nombre and nombre.lower().endswith(('.xlsx', '.xls', '.xlsm', '.xlsb'))
+
+# 🆕 v15.0: contiene_anexo1() está en validacion.py, con soporte mejorado
+# para detectar archivos TARIFAS y OTROSI
+
+def timestamp_a_fecha(timestamp: float) -> Optional[str]:
+    """Convierte timestamp UNIX a fecha DD/MM/YYYY."""
+    if not timestamp:
+        return None
+    try:
+        dt = datetime.fromtimestamp(timestamp)
+        return dt.strftime('%d/%m/%Y')
+    except:
+        return None
+
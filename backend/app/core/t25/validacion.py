@@ -0,0 +1,950 @@
+"""
+Validación semántica y detección de archivos
+============================================
+
+Reglas v14.1/v15.0 que deciden qué hoja de un anexo contiene servicios,
+qué filas son encabezados, sedes o traslados, y qué valores son CUPS,
+tarifas, manuales o descripciones válidas; además de la clasificación de
+archivos por nombre (ANEXO 1, tarifas, otrosíes).
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# 🆕 v14.1: Lista COMPLETA de ciudades colombianas (incluye las usadas en traslados)
+CIUDADES_COLOMBIA_COMPLETA = {
+    # Capitales
+    'BOGOTÁ', 'BOGOTA', 'MEDELLÍN', 'MEDELLIN', 'CALI', 'BARRANQUILLA',
+    'CARTAGENA', 'BUCARAMANGA', 'CÚCUTA', 'CUCUTA', 'PEREIRA', 'IBAGUÉ',
+    'IBAGUE', 'SANTA MARTA', 'MANIZALES', 'VILLAVICENCIO', 'PASTO',
+    'MONTERÍA', 'MONTERIA', 'NEIVA', 'ARMENIA', 'SINCELEJO', 'POPAYÁN',
+    'POPAYAN', 'VALLEDUPAR', 'TUNJA', 'FLORENCIA', 'QUIBDÓ', 'QUIBDO',
+    'RIOHACHA', 'YOPAL', 'MOCOA', 'LETICIA', 'INÍRIDA', 'INIRIDA',
+    'MITÚ', 'MITU', 'PUERTO CARREÑO', 'SAN JOSÉ DEL GUAVIARE', 'ARAUCA',
+    # Ciudades intermedias usadas en traslados aéreos
+    'BAHIA SOLANO', 'BARRANCABERMEJA', 'BUENAVENTURA', 'PALMIRA',
+    'CARTAGO', 'TULUA', 'TULUÁ', 'BUGA', 'SOGAMOSO', 'DUITAMA', 'GIRARDOT',
+    'FUSAGASUGA', 'FUSAGASUGÁ', 'FACATATIVA', 'FACATATIVÁ', 'ZIPAQUIRA',
+    'ZIPAQUIRÁ', 'CHIA', 'CHÍA', 'SOACHA', 'RIONEGRO', 'ENVIGADO',
+    'ITAGUI', 'ITAGÜÍ', 'BELLO', 'TUMACO', 'IPIALES', 'GRANADA', 'ACACIAS',
+    'ACACÍAS', 'PUERTO LOPEZ', 'PUERTO LÓPEZ', 'AGUACHICA', 'OCAÑA',
+    'APARTADO', 'APARTADÓ', 'TURBO', 'CAUCASIA', 'MAGANGUE', 'MAGANGUÉ',
+    'LORICA', 'CERETE', 'CERETÉ', 'ESPINAL', 'MELGAR', 'FLANDES', 'HONDA',
+    'MARIQUITA', 'LA DORADA', 'PUERTO BERRIO', 'PUERTO BERRÍO',
+    'PUERTO BOYACA', 'PUERTO BOYACÁ', 'CIENAGA', 'CIÉNAGA', 'FUNDACION',
+    'FUNDACIÓN', 'ARACATACA', 'EL BANCO', 'PLATO', 'COROZAL', 'SAMPUES',
+    'SAMPUÉS', 'SAN MARCOS', 'ZARZAL', 'JAMUNDI', 'JAMUNDÍ', 'YUMBO',
+    'CANDELARIA', 'PRADERA', 'FLORIDA', 'CERRITO', 'GUACARI', 'GUACARÍ',
+    'GINEBRA', 'ROLDANILLO', 'LA UNION', 'LA UNIÓN', 'SEVILLA',
+    'CAICEDONIA', 'ARGELIA', 'DARIEN', 'DARIÉN', 'RESTREPO', 'DAGUA',
+    'LA CUMBRE', 'CLO', 'BOG', 'MDE',  # Códigos de aeropuerto
+    # Otras ciudades importantes
+    'TENJO', 'MOSQUERA', 'SUESCA', 'FUNZA', 'MADRID', 'ALCALÁ', 'ULLOA',
+    'TRUJILLO', 'RIOFRÍO', 'RIOFRIO', 'CALIMA', 'VIJES', 'YOTOCO',
+    'SAN PEDRO', 'EL DOVIO', 'ANDALUCÍA', 'ANDALUCIA', 'CONTRATACIÓN',
+    'CONTRATACION', 'POPOYAN', 'BOLIVAR', 'BOLÍVAR',
+}
+
+MUNICIPIOS_COLOMBIA = {
+    'BOGOTÁ', 'BOGOTA', 'MEDELLÍN', 'MEDELLIN', 'CALI', 'BARRANQUILLA',
+    'CARTAGENA', 'BUCARAMANGA', 'CÚCUTA', 'CUCUTA', 'PEREIRA', 'IBAGUÉ',
+    'IBAGUE', 'SANTA MARTA', 'MANIZALES', 'VILLAVICENCIO', 'PASTO',
+    'MONTERÍA', 'MONTERIA', 'NEIVA', 'ARMENIA', 'SINCELEJO', 'POPAYÁN',
+    'POPOYAN', 'VALLEDUPAR', 'TUNJA', 'FLORENCIA', 'QUIBDÓ', 'QUIBDO',
+    'RIOHACHA', 'YOPAL', 'MOCOA', 'LETICIA', 'INÍRIDA', 'INIRIDA',
+    'MITÚ', 'MITU', 'PUERTO CARREÑO', 'SAN JOSÉ DEL GUAVIARE',
+    'ZARZAL', 'PALMIRA', 'ANDALUCÍA', 'ANDALUCIA', 'CONTRATACIÓN',
+    'CONTRATACION', 'TULUÁ', 'TULUA', 'BUGA', 'CARTAGO', 'JAMUNDÍ',
+    'JAMUNDI', 'YUMBO', 'CANDELARIA', 'PRADERA', 'FLORIDA', 'CERRITO',
+    'GUACARÍ', 'GUACARI', 'GINEBRA', 'ROLDANILLO', 'LA UNIÓN', 'SEVILLA',
+    'CAICEDONIA', 'ALCALÁ', 'ULLOA', 'ARGELIA', 'BOLÍVAR', 'TRUJILLO',
+    'RIOFRÍO', 'RIOFRIO', 'CALIMA', 'DAGUA', 'LA CUMBRE', 'RESTREPO',
+    'VIJES', 'YOTOCO', 'SAN PEDRO', 'DARIÉN', 'DARIEN', 'EL DOVIO',
+    'SOGAMOSO', 'TENJO', 'MOSQUERA', 'ZIPAQUIRÁ', 'ZIPAQUIRA', 'SUESCA',
+    'BUENAVENTURA', 'RIONEGRO', 'ENVIGADO', 'ITAGÜÍ', 'ITAGUI', 'BELLO',
+    'SOACHA', 'CHÍA', 'CHIA', 'FUNZA', 'MADRID', 'FACATATIVÁ', 'FACATATIVA',
+    'GIRARDOT', 'FUSAGASUGÁ', 'FUSAGASUGA', 'DUITAMA', 'SOGAMOSO'
+}
+
+DEPARTAMENTOS_COLOMBIA = {
+    'BOGOTÁ D.C', 'BOGOTA D.C', 'BOGOTÁ D.C.', 'BOGOTA D.C.',
+    'ANTIOQUIA', 'ATLÁNTICO', 'ATLANTICO', 'BOLÍVAR', 'BOLIVAR',
+    'BOYACÁ', 'BOYACA', 'CALDAS', 'CAQUETÁ', 'CAQUETA', 'CASANARE',
+    'CAUCA', 'CESAR', 'CHOCÓ', 'CHOCO', 'CÓRDOBA', 'CORDOBA',
+    'CUNDINAMARCA', 'GUAINÍA', 'GUAINIA', 'GUAVIARE', 'HUILA',
+    'LA GUAJIRA', 'MAGDALENA', 'META', 'NARIÑO', 'NARINO',
+    'NORTE DE SANTANDER', 'PUTUMAYO', 'QUINDÍO', 'QUINDIO',
+    'RISARALDA', 'SAN ANDRÉS', 'SAN ANDRES', 'SANTANDER', 'SUCRE',
+    'TOLIMA', 'VALLE', 'VALLE DEL CAUCA', 'VAUPÉS', 'VAUPES',
+    'VICHADA', 'AMAZONAS', 'ARAUCA'
+}
+
+PALABRAS_ENCABEZADO_SEDES = {
+    'DEPARTAMENTO', 'MUNICIPIO', 'CODIGO DE HABILITACION', 'CÓDIGO DE HABILITACIÓN',
+    'CODIGO DE HABIITACION', 'CÓDIGO DE HABIITACIÓN',
+    'CODIGO HABILITACION', 'CÓDIGO HABILITACIÓN',
+    'NUMERO DE SEDE', 'NÚMERO DE SEDE', 'N° SEDE', 'NO. SEDE',
+    'NOMBRE DE LA SEDE', 'DIRECCION', 'DIRECCIÓN', 'TELEFONO', 'TELÉFONO',
+    'EMAIL', 'CORREO', 'NOMBRE SEDE'
+}
+
+PALABRAS_ENCABEZADO_SERVICIOS = {
+    'CODIGO CUPS', 'CÓDIGO CUPS', 'COD CUPS', 'COD. CUPS','CODIGO CUP', 'COD. CUP', 'COD CUP',
+    'DESCRIPCION DEL CUPS', 'DESCRIPCIÓN DEL CUPS', 'DESCRIPCION DE CUP', 'DESCRIPCIÓN DE CUP',
+    'TARIFA UNITARIA', 'MANUAL TARIFARIO', 'TARIFARIO',
+    'CODIGO DE ESPECIALIDAD', 'CÓDIGO DE ESPECIALIDAD'
+}
+
+PATRONES_DIRECCION = [
+    'CARRERA ', 'CRA ', 'CRA. ', 'CR ',
+    'CALLE ', 'CL ', 'CL. ',
+    'AVENIDA ', 'AV ', 'AV. ',
+    'DIAGONAL ', 'DG ', 'DG. ',
+    'TRANSVERSAL ', 'TV ', 'TV. ',
+    'KM ', 'KILOMETRO', 'KILÓMETRO',
+    'LOCAL ', 'PISO ', 'OFICINA ', 'OF ',
+    'CONSULTORIO', 'TORRE ', 'BLOQUE ',
+    'MANZANA', 'CASA ', 'APARTAMENTO', 'APTO',
+    'EDIFICIO', 'CENTRO COMERCIAL', 'C.C.',
+    'BARRIO ', 'VEREDA ', 'SECTOR '
+]
+
+# 🆕 v14.1 - Hojas a excluir SILENCIOSAMENTE (sin generar alerta)
+HOJAS_EXCLUIR = {
+    'INSTRUCCIONES', 'INFO', 'DATOS', 'CONTENIDO', 'INDICE', 'ÍNDICE',
+    'GUIA DE USO', 'GUÍA DE USO', 'CONTROL DE CAMBIOS', 'HOJA1', 'SHEET1',
+    'INSTRUCTIVO', 'PARAMETROS', 'PARÁMETROS', 'CONFIGURACION', 'CONFIGURACIÓN',
+    'LISTA', 'LISTAS', 'VALIDACION', 'VALIDACIÓN', 'CATALOGO', 'CATÁLOGO',
+    'RESUMEN', 'PORTADA', 'CARATULA', 'CARÁTULA', 'INICIO', 'HOME',
+    'MENU', 'MENÚ', 'ANEXO TECNICO', 'ANEXO TÉCNICO', 'GLOSARIO',
+}
+
+# 🆕 v14.1: Hojas que se excluyen SILENCIOSAMENTE pero se MENCIONAN si no hay hoja de servicios
+HOJAS_SIN_SERVICIOS_VALIDOS = {
+    'PAQUETE', 'PAQUETES', 'TARIFAS PAQUETE', 'TARIFAS PAQUETES',
+    'TARIFA PAQUETE', 'TARIFA PAQUETES',
+    'COSTO VIAJE', 'COSTO DE VIAJE', 'COSTOS VIAJE', 'COSTOS DE VIAJE'
+}
+
+PATRONES_EXCLUIR_HOJA = [
+    'COSTO VIAJE',
+    'COSTO DE VIAJE',
+    '(COSTO',
+]
+
+# 🆕 v14.1: Patrones de PAQUETES (se excluyen pero NO generan alerta individual)
+PATRONES_PAQUETES = [
+    'PAQUETE',
+]
+
+PALABRAS_HOJA_SERVICIOS_ALTA = [
+    'TARIFA DE SERV',
+    'TARIFAS DE SERV',
+    'TARIFA SERV',
+    'TARIFAS SERV',
+    'SERVICIOS INDIVIDUALES',
+    'SOLICITUD',
+    'ANEXO 1',
+    'ANEXO',
+]
+
+def debe_excluir_hoja(nombre_hoja: str) -> bool:
+    """🆕 v14.1: Verifica si una hoja debe ser excluida (SILENCIOSAMENTE).
+    Las hojas de PAQUETES se excluyen pero NO generan alerta individual.
+    """
+    if not nombre_hoja:
+        return True
+
+    nombre_upper = nombre_hoja.upper().strip()
+
+    # Excluir hojas de configuración/instrucciones
+    if nombre_upper in HOJAS_EXCLUIR:
+        return True
+
+    # 🆕 v14.1: Excluir hojas de PAQUETES silenciosamente (sin alerta)
+    if nombre_upper in HOJAS_SIN_SERVICIOS_VALIDOS:
+        return True
+
+    # Verificar patrones de exclusión
+    for patron in PATRONES_EXCLUIR_HOJA:
+        if patron in nombre_upper:
+            return True
+
+    # 🆕 v14.1: Verificar patrones de PAQUETES
+    for patron in PATRONES_PAQUETES:
+        if patron in nombre_upper:
+            return True
+
+    return False
+
+def obtener_hojas_excluidas_info(hojas: List[str]) -> List[Tuple[str, str]]:
+    """🆕 v14.1: Obtiene info de hojas excluidas para mostrar si no hay servicios."""
+    info = []
+    for hoja in hojas:
+        hoja_upper = hoja.upper().strip()
+
+        # Verificar si es hoja de paquetes/costos
+        if hoja_upper in HOJAS_SIN_SERVICIOS_VALIDOS:
+            info.append((hoja, "Hoja de paquetes/costos - No aplica para T25"))
+            continue
+
+        for patron in PATRONES_PAQUETES:
+            if patron in hoja_upper:
+                info.append((hoja, "Hoja de paquetes - No aplica para T25"))
+                break
+
+    return info
+
+def buscar_hoja_servicios_inteligente(hojas: List[str]) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+    """🆕 v14.1: Busca la hoja de servicios de forma inteligente.
+
+    Retorna: (nombre_hoja_encontrada, hojas_excluidas_info)
+
+    CAMBIO v14.1: Las hojas de PAQUETES NO generan alerta individual.
+    Solo se mencionan en el mensaje final si no hay hoja de servicios.
+    """
+    if not hojas:
+        return None, []
+
+    hojas_norm = {h: h.upper().strip() for h in hojas}
+
+    # 🆕 v14.1: Obtener info de hojas excluidas para informar si no hay servicios
+    hojas_excluidas_info = obtener_hojas_excluidas_info(hojas)
+
+    # Filtrar hojas excluidas
+    hojas_validas = {h: h_norm for h, h_norm in hojas_norm.items()
+                     if not debe_excluir_hoja(h_norm)}
+
+    if not hojas_validas:
+        hojas_validas = hojas_norm
+
+    # PASO 1: Buscar hoja "SERVICIOS"
+    for hoja, h_norm in hojas_validas.items():
+        if h_norm.strip() == 'SERVICIOS':
+            return hoja, hojas_excluidas_info
+
+    # PASO 2: "TARIFAS DE SERVICIOS" sin modificadores
+    patrones_exactos = [
+        'TARIFAS DE SERVICIOS',
+        'TARIFA DE SERVICIOS',
+        'TARIFAS DE SERV',
+        'TARIFA DE SERV',
+    ]
+
+    for hoja, h_norm in hojas_validas.items():
+        h_clean = ' '.join(h_norm.split())
+
+        for patron in patrones_exactos:
+            if h_clean == patron or h_clean.startswith(patron + ' '):
+                if 'COSTO' not in h_clean and 'VIAJE' not in h_clean and 'PAQUETE' not in h_clean:
+                    return hoja, hojas_excluidas_info
+
+    # PASO 3: TARIFA + SERV
+    for hoja, h_norm in hojas_validas.items():
+        if 'TARIFA' in h_norm and 'SERV' in h_norm:
+            if not debe_excluir_hoja(h_norm):
+                return hoja, hojas_excluidas_info
+
+    # PASO 4: SERVICIO
+    for hoja, h_norm in hojas_validas.items():
+        if 'SERVICIO' in h_norm:
+            if not debe_excluir_hoja(h_norm):
+                return hoja, hojas_excluidas_info
+
+    # PASO 5: CUPS
+    for hoja, h_norm in hojas_validas.items():
+        if 'CUPS' in h_norm:
+            if not debe_excluir_hoja(h_norm):
+                return hoja, hojas_excluidas_info
+
+    # PASO 6: ANEXO 1
+    for hoja, h_norm in hojas_validas.items():
+        h_clean = h_norm.replace(' ', '').replace('_', '')
+        if h_clean in ['ANEXO1', 'ANEXO01']:
+            if not debe_excluir_hoja(h_norm):
+                return hoja, hojas_excluidas_info
+
+    # No se encontró hoja de servicios
+    return None, hojas_excluidas_info
+
+def es_encabezado_seccion_sedes(fila: list) -> bool:
+    """Detecta si una fila es el ENCABEZADO de la sección de SEDES."""
+    if not fila:
+        return False
+
+    fila_texto = ' '.join([str(x).upper().strip() for x in fila if x is not None])
+
+    contador = 0
+    for palabra in PALABRAS_ENCABEZADO_SEDES:
+        if palabra in fila_texto:
+            contador += 1
+
+    return contador >= 3
+
+def es_encabezado_seccion_servicios(fila: list) -> bool:
+    """Detecta si una fila es el ENCABEZADO de la sección de SERVICIOS."""
+    if not fila:
+        return False
+
+    fila_texto = ' '.join([str(x).upper().strip() for x in fila if x is not None])
+
+    tiene_cups = 'CODIGO CUPS' in fila_texto or 'CÓDIGO CUPS' in fila_texto
+    tiene_otra = any(p in fila_texto for p in ['DESCRIPCION', 'TARIFA', 'TARIFARIO', 'ESPECIALIDAD'])
+
+    return tiene_cups and tiene_otra
+
+def es_dato_de_sede(fila: list) -> bool:
+    """Detecta si una fila contiene DATOS de sede."""
+    if not fila or len(fila) < 3:
+        return False
+    
+    col0 = str(fila[0]).upper().strip() if fila[0] is not None else ''
+    col1 = str(fila[1]).upper().strip() if len(fila) > 1 and fila[1] is not None else ''
+
+    es_depto = col0 in DEPARTAMENTOS_COLOMBIA or any(d in col0 for d in DEPARTAMENTOS_COLOMBIA)
+    es_muni = col1 in MUNICIPIOS_COLOMBIA or any(m in col1 for m in MUNICIPIOS_COLOMBIA)
+
+    # Validar por ubicación geográfica (método más confiable)
+    if es_depto and es_muni:
+        return True
+
+    # 🆕 v15.3: Validación más estricta para evitar falsos positivos
+    tiene_direccion = False
+    tiene_codigo_hab = False
+
+    # Solo buscar código de habilitación en columnas 2-5 (no en col 0-1 que son ITEM/CUPS)
+    for i, item in enumerate(fila[2:6]):  # Columnas 2, 3, 4, 5
+        if not item: continue
+        item_str = str(item).upper().strip()
+        
+        # Chequear dirección
+        for patron in PATRONES_DIRECCION:
+            if patron in item_str:
+                tiene_direccion = True
+                break
+        
+        # Chequear código habilitación: debe ser 10-12 dígitos PUROS (sin guiones)
+        # Los códigos CUPS como 890202-04 tienen guiones, la habilitación no
+        clean_code = item_str.replace('.0', '')
+        if clean_code.isdigit() and 10 <= len(clean_code) <= 12:
+            tiene_codigo_hab = True
+
+    # Solo considerar sede si tiene AMBOS: código de habilitación Y (departamento O dirección)
+    if tiene_codigo_hab and (es_depto or es_muni or tiene_direccion):
+        return True
+
+    # Si tiene dirección Y departamento/municipio, es sede
+    if tiene_direccion and (es_depto or es_muni):
+        return True
+
+    return False
+
+def es_municipio_o_departamento(valor: str) -> bool:
+    """Detecta si un valor es un municipio o departamento."""
+    if not valor:
+        return False
+    valor_u = str(valor).upper().strip()
+    return valor_u in MUNICIPIOS_COLOMBIA or valor_u in DEPARTAMENTOS_COLOMBIA
+
+def es_direccion(valor: str) -> bool:
+    """Detecta si un valor es una dirección."""
+    if not valor:
+        return False
+    valor_u = str(valor).upper()
+    for patron in PATRONES_DIRECCION:
+        if patron in valor_u:
+            return True
+    return False
+
+PREFIJOS_CELULAR_COLOMBIA = {
+    '300', '301', '302', '303', '304', '305',
+    '310', '311', '312', '313', '314', '315', '316', '317', '318',
+    '320', '321', '322', '323', '324',
+    '350', '351',
+    '330', '331', '332', '333'
+}
+
+def es_telefono_celular_colombiano(valor: str) -> bool:
+    """🆕 v14.1: Detecta si un valor es un teléfono celular colombiano.
+    CORREGIDO: Funciona con números SIN guiones (como vienen en Excel).
+
+    Ejemplos que detecta:
+    - 3214567890 (sin guiones)
+    - 3001234567
+    - 3501234567
+
+    NO debe confundir con:
+    - Tarifas (5920000, 11380000)
+    - Códigos CUPS (890201)
+    - Habilitación (7614708225)
+    """
+    if not valor:
+        return False
+
+    # Convertir a string y limpiar
+    valor_str = str(valor).strip()
+
+    # Si termina en .0, quitarlo (típico de Excel)
+    if valor_str.endswith('.0'):
+        valor_str = valor_str[:-2]
+
+    # Quitar TODOS los caracteres no dígitos
+    valor_clean = re.sub(r'[^\d]', '', valor_str)
+
+    # Debe ser exactamente 10 dígitos
+    if len(valor_clean) != 10:
+        return False
+
+    # Verificar prefijo de celular colombiano
+    prefijo = valor_clean[:3]
+    return prefijo in PREFIJOS_CELULAR_COLOMBIA
+
+def es_telefono_celular(valor: str) -> bool:
+    return es_telefono_celular_colombiano(valor)
+
+def es_numero_sede(valor: str) -> bool:
+    """Detecta si un valor es solo un número de sede."""
+    if not valor:
+        return False
+    valor_str = str(valor).strip().replace('.0', '')
+    return valor_str.isdigit() and len(valor_str) <= 2
+
+#VALIDACIÓN DE CUPS ULTRA ESTRICTA
+PALABRAS_INVALIDAS_CUPS = [
+    'CODIGO', 'CUPS', 'ITEM', 'DESCRIPCION', 'TARIFA', 'TOTAL', 'SUBTOTAL',
+    'DEPARTAMENTO', 'MUNICIPIO', 'HABILITACION', 'HABIITACION', 'DIRECCION',
+    'TELEFONO', 'EMAIL', 'SEDE', 'NOMBRE', 'NUMERO', 'ESPECIALIDAD',
+    'MANUAL', 'OBSERV', 'PORCENTAJE', 'HOMOLOGO', 'N°', 'NO.',
+    'NOTA', 'NOTAS', 'ACLARATORIA', 'ACLARATORIAS', 'ACLARACION', 'ACLARACIONES',
+    'INCLUYE', 'NO INCLUYE', 'EXCLUYE',
+    'USO DE EQUIPO', 'DERECHO DE SALA', 'DERECHO SALA',
+    'VER NOTA', 'VER NOTAS', 'SEGUN NOTA',
+    'APLICA', 'NO APLICA', 'SEGÚN', 'SEGUN',
+    'CONSULTAR', 'REVISAR', 'PENDIENTE',
+    'VALOR', 'PRECIO', 'COSTO',
+    'CONTRATO', 'ACTA', 'OTROSI', 'OTROSÍ',
+    'VIGENTE', 'VIGENCIA',
+    'TRASLADO', 'ORIGEN', 'DESTINO',  # 🆕 v14.1: Palabras de traslados
+    'TARIFAS PROPIAS', 'TARIFA PROPIA',  # 🆕 v14.1: Son manuales tarifarios
+]
+
+PATRONES_INVALIDOS_CUPS = [
+    r'^\*',
+    r'^-+$',
+    r'^\d{1,2}$',
+    r'^N\.?A\.?$',
+    r'^N/A$',
+    r'INCLUYE',
+    r'NOTA\s*\d*',
+]
+
+def es_fila_de_traslados(fila: list) -> bool:
+    """🆕 v14.1: Detecta si una fila de DATOS contiene información de traslados.
+    Una fila es de traslados si tiene ciudades en las primeras columnas.
+    """
+    if not fila or len(fila) < 3:
+        return False
+
+    # Verificar si hay ciudades en las primeras columnas
+    for i, celda in enumerate(fila[:4]):
+        if celda:
+            celda_str = str(celda).strip()
+            if celda_str.endswith('.0'):
+                celda_str = celda_str[:-2]
+            celda_upper = celda_str.upper()
+
+            # Verificar contra lista de ciudades
+            if celda_upper in CIUDADES_COLOMBIA_COMPLETA:
+                return True
+
+    return False
+
+def es_encabezado_seccion_traslados(fila: list) -> bool:
+    """🆕 v14.1: Detecta si una fila es el ENCABEZADO de una sección de TRASLADOS."""
+    if not fila:
+        return False
+
+    fila_texto = ' '.join([str(x).upper().strip() for x in fila if x is not None])
+
+    # Patrones específicos de encabezados de traslados
+    indicadores_traslados = [
+        'ORIGEN',
+        'DESTINO',
+        'MUNICIPIO ORIGEN',
+        'MUNICIPIO DESTINO',
+        'DEPARTAMENTO DESTINO',
+        'TIPO DE TRASLADO',
+    ]
+
+    contador = 0
+    for indicador in indicadores_traslados:
+        if indicador in fila_texto:
+            contador += 1
+
+    # Si tiene 2+ indicadores de traslados Y NO tiene CUPS, es sección de traslados
+    tiene_cups = 'CUPS' in fila_texto
+    return contador >= 2 and not tiene_cups
+
+def validar_cups(cups: str, fila: list = None) -> bool:
+    """🆕 v14.1: Validación de CUPS ULTRA estricta.
+
+    RECHAZA:
+    - Ciudades colombianas (ARMENIA, CALI, BAHIA SOLANO, etc.)
+    - Valores monetarios grandes (>= 7 dígitos)
+    - Teléfonos celulares (10 dígitos con prefijo conocido)
+    - Códigos de habilitación (8-12 dígitos puros)
+    - Palabras inválidas (CODIGO, TARIFA, DESCRIPCION, etc.)
+    """
+    if not cups:
+        return False
+
+    cups_str = str(cups).strip()
+
+    # Quitar .0 si existe
+    if cups_str.endswith('.0'):
+        cups_str = cups_str[:-2]
+
+    cups_u = cups_str.upper()
+
+    # 1. Longitud básica
+    if not cups_str or len(cups_str) > 25:
+        return False
+
+    # 2. 🆕 v14.1: RECHAZAR si es una ciudad (traslados)
+    if cups_u in CIUDADES_COLOMBIA_COMPLETA:
+        return False
+
+    # 3. RECHAZAR palabras inválidas
+    for palabra in PALABRAS_INVALIDAS_CUPS:
+        if palabra in cups_u:
+            return False
+
+    # 4. RECHAZAR patrones inválidos
+    for patron in PATRONES_INVALIDOS_CUPS:
+        if re.search(patron, cups_u):
+            return False
+
+    # 5. Extraer solo dígitos
+    cups_digits = re.sub(r'[^\d]', '', cups_str)
+
+    # 6. 🆕 v14.2: RECHAZAR si parece un valor monetario grande (>= 7 dígitos)
+    # Permitir códigos con guiones (códigos propios de prestadores)
+    if cups_digits and len(cups_digits) >= 7:
+        # Si tiene guión, es un código propio válido (ej: 931002-1)
+        if '-' in cups_str:
+            pass  # Permitir
+        else:
+            return False
+
+    # 7. RECHAZAR si parece teléfono celular (10 dígitos con prefijo conocido)
+    if es_telefono_celular(cups_str):
+        return False
+
+    # 8. 🆕 v14.1: RECHAZAR si parece código de habilitación (8-12 dígitos puros)
+    if cups_digits and cups_digits == cups_str and 8 <= len(cups_digits) <= 12:
+        return False
+
+    # 9. RECHAZAR municipios/departamentos
+    if es_municipio_o_departamento(cups_u):
+        return False
+
+    # 10. RECHAZAR direcciones
+    if es_direccion(cups_u):
+        return False
+
+    # 11. RECHAZAR valores especiales
+    if cups_u in ['N.A', 'NA', 'N/A', 'N.A.', '-', '--', '---', 'NINGUNO', 'NINGUNA', 'NULL', 'NONE', '']:
+        return False
+
+    # 12. RECHAZAR si es número de sede
+    if es_numero_sede(cups_str):
+        return False
+
+    # 13. Si es solo dígitos, debe tener al menos 4
+    if cups_digits and cups_digits == cups_str:
+        if len(cups_digits) < 4:
+            return False
+
+    # 14. 🆕 v14.1: Si la fila completa parece ser de traslados, rechazar
+    if fila and es_fila_de_traslados(fila):
+        return False
+
+    # 15. Si la fila es dato de sede, rechazar
+    if fila and es_dato_de_sede(fila):
+        return False
+
+    return True
+
+def validar_tarifa(tarifa, fila: list = None) -> bool:
+    """🆕 v14.1: Validación mejorada de tarifas.
+    Solo rechaza si CLARAMENTE es un teléfono celular.
+    """
+    if tarifa is None:
+        return True  # Valor nulo es aceptable
+
+    valor_str = str(tarifa).strip()
+
+    # Quitar .0 si existe
+    if valor_str.endswith('.0'):
+        valor_str = valor_str[:-2]
+
+    # RECHAZAR si es teléfono celular
+    if es_telefono_celular(valor_str):
+        return False
+
+    # RECHAZAR si parece código de habilitación Y hay contexto de sede
+    valor_clean = re.sub(r'[^\d]', '', valor_str)
+    if valor_clean and 8 <= len(valor_clean) <= 12:
+        if fila:
+            fila_texto = ' '.join([str(x).upper() for x in fila[:5] if x])
+            for depto in DEPARTAMENTOS_COLOMBIA:
+                if depto in fila_texto:
+                    return False
+
+    return True
+
+def validar_manual_tarifario(manual) -> bool:
+    if manual is None:
+        return True
+    if es_direccion(str(manual)):
+        return False
+    return not es_telefono_celular(str(manual))
+
+def validar_descripcion(descripcion) -> bool:
+    if descripcion is None:
+        return True
+    desc_str = str(descripcion).strip()
+    if es_numero_sede(desc_str):
+        return False
+    return not es_municipio_o_departamento(desc_str)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FUNCIONES DE DETECCIÓN DE ARCHIVOS v15.0
+# ══════════════════════════════════════════════════════════════════════════════
+
+def es_archivo_tarifas_valido(nombre: str) -> tuple:
+    """
+    🆕 v15.1: Detecta si un archivo es válido para procesamiento de tarifas.
+
+    PATRONES VÁLIDOS:
+    1. Contiene "ANEXO 1" o "ANEXO_1" (formato tradicional)
+    2. Contiene "TARIFAS" o "TARIFA" en el nombre (formato simplificado)
+    3. Contiene "OTROSI" o "OTROSÍ" seguido de número
+
+    EXCLUSIONES v15.1:
+    - "ANALISIS DE TARIFAS" y variantes (ANÁLISIS, sin DE, singular/plural)
+
+    Retorna: (es_valido: bool, tipo: str)
+    Tipos: 'ANEXO_1', 'TARIFAS', 'OTROSI', 'INVALIDO'
+    """
+    if not nombre:
+        return False, 'INVALIDO'
+
+    # 🆕 v15.2: Normalización agresiva (eliminar tabs y espacios extra)
+    nombre_upper = nombre.upper().replace('\t', '').strip()
+
+    # EXCLUSIONES: archivos que NO se deben procesar
+    palabras_excluir = [
+        'MEDICAMENT', 'MEDICAMENTO', 'MEDICAMENTOS',
+        'FARMACO', 'FÁRMACO', 'FARMACOS', 'FÁRMACOS',
+        'INSUMO', 'INSUMOS'
+    ]
+
+    for palabra in palabras_excluir:
+        if palabra in nombre_upper:
+            if 'SERVICIO' in nombre_upper or 'SERV' in nombre_upper:
+                continue
+            return False, 'INVALIDO'
+
+    # 🆕 v15.1: EXCLUSIÓN: "ANALISIS DE TARIFAS" y variantes NO se procesan
+    # Pero "TARIFAS" o "TARIFA" solas SÍ se procesan
+    if re.search(r'AN[AÁ]LISIS\s*(DE\s*)?(TARIFAS?|TARIFA)', nombre_upper):
+        return False, 'INVALIDO'
+
+    # DETECCIÓN 1: Archivos OTROSÍ (tienen prioridad)
+    patrones_otrosi = [
+        r'OTRO\s*S[IÍ]\s*[_#\-\s]*(\d+)',
+        r'OTROS[IÍ]\s*[_#\-\s]*(\d+)',
+        r'OT[_\-\s]?(\d+)',
+        r'ADICI[OÓ]N\s*[_#\-\s]*(\d+)',
+        r'MODIFICACI[OÓ]N\s*[_#\-\s]*(\d+)',
+    ]
+
+    for patron in patrones_otrosi:
+        if re.search(patron, nombre_upper):
+            return True, 'OTROSI'
+
+    # DETECCIÓN 2: Archivos con ANEXO 1 explícito
+    patrones_anexo1 = [
+        r'ANEXO\s*[_\-\s]*0?1(?!\d)',
+        r'ANEX[O0]\s*[_\-\s]*1(?!\d)',
+        r'ANEXO\s*N[OÚº°]?\.?\s*0?1(?!\d)',
+        r'A1[_\-\s]',
+        r'[_\-]ANEXO[_\-]?1',
+        r'ANEXO[_\-]1[_\-]',
+    ]
+
+    for patron in patrones_anexo1:
+        if re.search(patron, nombre_upper):
+            return True, 'ANEXO_1'
+
+    n_limpio = nombre_upper.replace(' ', '').replace('_', '').replace('-', '').replace('(', '').replace(')', '')
+    if 'ANEXO1' in n_limpio or 'ANEXO01' in n_limpio:
+        return True, 'ANEXO_1'
+
+    # EXCLUSIÓN: Verificar si es ANEXO 2, 3, etc.
+    patron_anexo_no_1 = r'ANEXO\s*[_\-\s]*([2-9]|[1-9]\d)(?!\d)'
+    if re.search(patron_anexo_no_1, nombre_upper):
+        return False, 'INVALIDO'
+
+    # DETECCIÓN 3: Archivos que contienen "TARIFAS" (formato simplificado)
+    patrones_tarifas = [
+        r'\d+[\-_]TARIFAS[\-_]',
+        r'^TARIFAS[\-_]',
+        r'[\-_]TARIFAS[\-_]',
+        r'[\-_]TARIFAS\.',
+    ]
+
+    for patron in patrones_tarifas:
+        if re.search(patron, nombre_upper):
+            return True, 'TARIFAS'
+
+    # DETECCIÓN 4: Combinaciones especiales
+    if 'ANEXO' in nombre_upper and ('TARIFA' in nombre_upper or 'SERV' in nombre_upper):
+        otros_anexos = re.search(r'ANEXO\s*[_\-\s]*([2-9]|[1-9]\d)(?!\d)', nombre_upper)
+        if not otros_anexos:
+            return True, 'ANEXO_1'
+
+    # 🆕 v15.3: DETECCIÓN 5: PORTAFOLIO DE SERVICIOS (equivalente a ANEXO 1)
+    if 'PORTAFOLIO' in nombre_upper and 'SERVICIO' in nombre_upper:
+        return True, 'ANEXO_1'
+
+    return False, 'INVALIDO'
+
+def contiene_anexo1(nombre: str) -> bool:
+    """
+    🆕 v15.0: Detecta si el nombre corresponde a un archivo procesable de tarifas.
+
+    AHORA INCLUYE:
+    - Archivos con ANEXO 1 explícito
+    - Archivos con "TARIFAS" en el nombre (formato simplificado)
+    - Archivos de OTROSÍ
+    """
+    es_valido, tipo = es_archivo_tarifas_valido(nombre)
+    return es_valido
+
+def extraer_numero_otrosi_global(nombre: str):
+    """
+    🆕 v15.0: Extrae el número de otrosí del nombre del archivo.
+    """
+    if not nombre:
+        return None
+
+    nombre_upper = nombre.upper()
+
+    patrones = [
+        r'OTRO\s*S[IÍ]\s*[_#\-\s]*N?[OÚº°]?\.?\s*(\d+)',
+        r'OTROS[IÍ]\s*[_#\-\s]*(\d+)',
+        r'OTRO[\s_\-]?SI[\s_\-#]*(\d+)',
+        r'OT\s*[_\-\s]?\s*(\d+)',
+        r'ADICI[OÓ]N\s*[_#\-\s]*N?[OÚº°]?\.?\s*(\d+)',
+        r'MODIFICA(?:CI[OÓ]N)?\s*[_#\-\s]*(\d+)',
+    ]
+
+    for patron in patrones:
+        match = re.search(patron, nombre_upper)
+        if match:
+            try:
+                return int(match.group(1))
+            except (ValueError, IndexError):
+                continue
+
+    return None
+
+def clasificar_tipo_archivo(nombre: str) -> dict:
+    """
+    🆕 v15.0: Clasifica un archivo y retorna información completa.
+    """
+    resultado = {
+        'es_valido': False,
+        'tipo': 'INVALIDO',
+        'numero_otrosi': None,
+        'es_otrosi': False,
+        'motivo_exclusion': None
+    }
+
+    if not nombre:
+        resultado['motivo_exclusion'] = 'Nombre vacío'
+        return resultado
+
+    nombre_upper = nombre.upper()
+
+    palabras_excluir = ['MEDICAMENT', 'FARMACO', 'FÁRMACO', 'INSUMO']
+    for palabra in palabras_excluir:
+        if palabra in nombre_upper:
+            if 'SERVICIO' not in nombre_upper and 'SERV' not in nombre_upper:
+                resultado['motivo_exclusion'] = f'Archivo de {palabra.lower()}'
+                return resultado
+
+    num_otrosi = extraer_numero_otrosi_global(nombre)
+    if num_otrosi:
+        resultado['numero_otrosi'] = num_otrosi
+        resultado['es_otrosi'] = True
+
+    es_valido, tipo = es_archivo_tarifas_valido(nombre)
+    resultado['es_valido'] = es_valido
+    resultado['tipo'] = tipo
+
+    if not es_valido:
+        resultado['motivo_exclusion'] = 'No coincide con patrones de tarifas'
+
+    return resultado
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FUNCIÓN: debe_excluir_hoja_silenciosamente
+# ══════════════════════════════════════════════════════════════════════════════
+
+def debe_excluir_hoja_silenciosamente(nombre_hoja: str) -> bool:
+    """Verifica si una hoja debe ser excluida SIN generar alerta."""
+    if not nombre_hoja:
+        return True
+
+    nombre_upper = nombre_hoja.upper().strip()
+
+    # Excluir hojas de configuración/instrucciones
+    if nombre_upper in HOJAS_EXCLUIR:
+        return True
+
+    # Excluir hojas de paquetes/costos (NO generan alerta individual)
+    if nombre_upper in HOJAS_SIN_SERVICIOS_VALIDOS:
+        return True
+
+    # Verificar patrones parciales
+    for patron in HOJAS_SIN_SERVICIOS_VALIDOS:
+        if patron in nombre_upper:
+            return True
+
+    return False
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FUNCIÓN: generar_mensaje_hojas_disponibles
+# ══════════════════════════════════════════════════════════════════════════════
+
+def generar_mensaje_hojas_disponibles(hojas: list, hojas_excluidas_info: list = None) -> str:
+    """
+    v14.1: Genera mensaje con todas las hojas disponibles.
+    Solo se llama cuando NO se encuentra hoja de servicios.
+
+    AQUÍ es donde se menciona que hay hojas de PAQUETES (no antes).
+    """
+    if not hojas:
+        return "Archivo sin hojas"
+
+    hojas_str = ", ".join([f"'{h}'" for h in hojas])
+    mensaje = f"No se encontró hoja de servicios válida. Hojas disponibles: [{hojas_str}]"
+
+    # Agregar info de hojas excluidas si existen
+    if hojas_excluidas_info:
+        excluidas_str = ", ".join([f"'{h[0]}' ({h[1]})" for h in hojas_excluidas_info])
+        mensaje += f". Hojas excluidas: [{excluidas_str}]"
+
+    return mensaje
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FUNCIÓN: es_formato_propio (v14.1)
+# ══════════════════════════════════════════════════════════════════════════════
+
+def es_formato_propio(hojas: list, datos_primera_hoja: list = None) -> tuple:
+    """
+    v14.1: Detecta si un archivo tiene formato propio (no POSITIVA estándar).
+
+    Retorna: (es_propio: bool, descripcion: str)
+    """
+    if not hojas:
+        return True, "Sin hojas disponibles"
+
+    # Nombres de hojas estándar POSITIVA
+    NOMBRES_ESTANDAR = {
+        'TARIFAS DE SERVICIOS', 'TARIFA DE SERVICIOS', 'TARIFAS DE SERV',
+        'SERVICIOS', 'TARIFAS MEDICAMENTOS', 'TARIFAS INSUMOS',
+        'TARIFAS TRASLADOS', 'TARIFAS PAQUETES', 'MEDICAMENTOS',
+        'INSUMOS', 'TRASLADOS', 'PAQUETES', 'TARIFA DE SERV',
+        'TARIFAS DE SERVICIO', 'TARIFA DE SERVICIO'
+    }
+
+    hojas_reconocidas = 0
+    for hoja in hojas:
+        hoja_upper = hoja.upper().strip()
+        for std in NOMBRES_ESTANDAR:
+            if std in hoja_upper or hoja_upper in std:
+                hojas_reconocidas += 1
+                break
+
+    # Si ninguna hoja es reconocida, es formato propio
+    if hojas_reconocidas == 0:
+        return True, f"Formato propio - Hojas no estándar: {hojas}"
+
+    # Verificar estructura interna si tenemos datos
+    if datos_primera_hoja:
+        for fila in datos_primera_hoja[:20]:
+            if fila:
+                fila_texto = ' '.join([str(x).upper() for x in fila if x])
+
+                # Si tiene ORIGEN/DESTINO sin CUPS, es formato de traslados
+                if ('ORIGEN' in fila_texto and 'DESTINO' in fila_texto):
+                    if 'CUPS' not in fila_texto:
+                        return True, "Formato propio de traslados"
+
+    return False, ""
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FUNCIÓN: generar_mensaje_alerta_ambulancia (v14.1)
+# ══════════════════════════════════════════════════════════════════════════════
+
+def generar_mensaje_alerta_ambulancia(mensaje: str, categoria: str) -> str:
+    """
+    v14.1: Agrega prefijo de categoría si es contrato de ambulancias.
+    """
+    if categoria and 'AMBULANCIA' in categoria.upper():
+        return f"[CATEGORÍA: Cuentas Médicas Ambulancias] {mensaje}"
+    return mensaje
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CLASE: SistemaAlertas (v14.1 - Sin duplicados mejorado)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class SistemaAlertas:
+    """
+    v14.1: Sistema de alertas sin duplicados.
+    """
+
+    def __init__(self):
+        self._alertas_hash = set()
+        self.alertas = []
+
+    def limpiar(self):
+        self._alertas_hash = set()
+        self.alertas = []
+
+    def agregar(self, tipo: str, mensaje: str, contrato: str, archivo: str = "") -> bool:
+        """
+        Agrega una alerta si no existe una similar.
+        Retorna True si se agregó, False si ya existía.
+        """
+        # Hash principal: tipo + contrato + archivo
+        hash_principal = hash((tipo, contrato, archivo))
+
+        # Hash secundario: incluye parte del mensaje para evitar duplicados exactos
+        hash_secundario = hash((tipo, contrato, archivo, mensaje[:50]))
+
+        if hash_secundario in self._alertas_hash:
+            return False
+
+        self._alertas_hash.add(hash_secundario)
+        self.alertas.append({
+            'tipo': tipo,
+            'mensaje': mensaje,
+            'contrato': contrato,
+            'archivo': archivo
+        })
+        return True
@@ -5,19 +5,36 @@ Consolidador T25 - API Principal
 API FastAPI para el sistema de consolidación de tarifas POSITIVA.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import os
 
 from app.api import upload, sftp, process, download
 from app.websockets import logs
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Pre-calienta el servicio del consolidador y recupera la cola de jobs al arrancar."""
+    # Los hilos de lectura publican los logs al WebSocket en este loop
+    logs.manager.iniciar(asyncio.get_running_loop())
+    process.precargar_servicio(upload.archivo_maestra_path)
+    # Jobs de la ejecución anterior: los que estaban en proceso vuelven a la cola
+    process.recuperar_jobs()
+    yield
+    process.detener_servicio()
+    process.cola.cerrar()
+
+
 # Crear aplicación FastAPI
 app = FastAPI(
     title="Consolidador T25 API",
     description="API para el sistema de consolidación de tarifas POSITIVA",
-    version="15.1.0"
+    version="15.1.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS para permitir conexiones desde el frontend
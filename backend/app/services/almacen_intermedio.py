@@ -0,0 +1,290 @@
+"""
+Almacén intermedio del consolidado
+==================================
+
+Destino de los lotes que el consolidador procesa (después del ETL ML) y
+origen de los exportadores finales (XLSX, CSV y Parquet).
+
+- AlmacenParquet (si pyarrow está instalado): un archivo Parquet con esquema
+  fijo; tarifa y porcentaje tipados (float64), manual/contrato/origen
+  codificados como diccionario y un row group por lote.
+- AlmacenCSV: el CSV temporal UTF-8-BOM en modo append de siempre.
+
+Ambos entregan los bloques de lectura con la MISMA forma que
+pd.read_csv(dtype=str) sobre el CSV temporal (texto, NaN para vacíos), de
+modo que los exportadores producen exactamente el mismo resultado con
+cualquiera de los dos.
+
+Para los puntos de control del consolidador, posicion() deja en disco todo
+lo escrito hasta ese momento y retorna dónde termina; reanudar(posicion)
+descarta lo escrito después. El CSV se trunca a su tamaño en bytes; el
+Parquet (ilegible hasta cerrar su footer) se cierra y sigue en una nueva
+parte: RUTA, RAIZ_0001.parquet, RAIZ_0002.parquet... Para no llenar la
+carpeta de partes pequeñas, conviene_posicion() indica cuándo vale la pena
+pedir la posición: siempre en el CSV, y en el Parquet solo cuando la parte
+abierta ya tiene LOTES_POR_PARTE lotes o MB_POR_PARTE MB (o no hay parte
+abierta). Así un trabajo deja a lo sumo ~lotes/LOTES_POR_PARTE partes.
+
+El esquema del Parquet sale del primer lote; un lote posterior con columnas
+que no están en él lanza EsquemaIncompatible en vez de perderlas.
+"""
+
+import glob
+import os
+import shutil
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+# Dependencia opcional
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Tamaño mínimo de una parte Parquet antes de cerrarla para un punto de control
+LOTES_POR_PARTE = 20
+MB_POR_PARTE = 64
+
+COLUMNAS_NUMERICAS = ('tarifa_unitaria_en_pesos', 'porcentaje_manual_tarifario')
+COLUMNAS_DICCIONARIO = ('manual_tarifario', 'contrato', 'origen_tarifa')
+
+# Textos que pd.read_csv interpreta como vacíos por defecto
+VALORES_NA_CSV = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null'
+])
+
+
+class EsquemaIncompatible(ValueError):
+    """Un lote trae columnas que no están en el esquema del Parquet."""
+
+
+def parquet_disponible() -> bool:
+    return pq is not None
+
+
+def formatear_numerico(serie: pd.Series) -> pd.Series:
+    """Texto de tarifa/porcentaje: sin 'nan'/'None' y sin '.0' final."""
+    serie = serie.astype(str).replace({'nan': '', 'NaN': '', 'None': ''})
+    return serie.str.replace(r'\.0$', '', regex=True)
+
+
+def _es_nulo(valor) -> bool:
+    return valor is None or (not isinstance(valor, str) and pd.isna(valor))
+
+
+class AlmacenCSV:
+    """CSV temporal en modo append (formato histórico)."""
+
+    formato = 'csv'
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._con_encabezado = False
+
+    def agregar_lote(self, df: pd.DataFrame) -> int:
+        for col in COLUMNAS_NUMERICAS:
+            if col in df.columns:
+                df[col] = formatear_numerico(df[col])
+
+        modo = 'a' if self._con_encabezado else 'w'
+        df.to_csv(self.ruta, mode=modo, header=not self._con_encabezado, index=False, encoding='utf-8-sig')
+        self._con_encabezado = True
+        return len(df)
+
+    def cerrar(self):
+        pass
+
+    def existe(self) -> bool:
+        return os.path.exists(self.ruta)
+
+    def archivos(self) -> List[str]:
+        return [self.ruta] if self.existe() else []
+
+    def conviene_posicion(self) -> bool:
+        # Truncar el CSV no deja rastro: la posición es gratis
+        return True
+
+    def posicion(self) -> Dict[str, Any]:
+        return {'bytes': os.path.getsize(self.ruta) if self.existe() else 0,
+                'encabezado': self._con_encabezado}
+
+    def reanudar(self, posicion: Dict[str, Any]):
+        if self.existe():
+            if posicion['bytes']:
+                os.truncate(self.ruta, posicion['bytes'])
+            else:
+                os.remove(self.ruta)
+        self._con_encabezado = bool(posicion['bytes']) and posicion['encabezado']
+
+    def leer_bloques(self, filas_por_bloque: int = 50_000, columnas=None) -> Iterator[pd.DataFrame]:
+        if not self.existe():
+            return iter(())
+        return pd.read_csv(self.ruta, dtype=str, chunksize=filas_por_bloque, usecols=columnas)
+
+    def contar_filas(self) -> int:
+        return sum(len(b) for b in self.leer_bloques(columnas=[0]))
+
+
+class AlmacenParquet:
+    """Parquet con esquema fijo y un row group por lote."""
+
+    formato = 'parquet'
+
+    def __init__(self, ruta: str, compresion: str = 'zstd', lotes_por_parte: int = LOTES_POR_PARTE,
+                 mb_por_parte: float = MB_POR_PARTE):
+        if pq is None:
+            raise ImportError("pyarrow no está instalado")
+        self.ruta = ruta
+        self.compresion = compresion
+        self.lotes_por_parte = lotes_por_parte
+        self.mb_por_parte = mb_por_parte
+        self.esquema: Optional["pa.Schema"] = None
+        self.partes: List[str] = []
+        self._writer = None
+        # Lotes y bytes (en memoria, antes de comprimir) de la parte abierta
+        self._lotes_parte = 0
+        self._bytes_parte = 0
+
+    def _ruta_parte(self, n: int) -> str:
+        return self.ruta if n == 0 else f"{os.path.splitext(self.ruta)[0]}_{n:04d}.parquet"
+
+    def _crear_esquema(self, df: pd.DataFrame) -> "pa.Schema":
+        campos = []
+        for col in df.columns:
+            if col in COLUMNAS_NUMERICAS and pd.api.types.is_numeric_dtype(df[col]):
+                tipo = pa.float64()
+            elif col in COLUMNAS_DICCIONARIO:
+                tipo = pa.dictionary(pa.int32(), pa.string())
+            else:
+                tipo = pa.string()
+            campos.append(pa.field(str(col), tipo))
+        return pa.schema(campos)
+
+    def _a_tabla(self, df: pd.DataFrame) -> "pa.Table":
+        arreglos = []
+        for campo in self.esquema:
+            if campo.name in df.columns:
+                serie = df[campo.name]
+            else:
+                serie = pd.Series([None] * len(df), dtype=object)
+
+            if pa.types.is_floating(campo.type):
+                arreglos.append(pa.array(pd.to_numeric(serie, errors='coerce'), type=pa.float64(), from_pandas=True))
+                continue
+
+            if campo.name in COLUMNAS_NUMERICAS:
+                serie = formatear_numerico(serie)
+            arreglo = pa.array([None if _es_nulo(v) else str(v) for v in serie], type=pa.string())
+            if pa.types.is_dictionary(campo.type):
+                arreglo = arreglo.dictionary_encode()
+            arreglos.append(arreglo)
+        return pa.Table.from_arrays(arreglos, schema=self.esquema)
+
+    def agregar_lote(self, df: pd.DataFrame) -> int:
+        if self.esquema is None:
+            self.esquema = self._crear_esquema(df)
+        nuevas = [str(c) for c in df.columns if str(c) not in self.esquema.names]
+        if nuevas:
+            raise EsquemaIncompatible(f"Columnas fuera del esquema del Parquet: {', '.join(nuevas)}")
+
+        if self._writer is None:
+            ruta_parte = self._ruta_parte(len(self.partes))
+            self._writer = pq.ParquetWriter(ruta_parte, self.esquema, compression=self.compresion)
+            self.partes.append(ruta_parte)
+        # Un write_table por lote = un row group por lote
+        tabla = self._a_tabla(df)
+        self._writer.write_table(tabla)
+        self._lotes_parte += 1
+        self._bytes_parte += tabla.nbytes
+        return len(df)
+
+    def cerrar(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._lotes_parte = 0
+        self._bytes_parte = 0
+
+    def existe(self) -> bool:
+        return any(os.path.exists(parte) for parte in self.partes)
+
+    def archivos(self) -> List[str]:
+        return [parte for parte in self.partes if os.path.exists(parte)]
+
+    def conviene_posicion(self) -> bool:
+        """True si no hay parte abierta o ya es lo bastante grande para cerrarla."""
+        return (self._writer is None
+                or self._lotes_parte >= self.lotes_por_parte
+                or self._bytes_parte >= self.mb_por_parte * 1024 * 1024)
+
+    def posicion(self) -> Dict[str, Any]:
+        # Cerrar la parte actual la deja legible; el siguiente lote abre otra
+        self.cerrar()
+        return {'partes': len(self.partes)}
+
+    def reanudar(self, posicion: Dict[str, Any]):
+        self.cerrar()
+        self.partes = [self._ruta_parte(n) for n in range(posicion['partes'])]
+        # Partes posteriores al punto de control (la última pudo quedar sin footer)
+        raiz = glob.escape(os.path.splitext(self.ruta)[0])
+        for ruta in glob.glob(f"{raiz}_[0-9][0-9][0-9][0-9].parquet"):
+            if ruta not in self.partes:
+                os.remove(ruta)
+        if not self.partes and os.path.exists(self.ruta):
+            os.remove(self.ruta)
+        self.esquema = pq.read_schema(self.partes[0]) if self.partes else None
+
+    def copiar_a(self, destino: str):
+        """Escribe el contenido de todas las partes en un solo archivo Parquet."""
+        self.cerrar()
+        if len(self.partes) == 1:
+            shutil.copyfile(self.partes[0], destino)
+            return
+        with pq.ParquetWriter(destino, self.esquema, compression=self.compresion) as writer:
+            for parte in self.partes:
+                archivo = pq.ParquetFile(parte)
+                for i in range(archivo.num_row_groups):
+                    writer.write_table(archivo.read_row_group(i))
+
+    @staticmethod
+    def _como_csv(df: pd.DataFrame) -> pd.DataFrame:
+        """Bloque con la forma de pd.read_csv(dtype=str) sobre el CSV temporal."""
+        for col in df.columns:
+            serie = df[col]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                serie = serie.astype(object)
+            if col in COLUMNAS_NUMERICAS and pd.api.types.is_float_dtype(serie):
+                serie = formatear_numerico(serie)
+            serie = serie.astype(object)
+            df[col] = serie.mask(serie.isna() | serie.isin(VALORES_NA_CSV))
+        return df
+
+    def leer_bloques(self, filas_por_bloque: int = 50_000, columnas=None) -> Iterator[pd.DataFrame]:
+        self.cerrar()
+        if columnas is not None and self.esquema is not None:
+            nombres = self.esquema.names
+            columnas = [nombres[c] if isinstance(c, int) else c for c in columnas]
+        for parte in self.archivos():
+            archivo = pq.ParquetFile(parte)
+            for lote in archivo.iter_batches(batch_size=filas_por_bloque, columns=columnas):
+                yield self._como_csv(lote.to_pandas())
+
+    def contar_filas(self) -> int:
+        self.cerrar()
+        return sum(pq.ParquetFile(parte).metadata.num_rows for parte in self.archivos())
+
+
+def crear_almacen_intermedio(nombre_base: str, formato: str = 'auto'):
+    """Almacén para `nombre_base` (sin extensión).
+
+    formato: 'auto' (Parquet si pyarrow está instalado), 'parquet' o 'csv'.
+    """
+    formato = (formato or 'auto').strip().lower()
+    if formato in ('auto', 'parquet') and parquet_disponible():
+        return AlmacenParquet(f"{nombre_base}.parquet")
+    return AlmacenCSV(f"{nombre_base}.csv")
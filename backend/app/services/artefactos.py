@@ -0,0 +1,65 @@
+"""
+Manifiesto de artefactos de un trabajo
+======================================
+
+Al terminar, el consolidador escribe en su carpeta de salida el archivo
+artefactos.json con los archivos que generó (consolidado, alertas,
+resumen...): nombre, ruta relativa a la carpeta y tamaño. La API lo lee para
+saber qué produjo cada job sin adivinar por fecha de modificación; como cada
+job de la API tiene su propia carpeta (OUTPUT_FOLDER/jobs/<job_id>), varios
+jobs pueden correr a la vez sin mezclar sus resultados.
+
+Solo usa la librería estándar para poder importarse desde el consolidador y
+desde la API sin arrastrar las dependencias del otro lado.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+NOMBRE_MANIFIESTO = 'artefactos.json'
+
+
+def escribir_manifiesto(carpeta: str, rutas: Sequence[str], **datos: Any) -> str:
+    """Escribe <carpeta>/artefactos.json con los archivos `rutas` (escritura atómica).
+
+    `datos` se agrega tal cual al manifiesto (run_id, modo...). Retorna su ruta.
+    """
+    artefactos = []
+    for ruta in rutas:
+        if not os.path.isfile(ruta):
+            continue
+        artefactos.append({
+            'nombre': os.path.basename(ruta),
+            'ruta': os.path.relpath(ruta, carpeta).replace(os.sep, '/'),
+            'bytes': os.path.getsize(ruta)
+        })
+
+    manifiesto = dict(datos, generado=round(time.time(), 3), artefactos=artefactos)
+    ruta_manifiesto = os.path.join(carpeta, NOMBRE_MANIFIESTO)
+    tmp = f"{ruta_manifiesto}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, ruta_manifiesto)
+    return ruta_manifiesto
+
+
+def leer_manifiesto(carpeta: str) -> Optional[Dict[str, Any]]:
+    """Manifiesto de <carpeta> o None si no existe (o no se puede leer)."""
+    try:
+        with open(os.path.join(carpeta, NOMBRE_MANIFIESTO), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def rutas_artefactos(carpeta: str) -> List[str]:
+    """Rutas absolutas de los artefactos del manifiesto de <carpeta> que aún existen."""
+    manifiesto = leer_manifiesto(carpeta) or {}
+    rutas = []
+    for artefacto in manifiesto.get('artefactos', []):
+        ruta = os.path.join(carpeta, *artefacto['ruta'].split('/'))
+        if os.path.isfile(ruta):
+            rutas.append(ruta)
+    return rutas
@@ -0,0 +1,151 @@
+"""
+Caché de listados SFTP
+======================
+
+Caché en memoria de listados de directorios del GoAnywhere, con TTL e
+invalidación, usada por el consolidador (navegación a contratos y descarga
+de anexos) y por la API (SFTPClientService.listar_directorio).
+
+Las entradas se indexan por RUTA ABSOLUTA normalizada, así "CONTRATOS 2024",
+"./CONTRATOS 2024/" y "/R.A-.../CONTRATOS 2024" comparten la misma entrada
+si apuntan al mismo directorio.
+
+Cada entrada puede llevar además un índice numero -> carpeta construido una
+sola vez, para que buscar la carpeta de un contrato dentro de "CONTRATOS {año}"
+sea una búsqueda en diccionario en vez de recorrer cientos de nombres.
+
+Solo usa la librería estándar para poder importarse desde el script del
+consolidador sin cargar la configuración de la API.
+"""
+
+import posixpath
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+def ruta_absoluta(ruta: str, cwd: Optional[str] = "/") -> str:
+    """Normaliza una ruta remota a absoluta respecto al directorio actual."""
+    ruta = (ruta or ".").replace("\\", "/")
+    if not ruta.startswith("/"):
+        ruta = posixpath.join(cwd or "/", ruta)
+    ruta = posixpath.normpath(ruta)
+    # normpath conserva '//' inicial (POSIX); en el SFTP es la raíz
+    return "/" + ruta.lstrip("/")
+
+
+def clave_numero_carpeta(nombre: str) -> str:
+    """Primer segmento del nombre de carpeta ('0531-2024 PROVEEDOR' -> '0531')."""
+    partes = re.split(r'[\s\-_]', nombre)
+    return partes[0] if partes else ""
+
+
+class _Entrada:
+    __slots__ = ("items", "creado", "indice")
+
+    def __init__(self, items: List[Any]):
+        self.items = items
+        self.creado = time.monotonic()
+        self.indice: Optional[Dict[str, str]] = None
+
+
+class CacheDirectorios:
+    """Caché de listados por ruta absoluta con TTL, invalidación e índice de contratos."""
+
+    def __init__(self, ttl: float = 300.0, max_entradas: int = 5000):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def habilitada(self) -> bool:
+        return self.ttl > 0
+
+    def _vigente(self, ruta: str) -> Optional[_Entrada]:
+        """Retorna la entrada si existe y no ha vencido (requiere el lock)."""
+        entrada = self._entradas.get(ruta)
+        if entrada is None:
+            return None
+        if time.monotonic() - entrada.creado > self.ttl:
+            del self._entradas[ruta]
+            return None
+        self._entradas.move_to_end(ruta)
+        return entrada
+
+    def obtener(self, ruta: str) -> Optional[List[Any]]:
+        """Retorna una copia del listado cacheado o None."""
+        if not self.habilitada:
+            return None
+        with self._lock:
+            entrada = self._vigente(ruta)
+            if entrada is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return list(entrada.items)
+
+    def guardar(self, ruta: str, items: List[Any]):
+        if not self.habilitada:
+            return
+        with self._lock:
+            self._entradas[ruta] = _Entrada(list(items))
+            self._entradas.move_to_end(ruta)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def obtener_o_listar(self, ruta: str, listar: Callable[[], List[Any]]) -> List[Any]:
+        """Sirve el listado desde la caché o lo obtiene con `listar()` y lo guarda."""
+        items = self.obtener(ruta)
+        if items is not None:
+            return items
+        items = listar()
+        self.guardar(ruta, items)
+        return list(items)
+
+    def indice_carpetas(self, ruta: str, nombres: List[str]) -> Dict[str, str]:
+        """Índice numero -> carpeta para los nombres listados en `ruta`.
+
+        Conserva la PRIMERA carpeta de cada número en el orden del listado,
+        igual que la búsqueda lineal que reemplaza. Se construye una vez por
+        entrada y vence con ella.
+        """
+        with self._lock:
+            entrada = self._vigente(ruta) if self.habilitada else None
+            if entrada is not None and entrada.indice is not None:
+                return entrada.indice
+
+        indice: Dict[str, str] = {}
+        for nombre in nombres:
+            indice.setdefault(clave_numero_carpeta(nombre), nombre)
+
+        if entrada is not None:
+            with self._lock:
+                entrada.indice = indice
+        return indice
+
+    def invalidar(self, ruta: Optional[str] = None, recursivo: bool = False):
+        """Invalida una ruta (y opcionalmente todo lo que cuelga de ella) o toda la caché."""
+        with self._lock:
+            if ruta is None:
+                self._entradas.clear()
+                return
+            self._entradas.pop(ruta, None)
+            if recursivo:
+                prefijo = ruta.rstrip("/") + "/"
+                for clave in [c for c in self._entradas if c.startswith(prefijo)]:
+                    del self._entradas[clave]
+
+    @property
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "hits": self.hits,
+                "misses": self.misses,
+                "ttl": self.ttl
+            }
@@ -0,0 +1,216 @@
+"""
+Caché de parseo de anexos
+=========================
+
+Caché en disco, direccionada por contenido, de lo que extrae
+ProcesadorAnexo.extraer_servicios de un ANEXO 1: la clave es el SHA-256 de
+los bytes del archivo más la versión del parser, así un mismo anexo
+reutilizado entre contratos, actas u otrosíes (o re-descargado idéntico en
+otra ejecución) se parsea una sola vez.
+
+Cada entrada es un JSON comprimido con gzip y en formato columnar (una lista
+de valores por columna), que comprime mucho mejor que fila a fila porque las
+filas de cada sede repiten los mismos valores del servicio.
+
+Solo usa la librería estándar para poder importarse desde el script del
+consolidador sin cargar la configuración de la API. Las escrituras son
+atómicas (archivo temporal + os.replace) para que varios workers puedan
+compartir el directorio.
+
+La fecha de modificación de cada entrada marca su último uso (obtener la
+renueva); podar() borra las entradas de otras versiones del parser, que ya
+no pueden acertar, y las menos usadas cuando la caché pasa de su límite de
+antigüedad o de tamaño.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import IO, Any, Dict, List, Optional, Union
+
+_BLOQUE_HASH = 1024 * 1024
+
+# Límites por defecto de podar(); 0 desactiva el límite
+MB_MAXIMO_DEFECTO = 2048
+DIAS_MAXIMO_DEFECTO = 60
+# Temporales de escrituras que no terminaron (un worker que murió a medias)
+_SEGUNDOS_TEMPORAL = 3600
+
+
+def hash_archivo(ruta: Union[str, IO[bytes]]) -> str:
+    """SHA-256 de los bytes del archivo (ruta o archivo binario ya abierto)."""
+    h = hashlib.sha256()
+    if isinstance(ruta, str):
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(_BLOQUE_HASH), b''):
+                h.update(bloque)
+    else:
+        ruta.seek(0)
+        for bloque in iter(lambda: ruta.read(_BLOQUE_HASH), b''):
+            h.update(bloque)
+        ruta.seek(0)
+    return h.hexdigest()
+
+
+def filas_a_columnas(filas: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Convierte filas (dicts con las mismas claves) a {'columnas', 'valores'}.
+
+    Retorna None si las filas no comparten exactamente las mismas claves.
+    """
+    if not filas:
+        return {'columnas': [], 'valores': [], 'n': 0}
+    columnas = list(filas[0].keys())
+    for fila in filas:
+        if len(fila) != len(columnas) or any(c not in fila for c in columnas):
+            return None
+    return {
+        'columnas': columnas,
+        'valores': [[fila[c] for fila in filas] for c in columnas],
+        'n': len(filas)
+    }
+
+
+def columnas_a_filas(datos: Dict[str, Any]) -> List[Dict[str, Any]]:
+    columnas = datos['columnas']
+    if not columnas:
+        return []
+    return [dict(zip(columnas, valores)) for valores in zip(*datos['valores'])]
+
+
+class CacheParseo:
+    """Caché de resultados de extracción por hash de contenido + versión del parser."""
+
+    def __init__(self, directorio: str, version: str):
+        self.directorio = directorio
+        self.version = version
+        self._sufijo = hashlib.sha256(version.encode('utf-8')).hexdigest()[:12]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, clave[:2], f"{clave}-{self._sufijo}.json.gz")
+
+    def obtener(self, clave: str) -> Optional[Dict[str, Any]]:
+        """Retorna {'ok', 'mensaje', 'filas', 'alertas'} o None si no hay entrada válida."""
+        try:
+            with gzip.open(self._ruta(clave), 'rt', encoding='utf-8') as f:
+                entrada = json.load(f)
+            if entrada.get('version') != self.version:
+                raise ValueError("versión distinta")
+            filas = columnas_a_filas(entrada['filas'])
+        except (OSError, EOFError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            # Último uso, para podar()
+            os.utime(self._ruta(clave))
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return {
+            'ok': entrada['ok'],
+            'mensaje': entrada['mensaje'],
+            'filas': filas,
+            'alertas': entrada.get('alertas', [])
+        }
+
+    def guardar(self, clave: str, ok: bool, mensaje: str, filas: List[Dict[str, Any]],
+                alertas: List[Any]) -> bool:
+        """Guarda el resultado de una extracción. Retorna False si no es serializable."""
+        columnar = filas_a_columnas(filas)
+        if columnar is None:
+            return False
+        entrada = {
+            'version': self.version,
+            'ok': ok,
+            'mensaje': mensaje,
+            'filas': columnar,
+            'alertas': alertas
+        }
+        try:
+            datos = json.dumps(entrada, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        except (TypeError, ValueError):
+            return False
+
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(datos, compresslevel=6))
+            os.replace(tmp, ruta)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def podar(self, max_mb: float = MB_MAXIMO_DEFECTO, max_dias: float = DIAS_MAXIMO_DEFECTO) -> Dict[str, int]:
+        """Borra las entradas de otras versiones, las que llevan más de `max_dias`
+        sin usarse y, mientras la caché pase de `max_mb`, las usadas hace más tiempo.
+
+        Retorna {'eliminadas', 'conservadas', 'bytes'} (bytes de lo conservado).
+        """
+        ahora = time.time()
+        sufijo = f"-{self._sufijo}.json.gz"
+        entradas = []
+        eliminadas = 0
+
+        for raiz, _, archivos in os.walk(self.directorio):
+            for nombre in archivos:
+                ruta = os.path.join(raiz, nombre)
+                try:
+                    st = os.stat(ruta)
+                except OSError:
+                    continue
+                if nombre.endswith('.tmp'):
+                    borrar = ahora - st.st_mtime > _SEGUNDOS_TEMPORAL
+                else:
+                    borrar = (not nombre.endswith(sufijo)
+                              or (max_dias > 0 and ahora - st.st_mtime > max_dias * 86400))
+                    if not borrar:
+                        entradas.append((st.st_mtime, st.st_size, ruta))
+                if borrar and _eliminar(ruta):
+                    eliminadas += 1
+
+        total = sum(tamano for _, tamano, _ in entradas)
+        if max_mb > 0:
+            entradas.sort()
+            while entradas and total > max_mb * 1024 * 1024:
+                _, tamano, ruta = entradas.pop(0)
+                if _eliminar(ruta):
+                    eliminadas += 1
+                    total -= tamano
+
+        for raiz, carpetas, _ in os.walk(self.directorio, topdown=False):
+            for carpeta in carpetas:
+                try:
+                    os.rmdir(os.path.join(raiz, carpeta))
+                except OSError:
+                    pass
+
+        return {'eliminadas': eliminadas, 'conservadas': len(entradas), 'bytes': total}
+
+    @property
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "directorio": self.directorio}
+
+
+def _eliminar(ruta: str) -> bool:
+    try:
+        os.remove(ruta)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,157 @@
+"""
+Cola persistente de jobs
+========================
+
+Base SQLite (bajo OUTPUT_FOLDER/.cache) con los trabajos de la API: sus
+parámetros, su estado y la última copia de su información (progreso,
+archivos generados, estadísticas...). La API toma de aquí el siguiente
+trabajo pendiente (por prioridad y luego por orden de llegada) cuando hay un
+cupo libre, y al arrancar recupera los trabajos de la ejecución anterior:
+los que estaban en proceso vuelven a la cola.
+
+🆕 v15.4: los jobs terminados se conservan como historial solo N días
+(purgar los borra de la base y cargar no los trae), para que arrancar la
+API no cargue en memoria todos los jobs que se han hecho.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    estado      TEXT NOT NULL,
+    prioridad   INTEGER NOT NULL,
+    creado      REAL NOT NULL,
+    parametros  TEXT NOT NULL,
+    datos       TEXT NOT NULL,
+    actualizado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_cola ON jobs (estado, prioridad, creado);
+"""
+
+# Menor número = se ejecuta antes
+PRIORIDAD_MODO = {"ESPECIFICO": 0, "POR_ANO": 1, "COMPLETO": 2}
+
+# Estados en los que un job ya no corre ni se va a retomar
+ESTADOS_TERMINALES = ("completado", "error", "cancelado")
+
+_SEGUNDOS_DIA = 86400
+
+
+def _serializar(datos: Dict[str, Any]) -> str:
+    return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class ColaJobs:
+    """Cola FIFO por prioridad de los jobs, persistida en SQLite."""
+
+    def __init__(self, ruta_db: str):
+        self.ruta_db = ruta_db
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _conexion(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.ruta_db)), exist_ok=True)
+            conn = sqlite3.connect(self.ruta_db, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_ESQUEMA)
+            self._conn = conn
+        return self._conn
+
+    def encolar(self, job_id: str, parametros: Dict[str, Any], datos: Dict[str, Any],
+                prioridad: Optional[int] = None):
+        """Agrega un job pendiente; sin prioridad explícita se usa la de su modo."""
+        if prioridad is None:
+            prioridad = PRIORIDAD_MODO.get(parametros.get("modo"), max(PRIORIDAD_MODO.values()))
+        ahora = time.time()
+        with self._lock:
+            conn = self._conexion()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO jobs VALUES (?, 'pendiente', ?, ?, ?, ?, ?)",
+                    (job_id, prioridad, ahora, _serializar(parametros), _serializar(datos), ahora)
+                )
+
+    def tomar_siguiente(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Marca en proceso el siguiente job pendiente y retorna (job_id, parametros)."""
+        with self._lock:
+            conn = self._conexion()
+            with conn:
+                fila = conn.execute(
+                    "SELECT job_id, parametros FROM jobs WHERE estado = 'pendiente' "
+                    "ORDER BY prioridad, creado LIMIT 1"
+                ).fetchone()
+                if fila is None:
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET estado = 'en_proceso', actualizado = ? WHERE job_id = ?",
+                    (time.time(), fila[0])
+                )
+        return fila[0], json.loads(fila[1])
+
+    def guardar(self, job_id: str, estado: str, datos: Dict[str, Any]):
+        """Actualiza el estado y la información del job."""
+        with self._lock:
+            conn = self._conexion()
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET estado = ?, datos = ?, actualizado = ? WHERE job_id = ?",
+                    (estado, _serializar(datos), time.time(), job_id)
+                )
+
+    def reencolar_en_proceso(self) -> List[str]:
+        """Devuelve a la cola los jobs que quedaron en proceso (la API se detuvo)."""
+        with self._lock:
+            conn = self._conexion()
+            with conn:
+                ids = [fila[0] for fila in conn.execute(
+                    "SELECT job_id FROM jobs WHERE estado = 'en_proceso'"
+                )]
+                conn.execute(
+                    "UPDATE jobs SET estado = 'pendiente', actualizado = ? WHERE estado = 'en_proceso'",
+                    (time.time(),)
+                )
+        return ids
+
+    def cargar(self, dias_historial: Optional[float] = None) -> List[Tuple[str, str, Dict[str, Any], Dict[str, Any]]]:
+        """Jobs como (job_id, estado, parametros, datos), en orden de llegada.
+
+        Con dias_historial solo se traen los terminados actualizados en esos
+        últimos días; los pendientes y en proceso se traen siempre.
+        """
+        consulta = "SELECT job_id, estado, parametros, datos FROM jobs"
+        argumentos: tuple = ()
+        if dias_historial is not None and dias_historial > 0:
+            consulta += " WHERE estado NOT IN (?, ?, ?) OR actualizado >= ?"
+            argumentos = ESTADOS_TERMINALES + (time.time() - dias_historial * _SEGUNDOS_DIA,)
+        with self._lock:
+            filas = self._conexion().execute(consulta + " ORDER BY creado", argumentos).fetchall()
+        return [(job_id, estado, json.loads(parametros), json.loads(datos))
+                for job_id, estado, parametros, datos in filas]
+
+    def purgar(self, dias_historial: float) -> List[str]:
+        """Borra los jobs terminados hace más de dias_historial días y retorna sus ids (0 = no borra)."""
+        if dias_historial <= 0:
+            return []
+        argumentos = ESTADOS_TERMINALES + (time.time() - dias_historial * _SEGUNDOS_DIA,)
+        with self._lock:
+            conn = self._conexion()
+            with conn:
+                ids = [fila[0] for fila in conn.execute(
+                    "SELECT job_id FROM jobs WHERE estado IN (?, ?, ?) AND actualizado < ?", argumentos
+                )]
+                conn.execute("DELETE FROM jobs WHERE estado IN (?, ?, ?) AND actualizado < ?", argumentos)
+        return ids
+
+    def cerrar(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
@@ -0,0 +1,89 @@
+"""
+Canal de eventos del consolidador
+=================================
+
+Eventos tipados (una línea JSON por evento) que el consolidador emite para
+la API, separados del log para humanos que va a stdout:
+
+- job_start        modo, contratos, carpeta_trabajo, run_id (para CONSOLIDADOR_RESUME)
+- contract_start   idx, total, contrato
+- file_downloaded  contrato, archivo, bytes
+- rows_extracted   contrato, archivo, filas
+- contract_end     contrato, exito, registros, segundos, mensaje
+- alert            tipo, mensaje, contrato, archivo
+- progress         hechos, total (reanudados: contratos del punto de control al retomar)
+                   y etapas (segundos por etapa, cola de descargas adelantadas)
+- artifact         nombre, ruta, bytes
+- temporales       rutas (temporales del consolidado y las alertas, punto de control)
+- job_end          exito, contratos, exitosos, registros, alertas, segundos
+                   (cancelado=true si el trabajo se canceló)
+
+Cada evento lleva además "evento" (el tipo), "ts" (epoch) y "pid". El canal
+es un archivo JSON-lines en modo append: cada evento se escribe con un solo
+os.write(), así las líneas de los workers (fork) no se mezclan y el lector
+(app.api.process) lo sigue como un `tail -f` tanto si el consolidador corre
+como subproceso como dentro del servicio pre-calentado.
+
+Solo usa la librería estándar para poder importarse desde el consolidador y
+desde la API sin arrastrar las dependencias del otro lado.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, Optional
+
+
+class CanalEventos:
+    """Emisor de eventos JSON-lines; sin ruta no hace nada."""
+
+    def __init__(self, ruta: Optional[str] = None):
+        self.ruta = ruta or None
+        self._fd: Optional[int] = None
+        if self.ruta:
+            directorio = os.path.dirname(os.path.abspath(self.ruta))
+            os.makedirs(directorio, exist_ok=True)
+            self._fd = os.open(self.ruta, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    @property
+    def activo(self) -> bool:
+        return self._fd is not None
+
+    def emitir(self, evento: str, **datos: Any):
+        if self._fd is None:
+            return
+        registro = {'evento': evento, 'ts': round(time.time(), 3), 'pid': os.getpid()}
+        registro.update(datos)
+        linea = json.dumps(registro, ensure_ascii=False, default=str) + "\n"
+        try:
+            os.write(self._fd, linea.encode('utf-8'))
+        except OSError:
+            pass
+
+    def cerrar(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+
+def leer_eventos(archivo) -> Iterator[Dict[str, Any]]:
+    """Eventos completos disponibles en `archivo` (abierto en modo binario).
+
+    Deja el archivo posicionado después de la última línea completa, de modo
+    que una línea a medio escribir se lee en la siguiente llamada.
+    """
+    while True:
+        posicion = archivo.tell()
+        linea = archivo.readline()
+        if not linea:
+            return
+        if not linea.endswith(b"\n"):
+            archivo.seek(posicion)
+            return
+        try:
+            yield json.loads(linea.decode('utf-8'))
+        except ValueError:
+            continue
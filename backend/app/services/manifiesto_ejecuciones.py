@@ -0,0 +1,187 @@
+"""
+Manifiesto de ejecuciones incrementales
+=======================================
+
+Base SQLite (bajo OUTPUT_FOLDER/.cache) donde el consolidador registra, por
+contrato, la selección de anexos que procesó en la última ejecución:
+ruta remota, tamaño y fecha de modificación de cada archivo, junto con las
+filas extraídas (sin estampar contrato/origen/fecha) y su checksum.
+
+En la siguiente ejecución, si la selección de un contrato coincide archivo
+por archivo con la registrada (y con la misma versión del parser), el
+consolidador reutiliza esas filas y no descarga ni vuelve a parsear nada.
+
+Solo usa la librería estándar para poder importarse desde el script del
+consolidador sin cargar la configuración de la API. Cada proceso (workers
+incluidos) abre su propia conexión.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (ruta remota, tamaño, mtime)
+ArchivoSeleccion = Tuple[str, int, Optional[float]]
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS contratos (
+    contrato    TEXT PRIMARY KEY,
+    version     TEXT NOT NULL,
+    firma       TEXT NOT NULL,
+    actualizado REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archivos (
+    contrato    TEXT NOT NULL,
+    orden       INTEGER NOT NULL,
+    ruta_remota TEXT NOT NULL,
+    tamano      INTEGER,
+    mtime       REAL,
+    ok          INTEGER NOT NULL,
+    mensaje     TEXT,
+    n_filas     INTEGER NOT NULL,
+    checksum    TEXT NOT NULL,
+    filas       BLOB NOT NULL,
+    alertas     TEXT NOT NULL,
+    PRIMARY KEY (contrato, orden)
+);
+"""
+
+
+def _serializar_filas(filas: List[Dict[str, Any]]) -> bytes:
+    return json.dumps(filas, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class ManifiestoEjecuciones:
+    """Registro persistente de la selección y filas extraídas por contrato."""
+
+    def __init__(self, ruta_db: str, version: str):
+        self.ruta_db = ruta_db
+        self.version = version
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _conexion(self) -> sqlite3.Connection:
+        """Conexión propia del proceso actual (no se comparte tras un fork)."""
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.ruta_db)), exist_ok=True)
+            conn = sqlite3.connect(self.ruta_db, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_ESQUEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @staticmethod
+    def firma(seleccion: Sequence[ArchivoSeleccion], contexto: str = "") -> str:
+        """Huella de la selección (rutas, tamaños y mtimes en orden) y su contexto.
+
+        `contexto` recoge datos externos a los archivos que también afectan la
+        extracción (p. ej. la categoría de cuentas médicas de la maestra).
+        """
+        datos = json.dumps([contexto, [[r, t, m] for r, t, m in seleccion]], separators=(',', ':'))
+        return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+    def buscar(self, contrato: str, seleccion: Sequence[ArchivoSeleccion],
+               contexto: str = "") -> Optional[List[Dict[str, Any]]]:
+        """Retorna los resultados guardados por archivo si la selección no cambió.
+
+        Cada elemento trae 'ok', 'mensaje', 'filas' y 'alertas' (tipo, mensaje,
+        archivo) en el orden de la selección. Retorna None si no hay registro,
+        si cambió algún archivo, el contexto o la versión del parser, o si
+        alguna fila no cuadra con su checksum.
+        """
+        if not seleccion:
+            return None
+        with self._lock:
+            conn = self._conexion()
+            fila = conn.execute(
+                "SELECT 1 FROM contratos WHERE contrato = ? AND version = ? AND firma = ?",
+                (contrato, self.version, self.firma(seleccion, contexto))
+            ).fetchone()
+            if fila is None:
+                return None
+            registros = conn.execute(
+                "SELECT ok, mensaje, n_filas, checksum, filas, alertas FROM archivos "
+                "WHERE contrato = ? ORDER BY orden", (contrato,)
+            ).fetchall()
+
+        if len(registros) != len(seleccion):
+            return None
+
+        resultados = []
+        for ok, mensaje, n_filas, checksum, blob, alertas in registros:
+            try:
+                datos = zlib.decompress(blob)
+            except zlib.error:
+                return None
+            if hashlib.sha256(datos).hexdigest() != checksum:
+                return None
+            filas = json.loads(datos.decode('utf-8'))
+            if len(filas) != n_filas:
+                return None
+            resultados.append({
+                'ok': bool(ok),
+                'mensaje': mensaje or '',
+                'filas': filas,
+                'alertas': [tuple(a) for a in json.loads(alertas)]
+            })
+        return resultados
+
+    def registrar(self, contrato: str, seleccion: Sequence[ArchivoSeleccion],
+                  resultados: Sequence[Dict[str, Any]], contexto: str = "") -> bool:
+        """Guarda (reemplazando) la selección del contrato y sus resultados por archivo.
+
+        `resultados` va en el mismo orden que `seleccion`; cada uno con 'ok',
+        'mensaje', 'filas' (sin estampar) y 'alertas'. Retorna False si las
+        filas no se pueden serializar, en cuyo caso el contrato se olvida.
+        """
+        if not seleccion or len(seleccion) != len(resultados):
+            return False
+
+        try:
+            filas_archivos = []
+            for (ruta, tamano, mtime), res in zip(seleccion, resultados):
+                datos = _serializar_filas(res['filas'])
+                filas_archivos.append((
+                    contrato, len(filas_archivos), ruta, tamano, mtime,
+                    int(bool(res['ok'])), res.get('mensaje') or '', len(res['filas']),
+                    hashlib.sha256(datos).hexdigest(), zlib.compress(datos, 6),
+                    json.dumps([list(a) for a in res.get('alertas', [])], ensure_ascii=False)
+                ))
+        except (TypeError, ValueError):
+            self.olvidar(contrato)
+            return False
+
+        with self._lock:
+            conn = self._conexion()
+            with conn:
+                conn.execute("DELETE FROM archivos WHERE contrato = ?", (contrato,))
+                conn.executemany(
+                    "INSERT INTO archivos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", filas_archivos
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO contratos VALUES (?, ?, ?, ?)",
+                    (contrato, self.version, self.firma(seleccion, contexto), time.time())
+                )
+        return True
+
+    def olvidar(self, contrato: str):
+        """Elimina el registro de un contrato (la próxima ejecución lo procesa completo)."""
+        with self._lock:
+            conn = self._conexion()
+            with conn:
+                conn.execute("DELETE FROM archivos WHERE contrato = ?", (contrato,))
+                conn.execute("DELETE FROM contratos WHERE contrato = ?", (contrato,))
+
+    def cerrar(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._pid = None
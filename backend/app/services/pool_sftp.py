@@ -0,0 +1,373 @@
+"""
+Pool de sesiones SFTP
+=====================
+
+Conexiones SSH autenticadas contra el GoAnywhere, cada una con varios
+canales SFTP, que se prestan a quien los pide y se devuelven al terminar:
+
+    with pool.prestar() as sftp:
+        sftp.listdir_attr(ruta_absoluta)
+
+- préstamos verificados sin viajes extra: un canal libre se entrega si su
+  transporte sigue activo (estado local; el keepalive hace que un enlace
+  caído lo marque inactivo) y se usó con éxito hace menos de `sondeo`
+  segundos. Solo un canal ocioso por más tiempo se sondea con un stat('.')
+  antes de entregarlo; los canales de una conexión caída se descartan.
+- ejecutar(operacion): la operación real detecta la falla; el canal se
+  descarta y se reintenta una vez con otro.
+- sin reconexiones periódicas: una conexión se reemplaza solo cuando falla
+  (un préstamo que termina con error y la conexión ya no está activa).
+- inactividad: los canales libres sin uso por más de `inactividad` segundos
+  se cierran, y con ellos la conexión que se queda sin canales.
+- tope: nunca hay más de `max_conexiones` conexiones al servidor ni más de
+  `canales_por_conexion` canales en cada una; si todo está prestado se
+  espera hasta `espera` segundos a que se libere un canal.
+
+Los canales se devuelven sin directorio actual (chdir(None)), así que
+quien los usa trabaja con rutas absolutas y un préstamo no hereda el estado
+de otro. El pool es por proceso: la API tiene uno compartido por todas las
+peticiones y cada proceso del consolidador (y cada worker) el suyo.
+
+No importa paramiko: `conectar()` debe retornar un paramiko.SSHClient
+conectado y `abrir_canal(cliente_ssh)` un paramiko.SFTPClient.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from app.services.transferencias_sftp import ERRORES_DEFINITIVOS
+
+CANALES_POR_CONEXION_DEFECTO = 4
+INACTIVIDAD_DEFECTO = 300
+# Segundos sin operaciones exitosas tras los que un canal se sondea antes de usarlo
+SONDEO_DEFECTO = 30
+
+T = TypeVar('T')
+
+
+class SinSesionesLibres(TimeoutError):
+    """Todos los canales están prestados y ninguno se liberó a tiempo."""
+
+
+class _Conexion:
+    def __init__(self, cliente_ssh: Any):
+        self.cliente_ssh = cliente_ssh
+        self.canales = 0
+
+    def activa(self) -> bool:
+        try:
+            transporte = self.cliente_ssh.get_transport()
+            return transporte is not None and transporte.is_active()
+        except Exception:
+            return False
+
+    def cerrar(self):
+        try:
+            self.cliente_ssh.close()
+        except Exception:
+            pass
+
+
+class _Canal:
+    def __init__(self, sftp: Any, conexion: _Conexion):
+        self.sftp = sftp
+        self.conexion = conexion
+        # Última operación exitosa (o la apertura del canal)
+        self.ultimo_uso = time.time()
+
+    def vigente(self, sondeo: float, forzar: bool = False) -> bool:
+        """Transporte activo y uso reciente; si lleva más de `sondeo` s ocioso (o `forzar`), un stat('.')."""
+        if not self.conexion.activa():
+            return False
+        if not forzar and (sondeo <= 0 or time.time() - self.ultimo_uso <= sondeo):
+            return True
+        try:
+            self.sftp.stat('.')
+        except Exception:
+            return False
+        self.ultimo_uso = time.time()
+        return True
+
+    def cerrar(self):
+        try:
+            self.sftp.close()
+        except Exception:
+            pass
+
+
+class Prestamo:
+    """Canal prestado; se devuelve al salir del `with` o con devolver()."""
+
+    def __init__(self, pool: "PoolSFTP", canal: _Canal):
+        self._pool = pool
+        self._canal: Optional[_Canal] = canal
+
+    @property
+    def sftp(self) -> Any:
+        if self._canal is None:
+            raise RuntimeError("Préstamo SFTP ya devuelto")
+        return self._canal.sftp
+
+    @property
+    def transporte(self) -> Any:
+        return self._canal.conexion.cliente_ssh.get_transport() if self._canal is not None else None
+
+    def vigente(self, forzar: bool = False) -> bool:
+        """Si el canal sigue sirviendo; solo va al servidor si lleva rato ocioso (o con `forzar`)."""
+        return self._canal is not None and self._canal.vigente(self._pool.sondeo, forzar)
+
+    def marcar_uso(self):
+        """Registra una operación exitosa (posterga el próximo sondeo)."""
+        if self._canal is not None:
+            self._canal.ultimo_uso = time.time()
+
+    def devolver(self, sano: bool = True):
+        """Devuelve el canal; con `sano=False` se cierra (y su conexión si ya no está activa)."""
+        canal, self._canal = self._canal, None
+        if canal is not None:
+            self._pool._devolver(canal, sano)
+
+    def descartar(self, cerrar_conexion: bool = False):
+        """Cierra el canal sin devolverlo; con `cerrar_conexion` también su conexión SSH."""
+        canal, self._canal = self._canal, None
+        if canal is not None:
+            self._pool._descartar(canal, cerrar_conexion)
+
+    def __enter__(self) -> Any:
+        return self.sftp
+
+    def __exit__(self, tipo_error, *exc) -> bool:
+        # Un error del archivo (no existe, sin permiso) no invalida el canal;
+        # si la conexión se cayó, _devolver lo descarta igual
+        if tipo_error is None:
+            self.marcar_uso()
+        self.devolver(sano=True)
+        return False
+
+
+class PoolSFTP:
+    """Conexiones SSH con varios canales SFTP cada una, prestados de forma segura entre hilos."""
+
+    def __init__(self, conectar: Callable[[], Any], abrir_canal: Callable[[Any], Any],
+                 max_conexiones: int = 1, canales_por_conexion: int = CANALES_POR_CONEXION_DEFECTO,
+                 inactividad: float = INACTIVIDAD_DEFECTO, sondeo: float = SONDEO_DEFECTO,
+                 espera: float = 30.0):
+        self._conectar = conectar
+        self._abrir_canal = abrir_canal
+        self.max_conexiones = max(1, max_conexiones)
+        self.canales_por_conexion = max(1, canales_por_conexion)
+        self.inactividad = inactividad
+        self.sondeo = sondeo
+        self.espera = espera
+
+        self._cond = threading.Condition()
+        self._conexiones: List[_Conexion] = []
+        self._libres: List[_Canal] = []
+        self._prestados = 0
+        # Conexiones que se están abriendo fuera del lock (cuentan para el tope)
+        self._abriendo = 0
+        self.conexiones_abiertas = 0
+        self.canales_abiertos = 0
+        self.descartados = 0
+        self.esperas = 0
+        self.sondeos = 0
+        self.reintentos = 0
+
+    # ── préstamos ────────────────────────────────────────────────────────────
+
+    def prestar(self, timeout: Optional[float] = None) -> Prestamo:
+        """Presta un canal verificado; abre canales o conexiones si hace falta y hay cupo.
+
+        Lanza SinSesionesLibres si no se libera ningún canal a tiempo; los
+        errores al conectar se propagan.
+        """
+        limite = time.time() + (self.espera if timeout is None else timeout)
+        while True:
+            canal = None
+            with self._cond:
+                while True:
+                    self._mantener()
+
+                    while self._libres:
+                        canal = self._libres.pop()
+                        if canal.conexion.activa():
+                            self._prestados += 1
+                            break
+                        self._quitar_canal(canal)
+                        canal = None
+                    if canal is not None:
+                        break
+
+                    conexion = next((c for c in self._conexiones
+                                     if c.canales < self.canales_por_conexion and c.activa()), None)
+                    if conexion is not None:
+                        conexion.canales += 1
+                        self._prestados += 1
+                        break
+
+                    if len(self._conexiones) + self._abriendo < self.max_conexiones:
+                        self._abriendo += 1
+                        conexion = None
+                        break
+
+                    restante = limite - time.time()
+                    if restante <= 0:
+                        raise SinSesionesLibres("No hay sesiones SFTP libres")
+                    self.esperas += 1
+                    self._cond.wait(restante)
+
+            if canal is None:
+                break
+            # Un canal ocioso por más de `sondeo` s se prueba (fuera del lock) antes de prestarlo
+            if self.sondeo > 0 and time.time() - canal.ultimo_uso > self.sondeo:
+                with self._cond:
+                    self.sondeos += 1
+                if not canal.vigente(self.sondeo):
+                    self._descartar(canal, cerrar_conexion=True)
+                    continue
+            return Prestamo(self, canal)
+
+        # Conectar y abrir el canal fuera del lock (pueden tardar segundos)
+        nueva = conexion is None
+        try:
+            if nueva:
+                conexion = _Conexion(self._conectar())
+            canal = _Canal(self._abrir_canal(conexion.cliente_ssh), conexion)
+        except BaseException:
+            with self._cond:
+                if nueva:
+                    self._abriendo -= 1
+                else:
+                    conexion.canales -= 1
+                    self._prestados -= 1
+                self._cond.notify()
+            if nueva and conexion is not None:
+                conexion.cerrar()
+            raise
+
+        with self._cond:
+            if nueva:
+                self._abriendo -= 1
+                conexion.canales = 1
+                self._conexiones.append(conexion)
+                self._prestados += 1
+                self.conexiones_abiertas += 1
+            self.canales_abiertos += 1
+        return Prestamo(self, canal)
+
+    def _devolver(self, canal: _Canal, sano: bool):
+        with self._cond:
+            self._prestados -= 1
+            if sano and canal.conexion.activa():
+                try:
+                    # Sin directorio actual: el próximo préstamo no hereda el de este
+                    # (chdir(None) es local, no va al servidor)
+                    canal.sftp.chdir(None)
+                except Exception:
+                    pass
+                self._libres.append(canal)
+            else:
+                self._quitar_canal(canal)
+            self._cond.notify()
+
+    def _descartar(self, canal: _Canal, cerrar_conexion: bool):
+        with self._cond:
+            self._prestados -= 1
+            self._quitar_canal(canal)
+            if cerrar_conexion and canal.conexion in self._conexiones:
+                self._cerrar_conexion(canal.conexion)
+            self._cond.notify_all()
+
+    def ejecutar(self, operacion: Callable[[Any], T], reintentos: int = 1,
+                 prestar: Optional[Callable[[], Prestamo]] = None) -> T:
+        """Corre `operacion(sftp)` con un canal prestado y retorna su resultado.
+
+        La falla se detecta con el error de la propia operación: el canal se
+        descarta y se reintenta hasta `reintentos` veces con otro. Los errores
+        del archivo remoto (no existe, sin permiso) se relanzan sin reintentar.
+        `prestar` reemplaza a self.prestar (p. ej. para reintentar la conexión).
+        """
+        for intento in range(reintentos + 1):
+            prestamo = (prestar or self.prestar)()
+            try:
+                resultado = operacion(prestamo.sftp)
+            except ERRORES_DEFINITIVOS:
+                prestamo.devolver()
+                raise
+            except Exception:
+                prestamo.descartar()
+                if intento >= reintentos:
+                    raise
+                self.reintentos += 1
+                continue
+            prestamo.marcar_uso()
+            prestamo.devolver()
+            return resultado
+
+    # ── mantenimiento (con el lock tomado) ───────────────────────────────────
+
+    def _quitar_canal(self, canal: _Canal):
+        canal.cerrar()
+        self.descartados += 1
+        conexion = canal.conexion
+        conexion.canales -= 1
+        if conexion in self._conexiones and (conexion.canales <= 0 or not conexion.activa()):
+            self._cerrar_conexion(conexion)
+
+    def _cerrar_conexion(self, conexion: _Conexion):
+        """Cierra la conexión y sus canales libres (los prestados fallarán y se descartarán)."""
+        self._conexiones.remove(conexion)
+        for canal in [c for c in self._libres if c.conexion is conexion]:
+            self._libres.remove(canal)
+            canal.cerrar()
+            conexion.canales -= 1
+        conexion.cerrar()
+
+    def _mantener(self):
+        """Suelta las conexiones caídas y cierra los canales libres vencidos."""
+        for conexion in [c for c in self._conexiones if not c.activa()]:
+            self._cerrar_conexion(conexion)
+        if self.inactividad <= 0:
+            return
+        limite = time.time() - self.inactividad
+        for canal in [c for c in self._libres if c.ultimo_uso < limite]:
+            self._libres.remove(canal)
+            self._quitar_canal(canal)
+
+    # ── API pública ──────────────────────────────────────────────────────────
+
+    def activo(self) -> bool:
+        """Si hay alguna conexión con el transporte activo (sin ir al servidor)."""
+        with self._cond:
+            self._mantener()
+            return bool(self._conexiones)
+
+    def cerrar_inactivos(self):
+        """Cierra ya los canales libres vencidos y las conexiones caídas (también ocurre en cada préstamo)."""
+        with self._cond:
+            self._mantener()
+
+    def cerrar(self):
+        """Cierra todas las conexiones; los préstamos en curso fallarán y se descartarán."""
+        with self._cond:
+            for conexion in list(self._conexiones):
+                self._cerrar_conexion(conexion)
+            self._cond.notify_all()
+
+    @property
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'conexiones': len(self._conexiones),
+                'canales_libres': len(self._libres),
+                'canales_prestados': self._prestados,
+                'max_conexiones': self.max_conexiones,
+                'canales_por_conexion': self.canales_por_conexion,
+                'conexiones_abiertas': self.conexiones_abiertas,
+                'canales_abiertos': self.canales_abiertos,
+                'canales_descartados': self.descartados,
+                'esperas': self.esperas,
+                'sondeos': self.sondeos,
+                'reintentos': self.reintentos
+            }
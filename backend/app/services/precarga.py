@@ -0,0 +1,64 @@
+"""
+Precarga de objetos del consolidador
+====================================
+
+Registro, por proceso, de los objetos costosos que arma el arranque del
+script del consolidador: resultado de las pruebas v14.1, clasificador ML
+entrenado, hojas y DataFrame de la maestra e índice de la maestra.
+
+Ejecutado como subproceso normal, obtener() solo construye el objeto. Con el
+servicio pre-calentado (app.services.servicio_consolidador) el proceso
+servidor ejecuta una vez el arranque del script y cada trabajo corre en un
+fork que hereda estos objetos ya construidos.
+
+Solo usa la librería estándar para poder importarse desde el script del
+consolidador sin cargar la configuración de la API.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+_objetos: Dict[Hashable, Any] = {}
+_grupos: Dict[str, Hashable] = {}
+_lock = threading.RLock()
+
+
+def clave_archivo(ruta: str, *extra: Hashable) -> Tuple:
+    """Clave que cambia si el archivo cambia (ruta absoluta, tamaño y mtime)."""
+    st = os.stat(ruta)
+    return (os.path.abspath(ruta), st.st_size, st.st_mtime_ns) + tuple(extra)
+
+
+def obtener(clave: Hashable, fabrica: Callable[[], Any], grupo: Optional[str] = None) -> Any:
+    """Retorna el objeto registrado con `clave` o lo construye con `fabrica`.
+
+    Con `grupo` se conserva un solo objeto por grupo: registrar una clave
+    nueva descarta la anterior (p. ej. la maestra reemplazada por otra).
+    """
+    with _lock:
+        if clave in _objetos:
+            return _objetos[clave]
+
+    valor = fabrica()
+
+    with _lock:
+        if grupo is not None:
+            anterior = _grupos.get(grupo)
+            if anterior is not None and anterior != clave:
+                _objetos.pop(anterior, None)
+            _grupos[grupo] = clave
+        return _objetos.setdefault(clave, valor)
+
+
+def descartar(clave: Hashable):
+    with _lock:
+        _objetos.pop(clave, None)
+        for grupo, actual in list(_grupos.items()):
+            if actual == clave:
+                del _grupos[grupo]
+
+
+def claves() -> List[Hashable]:
+    with _lock:
+        return list(_objetos.keys())
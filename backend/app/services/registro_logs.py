@@ -0,0 +1,210 @@
+"""
+Registro de logs de un job
+==========================
+
+Almacén acotado de las líneas de log de un trabajo. Las últimas líneas se
+guardan en memoria (un buffer circular) y todas se escriben en un log
+append-only en disco, partido en segmentos de tamaño fijo:
+
+    segmento_000000.jsonl   una línea JSON por log
+    segmento_000000.idx     offset en bytes de cada línea (uint64, 8 bytes)
+
+El log N está en el segmento N // por_segmento y su offset en la posición
+(N % por_segmento) * 8 del .idx, así que leer desde cualquier índice es un
+par de seek() y la memoria de la API no depende de cuánto dure el job.
+
+🆕 v15.4: registro.json guarda el por_segmento con el que se escribió el
+registro y los conteos por tipo hasta cierto total (se actualiza al cerrar).
+Al retomarlo tras reiniciar la API solo se leen las líneas posteriores a ese
+total, y un cambio de LOGS_POR_SEGMENTO no altera los índices. La carpeta se
+crea con el primer log, no al abrir el registro.
+"""
+
+import json
+import os
+import shutil
+import struct
+import threading
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, List, Optional
+
+# Logs recientes que se mantienen en memoria por job
+LOGS_EN_MEMORIA = 2000
+
+# Logs por segmento en disco
+LOGS_POR_SEGMENTO = 50000
+
+_OFFSET = struct.Struct('<Q')
+
+# Metadatos del registro (por_segmento, total y conteos por tipo)
+ARCHIVO_META = "registro.json"
+
+
+class RegistroLogs:
+    """Buffer circular en memoria + log segmentado en disco con índice de offsets."""
+
+    def __init__(self, directorio: str, en_memoria: int = LOGS_EN_MEMORIA,
+                 por_segmento: int = LOGS_POR_SEGMENTO):
+        self.directorio = directorio
+        self.por_segmento = max(1, por_segmento)
+        self.recientes: deque = deque(maxlen=max(1, en_memoria))
+        self.total = 0
+        self.por_tipo: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._segmento: Optional[int] = None
+        self._datos = None
+        self._indice = None
+        self._offset = 0
+        self._recuperar()
+
+    def _ruta(self, segmento: int, extension: str) -> str:
+        return os.path.join(self.directorio, f"segmento_{segmento:06d}.{extension}")
+
+    def _recuperar(self):
+        """Retoma un registro existente (p. ej. tras reiniciar la API)."""
+        if not os.path.isdir(self.directorio):
+            return
+        meta = self._leer_meta()
+        if meta is not None:
+            # Los índices dependen del por_segmento con que se escribió
+            self.por_segmento = meta["por_segmento"]
+        segmentos = [
+            int(nombre[9:15]) for nombre in os.listdir(self.directorio)
+            if nombre.startswith("segmento_") and nombre.endswith(".idx")
+        ]
+        if segmentos:
+            ultimo = max(segmentos)
+            lineas = os.path.getsize(self._ruta(ultimo, "idx")) // _OFFSET.size
+            self.total = ultimo * self.por_segmento + lineas
+            contados = 0
+            if meta is not None and meta["total"] <= self.total:
+                self.por_tipo = dict(meta["por_tipo"])
+                contados = meta["total"]
+            self._contar_tipos(contados)
+
+    def _leer_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directorio, ARCHIVO_META), encoding="utf-8") as f:
+                meta = json.load(f)
+            return {
+                "por_segmento": max(1, int(meta["por_segmento"])),
+                "total": int(meta.get("total", 0)),
+                "por_tipo": {str(t): int(n) for t, n in meta.get("por_tipo", {}).items()}
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def _guardar_meta(self):
+        ruta = os.path.join(self.directorio, ARCHIVO_META)
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"por_segmento": self.por_segmento, "total": self.total,
+                       "por_tipo": self.por_tipo}, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    def _contar_tipos(self, desde: int = 0):
+        """Suma a por_tipo los logs [desde, total) leyendo los segmentos (solo lo que el .idx registra)."""
+        for segmento in range(desde // self.por_segmento, self.total // self.por_segmento + 1):
+            inicio = segmento * self.por_segmento
+            saltar = max(0, desde - inicio)
+            cantidad = min(self.por_segmento, self.total - inicio)
+            if cantidad <= saltar or not os.path.exists(self._ruta(segmento, "jsonl")):
+                continue
+            with open(self._ruta(segmento, "jsonl"), "rb") as f:
+                for linea in islice(f, saltar, cantidad):
+                    try:
+                        tipo = json.loads(linea).get("tipo", "")
+                    except ValueError:
+                        continue
+                    self.por_tipo[tipo] = self.por_tipo.get(tipo, 0) + 1
+
+    def _abrir(self, segmento: int):
+        self._cerrar_segmento()
+        os.makedirs(self.directorio, exist_ok=True)
+        if not os.path.exists(os.path.join(self.directorio, ARCHIVO_META)):
+            self._guardar_meta()
+        # Sin buffer: cada línea llega al disco con un solo write y los
+        # lectores la ven en cuanto `total` la incluye
+        self._datos = open(self._ruta(segmento, "jsonl"), "ab", buffering=0)
+        self._indice = open(self._ruta(segmento, "idx"), "ab", buffering=0)
+        self._offset = os.path.getsize(self._ruta(segmento, "jsonl"))
+        self._segmento = segmento
+
+    def agregar(self, log: Dict[str, Any]) -> int:
+        """Guarda un log y devuelve su índice."""
+        linea = json.dumps(log, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+        with self._lock:
+            indice = self.total
+            segmento = indice // self.por_segmento
+            if segmento != self._segmento:
+                self._abrir(segmento)
+            self._datos.write(linea)
+            self._indice.write(_OFFSET.pack(self._offset))
+            self._offset += len(linea)
+
+            self.recientes.append(log)
+            tipo = log.get("tipo", "")
+            self.por_tipo[tipo] = self.por_tipo.get(tipo, 0) + 1
+            self.total += 1
+        return indice
+
+    def leer(self, desde: int = 0, limite: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Logs [desde, desde + limite); los recientes salen de memoria, el resto del disco."""
+        with self._lock:
+            total = self.total
+            desde = max(0, desde)
+            hasta = total if limite is None else min(total, desde + max(0, limite))
+            if desde >= hasta:
+                return []
+            primero_en_memoria = total - len(self.recientes)
+            if desde >= primero_en_memoria:
+                inicio = desde - primero_en_memoria
+                return list(islice(self.recientes, inicio, inicio + hasta - desde))
+
+        return self._leer_disco(desde, hasta)
+
+    def _leer_disco(self, desde: int, hasta: int) -> List[Dict[str, Any]]:
+        logs = []
+        indice = desde
+        while indice < hasta:
+            segmento, posicion = divmod(indice, self.por_segmento)
+            cantidad = min(hasta - indice, self.por_segmento - posicion)
+
+            with open(self._ruta(segmento, "idx"), "rb") as f:
+                f.seek(posicion * _OFFSET.size)
+                (offset,) = _OFFSET.unpack(f.read(_OFFSET.size))
+
+            with open(self._ruta(segmento, "jsonl"), "rb") as f:
+                f.seek(offset)
+                for _ in range(cantidad):
+                    logs.append(json.loads(f.readline()))
+
+            indice += cantidad
+        return logs
+
+    def cerrar(self):
+        """Cierra el segmento abierto (se reabre solo si llegan más logs) y guarda los conteos."""
+        with self._lock:
+            if self._segmento is not None:
+                self._guardar_meta()
+            self._cerrar_segmento()
+
+    def eliminar(self):
+        """Borra los segmentos del disco y vacía el registro (sigue usable)."""
+        with self._lock:
+            self._cerrar_segmento()
+            shutil.rmtree(self.directorio, ignore_errors=True)
+            self.recientes.clear()
+            self.total = 0
+            self.por_tipo = {}
+
+    def _cerrar_segmento(self):
+        for archivo in (self._datos, self._indice):
+            if archivo is not None:
+                archivo.close()
+        self._datos = self._indice = None
+        self._segmento = None
+
+    def __len__(self) -> int:
+        return self.total
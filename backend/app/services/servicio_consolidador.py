@@ -0,0 +1,539 @@
+"""
+Servicio pre-calentado del consolidador
+=======================================
+
+Proceso de larga vida que mantiene importadas las dependencias pesadas
+(pandas, scikit-learn, paramiko, openpyxl...) y ya ejecutado el arranque del
+script del consolidador: pruebas v14.1, entrenamiento del clasificador ML y
+lectura de la maestra (ver app.services.precarga). La API le envía los
+trabajos por un socket Unix y cada trabajo corre en un fork del servidor, así
+un trabajo ESPECIFICO arranca en milisegundos y no en decenas de segundos.
+
+Protocolo (una conexión por petición, JSON en la primera línea):
+- {"accion": "ping"} -> {"ok": true, "pid": ..., "precargas": ...}
+- {"accion": "precargar", "env": {...}} -> {"ok": ..., "segundos": ...}
+  Ejecuta el script con CONSOLIDADOR_SOLO_PRECARGA=1 dentro del servidor, en
+  un hilo aparte (una precarga a la vez) para seguir aceptando peticiones.
+- {"accion": "ejecutar", "env": {...}, "cwd": ..., "espera": s} -> {"pid": ...}
+  y luego la salida del trabajo (stdout + stderr) terminada en MARCA_FIN +
+  código. La marca la escribe el propio fork al salir, así llega aunque el
+  servidor se haya reiniciado mientras tanto; el servidor solo la envía si el
+  fork murió por una señal. El fork no se hace a mitad de una precarga: si la
+  precarga en curso no termina en `espera` segundos responde {"ok": false}
+  y el cliente lanza el trabajo como subproceso.
+- {"accion": "detener"} -> {"ok": true}
+
+Requiere fork y sockets Unix; donde no existen la API sigue lanzando un
+subproceso por trabajo. Solo usa la librería estándar.
+
+Uso del servidor:
+    python -m app.services.servicio_consolidador --socket RUTA --script RUTA
+"""
+
+import argparse
+import importlib
+import io
+import json
+import os
+import runpy
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+MARCA_FIN = "\x00FIN "
+
+MODULOS_PRECARGA = (
+    'numpy', 'pandas', 'openpyxl', 'paramiko', 'sklearn.feature_extraction.text',
+    'sklearn.metrics.pairwise', 'pyxlsb', 'xlrd', 'xlsxwriter', 'pyarrow', 'pyarrow.parquet'
+)
+
+
+class ServicioNoDisponible(RuntimeError):
+    """El servicio no se pudo iniciar o no responde."""
+
+
+def servicio_disponible() -> bool:
+    return hasattr(os, 'fork') and hasattr(socket, 'AF_UNIX')
+
+
+def _leer_linea(conn: socket.socket, limite: int = 16 * 1024 * 1024) -> bytes:
+    datos = bytearray()
+    while not datos.endswith(b'\n'):
+        bloque = conn.recv(65536)
+        if not bloque:
+            break
+        datos.extend(bloque)
+        if len(datos) > limite:
+            raise ValueError("petición demasiado grande")
+    return bytes(datos)
+
+
+def _enviar_json(conn: socket.socket, datos: Dict[str, Any]):
+    conn.sendall((json.dumps(datos, ensure_ascii=False) + '\n').encode('utf-8'))
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SERVIDOR
+# ══════════════════════════════════════════════════════════════════════════════
+
+class _Servidor:
+    def __init__(self, ruta_socket: str, script: str):
+        self.ruta_socket = ruta_socket
+        self.script = os.path.abspath(script)
+        self.precargas = 0
+        # Tomado durante cada precarga y cada fork: un trabajo nunca hereda una a medias
+        self._lock_precarga = threading.Lock()
+
+    def precargar(self, env: Dict[str, str]) -> Dict[str, Any]:
+        """Ejecuta el arranque del script en este proceso (queda en precarga)."""
+        inicio = time.time()
+        cwd, entorno, argv = os.getcwd(), dict(os.environ), list(sys.argv)
+        os.environ.update(env)
+        os.environ['CONSOLIDADOR_SOLO_PRECARGA'] = '1'
+        sys.argv = [self.script]
+        ok = True
+        try:
+            os.chdir(os.path.dirname(self.script))
+            runpy.run_path(self.script, run_name='__main__')
+        except SystemExit as e:
+            ok = e.code in (None, 0)
+        except Exception:
+            traceback.print_exc()
+            ok = False
+        finally:
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(entorno)
+            sys.argv = argv
+            sys.stdout.flush()
+
+        if ok:
+            self.precargas += 1
+        return {'ok': ok, 'segundos': round(time.time() - inicio, 2)}
+
+    def _atender_precarga(self, conn: socket.socket, env: Dict[str, str]):
+        try:
+            with self._lock_precarga:
+                respuesta = self.precargar(env)
+            _enviar_json(conn, respuesta)
+        except Exception as e:
+            try:
+                _enviar_json(conn, {'ok': False, 'error': str(e)})
+            except OSError:
+                pass
+        finally:
+            conn.close()
+
+    def _atender_ejecucion(self, conn: socket.socket, peticion: Dict[str, Any], servidor: socket.socket):
+        espera = peticion.get('espera')
+        if not self._lock_precarga.acquire(timeout=-1 if espera is None else max(0.0, float(espera))):
+            try:
+                _enviar_json(conn, {'ok': False, 'error': "el servicio sigue precargando"})
+            except OSError:
+                pass
+            conn.close()
+            return
+        try:
+            self.ejecutar(conn, peticion, servidor)
+        except Exception as e:
+            try:
+                _enviar_json(conn, {'ok': False, 'error': str(e)})
+            except OSError:
+                pass
+            conn.close()
+        finally:
+            self._lock_precarga.release()
+
+    def ejecutar(self, conn: socket.socket, peticion: Dict[str, Any], servidor: socket.socket):
+        """Corre el trabajo en un fork; la salida va directo al socket del cliente."""
+        pid = os.fork()
+        if pid == 0:
+            codigo = 1
+            try:
+                servidor.close()
+                os.setpgrp()
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                _enviar_json(conn, {'pid': os.getpid()})
+
+                os.dup2(conn.fileno(), 1)
+                os.dup2(conn.fileno(), 2)
+                nulo = os.open(os.devnull, os.O_RDONLY)
+                os.dup2(nulo, 0)
+                sys.stdout = io.TextIOWrapper(io.FileIO(1, 'w', closefd=False), encoding='utf-8',
+                                              errors='replace', line_buffering=True)
+                sys.stderr = io.TextIOWrapper(io.FileIO(2, 'w', closefd=False), encoding='utf-8',
+                                              errors='replace', line_buffering=True)
+
+                os.environ.clear()
+                os.environ.update(peticion.get('env') or {})
+                os.chdir(peticion.get('cwd') or os.path.dirname(self.script))
+                sys.argv = [self.script]
+
+                try:
+                    runpy.run_path(self.script, run_name='__main__')
+                    codigo = 0
+                except SystemExit as e:
+                    if e.code is None:
+                        codigo = 0
+                    elif isinstance(e.code, int):
+                        codigo = e.code
+                    else:
+                        print(e.code, file=sys.stderr)
+                        codigo = 1
+                except BaseException:
+                    traceback.print_exc()
+                    codigo = 1
+            finally:
+                try:
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    # La marca va por el socket del cliente, que no depende del servidor
+                    os.write(1, f"{MARCA_FIN}{codigo}\n".encode('utf-8'))
+                except Exception:
+                    pass
+                os._exit(codigo)
+
+        threading.Thread(target=self._esperar, args=(conn, pid), daemon=True).start()
+
+    @staticmethod
+    def _esperar(conn: socket.socket, pid: int):
+        """Recoge el fork; si murió por una señal (no alcanzó a escribir su marca) la envía."""
+        try:
+            _, estado = os.waitpid(pid, 0)
+            codigo = os.waitstatus_to_exitcode(estado) if os.WIFSIGNALED(estado) else None
+        except ChildProcessError:
+            codigo = -1
+        try:
+            if codigo is not None:
+                conn.sendall(f"{MARCA_FIN}{codigo}\n".encode('utf-8'))
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def servir(self):
+        if os.path.exists(self.ruta_socket):
+            os.unlink(self.ruta_socket)
+        servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        servidor.bind(self.ruta_socket)
+        os.chmod(self.ruta_socket, 0o600)
+        servidor.listen(16)
+        print(f"Servicio del consolidador escuchando en {self.ruta_socket} (pid {os.getpid()})", flush=True)
+
+        try:
+            while True:
+                conn, _ = servidor.accept()
+                try:
+                    peticion = json.loads(_leer_linea(conn).decode('utf-8') or '{}')
+                    accion = peticion.get('accion')
+
+                    # Precarga y ejecución pueden esperar: van en su propio hilo, que
+                    # responde y cierra (en la ejecución, el hilo que espera al fork)
+                    if accion == 'ejecutar':
+                        threading.Thread(target=self._atender_ejecucion, args=(conn, peticion, servidor),
+                                         daemon=True).start()
+                        continue
+                    if accion == 'precargar':
+                        threading.Thread(target=self._atender_precarga, args=(conn, peticion.get('env') or {}),
+                                         daemon=True).start()
+                        continue
+
+                    if accion == 'ping':
+                        respuesta = {'ok': True, 'pid': os.getpid(), 'script': self.script,
+                                     'precargas': self.precargas}
+                    elif accion == 'detener':
+                        _enviar_json(conn, {'ok': True})
+                        conn.close()
+                        break
+                    else:
+                        respuesta = {'ok': False, 'error': f"acción desconocida: {accion}"}
+                    _enviar_json(conn, respuesta)
+                except Exception as e:
+                    try:
+                        _enviar_json(conn, {'ok': False, 'error': str(e)})
+                    except OSError:
+                        pass
+                conn.close()
+        finally:
+            servidor.close()
+            try:
+                os.unlink(self.ruta_socket)
+            except OSError:
+                pass
+
+
+def _precargar_modulos():
+    for modulo in MODULOS_PRECARGA:
+        try:
+            importlib.import_module(modulo)
+        except ImportError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio pre-calentado del consolidador T25")
+    parser.add_argument('--socket', required=True)
+    parser.add_argument('--script', required=True)
+    args = parser.parse_args(argv)
+
+    _precargar_modulos()
+    _Servidor(args.socket, args.script).servir()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CLIENTE (lado API)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class _SalidaServicio:
+    """stdout de un trabajo; al llegar MARCA_FIN fija el código y responde ''."""
+
+    def __init__(self, archivo, proceso: "ProcesoServicio"):
+        self._archivo = archivo
+        self._proceso = proceso
+        self._fin: Optional[str] = None
+
+    def readline(self) -> str:
+        if self._fin is not None:
+            self._terminar(self._fin)
+            return ''
+
+        linea = self._archivo.readline()
+        if not linea:
+            self._terminar(None)
+            return ''
+
+        pos = linea.find(MARCA_FIN)
+        if pos < 0:
+            return linea
+        if pos > 0:
+            # Última línea del trabajo sin salto final
+            self._fin = linea[pos:]
+            return linea[:pos] + '\n'
+        self._terminar(linea)
+        return ''
+
+    def _terminar(self, marca: Optional[str]):
+        if self._proceso.returncode is None:
+            try:
+                codigo = int(marca[len(MARCA_FIN):].strip()) if marca else -1
+            except ValueError:
+                codigo = -1
+            self._proceso._finalizar(codigo)
+
+    def close(self):
+        self._archivo.close()
+
+
+class ProcesoServicio:
+    """Trabajo corriendo en el servicio, con la interfaz de Popen que usa la API."""
+
+    def __init__(self, conn: socket.socket):
+        self._conn = conn
+        self._terminado = threading.Event()
+        self.returncode: Optional[int] = None
+
+        archivo = conn.makefile('r', encoding='utf-8', errors='replace')
+        try:
+            cabecera = json.loads(archivo.readline() or 'null')
+        except (OSError, ValueError):
+            cabecera = None
+        if not isinstance(cabecera, dict) or 'pid' not in cabecera:
+            conn.close()
+            error = cabecera.get('error') if isinstance(cabecera, dict) else None
+            raise ServicioNoDisponible(error or "el servicio cerró la conexión sin iniciar el trabajo")
+        # Iniciado el trabajo, su salida puede tardar lo que sea
+        conn.settimeout(None)
+        self.pid: int = cabecera['pid']
+        self.stdout = _SalidaServicio(archivo, self)
+
+    def _finalizar(self, codigo: int):
+        self.returncode = codigo
+        self._terminado.set()
+        try:
+            self._conn.close()
+        except OSError:
+            pass
+
+    def poll(self) -> Optional[int]:
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[int]:
+        if not self._terminado.wait(timeout):
+            raise subprocess.TimeoutExpired('servicio_consolidador', timeout)
+        return self.returncode
+
+    def send_signal(self, sig: int):
+        """Señal al grupo del trabajo (incluye sus procesos worker)."""
+        if self.returncode is not None:
+            return
+        try:
+            os.killpg(self.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class ServicioConsolidador:
+    """Arranca, vigila y usa el proceso servidor desde la API.
+
+    El servidor se (re)inicia al primer uso, si murió o si cambió el script
+    o la librería del consolidador (app/core/t25).
+    La última precarga se repite automáticamente tras un reinicio.
+
+    El lock solo cubre el arranque del servidor, nunca una precarga: un
+    trabajo que llega mientras el servidor precarga espera a lo sumo
+    `espera_precarga` segundos y si no, ejecutar() lanza ServicioNoDisponible
+    (la API lo corre entonces como subproceso).
+    """
+
+    def __init__(self, script: str, ruta_socket: str, directorio_backend: str,
+                 archivo_log: Optional[str] = None, timeout_inicio: float = 60.0,
+                 espera_precarga: float = 30.0):
+        self.script = os.path.abspath(script)
+        self.ruta_socket = ruta_socket
+        self.directorio_backend = directorio_backend
+        self.archivo_log = archivo_log
+        self.timeout_inicio = timeout_inicio
+        self.espera_precarga = espera_precarga
+        self._proceso: Optional[subprocess.Popen] = None
+        self._mtime_script: Optional[float] = None
+        self._env_precarga: Optional[Dict[str, str]] = None
+        self._lock = threading.RLock()
+
+    def _mtime_codigo(self) -> float:
+        """Última modificación del script y de los módulos de app/core/t25."""
+        mtime = os.path.getmtime(self.script)
+        libreria = os.path.join(self.directorio_backend, 'app', 'core', 't25')
+        if os.path.isdir(libreria):
+            for nombre in os.listdir(libreria):
+                if nombre.endswith('.py'):
+                    mtime = max(mtime, os.path.getmtime(os.path.join(libreria, nombre)))
+        return mtime
+
+    def _conectar(self, timeout: Optional[float] = None) -> socket.socket:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(timeout)
+        try:
+            conn.connect(self.ruta_socket)
+        except OSError:
+            conn.close()
+            raise
+        conn.settimeout(None)
+        return conn
+
+    def _peticion(self, datos: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        conn = self._conectar(timeout)
+        try:
+            conn.settimeout(timeout)
+            _enviar_json(conn, datos)
+            respuesta = _leer_linea(conn)
+        finally:
+            conn.close()
+        if not respuesta:
+            raise ServicioNoDisponible("el servicio no respondió")
+        return json.loads(respuesta.decode('utf-8'))
+
+    def activo(self) -> bool:
+        return self._proceso is not None and self._proceso.poll() is None
+
+    def iniciar(self, reprecargar: bool = True) -> bool:
+        """Deja el servidor corriendo; retorna True si hubo que (re)iniciarlo.
+
+        Tras un reinicio, la última precarga se repite en segundo plano (fuera
+        del lock: un trabajo que llegue antes no la espera entera).
+        """
+        with self._lock:
+            mtime = self._mtime_codigo()
+            if self.activo() and mtime == self._mtime_script:
+                return False
+            self.detener()
+
+            log = open(self.archivo_log, 'ab') if self.archivo_log else subprocess.DEVNULL
+            env = dict(os.environ, PYTHONIOENCODING='utf-8', PYTHONUTF8='1')
+            try:
+                self._proceso = subprocess.Popen(
+                    [sys.executable, '-u', '-m', 'app.services.servicio_consolidador',
+                     '--socket', self.ruta_socket, '--script', self.script],
+                    cwd=self.directorio_backend, stdout=log, stderr=subprocess.STDOUT,
+                    stdin=subprocess.DEVNULL, env=env
+                )
+            finally:
+                if log is not subprocess.DEVNULL:
+                    log.close()
+            self._mtime_script = mtime
+
+            limite = time.time() + self.timeout_inicio
+            while True:
+                if self._proceso.poll() is not None:
+                    raise ServicioNoDisponible(f"el servicio terminó con código {self._proceso.returncode}")
+                try:
+                    self._peticion({'accion': 'ping'}, timeout=5)
+                    break
+                except (OSError, ValueError, ServicioNoDisponible):
+                    if time.time() > limite:
+                        self.detener()
+                        raise ServicioNoDisponible("el servicio no arrancó a tiempo")
+                    time.sleep(0.1)
+
+            if reprecargar and self._env_precarga is not None:
+                threading.Thread(target=self._reprecargar, args=(self._env_precarga,), daemon=True).start()
+            return True
+
+    def precargar(self, env: Dict[str, str]) -> Dict[str, Any]:
+        """Ejecuta el arranque del script (maestra incluida) dentro del servidor."""
+        with self._lock:
+            self._env_precarga = dict(env)
+            self.iniciar(reprecargar=False)
+        return self._peticion({'accion': 'precargar', 'env': env}, timeout=None)
+
+    def _reprecargar(self, env: Dict[str, str]):
+        try:
+            self._peticion({'accion': 'precargar', 'env': env}, timeout=None)
+        except (OSError, ValueError, ServicioNoDisponible):
+            pass
+
+    def ejecutar(self, env: Dict[str, str], cwd: Optional[str] = None) -> ProcesoServicio:
+        """Inicia un trabajo; retorna un objeto tipo Popen para leer su salida.
+
+        Lanza ServicioNoDisponible si el servidor no lo inicia en espera_precarga
+        segundos (p. ej. porque sigue precargando la maestra).
+        """
+        with self._lock:
+            self.iniciar()
+            conn = self._conectar(timeout=10)
+
+        try:
+            # El servidor responde a más tardar en espera_precarga: el margen cubre el fork
+            conn.settimeout(self.espera_precarga + 10)
+            _enviar_json(conn, {'accion': 'ejecutar', 'env': env, 'cwd': cwd, 'espera': self.espera_precarga})
+        except OSError:
+            conn.close()
+            raise
+        return ProcesoServicio(conn)
+
+    def detener(self):
+        with self._lock:
+            if self._proceso is None:
+                return
+            if self._proceso.poll() is None:
+                try:
+                    self._peticion({'accion': 'detener'}, timeout=5)
+                    self._proceso.wait(timeout=10)
+                except (OSError, ValueError, ServicioNoDisponible, subprocess.TimeoutExpired):
+                    self._proceso.kill()
+                    self._proceso.wait()
+            self._proceso = None
+
+
+if __name__ == '__main__':
+    main()
@@ -10,11 +10,14 @@ import paramiko
 import stat
 import time
 import os
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable
 from dataclasses import dataclass
 from enum import Enum
 
 from app.config import CONFIG
+from app.services.cache_directorios import CacheDirectorios, ruta_absoluta
+from app.services.pool_sftp import PoolSFTP, Prestamo, SinSesionesLibres
+from app.services.transferencias_sftp import MetricasTransferencias, descargar_reanudable
 
 
 class TipoArchivo(Enum):
@@ -33,92 +36,111 @@ class ItemSFTP:
 
 
 class SFTPClientService:
-    """Cliente SFTP para conectarse al GoAnywhere de POSITIVA."""
+    """Cliente SFTP para conectarse al GoAnywhere de POSITIVA.
+    
+    🆕 v15.4: Cada operación toma prestado un canal del pool compartido y lo
+    devuelve al terminar, así las peticiones concurrentes de la API no se
+    pisan el directorio actual ni se encolan detrás de una sola sesión. Las
+    rutas relativas se resuelven contra la raíz ("/"), igual que en el
+    consolidador, y esa misma ruta absoluta es la clave de la caché.
+    
+    No se verifica la sesión antes de cada operación: el estado del
+    transporte basta si el canal se usó hace poco (SFTP_SONDEO_S) y, si la
+    operación falla, se reintenta una vez con otro canal.
+    """
     
     def __init__(self):
         self.config = CONFIG
-        self._client: Optional[paramiko.SSHClient] = None
-        self._sftp: Optional[paramiko.SFTPClient] = None
-        self._transport: Optional[paramiko.Transport] = None
         self._reconexiones = 0
         self._current_path = "/"
-        self._conectado = False
+        # Pool de conexiones SSH con varios canales SFTP (compartido entre requests)
+        self.pool = PoolSFTP(
+            self._abrir_conexion, self._abrir_canal,
+            max_conexiones=self.config.SFTP_MAX_CONEXIONES,
+            canales_por_conexion=self.config.SFTP_CANALES_POR_CONEXION,
+            inactividad=self.config.SFTP_INACTIVIDAD_S,
+            sondeo=self.config.SFTP_SONDEO_S
+        )
+        # Caché de listados por ruta absoluta (compartida entre requests)
+        self.cache = CacheDirectorios(self.config.SFTP_CACHE_TTL)
+        # Totales de las descargas (bytes, segundos, reanudaciones)
+        self.transferencias = MetricasTransferencias()
+    
+    def _abrir_conexion(self) -> paramiko.SSHClient:
+        """Abre y autentica una conexión SSH nueva (la llama el pool)."""
+        cliente = paramiko.SSHClient()
+        cliente.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        cliente.connect(
+            hostname=self.config.HOST,
+            port=self.config.PORT,
+            username=self.config.USERNAME,
+            password=self.config.PASSWORD,
+            timeout=self.config.TIMEOUT_CONEXION,
+            banner_timeout=30,
+            auth_timeout=30,
+            allow_agent=False,
+            look_for_keys=False
+        )
+        
+        transporte = cliente.get_transport()
+        if transporte:
+            transporte.set_keepalive(self.config.KEEPALIVE_INTERVAL)
+        
+        self._reconexiones += 1
+        return cliente
+    
+    def _abrir_canal(self, cliente: paramiko.SSHClient) -> paramiko.SFTPClient:
+        """Abre un canal SFTP sobre una conexión del pool."""
+        sftp = paramiko.SFTPClient.from_transport(
+            cliente.get_transport(),
+            window_size=self.config.SFTP_VENTANA_KB * 1024,
+            max_packet_size=self.config.SFTP_PAQUETE_KB * 1024
+        )
+        sftp.get_channel().settimeout(self.config.TIMEOUT_OPERACION)
+        return sftp
+    
+    def _prestar(self) -> Prestamo:
+        """Toma un canal del pool, reintentando la conexión con backoff."""
+        for intento in range(self.config.MAX_REINTENTOS_CONEXION):
+            try:
+                return self.pool.prestar()
+            except SinSesionesLibres:
+                raise ConnectionError("No hay sesiones SFTP libres")
+            except Exception as e:
+                print(f"Intento {intento + 1} fallido: {e}")
+                if intento + 1 < self.config.MAX_REINTENTOS_CONEXION:
+                    time.sleep(self.config.BACKOFF_BASE ** intento)
+        
+        raise ConnectionError("No se pudo conectar al SFTP")
+    
+    def _ejecutar(self, operacion: Callable[[paramiko.SFTPClient], Any]) -> Any:
+        """Corre operacion(sftp) con un canal del pool; si falla, reintenta una vez con otro."""
+        return self.pool.ejecutar(operacion, prestar=self._prestar)
     
     def _cerrar(self):
         """Cierra todas las conexiones."""
-        for c in [self._sftp, self._client]:
-            try:
-                if c:
-                    c.close()
-            except:
-                pass
-        try:
-            if self._transport:
-                self._transport.close()
-        except:
-            pass
-        self._sftp = self._client = self._transport = None
-        self._conectado = False
+        self.pool.cerrar()
     
     def conectar(self) -> bool:
         """
-        Establece conexión con el servidor SFTP.
+        Verifica que se pueda obtener una sesión SFTP (conectando si hace falta).
         
         Returns:
             True si la conexión fue exitosa
         """
-        self._cerrar()
-        
-        for intento in range(self.config.MAX_REINTENTOS_CONEXION):
-            try:
-                self._client = paramiko.SSHClient()
-                self._client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                self._client.connect(
-                    hostname=self.config.HOST,
-                    port=self.config.PORT,
-                    username=self.config.USERNAME,
-                    password=self.config.PASSWORD,
-                    timeout=self.config.TIMEOUT_CONEXION,
-                    banner_timeout=30,
-                    auth_timeout=30,
-                    allow_agent=False,
-                    look_for_keys=False
-                )
-                
-                self._transport = self._client.get_transport()
-                if self._transport:
-                    self._transport.set_keepalive(self.config.KEEPALIVE_INTERVAL)
-                
-                self._sftp = self._client.open_sftp()
-                self._sftp.get_channel().settimeout(self.config.TIMEOUT_OPERACION)
-                
-                self._conectado = True
-                self._reconexiones += 1
-                
-                return True
-                
-            except Exception as e:
-                print(f"Intento {intento + 1} fallido: {e}")
-                wait_time = self.config.BACKOFF_BASE ** intento
-                time.sleep(wait_time)
-        
-        return False
+        try:
+            self._prestar().devolver()
+            return True
+        except ConnectionError:
+            return False
     
     def desconectar(self):
         """Cierra la conexión SFTP."""
         self._cerrar()
     
     def esta_conectado(self) -> bool:
-        """Verifica si hay una conexión activa."""
-        if not self._conectado or not self._sftp:
-            return False
-        
-        try:
-            self._sftp.getcwd()
-            return True
-        except:
-            self._conectado = False
-            return False
+        """Verifica si hay una conexión activa (estado del transporte, sin ir al servidor)."""
+        return self.pool.activo()
     
     def reconectar_si_necesario(self) -> bool:
         """Reconecta si la conexión se perdió."""
@@ -126,37 +148,51 @@ class SFTPClientService:
             return self.conectar()
         return True
     
-    def listar_directorio(self, ruta: str = ".") -> List[ItemSFTP]:
+    def listar_directorio(self, ruta: str = ".", usar_cache: bool = True) -> List[ItemSFTP]:
         """
         Lista el contenido de un directorio.
         
         Args:
             ruta: Ruta del directorio a listar
+            usar_cache: Si es False, consulta el servidor y refresca la caché
             
         Returns:
             Lista de ItemSFTP con archivos y carpetas
         """
-        if not self.reconectar_si_necesario():
-            raise ConnectionError("No se pudo conectar al SFTP")
+        # Los canales del pool no tienen directorio actual: se lista la misma
+        # ruta absoluta que se usa como clave de la caché
+        ruta_abs = ruta_absoluta(ruta)
+        
+        # La caché guarda las entradas crudas; ruta_completa depende de `ruta`
+        entradas = self.cache.obtener(ruta_abs) if usar_cache else None
+        
+        if entradas is None:
+            try:
+                entradas = self._ejecutar(lambda sftp: [
+                    (entry.filename, stat.S_ISDIR(entry.st_mode), entry.st_size, entry.st_mtime)
+                    for entry in sftp.listdir_attr(ruta_abs)
+                ])
+            except Exception as e:
+                raise Exception(f"Error al listar directorio {ruta}: {str(e)}")
+            
+            self.cache.guardar(ruta_abs, entradas)
         
         items = []
         
         try:
-            for entry in self._sftp.listdir_attr(ruta):
-                nombre = entry.filename
-                
+            for nombre, es_directorio, tamaño, mtime in entradas:
                 # Ignorar archivos ocultos
                 if nombre.startswith('.'):
                     continue
                 
                 # Determinar tipo
-                if stat.S_ISDIR(entry.st_mode):
+                if es_directorio:
                     tipo = TipoArchivo.CARPETA
                 else:
                     tipo = TipoArchivo.ARCHIVO
                 
                 # Formatear fecha
-                fecha = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.st_mtime))
+                fecha = time.strftime('%Y-%m-%d %H:%M', time.localtime(mtime))
                 
                 # Construir ruta completa
                 if ruta == "." or ruta == "/":
@@ -167,7 +203,7 @@ class SFTPClientService:
                 items.append(ItemSFTP(
                     nombre=nombre,
                     tipo=tipo,
-                    tamaño=entry.st_size,
+                    tamaño=tamaño,
                     fecha_modificacion=fecha,
                     ruta_completa=ruta_completa
                 ))
@@ -184,14 +220,16 @@ class SFTPClientService:
         """
         Navega a la carpeta principal de contratos.
         
+        Solo verifica que exista: los canales del pool no guardan directorio
+        actual y las demás operaciones reciben la ruta completa.
+        
         Returns:
             True si se navegó exitosamente
         """
-        if not self.reconectar_si_necesario():
-            return False
-        
         try:
-            self._sftp.chdir(self.config.CARPETA_PRINCIPAL)
+            attr = self._ejecutar(lambda sftp: sftp.stat(ruta_absoluta(self.config.CARPETA_PRINCIPAL)))
+            if not stat.S_ISDIR(attr.st_mode):
+                return False
             self._current_path = self.config.CARPETA_PRINCIPAL
             return True
         except:
@@ -208,15 +246,9 @@ class SFTPClientService:
         Returns:
             Nombre de la carpeta encontrada o None
         """
-        if not self.reconectar_si_necesario():
-            return None
-        
         try:
-            # Navegar a carpeta principal
-            self._sftp.chdir(self.config.CARPETA_PRINCIPAL)
-            
-            # Listar carpetas
-            items = self._sftp.listdir()
+            # Listar carpetas de la carpeta principal
+            items = self._ejecutar(lambda sftp: sftp.listdir(ruta_absoluta(self.config.CARPETA_PRINCIPAL)))
             
             # Patrones de búsqueda
             numero_limpio = str(int(numero_contrato)) if numero_contrato.isdigit() else numero_contrato
@@ -252,9 +284,6 @@ class SFTPClientService:
         Returns:
             Diccionario con la estructura del contrato
         """
-        if not self.reconectar_si_necesario():
-            raise ConnectionError("No se pudo conectar al SFTP")
-        
         resultado = {
             "nombre": nombre_carpeta,
             "ruta": f"{self.config.CARPETA_PRINCIPAL}/{nombre_carpeta}",
@@ -289,6 +318,10 @@ class SFTPClientService:
         """
         Descarga un archivo del servidor SFTP.
         
+        Usa lecturas adelantadas y, si la conexión se cae a mitad de
+        archivo, descarta el canal, toma otro del pool y sigue desde el
+        último byte recibido.
+        
         Args:
             ruta_remota: Ruta del archivo en el servidor
             ruta_local: Ruta donde guardar el archivo localmente
@@ -296,20 +329,43 @@ class SFTPClientService:
         Returns:
             True si se descargó exitosamente
         """
-        if not self.reconectar_si_necesario():
-            raise ConnectionError("No se pudo conectar al SFTP")
+        prestamo: Optional[Prestamo] = None
+        
+        def _sesion():
+            nonlocal prestamo
+            if prestamo is None:
+                prestamo = self._prestar()
+            return prestamo.sftp
+        
+        def _al_reanudar(posicion, error):
+            nonlocal prestamo
+            if prestamo is not None:
+                # El pool cierra también la conexión si ya no está activa
+                prestamo.descartar()
+                prestamo = None
         
         try:
             # Crear carpeta local si no existe
             os.makedirs(os.path.dirname(ruta_local), exist_ok=True)
             
-            # Descargar archivo
-            self._sftp.get(ruta_remota, ruta_local)
+            with open(ruta_local, 'wb') as destino:
+                transferencia = descargar_reanudable(
+                    _sesion, ruta_absoluta(ruta_remota), destino,
+                    tamano_lectura=self.config.SFTP_PAQUETE_KB * 1024,
+                    pendientes=self.config.SFTP_LECTURAS_PENDIENTES,
+                    reintentos=self.config.MAX_REINTENTOS_OPERACION,
+                    al_reanudar=_al_reanudar
+                )
+            self.transferencias.registrar(transferencia)
+            prestamo.marcar_uso()
             
             return True
             
         except Exception as e:
             raise Exception(f"Error al descargar {ruta_remota}: {str(e)}")
+        finally:
+            if prestamo is not None:
+                prestamo.devolver()
     
     def obtener_info_archivo(self, ruta: str) -> Dict[str, Any]:
         """
@@ -321,11 +377,8 @@ class SFTPClientService:
         Returns:
             Diccionario con información del archivo
         """
-        if not self.reconectar_si_necesario():
-            raise ConnectionError("No se pudo conectar al SFTP")
-        
         try:
-            attr = self._sftp.stat(ruta)
+            attr = self._ejecutar(lambda sftp: sftp.stat(ruta_absoluta(ruta)))
             
             return {
                 "nombre": os.path.basename(ruta),
@@ -349,9 +402,6 @@ class SFTPClientService:
         Returns:
             Estructura jerárquica de carpetas y archivos
         """
-        if not self.reconectar_si_necesario():
-            raise ConnectionError("No se pudo conectar al SFTP")
-        
         if profundidad <= 0:
             return {"nombre": ruta_base.split("/")[-1], "tipo": "carpeta", "hijos": []}
         
@@ -0,0 +1,144 @@
+"""
+Transferencias SFTP
+===================
+
+Descarga de archivos desde el GoAnywhere con lecturas adelantadas y
+reanudación, usada por el consolidador (SFTPClient) y por la API
+(SFTPClientService) en lugar de sftp.get():
+
+- prefetch: se piden por adelantado hasta `pendientes` lecturas de
+  `tamano_lectura` bytes, así el enlace de alta latencia no espera un viaje
+  de ida y vuelta por cada bloque. La ventana y el paquete del canal los
+  fija quien abre la sesión (SFTPClient.from_transport con window_size y
+  max_packet_size; ver VENTANA_DEFECTO y PAQUETE_DEFECTO).
+- reanudación: si la conexión se cae a mitad de archivo se pide una sesión
+  nueva y se sigue desde el último byte escrito en vez de empezar de cero.
+- métricas: cada descarga retorna una Transferencia (bytes, segundos,
+  reanudaciones) y MetricasTransferencias las acumula por cliente.
+
+No importa paramiko: trabaja con el SFTPClient que le entregan, así se
+puede importar desde ambos lados sin condiciones.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Dict, Optional
+
+# Por defecto: ventana de 16 MB (paramiko usa 2 MB), paquetes y lecturas de
+# 32 KB (lo que aceptan todos los servidores) y 128 lecturas en vuelo (4 MB)
+VENTANA_DEFECTO = 16 * 1024 * 1024
+PAQUETE_DEFECTO = 32 * 1024
+LECTURAS_PENDIENTES_DEFECTO = 128
+
+# Errores del archivo remoto: reintentar no sirve
+ERRORES_DEFINITIVOS = (FileNotFoundError, PermissionError, IsADirectoryError)
+
+
+@dataclass
+class Transferencia:
+    """Resultado de una descarga."""
+    remoto: str
+    bytes: int
+    segundos: float
+    reanudaciones: int = 0
+
+    @property
+    def kb_por_segundo(self) -> float:
+        return round(self.bytes / 1024 / self.segundos, 1) if self.segundos > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'bytes': self.bytes,
+            'segundos': round(self.segundos, 3),
+            'kb_s': self.kb_por_segundo,
+            'reanudaciones': self.reanudaciones
+        }
+
+
+class MetricasTransferencias:
+    """Totales de las descargas de un cliente (seguro entre hilos)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.archivos = 0
+        self.bytes = 0
+        self.segundos = 0.0
+        self.reanudaciones = 0
+
+    def registrar(self, transferencia: Transferencia):
+        with self._lock:
+            self.archivos += 1
+            self.bytes += transferencia.bytes
+            self.segundos += transferencia.segundos
+            self.reanudaciones += transferencia.reanudaciones
+
+    def sumar(self, otras: Dict[str, Any]):
+        """Agrega los totales de instantanea() de otro cliente (p. ej. de un worker)."""
+        with self._lock:
+            self.archivos += otras.get('archivos', 0)
+            self.bytes += otras.get('bytes', 0)
+            self.segundos += otras.get('segundos', 0.0)
+            self.reanudaciones += otras.get('reanudaciones', 0)
+
+    def instantanea(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'archivos': self.archivos,
+                'bytes': self.bytes,
+                'segundos': round(self.segundos, 3),
+                'kb_s': round(self.bytes / 1024 / self.segundos, 1) if self.segundos > 0 else 0.0,
+                'reanudaciones': self.reanudaciones
+            }
+
+
+def descargar_reanudable(sesion: Callable[[], Any], remoto: str, destino: IO[bytes],
+                         tamano_lectura: int = PAQUETE_DEFECTO,
+                         pendientes: int = LECTURAS_PENDIENTES_DEFECTO,
+                         reintentos: int = 3, al_reanudar: Optional[Callable[[int, Exception], None]] = None
+                         ) -> Transferencia:
+    """Descarga `remoto` en `destino` (archivo binario vacío, abierto para escribir).
+
+    `sesion()` retorna el SFTPClient a usar y se llama en cada intento: debe
+    reconectar si la sesión anterior se cayó. Tras un error de conexión se
+    reanuda desde el último byte escrito, hasta `reintentos` veces seguidas
+    sin avanzar; `al_reanudar(posicion, error)` se llama antes de cada una.
+    Los errores del archivo remoto (no existe, sin permiso) no se reintentan.
+    """
+    inicio = time.time()
+    posicion = 0
+    reanudaciones = 0
+    fallos_seguidos = 0
+    tamano: Optional[int] = None
+
+    while True:
+        try:
+            sftp = sesion()
+            if tamano is None:
+                tamano = sftp.stat(remoto).st_size
+            with sftp.open(remoto, 'rb') as remoto_f:
+                remoto_f.MAX_REQUEST_SIZE = tamano_lectura
+                if posicion:
+                    remoto_f.seek(posicion)
+                remoto_f.prefetch(tamano, pendientes)
+                while posicion < tamano:
+                    datos = remoto_f.read(min(tamano - posicion, tamano_lectura * 8))
+                    if not datos:
+                        break
+                    destino.write(datos)
+                    posicion += len(datos)
+                    fallos_seguidos = 0
+            if posicion != tamano:
+                raise IOError(f"Descarga incompleta de {remoto}: {posicion} de {tamano} bytes")
+            break
+        except ERRORES_DEFINITIVOS:
+            raise
+        except Exception as e:
+            fallos_seguidos += 1
+            if fallos_seguidos > reintentos:
+                raise
+            reanudaciones += 1
+            if al_reanudar is not None:
+                al_reanudar(posicion, e)
+
+    return Transferencia(remoto, posicion, time.time() - inicio, reanudaciones)
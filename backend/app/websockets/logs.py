@@ -3,68 +3,161 @@ WebSocket de Logs - Consolidador T25
 ====================================
 
 WebSocket para transmitir logs de procesamiento en tiempo real.
+
+Pub/sub asyncio por job: los hilos que leen la salida del consolidador
+publican con loop.call_soon_threadsafe (ConnectionManager.publicar_desde_hilo)
+y cada WebSocket suscrito tiene su propia cola acotada. Si un cliente no da
+abasto, los mensajes de estado/progreso pendientes se reemplazan por el más
+reciente y los logs más viejos se descartan; el cliente recibe un aviso
+"logs_omitidos" con el índice desde el que puede pedirlos a
+/api/procesar/logs/{job_id}?desde=N.
 """
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Set
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Set
 import asyncio
-import json
 
 router = APIRouter()
 
-# Conexiones activas por job_id
-active_connections: Dict[str, Set[WebSocket]] = {}
+# Mensajes pendientes por suscriptor antes de empezar a descartar logs
+MAX_PENDIENTES = 1000
+
+# Tipos de mensaje en los que solo importa el último (se coalescen)
+TIPOS_COALESCIBLES = ("estado", "progreso")
+
+# Logs por lectura al reponer el historial de un job al conectarse
+LOGS_POR_REPOSICION = 500
+
+
+class Suscriptor:
+    """Cola acotada de un WebSocket; coalesce estado/progreso y descarta logs viejos."""
+
+    def __init__(self, max_pendientes: int = MAX_PENDIENTES):
+        self.max_pendientes = max_pendientes
+        self.pendientes: deque = deque()
+        self.ultimo: Dict[str, dict] = {}
+        self.omitidos = 0
+        self.omitidos_desde: Optional[int] = None
+        self.evento = asyncio.Event()
+
+    def agregar(self, mensaje: dict):
+        tipo = mensaje.get("tipo")
+        if tipo in TIPOS_COALESCIBLES:
+            # Solo se encola el tipo una vez; si ya estaba pendiente se actualiza
+            if tipo not in self.ultimo:
+                self.pendientes.append(tipo)
+            self.ultimo[tipo] = mensaje
+        else:
+            if len(self.pendientes) >= self.max_pendientes:
+                self._descartar_log_mas_viejo()
+            self.pendientes.append(mensaje)
+        self.evento.set()
+
+    def _descartar_log_mas_viejo(self):
+        for i, pendiente in enumerate(self.pendientes):
+            if isinstance(pendiente, dict) and pendiente.get("tipo") == "log":
+                del self.pendientes[i]
+                self.omitidos += 1
+                if self.omitidos_desde is None:
+                    self.omitidos_desde = pendiente.get("indice")
+                return
+
+    async def obtener(self) -> dict:
+        while not self.pendientes and not self.omitidos:
+            self.evento.clear()
+            await self.evento.wait()
+
+        if self.omitidos:
+            aviso = {"tipo": "logs_omitidos", "cantidad": self.omitidos, "desde": self.omitidos_desde}
+            self.omitidos = 0
+            self.omitidos_desde = None
+            return aviso
+
+        pendiente = self.pendientes.popleft()
+        if isinstance(pendiente, str):
+            return self.ultimo.pop(pendiente)
+        return pendiente
 
 
 class ConnectionManager:
     """Gestiona las conexiones WebSocket."""
-    
+
     def __init__(self):
         self.active_connections: Dict[str, Set[WebSocket]] = {}
-    
-    async def connect(self, websocket: WebSocket, job_id: str):
-        """Acepta una nueva conexión WebSocket."""
+        self.suscriptores: Dict[str, Dict[WebSocket, Suscriptor]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def iniciar(self, loop: asyncio.AbstractEventLoop):
+        """Registra el event loop de la aplicación (lo usan los hilos para publicar)."""
+        self.loop = loop
+
+    async def connect(self, websocket: WebSocket, job_id: str) -> Suscriptor:
+        """Acepta una nueva conexión WebSocket y la suscribe al job."""
         await websocket.accept()
-        
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+
         if job_id not in self.active_connections:
             self.active_connections[job_id] = set()
-        
+
         self.active_connections[job_id].add(websocket)
-    
+        suscriptor = Suscriptor()
+        self.suscriptores.setdefault(job_id, {})[websocket] = suscriptor
+        return suscriptor
+
     def disconnect(self, websocket: WebSocket, job_id: str):
         """Elimina una conexión WebSocket."""
         if job_id in self.active_connections:
             self.active_connections[job_id].discard(websocket)
-            
+
             if not self.active_connections[job_id]:
                 del self.active_connections[job_id]
-    
-    async def send_log(self, job_id: str, log: dict):
-        """Envía un log a todos los clientes conectados a un job."""
-        if job_id not in self.active_connections:
+
+        if job_id in self.suscriptores:
+            self.suscriptores[job_id].pop(websocket, None)
+            if not self.suscriptores[job_id]:
+                del self.suscriptores[job_id]
+
+    def tiene_suscriptores(self, job_id: str) -> bool:
+        return job_id in self.suscriptores
+
+    def publicar(self, job_id: str, mensaje: dict):
+        """Encola un mensaje para los suscriptores del job (desde el event loop)."""
+        for suscriptor in self.suscriptores.get(job_id, {}).values():
+            suscriptor.agregar(mensaje)
+
+    def publicar_desde_hilo(self, metodo: Callable[..., Any], *args):
+        """Ejecuta `metodo(*args)` en el event loop desde otro hilo (sin bloquear)."""
+        loop = self.loop
+        if loop is None or loop.is_closed():
             return
-        
-        message = json.dumps(log)
-        
-        disconnected = set()
-        for websocket in self.active_connections[job_id]:
-            try:
-                await websocket.send_text(message)
-            except:
-                disconnected.add(websocket)
-        
-        # Limpiar conexiones muertas
-        for ws in disconnected:
-            self.active_connections[job_id].discard(ws)
-    
-    async def broadcast_progress(self, job_id: str, progreso: float, mensaje: str):
+        try:
+            loop.call_soon_threadsafe(metodo, *args)
+        except RuntimeError:
+            # El loop se cerró entre la comprobación y la llamada
+            pass
+
+    def send_log(self, job_id: str, log: dict, indice: Optional[int] = None):
+        """Envía un log a todos los clientes conectados a un job."""
+        self.publicar(job_id, {"tipo": "log", "indice": indice, "data": log})
+
+    def broadcast_progress(self, job_id: str, progreso: float, mensaje: str):
         """Envía actualización de progreso a todos los clientes."""
-        await self.send_log(job_id, {
+        self.publicar(job_id, {
             "tipo": "progreso",
             "progreso": progreso,
             "mensaje": mensaje
         })
 
+    def broadcast_estado(self, job_id: str, estado: dict):
+        """Envía el estado del job (contratos, métricas) a todos los clientes."""
+        self.publicar(job_id, dict(estado, tipo="estado"))
+
+    def broadcast_fin(self, job_id: str, fin: dict):
+        """Avisa a los clientes que el job terminó."""
+        self.publicar(job_id, dict(fin, tipo="fin"))
+
 
 manager = ConnectionManager()
 
@@ -73,65 +166,62 @@ manager = ConnectionManager()
 async def websocket_logs(websocket: WebSocket, job_id: str):
     """
     WebSocket para recibir logs de un trabajo en tiempo real.
-    
+
     Conectarse a: ws://localhost:8000/ws/logs/{job_id}
     """
-    await manager.connect(websocket, job_id)
-    
+    # Suscribirse ANTES de leer el estado para no perder mensajes; los logs
+    # ya enviados en la reposición se descartan por índice
+    suscriptor = await manager.connect(websocket, job_id)
+
     try:
         # Importar jobs del módulo de proceso
-        from app.api.process import jobs, jobs_lock
-        
-        last_log_index = 0
-        
+        from app.api.process import jobs, jobs_lock, mensaje_estado, mensaje_fin
+
+        # Copia del estado con el lock tomado; los envíos van sin el lock
+        with jobs_lock:
+            job = jobs.get(job_id)
+            if job is not None:
+                registro = job["logs"]
+                enviados = registro.total
+                estado_msg = mensaje_estado(job)
+                fin_msg = mensaje_fin(job) if job["estado"] in ["completado", "error", "cancelado"] else None
+
+        if job is None:
+            await websocket.send_json({
+                "tipo": "error",
+                "mensaje": "Job no encontrado"
+            })
+            return
+
+        # Reposición paginada desde el registro (los logs viejos están en disco)
+        indice = 0
+        while indice < enviados:
+            pagina = await asyncio.to_thread(
+                registro.leer, indice, min(LOGS_POR_REPOSICION, enviados - indice)
+            )
+            if not pagina:
+                break
+            for log in pagina:
+                await websocket.send_json({"tipo": "log", "indice": indice, "data": log})
+                indice += 1
+        await websocket.send_json(dict(estado_msg, tipo="estado"))
+
+        if fin_msg is not None:
+            await websocket.send_json(dict(fin_msg, tipo="fin"))
+            return
+
         while True:
-            # Verificar si el job existe
-            with jobs_lock:
-                if job_id not in jobs:
-                    await websocket.send_json({
-                        "tipo": "error",
-                        "mensaje": "Job no encontrado"
-                    })
-                    break
-                
-                job = jobs[job_id]
-                
-                # Enviar nuevos logs
-                logs = job.get("logs", [])
-                if len(logs) > last_log_index:
-                    for log in logs[last_log_index:]:
-                        await websocket.send_json({
-                            "tipo": "log",
-                            "data": log
-                        })
-                    last_log_index = len(logs)
-                
-                # Enviar estado actual
-                estado_msg = {
-                    "tipo": "estado",
-                    "estado": job["estado"],
-                    "progreso": job["progreso"],
-                    "mensaje": job["mensaje"],
-                    "contratos_procesados": job.get("contratos_procesados", 0),
-                    "contratos_total": job.get("contratos_total", 0)
-                }
-            
-            await websocket.send_json(estado_msg)
-            
-            # Si el job terminó, enviar mensaje final y cerrar
-            if job["estado"] in ["completado", "error", "cancelado"]:
-                with jobs_lock:
-                    await websocket.send_json({
-                        "tipo": "fin",
-                        "estado": job["estado"],
-                        "archivos_generados": job.get("archivos_generados", []),
-                        "errores": job.get("errores", [])
-                    })
+            mensaje = await suscriptor.obtener()
+
+            if mensaje["tipo"] == "log" and mensaje.get("indice") is not None and mensaje["indice"] < enviados:
+                continue
+
+            await websocket.send_json(mensaje)
+
+            # Si el job terminó, cerrar
+            if mensaje["tipo"] == "fin":
                 break
-            
-            # Esperar antes de la siguiente actualización
-            await asyncio.sleep(0.5)
-            
+
     except WebSocketDisconnect:
         pass
     except Exception as e:
@@ -150,21 +240,18 @@ async def websocket_logs(websocket: WebSocket, job_id: str):
 async def enviar_log(job_id: str, tipo: str, mensaje: str):
     """
     Envía un log a través del WebSocket.
-    
+
     Args:
         job_id: ID del trabajo
         tipo: Tipo de log (info, success, warning, error)
         mensaje: Mensaje del log
     """
     from datetime import datetime
-    
+
     log = {
         "timestamp": datetime.now().strftime("%H:%M:%S"),
         "tipo": tipo,
         "mensaje": mensaje
     }
-    
-    await manager.send_log(job_id, {
-        "tipo": "log",
-        "data": log
-    })
+
+    manager.send_log(job_id, log)
@@ -0,0 +1,14 @@
+"""
+Pruebas del backend
+===================
+
+Se ejecutan desde backend/ con `python -m pytest -q`; este conftest deja el
+paquete `app` importable igual que lo hace el script parametrizado.
+"""
+
+import os
+import sys
+
+_BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+if _BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, _BACKEND_ROOT)
@@ -0,0 +1,142 @@
+"""
+Almacén intermedio
+==================
+
+AlmacenParquet debe entregar los mismos bloques que el CSV temporal y no
+perder columnas de lotes posteriores al primero. posicion()/reanudar() de
+ambos: lo escrito hasta la posición sobrevive, lo posterior (incluida una
+parte Parquet sin footer de un proceso que murió) se descarta, y se puede
+seguir agregando lotes.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from app.services.almacen_intermedio import AlmacenCSV, AlmacenParquet, EsquemaIncompatible
+
+
+def _lote(inicio: int, n: int = 3) -> pd.DataFrame:
+    return pd.DataFrame({
+        'contrato': [f'{i:04d}-2024' for i in range(inicio, inicio + n)],
+        'manual_tarifario': ['SOAT'] * n,
+        'tarifa_unitaria_en_pesos': [1000.0 + i for i in range(inicio, inicio + n)],
+        'porcentaje_manual_tarifario': [10.5] * n,
+    })
+
+
+def test_bloques_iguales_en_csv_y_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    csv = AlmacenCSV(str(tmp_path / 'consolidado.csv'))
+    parquet = AlmacenParquet(str(tmp_path / 'consolidado.parquet'))
+    lote_con_vacios = _lote(3)
+    lote_con_vacios.loc[1, 'manual_tarifario'] = None
+    lote_con_vacios.loc[2, 'tarifa_unitaria_en_pesos'] = float('nan')
+    for almacen in (csv, parquet):
+        almacen.agregar_lote(_lote(0))
+        almacen.agregar_lote(lote_con_vacios.copy())
+
+    pd.testing.assert_frame_equal(
+        pd.concat(csv.leer_bloques(4), ignore_index=True),
+        pd.concat(parquet.leer_bloques(4), ignore_index=True)
+    )
+    assert parquet.contar_filas() == csv.contar_filas() == 6
+
+
+def test_parquet_rechaza_columnas_nuevas(tmp_path):
+    pytest.importorskip('pyarrow')
+    almacen = AlmacenParquet(str(tmp_path / 'consolidado.parquet'))
+    almacen.agregar_lote(_lote(0))
+
+    lote = _lote(3)
+    lote['observaciones'] = 'nueva'
+    with pytest.raises(EsquemaIncompatible, match='observaciones'):
+        almacen.agregar_lote(lote)
+
+    # El lote rechazado no deja filas a medias
+    assert almacen.contar_filas() == 3
+
+
+def test_parquet_admite_lote_con_menos_columnas(tmp_path):
+    pytest.importorskip('pyarrow')
+    almacen = AlmacenParquet(str(tmp_path / 'consolidado.parquet'))
+    almacen.agregar_lote(_lote(0))
+    almacen.agregar_lote(_lote(3).drop(columns=['manual_tarifario']))
+
+    df = pd.concat(almacen.leer_bloques(10), ignore_index=True)
+    assert df['manual_tarifario'].isna().tolist() == [False] * 3 + [True] * 3
+
+
+def _contratos(almacen) -> list:
+    return [c for bloque in almacen.leer_bloques(2) for c in bloque['contrato'].tolist()]
+
+
+def _crear(formato: str, tmp_path, **kwargs):
+    if formato == 'parquet':
+        pytest.importorskip('pyarrow')
+        return AlmacenParquet(str(tmp_path / 'consolidado.parquet'), **kwargs)
+    return AlmacenCSV(str(tmp_path / 'consolidado.csv'))
+
+
+@pytest.fixture(params=['csv', 'parquet'])
+def formato(request):
+    return request.param
+
+
+def test_reanudar_tras_reinicio_descarta_lo_posterior(formato, tmp_path):
+    almacen = _crear(formato, tmp_path)
+    almacen.agregar_lote(_lote(0))
+    almacen.agregar_lote(_lote(3))
+    posicion = almacen.posicion()
+    # Lote escrito después del punto de control por un proceso que muere sin cerrar
+    almacen.agregar_lote(_lote(6))
+
+    reanudado = _crear(formato, tmp_path)
+    reanudado.reanudar(posicion)
+    reanudado.agregar_lote(_lote(9))
+
+    assert _contratos(reanudado) == [f'{i:04d}-2024' for i in [*range(6), *range(9, 12)]]
+    assert reanudado.contar_filas() == 9
+
+
+def test_reanudar_en_el_mismo_proceso(formato, tmp_path):
+    almacen = _crear(formato, tmp_path)
+    almacen.agregar_lote(_lote(0))
+    posicion = almacen.posicion()
+    almacen.agregar_lote(_lote(3))
+    almacen.reanudar(posicion)
+    almacen.agregar_lote(_lote(6))
+
+    assert _contratos(almacen) == [f'{i:04d}-2024' for i in [*range(3), *range(6, 9)]]
+
+
+def test_reanudar_posicion_vacia(formato, tmp_path):
+    almacen = _crear(formato, tmp_path)
+    posicion = almacen.posicion()
+    almacen.agregar_lote(_lote(0))
+
+    reanudado = _crear(formato, tmp_path)
+    reanudado.reanudar(posicion)
+
+    assert not reanudado.existe()
+    assert not os.listdir(tmp_path)
+    reanudado.agregar_lote(_lote(3))
+    assert _contratos(reanudado) == [f'{i:04d}-2024' for i in range(3, 6)]
+
+
+def test_parquet_solo_conviene_posicion_con_parte_grande(tmp_path):
+    pytest.importorskip('pyarrow')
+    almacen = AlmacenParquet(str(tmp_path / 'consolidado.parquet'), lotes_por_parte=2)
+    assert almacen.conviene_posicion()
+
+    almacen.agregar_lote(_lote(0))
+    assert not almacen.conviene_posicion()
+    almacen.agregar_lote(_lote(3))
+    assert almacen.conviene_posicion()
+
+    posicion = almacen.posicion()
+    assert posicion == {'partes': 1}
+    assert almacen.conviene_posicion()
+    almacen.agregar_lote(_lote(6))
+    assert not almacen.conviene_posicion()
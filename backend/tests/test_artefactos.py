@@ -0,0 +1,46 @@
+"""
+Tests del manifiesto de artefactos
+==================================
+
+escribir_manifiesto/leer_manifiesto/rutas_artefactos: rutas relativas a la
+carpeta del job, archivos inexistentes omitidos y manifiesto ilegible.
+"""
+
+import os
+
+from app.services.artefactos import (
+    NOMBRE_MANIFIESTO, escribir_manifiesto, leer_manifiesto, rutas_artefactos
+)
+
+
+def test_manifiesto_de_ida_y_vuelta(tmp_path):
+    carpeta = tmp_path / "jobs" / "abc"
+    (carpeta / "alertas").mkdir(parents=True)
+    consolidado = carpeta / "Consolidado.xlsx"
+    alertas = carpeta / "alertas" / "Alertas.xlsx"
+    consolidado.write_bytes(b"12345")
+    alertas.write_bytes(b"1")
+
+    ruta = escribir_manifiesto(str(carpeta), [str(consolidado), str(alertas), str(carpeta / "falta.xlsx")],
+                               run_id="r1", modo="COMPLETO")
+    assert ruta == os.path.join(str(carpeta), NOMBRE_MANIFIESTO)
+
+    manifiesto = leer_manifiesto(str(carpeta))
+    assert manifiesto["run_id"] == "r1" and manifiesto["modo"] == "COMPLETO"
+    assert manifiesto["artefactos"] == [
+        {"nombre": "Consolidado.xlsx", "ruta": "Consolidado.xlsx", "bytes": 5},
+        {"nombre": "Alertas.xlsx", "ruta": "alertas/Alertas.xlsx", "bytes": 1},
+    ]
+    assert rutas_artefactos(str(carpeta)) == [str(consolidado), str(alertas)]
+
+    # Un artefacto borrado después deja de listarse
+    consolidado.unlink()
+    assert rutas_artefactos(str(carpeta)) == [str(alertas)]
+
+
+def test_sin_manifiesto_o_ilegible(tmp_path):
+    assert leer_manifiesto(str(tmp_path)) is None
+    assert rutas_artefactos(str(tmp_path)) == []
+    (tmp_path / NOMBRE_MANIFIESTO).write_text("{incompleto", encoding="utf-8")
+    assert leer_manifiesto(str(tmp_path)) is None
+    assert rutas_artefactos(str(tmp_path)) == []
@@ -0,0 +1,108 @@
+"""
+Tests de la caché de listados SFTP
+==================================
+
+CacheDirectorios: rutas equivalentes comparten entrada, vencimiento por TTL,
+invalidación (puntual, recursiva y total) e índice numero -> carpeta.
+"""
+
+import pytest
+
+from app.services import cache_directorios
+from app.services.cache_directorios import CacheDirectorios, clave_numero_carpeta, ruta_absoluta
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(cache_directorios.time, 'monotonic', reloj)
+    return reloj
+
+
+@pytest.mark.parametrize('ruta, cwd, esperada', [
+    ('CONTRATOS 2024', '/R.A-POSITIVA', '/R.A-POSITIVA/CONTRATOS 2024'),
+    ('./CONTRATOS 2024/', '/R.A-POSITIVA', '/R.A-POSITIVA/CONTRATOS 2024'),
+    ('/R.A-POSITIVA/CONTRATOS 2024', '/otro', '/R.A-POSITIVA/CONTRATOS 2024'),
+    ('..\\CONTRATOS 2024', '/R.A-POSITIVA/X', '/R.A-POSITIVA/CONTRATOS 2024'),
+    ('//raiz', None, '/raiz'),
+    ('', None, '/'),
+])
+def test_ruta_absoluta(ruta, cwd, esperada):
+    assert ruta_absoluta(ruta, cwd) == esperada
+
+
+def test_listado_cacheado_hasta_vencer(reloj):
+    cache = CacheDirectorios(ttl=60)
+    llamadas = []
+
+    def listar():
+        llamadas.append(1)
+        return ['a', 'b']
+
+    assert cache.obtener_o_listar('/x', listar) == ['a', 'b']
+    copia = cache.obtener_o_listar('/x', listar)
+    copia.append('c')
+    assert cache.obtener('/x') == ['a', 'b'] and len(llamadas) == 1
+
+    reloj.ahora += 61
+    assert cache.obtener('/x') is None
+    cache.obtener_o_listar('/x', listar)
+    assert len(llamadas) == 2
+    assert cache.estadisticas == {'entradas': 1, 'hits': 2, 'misses': 3, 'ttl': 60}
+
+
+def test_ttl_cero_deshabilita():
+    cache = CacheDirectorios(ttl=0)
+    cache.guardar('/x', ['a'])
+    assert cache.obtener('/x') is None
+    assert cache.estadisticas['entradas'] == 0
+
+
+def test_invalidar_puntual_recursivo_y_total():
+    cache = CacheDirectorios()
+    for ruta in ('/r', '/r/2024', '/r/2024/0531', '/r2'):
+        cache.guardar(ruta, [ruta])
+
+    cache.invalidar('/r/2024/0531')
+    assert cache.obtener('/r/2024/0531') is None and cache.obtener('/r/2024') == ['/r/2024']
+    cache.guardar('/r/2024/0531', [])
+    cache.invalidar('/r', recursivo=True)
+    assert [cache.obtener(r) for r in ('/r', '/r/2024', '/r/2024/0531')] == [None] * 3
+    # '/r2' comparte prefijo de texto pero no cuelga de '/r'
+    assert cache.obtener('/r2') == ['/r2']
+    cache.invalidar()
+    assert cache.obtener('/r2') is None
+
+
+def test_max_entradas_descarta_la_menos_usada():
+    cache = CacheDirectorios(max_entradas=2)
+    cache.guardar('/a', [])
+    cache.guardar('/b', [])
+    cache.obtener('/a')
+    cache.guardar('/c', [])
+    assert cache.obtener('/b') is None
+    assert cache.obtener('/a') == [] and cache.obtener('/c') == []
+
+
+def test_indice_conserva_la_primera_carpeta_y_vence_con_la_entrada(reloj):
+    nombres = ['0531-2024 PROVEEDOR', '0531_2024 DUPLICADA', '0042 CLINICA', 'SIN NUMERO']
+    assert clave_numero_carpeta('0531-2024 PROVEEDOR') == '0531'
+
+    cache = CacheDirectorios(ttl=60)
+    cache.guardar('/anio', nombres)
+    indice = cache.indice_carpetas('/anio', nombres)
+    assert indice['0531'] == '0531-2024 PROVEEDOR'
+    assert indice['0042'] == '0042 CLINICA' and indice['SIN'] == 'SIN NUMERO'
+    # Construido una vez por entrada
+    assert cache.indice_carpetas('/anio', []) is indice
+
+    reloj.ahora += 61
+    assert cache.indice_carpetas('/anio', ['0531 NUEVA']) == {'0531': '0531 NUEVA'}
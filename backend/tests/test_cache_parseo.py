@@ -0,0 +1,130 @@
+"""
+Caché de parseo de anexos
+=========================
+
+CacheParseo: aciertos y fallos por hash de contenido, entradas de otra
+versión del parser, y podar() por versión, antigüedad y tamaño.
+"""
+
+import io
+import os
+import time
+
+from app.core.t25 import procesador
+from app.core.t25.config import Config
+from app.services.cache_parseo import CacheParseo, hash_archivo
+
+FILAS = [
+    {'codigo_cups': '890201', 'descripcion_del_cups': 'CONSULTA', 'tarifa_unitaria_en_pesos': 35000.0},
+    {'codigo_cups': '903895', 'descripcion_del_cups': 'HEMOGRAMA', 'tarifa_unitaria_en_pesos': None},
+]
+ALERTAS = [['SIN_TARIFA', 'Fila sin tarifa', 'ANEXO 1.xlsx']]
+
+
+def _entradas(directorio) -> list:
+    return sorted(nombre for _, _, archivos in os.walk(directorio) for nombre in archivos)
+
+
+def test_acierto_y_fallo(tmp_path):
+    cache = CacheParseo(str(tmp_path), '15.4|a')
+    clave = hash_archivo(io.BytesIO(b'anexo'))
+
+    assert cache.obtener(clave) is None
+    assert cache.guardar(clave, True, 'ok', FILAS, ALERTAS)
+
+    assert cache.obtener(clave) == {'ok': True, 'mensaje': 'ok', 'filas': FILAS, 'alertas': ALERTAS}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_hash_igual_por_ruta_y_archivo_abierto(tmp_path):
+    ruta = tmp_path / 'anexo.xlsx'
+    ruta.write_bytes(b'x' * (3 * 1024 * 1024 + 7))
+    with open(ruta, 'rb') as f:
+        assert hash_archivo(str(ruta)) == hash_archivo(f)
+        assert f.tell() == 0
+
+
+def test_otra_version_no_acierta(tmp_path):
+    clave = hash_archivo(io.BytesIO(b'anexo'))
+    CacheParseo(str(tmp_path), '15.4|a').guardar(clave, True, '', FILAS, [])
+
+    otra = CacheParseo(str(tmp_path), '15.4|b')
+    assert otra.obtener(clave) is None
+    assert otra.misses == 1
+
+
+def test_entrada_corrupta_es_fallo(tmp_path):
+    cache = CacheParseo(str(tmp_path), '15.4|a')
+    clave = hash_archivo(io.BytesIO(b'anexo'))
+    cache.guardar(clave, True, '', FILAS, [])
+    with open(cache._ruta(clave), 'wb') as f:
+        f.write(b'no es gzip')
+
+    assert cache.obtener(clave) is None
+
+
+def test_filas_no_columnares_no_se_guardan(tmp_path):
+    cache = CacheParseo(str(tmp_path), '15.4|a')
+    assert not cache.guardar('ab' * 32, True, '', [{'a': 1}, {'b': 2}], [])
+    assert _entradas(tmp_path) == []
+
+
+def test_podar_borra_otras_versiones_y_temporales_viejos(tmp_path):
+    vieja = CacheParseo(str(tmp_path), '15.3')
+    actual = CacheParseo(str(tmp_path), '15.4')
+    vieja.guardar('aa' * 32, True, '', FILAS, [])
+    actual.guardar('bb' * 32, True, '', FILAS, [])
+    temporal = tmp_path / 'bb' / 'abandonado.tmp'
+    temporal.write_bytes(b'')
+    hace_un_dia = time.time() - 86400
+    os.utime(temporal, (hace_un_dia, hace_un_dia))
+
+    poda = actual.podar()
+
+    assert poda['eliminadas'] == 2
+    assert poda['conservadas'] == 1
+    assert not (tmp_path / 'aa').exists()
+    assert actual.obtener('bb' * 32) is not None
+
+
+def test_podar_por_antiguedad_respeta_el_ultimo_uso(tmp_path):
+    cache = CacheParseo(str(tmp_path), '15.4')
+    hace_dos_meses = time.time() - 60 * 86400
+    for clave in ('aa' * 32, 'bb' * 32):
+        cache.guardar(clave, True, '', FILAS, [])
+        os.utime(cache._ruta(clave), (hace_dos_meses, hace_dos_meses))
+    # Un acierto renueva la entrada
+    assert cache.obtener('bb' * 32) is not None
+
+    assert cache.podar(max_mb=0, max_dias=30)['eliminadas'] == 1
+    assert cache.obtener('aa' * 32) is None
+    assert cache.obtener('bb' * 32) is not None
+
+
+def test_podar_por_tamano_borra_las_menos_usadas(tmp_path):
+    cache = CacheParseo(str(tmp_path), '15.4')
+    claves = [f'{n:02d}' * 32 for n in range(4)]
+    for n, clave in enumerate(claves):
+        cache.guardar(clave, True, '', FILAS * 50, [])
+        uso = time.time() - (10 - n) * 3600
+        os.utime(cache._ruta(clave), (uso, uso))
+    tamano = os.path.getsize(cache._ruta(claves[0]))
+
+    poda = cache.podar(max_mb=(2.5 * tamano) / 1024 / 1024, max_dias=0)
+
+    assert poda['eliminadas'] == 2
+    assert [cache.obtener(c) is not None for c in claves] == [False, False, True, True]
+
+
+def test_version_extraccion_depende_del_codigo(monkeypatch):
+    config = Config()
+    version = procesador.version_extraccion(config)
+    assert version.startswith(procesador.VERSION_PARSER + '|')
+    assert version.endswith(f'|sedes={config.MAX_SEDES}')
+
+    procesador._huella_modulos_extraccion.cache_clear()
+    monkeypatch.setattr(procesador, 'MODULOS_EXTRACCION', ('procesador.py', 'utilidades.py'))
+    try:
+        assert procesador.version_extraccion(config) != version
+    finally:
+        procesador._huella_modulos_extraccion.cache_clear()
@@ -0,0 +1,71 @@
+"""
+Tests de la cancelación de jobs
+===============================
+
+vigilar_cancelacion: un job en proceso cuyo proceso todavía no arrancó se
+sigue vigilando, y si al cumplirse el plazo sigue corriendo se fuerza su
+detención.
+"""
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('fastapi')
+
+from app.api import process
+
+
+class _ProcesoFalso:
+    def __init__(self):
+        self.codigo = None
+
+    def poll(self):
+        return self.codigo
+
+
+@pytest.fixture
+def job(monkeypatch):
+    forzados = []
+    monkeypatch.setattr(process.CONFIG, "TIMEOUT_CANCELACION", 2)
+    monkeypatch.setattr(process, "forzar_detencion", forzados.append)
+    process.jobs["cancelar"] = {"estado": "en_proceso"}
+    yield forzados
+    process.jobs.pop("cancelar", None)
+    process.procesos.pop("cancelar", None)
+
+
+def _vigilar() -> threading.Thread:
+    vigilante = threading.Thread(target=process.vigilar_cancelacion, args=("cancelar",))
+    vigilante.start()
+    return vigilante
+
+
+def test_proceso_que_arranca_tarde_se_fuerza_al_cumplir_el_plazo(job):
+    vigilante = _vigilar()
+    time.sleep(0.7)
+    assert vigilante.is_alive()
+    proceso = _ProcesoFalso()
+    with process.jobs_lock:
+        process.procesos["cancelar"] = proceso
+    vigilante.join(5)
+    assert not vigilante.is_alive()
+    assert job == [proceso]
+
+
+def test_proceso_que_termina_solo_no_se_fuerza(job):
+    proceso = _ProcesoFalso()
+    process.procesos["cancelar"] = proceso
+    vigilante = _vigilar()
+    proceso.codigo = 0
+    vigilante.join(5)
+    assert not vigilante.is_alive() and job == []
+
+
+def test_job_que_termina_sin_proceso_deja_de_vigilarse(job):
+    vigilante = _vigilar()
+    with process.jobs_lock:
+        process.jobs["cancelar"]["estado"] = "cancelado"
+    vigilante.join(1.5)
+    assert not vigilante.is_alive() and job == []
@@ -0,0 +1,123 @@
+"""
+ETL ML por lotes
+================
+
+procesar_dataframe (por lotes, _procesar_lote) debe dar el mismo manual,
+porcentaje y correcciones que aplicar _procesar_fila fila a fila. Las
+cachés (CacheLRU) no cambian los resultados y se guardan/cargan por versión.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('sklearn')
+
+from app.core.t25.clasificador import (
+    CacheLRU, ClasificadorTextoMedico, ETLConsolidadoT25_ML, cargar_caches_ml, guardar_caches_ml
+)
+
+# Casos de cada rama: normales, intercambiados, similares a la descripción,
+# tarifa en el manual, textos de manual en el porcentaje, vacíos y tarifas
+# pequeñas o iguales al porcentaje
+FILAS = [
+    ('SOAT', '+10%', 'CONSULTA DE MEDICINA GENERAL', '35000'),
+    ('ISS 2001', 'MENOS 5', 'HEMOGRAMA', '12000'),
+    ('SOAT 2023', '-0.15', 'ECOGRAFIA', '80000'),
+    ('CONSULTA DE MEDICINA ESPECIALIZADA', 'SOAT', 'CONSULTA ESPECIALISTA', '60000'),
+    ('SOAT VIGENTE PARA SERVICIOS AMBULATORIOS', 'ISS 2001', 'SERVICIOS AMBULATORIOS SOAT VIGENTE', '40000'),
+    ('125000', 'SOAT +20', 'BIOPSIA', '125000'),
+    ('TARIFA PROPIA', 'PROPIO', 'CURACION', '15000'),
+    ('INSTITUCIONAL', 'TARIFA PLENA', 'SUTURA', '22,5'),
+    ('', '', 'NEBULIZACION', ''),
+    (np.nan, np.nan, np.nan, np.nan),
+    ('SOAT', '35000', 'CONSULTA', '35000'),
+    ('ISS', '2500', 'EXAMEN', '90'),
+    ('UVT', 'MAS 12,5', 'LABORATORIO', '0.5'),
+    ('RADIOGRAFIA DE TORAX', 'DECRETO 2423', '', '70000'),
+    ('SOAT', '+10%', 'CONSULTA DE MEDICINA GENERAL', '35000'),
+]
+
+COLUMNAS = ['manual_tarifario', 'porcentaje_manual_tarifario', 'descripcion_del_cups', 'tarifa_unitaria_en_pesos']
+
+
+@pytest.fixture(scope='module')
+def clasificador():
+    return ClasificadorTextoMedico()
+
+
+def _df() -> pd.DataFrame:
+    return pd.DataFrame(FILAS, columns=COLUMNAS)
+
+
+def test_procesar_dataframe_igual_a_fila_por_fila(clasificador):
+    base = ETLConsolidadoT25_ML(clasificador)
+    esperado = [base._procesar_fila(fila) for _, fila in _df().iterrows()]
+
+    resultado = ETLConsolidadoT25_ML(clasificador).procesar_dataframe(_df(), 'prueba')
+
+    assert resultado['manual_tarifario'].tolist() == [r['manual_tarifario'] for r in esperado]
+    assert resultado['porcentaje_manual_tarifario'].tolist() == [r['porcentaje_manual_tarifario'] for r in esperado]
+
+
+def test_correcciones_igual_a_fila_por_fila(clasificador):
+    base = ETLConsolidadoT25_ML(clasificador)
+    esperado = {
+        i: r['log'] for i, r in
+        ((i, base._procesar_fila(fila)) for i, fila in _df().iterrows())
+        if r['correccion_aplicada']
+    }
+    assert esperado, "el DataFrame de prueba debe incluir filas a corregir"
+
+    _, _, correcciones = ETLConsolidadoT25_ML(clasificador)._procesar_lote(_df())
+
+    assert {c['indice']: c['log'] for c in correcciones} == esperado
+
+
+def test_cache_lru_descarta_el_menos_usado():
+    cache = CacheLRU(max_entradas=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    assert cache.buscar('a') == (True, 1)
+    cache.guardar('c', 3)
+    assert cache.buscar('b') == (False, None)
+    assert cache.obtener('a', lambda clave: 0) == 1
+    assert cache.obtener('d', str.upper) == 'D'
+    assert sorted(clave for clave, _ in cache.items()) == ['a', 'd']
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_clasificar_memoizado_igual_al_calculado(clasificador):
+    textos = [t for fila in FILAS for t in fila[:3]]
+    # Primera pasada llena la caché; la segunda sale toda de ella
+    esperado = {t: clasificador.clasificar(t) for t in textos if not pd.isna(t)}
+    aciertos = clasificador.cache.hits
+    cacheado = clasificador.clasificar_lote(textos)
+    assert clasificador.cache.hits > aciertos
+    for texto, resultado in esperado.items():
+        assert cacheado[texto]['tipo'] == resultado['tipo']
+        assert cacheado[texto]['confianza'] == pytest.approx(resultado['confianza'])
+
+
+def test_caches_ml_se_guardan_y_cargan_por_version(clasificador, tmp_path):
+    ruta = str(tmp_path / '.cache' / 'clasificador_ml.json')
+    etl = ETLConsolidadoT25_ML(clasificador)
+    esperado = etl.procesar_dataframe(_df(), 'prueba')
+    guardar_caches_ml(etl, ruta)
+
+    nuevo = ETLConsolidadoT25_ML(ClasificadorTextoMedico())
+    assert cargar_caches_ml(nuevo, ruta) > 0
+    assert len(nuevo.cache_manual) == len(etl.cache_manual)
+    resultado = nuevo.procesar_dataframe(_df(), 'prueba')
+    assert resultado['manual_tarifario'].tolist() == esperado['manual_tarifario'].tolist()
+    assert resultado['porcentaje_manual_tarifario'].tolist() == esperado['porcentaje_manual_tarifario'].tolist()
+    assert nuevo.cache_manual.hits > 0 and nuevo.cache_manual.misses == 0
+
+    with open(ruta, encoding='utf-8') as f:
+        datos = json.load(f)
+    datos['version'] = 'otra'
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+    assert cargar_caches_ml(ETLConsolidadoT25_ML(clasificador), ruta) == 0
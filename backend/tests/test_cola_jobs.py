@@ -0,0 +1,77 @@
+"""
+Tests de la cola de jobs
+========================
+
+ColaJobs: orden por prioridad y llegada, reencolado de los jobs que quedaron
+en proceso y retención del historial de terminados.
+"""
+
+import time
+
+from app.services.cola_jobs import ColaJobs
+
+
+def _cola(tmp_path) -> ColaJobs:
+    return ColaJobs(str(tmp_path / ".cache" / "jobs.db"))
+
+
+def _envejecer(cola: ColaJobs, job_id: str, dias: float):
+    with cola._conexion() as conn:
+        conn.execute("UPDATE jobs SET actualizado = ? WHERE job_id = ?",
+                     (time.time() - dias * 86400, job_id))
+
+
+def test_toma_por_prioridad_y_luego_por_llegada(tmp_path):
+    cola = _cola(tmp_path)
+    cola.encolar("completo", {"modo": "COMPLETO"}, {})
+    cola.encolar("anio_1", {"modo": "POR_ANO", "año": "2023"}, {})
+    cola.encolar("especifico", {"modo": "ESPECIFICO"}, {})
+    cola.encolar("anio_2", {"modo": "POR_ANO", "año": "2024"}, {})
+    cola.encolar("urgente", {"modo": "COMPLETO"}, {}, prioridad=-1)
+
+    orden = []
+    while (siguiente := cola.tomar_siguiente()) is not None:
+        orden.append(siguiente[0])
+    assert orden == ["urgente", "especifico", "anio_1", "anio_2", "completo"]
+    assert cola.tomar_siguiente() is None
+    cola.cerrar()
+
+
+def test_reencolar_en_proceso_tras_reiniciar(tmp_path):
+    cola = _cola(tmp_path)
+    for job_id in ("a", "b", "c"):
+        cola.encolar(job_id, {"modo": "COMPLETO"}, {"job_id": job_id})
+    assert cola.tomar_siguiente() == ("a", {"modo": "COMPLETO"})
+    assert cola.tomar_siguiente()[0] == "b"
+    cola.guardar("b", "completado", {"job_id": "b", "progreso": 100})
+    cola.cerrar()
+
+    reabierta = _cola(tmp_path)
+    assert reabierta.reencolar_en_proceso() == ["a"]
+    assert [(j, e, d) for j, e, _, d in reabierta.cargar()] == [
+        ("a", "pendiente", {"job_id": "a"}),
+        ("b", "completado", {"job_id": "b", "progreso": 100}),
+        ("c", "pendiente", {"job_id": "c"}),
+    ]
+    # El reencolado conserva su lugar por llegada
+    assert reabierta.tomar_siguiente()[0] == "a"
+    assert reabierta.reencolar_en_proceso() == ["a"]
+    reabierta.cerrar()
+
+
+def test_historial_de_terminados_limitado_por_dias(tmp_path):
+    cola = _cola(tmp_path)
+    for job_id in ("viejo_ok", "viejo_pendiente", "reciente_error"):
+        cola.encolar(job_id, {"modo": "COMPLETO"}, {})
+    cola.guardar("viejo_ok", "completado", {})
+    cola.guardar("reciente_error", "error", {})
+    _envejecer(cola, "viejo_ok", 40)
+    _envejecer(cola, "viejo_pendiente", 40)
+
+    assert [fila[0] for fila in cola.cargar(30)] == ["viejo_pendiente", "reciente_error"]
+    assert len(cola.cargar()) == 3
+
+    assert cola.purgar(0) == []
+    assert cola.purgar(30) == ["viejo_ok"]
+    assert [fila[0] for fila in cola.cargar()] == ["viejo_pendiente", "reciente_error"]
+    cola.cerrar()
@@ -0,0 +1,58 @@
+"""
+Canal de eventos
+================
+
+CanalEventos escribe una línea JSON por evento; leer_eventos entrega solo
+las líneas completas y deja una a medio escribir para la siguiente lectura.
+"""
+
+import json
+import os
+
+from app.services.eventos import CanalEventos, leer_eventos
+
+
+def test_emitir_y_leer(tmp_path):
+    ruta = str(tmp_path / 'sub' / 'eventos.jsonl')
+    canal = CanalEventos(ruta)
+    canal.emitir('job_start', modo='ESPECIFICO', contratos=1)
+    canal.emitir('contract_end', contrato='0012-2024', exito=True, registros=5)
+    canal.cerrar()
+
+    with open(ruta, 'rb') as f:
+        eventos = list(leer_eventos(f))
+
+    assert [e['evento'] for e in eventos] == ['job_start', 'contract_end']
+    assert eventos[0]['contratos'] == 1 and eventos[1]['registros'] == 5
+    assert all(e['pid'] == os.getpid() and 'ts' in e for e in eventos)
+
+
+def test_canal_sin_ruta_no_escribe(tmp_path):
+    canal = CanalEventos(None)
+    assert not canal.activo
+    canal.emitir('job_start')
+    assert os.listdir(tmp_path) == []
+
+
+def test_linea_a_medias_se_lee_completa_despues(tmp_path):
+    ruta = tmp_path / 'eventos.jsonl'
+    completo = json.dumps({'evento': 'alert', 'mensaje': 'tarifa vacía'}, ensure_ascii=False).encode('utf-8')
+    corte = completo.index('í'.encode('utf-8')) + 1  # a mitad de un carácter UTF-8
+    ruta.write_bytes(b'{"evento": "contract_start", "idx": 1}\n' + completo[:corte])
+
+    with open(ruta, 'rb') as lector:
+        assert [e['evento'] for e in leer_eventos(lector)] == ['contract_start']
+        assert list(leer_eventos(lector)) == []
+
+        with open(ruta, 'ab') as escritor:
+            escritor.write(completo[corte:] + b'\n')
+        assert list(leer_eventos(lector)) == [{'evento': 'alert', 'mensaje': 'tarifa vacía'}]
+        assert list(leer_eventos(lector)) == []
+
+
+def test_linea_invalida_se_salta(tmp_path):
+    ruta = tmp_path / 'eventos.jsonl'
+    ruta.write_bytes(b'no es json\n{"evento": "job_end", "exito": true}\n')
+
+    with open(ruta, 'rb') as f:
+        assert list(leer_eventos(f)) == [{'evento': 'job_end', 'exito': True}]
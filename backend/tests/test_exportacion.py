@@ -0,0 +1,73 @@
+"""
+Exportación por bloques
+=======================
+
+exportar_consolidado_streaming debe pasar a la siguiente hoja CONSOLIDADO_n
+cada MAX_FILAS_POR_HOJA filas aunque el corte caiga dentro de un bloque.
+"""
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from app.core.t25 import exportacion
+from app.services.almacen_intermedio import AlmacenCSV, AlmacenParquet
+
+
+def _consolidado(n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'contrato': [f'{i:04d}-2024' for i in range(n)],
+        'manual_tarifario': ['SOAT' if i % 2 else 'ISS' for i in range(n)],
+        'tarifa_unitaria_en_pesos': [1000.0 + i for i in range(n)],
+        'porcentaje_manual_tarifario': [10.0] * n,
+    })
+
+
+@pytest.fixture(params=['csv', 'parquet'])
+def almacen(request, tmp_path):
+    if request.param == 'parquet':
+        pytest.importorskip('pyarrow')
+        almacen = AlmacenParquet(str(tmp_path / 'consolidado.parquet'))
+    else:
+        almacen = AlmacenCSV(str(tmp_path / 'consolidado.csv'))
+    df = _consolidado(7)
+    almacen.agregar_lote(df.iloc[:4].copy())
+    almacen.agregar_lote(df.iloc[4:].copy())
+    return almacen
+
+
+def _filas(hoja) -> list:
+    return [list(fila) for fila in hoja.iter_rows(values_only=True)]
+
+
+def test_cambio_de_hoja(almacen, tmp_path, monkeypatch):
+    monkeypatch.setattr(exportacion, 'MAX_FILAS_POR_HOJA', 3)
+    monkeypatch.setattr(exportacion, 'FILAS_POR_BLOQUE_EXPORTACION', 2)
+
+    ruta = exportacion.exportar_consolidado_streaming(almacen, 'CONSOLIDADO', carpeta=str(tmp_path))
+
+    libro = load_workbook(ruta)
+    assert libro.sheetnames == ['CONSOLIDADO_1', 'CONSOLIDADO_2', 'CONSOLIDADO_3']
+
+    encabezado = ['contrato', 'manual_tarifario', 'tarifa_unitaria_en_pesos', 'porcentaje_manual_tarifario']
+    contratos = []
+    for nombre, n_filas in zip(libro.sheetnames, (3, 3, 1)):
+        filas = _filas(libro[nombre])
+        assert filas[0] == encabezado
+        assert len(filas) == n_filas + 1
+        assert libro[nombre].freeze_panes == 'A2'
+        contratos += [fila[0] for fila in filas[1:]]
+
+    assert contratos == [f'{i:04d}-2024' for i in range(7)]
+    assert _filas(libro['CONSOLIDADO_3'])[1] == ['0006-2024', 'ISS', '1006', '10']
+
+
+def test_una_sola_hoja_sin_sufijo(almacen, tmp_path, monkeypatch):
+    monkeypatch.setattr(exportacion, 'MAX_FILAS_POR_HOJA', 7)
+    monkeypatch.setattr(exportacion, 'FILAS_POR_BLOQUE_EXPORTACION', 2)
+
+    ruta = exportacion.exportar_consolidado_streaming(almacen, 'CONSOLIDADO', carpeta=str(tmp_path))
+
+    libro = load_workbook(ruta)
+    assert libro.sheetnames == ['CONSOLIDADO']
+    assert len(_filas(libro['CONSOLIDADO'])) == 8
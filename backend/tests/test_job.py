@@ -0,0 +1,61 @@
+"""
+Tests de los parámetros del trabajo
+===================================
+
+JobParams.desde_entorno: CONSOLIDADOR_WORKERS inválido o menor que 1 deja
+un solo worker; validar y ruta_cache. obtener_contexto_paralelo solo
+entrega el contexto 'fork' donde existe.
+"""
+
+import multiprocessing as mp
+import os
+
+import pytest
+
+pytest.importorskip('paramiko')
+
+from app.core.t25.job import JobParams, obtener_contexto_paralelo
+
+
+@pytest.mark.parametrize('valor, workers', [
+    ('4', 4), ('1', 1), ('0', 1), ('-3', 1), ('', 1), ('muchos', 1), (None, 1),
+])
+def test_workers_desde_entorno(valor, workers):
+    entorno = {'CONSOLIDADOR_MAESTRA': 'maestra.xlsx'}
+    if valor is not None:
+        entorno['CONSOLIDADOR_WORKERS'] = valor
+    assert JobParams.desde_entorno(entorno).workers == workers
+
+
+def test_valores_por_defecto_desde_entorno():
+    params = JobParams.desde_entorno({})
+    assert (params.maestra, params.modo, params.carpeta_salida) == ('', 'COMPLETO', './outputs')
+    assert params.nivel_log == 'DEBUG' and params.reanudar == '' and params.eventos == ''
+
+
+def test_validar(tmp_path):
+    maestra = tmp_path / 'maestra.xlsx'
+    with pytest.raises(ValueError):
+        JobParams(maestra='').validar()
+    with pytest.raises(FileNotFoundError):
+        JobParams(maestra=str(maestra)).validar()
+    maestra.write_bytes(b'')
+    with pytest.raises(ValueError):
+        JobParams(maestra=str(maestra), modo='OTRO').validar()
+    JobParams(maestra=f'"{maestra}"', modo='POR_ANO').validar()
+
+
+def test_ruta_cache(tmp_path):
+    salida = str(tmp_path / 'salida')
+    assert JobParams(maestra='m', carpeta_salida=salida).ruta_cache('anexos') == \
+        os.path.join(salida, '.cache', 'anexos')
+    compartida = str(tmp_path / 'compartida')
+    assert JobParams(maestra='m', carpeta_salida=salida, carpeta_cache=compartida).ruta_cache() == compartida
+
+
+def test_contexto_paralelo_solo_con_fork():
+    contexto = obtener_contexto_paralelo()
+    if 'fork' in mp.get_all_start_methods():
+        assert contexto.get_start_method() == 'fork'
+    else:
+        assert contexto is None
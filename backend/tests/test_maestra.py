@@ -0,0 +1,160 @@
+"""
+Índice de la maestra
+====================
+
+MaestraIndex debe encontrar la misma fila (categoría, ambulancia y fechas de
+acuerdo) que las búsquedas por máscara sobre toda la hoja que reemplazó.
+"""
+
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.t25.maestra import (
+    COLUMNAS_REVISAR_AMBULANCIA,
+    PALABRAS_AMBULANCIA_MAESTRA,
+    MaestraIndex,
+    identificar_columnas,
+    obtener_fecha_acuerdo,
+)
+
+PRESTADOR = 'PRESTADOR DE SERVICIOS DE SALUD'
+
+
+def _maestra() -> pd.DataFrame:
+    return pd.DataFrame({
+        'TIPO PROVEEDOR': [PRESTADOR, PRESTADOR, 'PROVEEDOR', PRESTADOR, PRESTADOR, PRESTADOR],
+        'CTO': ['0012-2023', np.nan, '0077-2024', '0012-2023', np.nan, '0345-2022'],
+        'NUMERO CONTRATO': [12.0, 8.0, 77.0, 12.0, 901.0, 345.0],
+        'AÑO CONTRATO': [2023.0, 2024.0, 2024.0, 2023.0, 2022.0, 2022.0],
+        'CATEGORÍA CUENTAS MEDICAS': ['HOSPITALARIO', np.nan, 'TRASLADO ASISTENCIAL', 'DUPLICADO', 'AMBULATORIO', 'IPS'],
+        'OBJETO': ['SERVICIOS DE SALUD', 'SERVICIO DE AMBULANCIA TAB', 'INSUMOS', np.nan, 'CONSULTA', 'LABORATORIO'],
+        'FECHA INICIAL': ['15/01/2023', datetime(2024, 3, 1), '01/02/2024', '31/12/2023', 45000, ' '],
+        'FECHA OTROSI 1': ['10/06/2023', np.nan, np.nan, np.nan, '05/05/2022', np.nan],
+        'FECHA OTROSI 2': [np.nan, datetime(2024, 9, 9), np.nan, np.nan, np.nan, np.nan],
+        'NO. ACTA 1': ['#1', np.nan, np.nan, np.nan, 'ACTA 2', np.nan],
+        'FECHA ACTA 1': ['20/07/2023', np.nan, np.nan, np.nan, '11/11/2022', np.nan],
+    })
+
+
+# Búsquedas por máscara previas a MaestraIndex
+def _fila_por_mascara(df, cols, numero, ano):
+    fila = None
+    if cols.cto:
+        mask = df[cols.cto] == f"{str(numero).zfill(4)}-{ano}"
+        if mask.any():
+            fila = df[mask].iloc[0]
+    if fila is None and cols.numero_contrato and cols.ano_contrato:
+        mask = (
+            df[cols.numero_contrato].astype(str).str.replace('.0', '', regex=False).str.zfill(4) == str(numero).zfill(4)
+        ) & (
+            df[cols.ano_contrato].astype(str).str.replace('.0', '', regex=False) == str(ano)
+        )
+        if mask.any():
+            fila = df[mask].iloc[0]
+    return fila
+
+
+def _categoria_por_mascara(df, fila):
+    for col in df.columns:
+        col_upper = str(col).upper().strip()
+        if 'CATEGOR' in col_upper and 'CUENTA' in col_upper and pd.notna(fila[col]):
+            return str(fila[col]).strip()
+    return ""
+
+
+def _ambulancia_por_mascara(df, fila):
+    for col in df.columns:
+        col_upper = str(col).upper().strip()
+        if not any(t in col_upper or col_upper in t for t in COLUMNAS_REVISAR_AMBULANCIA):
+            continue
+        valor = fila[col]
+        if pd.isna(valor):
+            continue
+        valor_str = str(valor).upper().strip()
+        if any(palabra in valor_str for palabra in PALABRAS_AMBULANCIA_MAESTRA):
+            return True, col, valor_str
+    return False, "", ""
+
+
+def _fecha_por_mascara(df, fila, origen):
+    columnas = list(df.columns)
+    if origen == 'Inicial':
+        for col in columnas:
+            cl = str(col).lower()
+            if 'fecha' in cl and 'inicial' in cl and 'otrosi' not in cl and 'otrosí' not in cl:
+                return fila[col]
+    elif 'Otrosí' in origen:
+        num = int(re.search(r'\d+', origen).group())
+        for col in columnas:
+            if re.search(f"fecha.*otros[ií].*{num}", str(col).lower()):
+                return fila[col]
+    elif 'Acta' in origen:
+        num = int(re.search(r'\d+', origen).group())
+        for i, col in enumerate(columnas):
+            cl = str(col).lower()
+            if ('no. acta' in cl or 'no acta' in cl) and pd.notna(fila[col]):
+                ma = re.search(r'#?(\d+)', str(fila[col]))
+                if ma and int(ma.group(1)) == num and i + 1 < len(columnas):
+                    return fila[columnas[i + 1]]
+    return None
+
+
+CONTRATOS = [('12', '2023'), ('0012', '2023'), ('8', '2024'), ('77', '2024'), ('901', '2022'),
+             ('345', '2022'), ('999', '2023'), ('12', '2024')]
+ORIGENES = ['Inicial', 'Otrosí 1', 'Otrosí 2', 'Acta 1', 'Acta 2', 'Acta 3']
+
+
+@pytest.fixture
+def maestra():
+    df_maestra = _maestra()
+    cols = identificar_columnas(df_maestra)
+    df_prestadores = df_maestra[df_maestra[cols.tipo_proveedor] == PRESTADOR].copy()
+    return df_maestra, df_prestadores, cols, MaestraIndex(df_maestra, df_prestadores, cols)
+
+
+@pytest.mark.parametrize('numero,ano', CONTRATOS)
+def test_categoria_y_ambulancia_igual_a_mascaras(maestra, numero, ano):
+    df_maestra, _, cols, indice = maestra
+    fila = _fila_por_mascara(df_maestra, cols, numero, ano)
+    registro = indice.buscar(numero, ano)
+
+    assert (registro is None) == (fila is None)
+    if fila is not None:
+        assert registro.categoria_cuentas_medicas == _categoria_por_mascara(df_maestra, fila)
+        assert registro.ambulancia == _ambulancia_por_mascara(df_maestra, fila)
+
+
+@pytest.mark.parametrize('numero,ano', CONTRATOS)
+@pytest.mark.parametrize('origen', ORIGENES)
+def test_fecha_acuerdo_igual_a_mascaras(maestra, numero, ano, origen):
+    _, df_prestadores, cols, indice = maestra
+    fila = _fila_por_mascara(df_prestadores, cols, numero, ano)
+    registro = indice.buscar_prestador(numero, ano)
+
+    assert (registro is None) == (fila is None)
+    if fila is None:
+        assert obtener_fecha_acuerdo(indice, numero, ano, origen) == (None, False)
+        return
+
+    esperada = _fecha_por_mascara(df_prestadores, fila, origen)
+    fecha, encontrada = obtener_fecha_acuerdo(indice, numero, ano, origen)
+    if esperada is None or pd.isna(esperada):
+        assert (fecha, encontrada) == (None, False)
+    elif isinstance(esperada, datetime):
+        assert (fecha, encontrada) == (esperada.strftime('%d/%m/%Y'), True)
+    elif isinstance(esperada, str) and esperada.strip():
+        assert (fecha, encontrada) == (esperada.strip(), True)
+    elif isinstance(esperada, int):
+        assert encontrada and fecha == '15/03/2023'
+    else:
+        assert (fecha, encontrada) == (None, False)
+
+
+def test_primera_fila_gana_con_cto_duplicado(maestra):
+    _, _, _, indice = maestra
+    assert indice.buscar('12', '2023').categoria_cuentas_medicas == 'HOSPITALARIO'
+    assert len(indice) == 5
@@ -0,0 +1,79 @@
+"""
+Manifiesto de ejecuciones incrementales
+=======================================
+
+ManifiestoEjecuciones.buscar solo reutiliza las filas de un contrato si su
+selección de anexos (rutas, tamaños y mtimes), el contexto y la versión del
+parser son los mismos que se registraron.
+"""
+
+import sqlite3
+
+import pytest
+
+from app.services.manifiesto_ejecuciones import ManifiestoEjecuciones
+
+SELECCION = [
+    ('/R.A/2024/0012-2024/ANEXO 1.xlsx', 5120, 1700000000.0),
+    ('/R.A/2024/0012-2024/OTROSI 1/ANEXO 1.xlsx', 4096, 1710000000.0),
+]
+RESULTADOS = [
+    {'ok': True, 'mensaje': '', 'filas': [{'codigo_cups': '890201', 'tarifa': 35000}],
+     'alertas': [('SIN_TARIFA', 'Fila sin tarifa', 'ANEXO 1.xlsx')]},
+    {'ok': False, 'mensaje': 'Sin hoja de servicios', 'filas': [], 'alertas': []},
+]
+
+
+@pytest.fixture
+def manifiesto(tmp_path):
+    manifiesto = ManifiestoEjecuciones(str(tmp_path / 'manifiesto.sqlite'), '15.4|a')
+    assert manifiesto.registrar('0012-2024', SELECCION, RESULTADOS, contexto='HOSPITALARIO')
+    yield manifiesto
+    manifiesto.cerrar()
+
+
+def test_misma_seleccion_reutiliza(manifiesto):
+    assert manifiesto.buscar('0012-2024', list(SELECCION), contexto='HOSPITALARIO') == RESULTADOS
+
+
+@pytest.mark.parametrize('seleccion', [
+    [SELECCION[0], (SELECCION[1][0], 4097, SELECCION[1][2])],   # cambió el tamaño
+    [SELECCION[0], (SELECCION[1][0], 4096, 1720000000.0)],      # cambió el mtime
+    [SELECCION[1], SELECCION[0]],                                # cambió el orden
+    SELECCION[:1],                                               # quitaron un anexo
+    SELECCION + [('/R.A/2024/0012-2024/ACTA 1/ANEXO 1.xlsx', 1, None)],  # agregaron uno
+    [],
+])
+def test_seleccion_distinta_no_reutiliza(manifiesto, seleccion):
+    assert manifiesto.buscar('0012-2024', seleccion, contexto='HOSPITALARIO') is None
+
+
+def test_contexto_o_version_distintos_no_reutilizan(manifiesto, tmp_path):
+    assert manifiesto.buscar('0012-2024', SELECCION, contexto='AMBULATORIO') is None
+    assert manifiesto.buscar('0345-2022', SELECCION, contexto='HOSPITALARIO') is None
+
+    otra_version = ManifiestoEjecuciones(manifiesto.ruta_db, '15.4|b')
+    assert otra_version.buscar('0012-2024', SELECCION, contexto='HOSPITALARIO') is None
+    otra_version.cerrar()
+
+
+def test_registrar_reemplaza_la_seleccion(manifiesto):
+    nueva = SELECCION[:1]
+    assert manifiesto.registrar('0012-2024', nueva, RESULTADOS[:1], contexto='HOSPITALARIO')
+
+    assert manifiesto.buscar('0012-2024', SELECCION, contexto='HOSPITALARIO') is None
+    assert manifiesto.buscar('0012-2024', nueva, contexto='HOSPITALARIO') == RESULTADOS[:1]
+
+
+def test_filas_alteradas_no_se_reutilizan(manifiesto):
+    conn = sqlite3.connect(manifiesto.ruta_db)
+    with conn:
+        conn.execute("UPDATE archivos SET checksum = 'x' WHERE orden = 0")
+    conn.close()
+
+    assert manifiesto.buscar('0012-2024', SELECCION, contexto='HOSPITALARIO') is None
+
+
+def test_olvidar(manifiesto):
+    manifiesto.olvidar('0012-2024')
+    assert manifiesto.buscar('0012-2024', SELECCION, contexto='HOSPITALARIO') is None
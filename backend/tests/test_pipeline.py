@@ -0,0 +1,84 @@
+"""
+Tests de la descarga adelantada
+===============================
+
+AdelantoContratos: entrega los contratos en orden con el log de su
+descarga, no adelanta más de `profundidad` contratos, relanza el error de
+un contrato al llegar a él y descarta lo descargado que no se procesó.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.core.t25.logger import Logger, LoggerDiferido
+from app.core.t25.pipeline import AdelantoContratos
+from app.core.t25.progreso import MedidorEtapas
+
+TAREAS = [(i, {'numero': f'{i:04d}', 'ano': '2024'}) for i in range(6)]
+
+
+class _Escenario:
+    def __init__(self, falla_en=None):
+        self.log = LoggerDiferido(Logger())
+        self.log_descarga = LoggerDiferido(self.log)
+        self.etapas = MedidorEtapas()
+        self.adquiridos = []
+        self.descartados = []
+        self.falla_en = falla_en
+        self.lock = threading.Lock()
+
+    def adquirir(self, idx, contrato):
+        self.log_descarga.info(f"Descargando {contrato['numero']}")
+        if idx == self.falla_en:
+            raise ConnectionError(f"SFTP caído en {contrato['numero']}")
+        with self.lock:
+            self.adquiridos.append(idx)
+        return {'idx': idx}
+
+    def adelanto(self, profundidad=2) -> AdelantoContratos:
+        return AdelantoContratos(TAREAS, self.adquirir, self.log, self.log_descarga,
+                                 profundidad, self.etapas, self.descartados.append)
+
+
+def test_entrega_en_orden_con_el_log_de_cada_descarga():
+    escenario = _Escenario()
+    with escenario.adelanto() as adelanto:
+        for esperado, preparado in enumerate(adelanto):
+            assert preparado['idx'] == esperado
+            escenario.log.volcar(preparado['log'])
+
+    lineas = [linea for linea in escenario.log.lineas if 'Descargando' in linea]
+    assert len(lineas) == 6
+    assert [linea.split('Descargando ')[1][:4] for linea in lineas] == [f'{i:04d}' for i in range(6)]
+    assert escenario.etapas.muestras_cola == 6 and escenario.descartados == []
+
+
+def test_no_adelanta_mas_que_la_profundidad():
+    escenario = _Escenario()
+    adelanto = escenario.adelanto(profundidad=2)
+    with adelanto:
+        iterador = iter(adelanto)
+        next(iterador)
+        # Cola llena (2) + el que espera lugar para entrar; no descarga más
+        limite = time.time() + 5
+        while len(escenario.adquiridos) < 4 and time.time() < limite:
+            time.sleep(0.02)
+        time.sleep(0.3)
+        assert escenario.adquiridos == [0, 1, 2, 3]
+    # Los ya descargados que no se procesaron se descartan
+    assert sorted(p['idx'] for p in escenario.descartados) == [1, 2, 3]
+
+
+def test_error_se_relanza_al_llegar_al_contrato():
+    escenario = _Escenario(falla_en=2)
+    procesados = []
+    with pytest.raises(ConnectionError, match='0002'):
+        with escenario.adelanto() as adelanto:
+            for preparado in adelanto:
+                procesados.append(preparado['idx'])
+    assert procesados == [0, 1]
+    # Lo que logueó el contrato que falló se vuelca antes de relanzar
+    assert any('Descargando 0002' in linea for linea in escenario.log.lineas)
+    assert escenario.adquiridos == [0, 1]
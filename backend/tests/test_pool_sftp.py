@@ -0,0 +1,245 @@
+"""
+Tests del pool SFTP
+===================
+
+PoolSFTP: reutiliza canales, respeta los topes de conexiones y canales,
+espera a que se libere uno y reintenta con otro canal cuando la operación
+falla. Un canal usado hace poco se presta sin ir al servidor; solo uno
+ocioso por más de `sondeo` segundos se prueba con un stat('.'). Con
+conexiones y canales falsos (sin servidor).
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.services.pool_sftp import PoolSFTP, SinSesionesLibres
+
+
+class _Transporte:
+    def __init__(self):
+        self.activo = True
+
+    def is_active(self):
+        return self.activo
+
+
+class _ClienteSSH:
+    def __init__(self):
+        self.transporte = _Transporte()
+        self.cerrado = False
+
+    def get_transport(self):
+        return self.transporte
+
+    def close(self):
+        self.cerrado = True
+        self.transporte.activo = False
+
+
+class _Canal:
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.cwd = '/'
+        self.stats = 0
+        self.cerrado = False
+        self.responde = True
+
+    def stat(self, ruta):
+        self.stats += 1
+        if not self.cliente.transporte.activo or not self.responde:
+            raise EOFError("conexión cerrada")
+
+    def chdir(self, ruta):
+        self.cwd = ruta
+
+    def close(self):
+        self.cerrado = True
+
+
+class _Servidor:
+    """Registra las conexiones y canales que abre el pool."""
+
+    def __init__(self):
+        self.clientes = []
+        self.canales = []
+
+    def conectar(self):
+        cliente = _ClienteSSH()
+        self.clientes.append(cliente)
+        return cliente
+
+    def abrir_canal(self, cliente):
+        canal = _Canal(cliente)
+        self.canales.append(canal)
+        return canal
+
+    def pool(self, **opciones) -> PoolSFTP:
+        return PoolSFTP(self.conectar, self.abrir_canal, **opciones)
+
+
+def test_reutiliza_el_canal_devuelto_sin_directorio_actual():
+    servidor = _Servidor()
+    pool = servidor.pool()
+    with pool.prestar() as sftp:
+        sftp.chdir('/CONTRATOS 2024')
+    with pool.prestar() as otra:
+        assert otra is sftp and otra.cwd is None
+    assert len(servidor.clientes) == 1 and len(servidor.canales) == 1
+
+
+def test_topes_de_conexiones_y_canales():
+    servidor = _Servidor()
+    pool = servidor.pool(max_conexiones=2, canales_por_conexion=2, espera=0.2)
+    prestamos = [pool.prestar() for _ in range(4)]
+    assert len(servidor.clientes) == 2 and len(servidor.canales) == 4
+    assert pool.estadisticas['canales_prestados'] == 4
+
+    with pytest.raises(SinSesionesLibres):
+        pool.prestar()
+
+    # Un canal devuelto desde otro hilo despierta al que espera
+    threading.Timer(0.1, prestamos[0].devolver).start()
+    assert pool.prestar(timeout=5).sftp is servidor.canales[0]
+    assert pool.estadisticas['esperas'] >= 1
+
+
+def test_ejecutar_reintenta_con_otro_canal():
+    servidor = _Servidor()
+    pool = servidor.pool(canales_por_conexion=2)
+    usados = []
+
+    def listar(sftp):
+        usados.append(sftp)
+        if len(usados) == 1:
+            raise EOFError("canal caído")
+        return ['0531-2024']
+
+    assert pool.ejecutar(listar) == ['0531-2024']
+    assert usados[0] is not usados[1] and usados[0].cerrado
+    assert pool.estadisticas['reintentos'] == 1
+
+    def siempre_falla(sftp):
+        raise EOFError("sigue caído")
+
+    with pytest.raises(EOFError):
+        pool.ejecutar(siempre_falla, reintentos=0)
+
+
+def test_error_del_archivo_no_descarta_el_canal():
+    servidor = _Servidor()
+    pool = servidor.pool()
+
+    def abrir(sftp):
+        raise FileNotFoundError('/no_existe.xlsx')
+
+    with pytest.raises(FileNotFoundError):
+        pool.ejecutar(abrir)
+    assert pool.estadisticas['canales_libres'] == 1
+    assert not servidor.canales[0].cerrado and pool.estadisticas['reintentos'] == 0
+
+
+def test_conexion_caida_se_reemplaza_al_prestar():
+    servidor = _Servidor()
+    pool = servidor.pool()
+    with pool.prestar():
+        pass
+    servidor.clientes[0].transporte.activo = False
+
+    with pool.prestar() as sftp:
+        assert sftp.cliente is servidor.clientes[1]
+    assert pool.estadisticas['conexiones'] == 1
+    assert pool.estadisticas['conexiones_abiertas'] == 2
+
+
+def test_error_al_conectar_libera_el_cupo():
+    intentos = []
+
+    def conectar():
+        intentos.append(1)
+        if len(intentos) == 1:
+            raise OSError("sin red")
+        return _ClienteSSH()
+
+    pool = PoolSFTP(conectar, _Canal, max_conexiones=1, espera=0.2)
+    with pytest.raises(OSError):
+        pool.prestar()
+    with pool.prestar():
+        pass
+    assert len(intentos) == 2
+
+
+def test_cerrar_cierra_todas_las_conexiones():
+    servidor = _Servidor()
+    pool = servidor.pool(max_conexiones=2, canales_por_conexion=1)
+    primero, segundo = pool.prestar(), pool.prestar()
+    primero.devolver()
+    pool.cerrar()
+    assert all(cliente.cerrado for cliente in servidor.clientes)
+    assert not pool.activo()
+    segundo.devolver()
+    assert pool.estadisticas['canales_libres'] == 0
+
+
+def test_canal_reciente_se_presta_sin_sondeo():
+    servidor = _Servidor()
+    pool = servidor.pool(sondeo=30)
+    for _ in range(5):
+        pool.ejecutar(lambda sftp: sftp.chdir('/'))
+    assert servidor.canales[0].stats == 0
+    assert pool.estadisticas['sondeos'] == 0
+
+
+def test_canal_ocioso_se_sondea_antes_de_prestarlo():
+    servidor = _Servidor()
+    pool = servidor.pool(sondeo=30)
+    with pool.prestar():
+        pass
+    canal = servidor.canales[0]
+    pool._libres[0].ultimo_uso = time.time() - 60
+
+    with pool.prestar() as sftp:
+        assert sftp is canal
+    assert canal.stats == 1 and pool.estadisticas['sondeos'] == 1
+    # El sondeo exitoso cuenta como uso: el siguiente préstamo no sondea
+    with pool.prestar():
+        pass
+    assert canal.stats == 1
+
+
+def test_sondeo_fallido_descarta_la_conexion():
+    servidor = _Servidor()
+    pool = servidor.pool(sondeo=30)
+    with pool.prestar():
+        pass
+    pool._libres[0].ultimo_uso = time.time() - 60
+    # Transporte marcado activo pero el servidor ya no responde
+    servidor.canales[0].responde = False
+
+    with pool.prestar() as sftp:
+        assert sftp is servidor.canales[1]
+    assert servidor.clientes[0].cerrado and len(servidor.clientes) == 2
+
+
+def test_transporte_inactivo_se_descarta_sin_ir_al_servidor():
+    servidor = _Servidor()
+    pool = servidor.pool(sondeo=30)
+    with pool.prestar():
+        pass
+    assert pool.activo()
+    servidor.clientes[0].transporte.activo = False
+    assert not pool.activo()
+    assert servidor.canales[0].stats == 0 and servidor.canales[0].cerrado
+
+
+def test_prestamo_vigente_solo_sondea_si_se_fuerza():
+    servidor = _Servidor()
+    pool = servidor.pool(sondeo=30)
+    prestamo = pool.prestar()
+    assert prestamo.vigente() and servidor.canales[0].stats == 0
+    assert prestamo.vigente(forzar=True) and servidor.canales[0].stats == 1
+    servidor.clientes[0].transporte.activo = False
+    assert not prestamo.vigente()
+    prestamo.devolver()
+    assert pool.estadisticas['canales_libres'] == 0
@@ -0,0 +1,54 @@
+"""
+Tests de progreso y ETA
+=======================
+
+MedidorProgreso: ETA con la media móvil y los workers en paralelo.
+MedidorEtapas: acumulado por etapa y profundidad de la cola de descargas.
+"""
+
+from app.core.t25.progreso import MedidorEtapas, MedidorProgreso
+
+
+def test_sin_contratos_terminados_no_hay_eta():
+    medidor = MedidorProgreso(total=10, workers=2)
+    assert medidor.eta_segundos() is None
+    assert medidor.instantanea()['eta_s'] is None
+    assert medidor.instantanea()['segundos_por_contrato'] is None
+
+
+def test_eta_usa_la_media_movil_y_los_workers():
+    medidor = MedidorProgreso(total=10, workers=2, ventana=2)
+    medidor.registrar(100.0)
+    medidor.registrar(4.0, filas=30, archivos=3, bytes_sftp=1000)
+    medidor.registrar(6.0)
+    # Ventana de 2: media de 4 y 6; 7 restantes entre 2 workers
+    assert medidor.eta_segundos() == 7 * 5.0 / 2
+    foto = medidor.instantanea()
+    assert foto['hechos'] == 3 and foto['total'] == 10
+    assert foto['segundos_por_contrato'] == 5.0
+
+
+def test_eta_no_reparte_entre_mas_workers_que_contratos_restantes():
+    medidor = MedidorProgreso(total=3, workers=8)
+    medidor.registrar(10.0)
+    medidor.registrar(10.0)
+    # Queda un contrato: los otros workers no lo aceleran
+    assert medidor.eta_segundos() == 10.0
+    medidor.registrar(10.0)
+    medidor.registrar(10.0)
+    assert medidor.eta_segundos() == 0.0
+
+
+def test_etapas_acumula_por_contrato_y_cola():
+    medidor = MedidorEtapas()
+    medidor.registrar({'descargar': 2.0, 'parsear': 1.0})
+    medidor.registrar({'descargar': 4.0, 'parsear': 3.0})
+    foto = medidor.instantanea()
+    assert foto['segundos']['descargar'] == 6.0
+    assert foto['por_contrato']['parsear'] == 2.0
+    assert 'cola' not in foto
+
+    for profundidad in (0, 2, 4):
+        medidor.registrar_cola(profundidad)
+    cola = medidor.instantanea()['cola']
+    assert cola['media'] == 2.0 and cola['max'] == 4
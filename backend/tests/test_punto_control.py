@@ -0,0 +1,91 @@
+"""
+Puntos de control
+=================
+
+PuntoControl: el diario solo cuenta hasta el último estado guardado, las
+líneas sin estado que las cubra se descartan al cargar y un estado de otra
+versión no se usa.
+"""
+
+import json
+
+import pytest
+
+from app.core.t25.punto_control import PuntoControl
+
+
+def _linea(n: int) -> dict:
+    return {'contrato': f'{n:04d}-2024', 'resumen': {'filas': n}, 'no_positiva': [],
+            'sin_fecha': False, 'alertas': [['TIPO', 'mensaje', f'{n:04d}-2024', '']]}
+
+
+def test_guardar_y_cargar(tmp_path):
+    punto = PuntoControl(str(tmp_path / 'run'))
+    punto.guardar(_linea(1), {'completados': 1, 'almacen': {'partes': 1}})
+    punto.guardar(_linea(2), {'completados': 2, 'almacen': {'partes': 2}})
+
+    estado, lineas = PuntoControl(str(tmp_path / 'run')).cargar()
+
+    assert estado['completados'] == 2
+    assert estado['almacen'] == {'partes': 2}
+    assert lineas == [_linea(1), _linea(2)]
+
+
+def test_lineas_sin_estado_se_truncan(tmp_path):
+    punto = PuntoControl(str(tmp_path / 'run'))
+    punto.guardar(_linea(1), {'completados': 1})
+    punto.guardar(_linea(2))
+    # Línea a medias de un proceso que murió escribiendo
+    with open(punto.ruta_diario, 'ab') as f:
+        f.write(b'{"contrato": "0003-')
+
+    estado, lineas = PuntoControl(str(tmp_path / 'run')).cargar()
+
+    assert estado['completados'] == 1
+    assert lineas == [_linea(1)]
+    # El diario queda truncado: la siguiente línea sigue a la última válida
+    punto.guardar(_linea(3), {'completados': 2})
+    assert PuntoControl(str(tmp_path / 'run')).cargar()[1] == [_linea(1), _linea(3)]
+
+
+def test_diario_sin_estado_no_cuenta(tmp_path):
+    punto = PuntoControl(str(tmp_path / 'run'))
+    punto.guardar(_linea(1))
+
+    assert punto.cargar() is None
+    assert not tmp_path.joinpath('run', 'diario.jsonl').exists()
+
+
+def test_estado_de_otra_version(tmp_path):
+    punto = PuntoControl(str(tmp_path / 'run'))
+    punto.guardar(_linea(1), {'completados': 1})
+    with open(punto.ruta_estado, encoding='utf-8') as f:
+        estado = json.load(f)
+    estado['version'] = 0
+    with open(punto.ruta_estado, 'w', encoding='utf-8') as f:
+        json.dump(estado, f)
+
+    with pytest.raises(ValueError):
+        punto.cargar()
+
+
+def test_eliminar_quita_checkpoints_vacio(tmp_path):
+    carpeta = tmp_path / '.checkpoints'
+    uno = PuntoControl(str(carpeta / 'uno'))
+    otro = PuntoControl(str(carpeta / 'otro'))
+    uno.guardar(_linea(1), {'completados': 1})
+    otro.guardar(_linea(1), {'completados': 1})
+
+    uno.eliminar()
+    assert carpeta.exists() and not uno.existe()
+    otro.eliminar()
+    assert not carpeta.exists()
+
+
+def test_firma_cambia_con_los_contratos():
+    contratos = [{'numero': '0012', 'ano': '2023'}, {'numero': '0345', 'ano': '2022'}]
+    firma = PuntoControl.firma('POR_ANO', '2023', '', contratos)
+
+    assert firma == PuntoControl.firma('POR_ANO', '2023', '', list(contratos))
+    assert firma != PuntoControl.firma('POR_ANO', '2023', '', contratos[:1])
+    assert firma != PuntoControl.firma('COMPLETO', '2023', '', contratos)
@@ -0,0 +1,97 @@
+"""
+Tests del registro de logs
+==========================
+
+RegistroLogs: paso de segmento, lectura paginada desde disco cuando los logs
+ya salieron de memoria, reapertura tras reiniciar (con otro por_segmento) y
+conteos por tipo sin releer lo que registro.json ya cubre.
+"""
+
+import json
+import os
+
+from app.services.registro_logs import ARCHIVO_META, RegistroLogs
+
+
+def _log(n: int) -> dict:
+    return {"tipo": "error" if n % 3 == 0 else "info", "mensaje": f"linea {n}"}
+
+
+def _llenar(registro: RegistroLogs, cantidad: int):
+    for n in range(cantidad):
+        assert registro.agregar(_log(n)) == n
+
+
+def test_carpeta_se_crea_con_el_primer_log(tmp_path):
+    directorio = tmp_path / "job"
+    registro = RegistroLogs(str(directorio))
+    assert not directorio.exists()
+    assert registro.leer() == [] and registro.total == 0
+
+    registro.agregar(_log(0))
+    assert (directorio / ARCHIVO_META).exists()
+    registro.eliminar()
+    assert not directorio.exists()
+    assert not RegistroLogs(str(directorio)).total and not directorio.exists()
+
+
+def test_segmentos_y_lectura_desde_disco(tmp_path):
+    registro = RegistroLogs(str(tmp_path), en_memoria=3, por_segmento=4)
+    _llenar(registro, 11)
+
+    assert sorted(os.listdir(tmp_path)) == [
+        ARCHIVO_META,
+        "segmento_000000.idx", "segmento_000000.jsonl",
+        "segmento_000001.idx", "segmento_000001.jsonl",
+        "segmento_000002.idx", "segmento_000002.jsonl",
+    ]
+    assert len(registro.recientes) == 3
+    # Páginas que cruzan segmentos y la frontera disco/memoria
+    assert registro.leer(2, 5) == [_log(n) for n in range(2, 7)]
+    assert registro.leer(6, 100) == [_log(n) for n in range(6, 11)]
+    assert registro.leer() == [_log(n) for n in range(11)]
+    assert registro.leer(11) == [] and registro.leer(5, 0) == []
+    assert registro.por_tipo == {"error": 4, "info": 7}
+
+
+def test_reabrir_con_otro_por_segmento_conserva_indices(tmp_path):
+    registro = RegistroLogs(str(tmp_path), en_memoria=2, por_segmento=4)
+    _llenar(registro, 10)
+    registro.cerrar()
+
+    reabierto = RegistroLogs(str(tmp_path), en_memoria=2, por_segmento=1000)
+    assert reabierto.por_segmento == 4
+    assert reabierto.total == 10
+    assert reabierto.por_tipo == {"error": 4, "info": 6}
+    assert reabierto.leer(3, 4) == [_log(n) for n in range(3, 7)]
+
+    # Sigue escribiendo en el segmento que corresponde
+    assert reabierto.agregar(_log(10)) == 10
+    assert reabierto.leer(8) == [_log(n) for n in range(8, 11)]
+    assert os.path.exists(tmp_path / "segmento_000002.jsonl")
+
+
+def test_reabrir_usa_los_conteos_guardados(tmp_path):
+    registro = RegistroLogs(str(tmp_path), por_segmento=4)
+    _llenar(registro, 6)
+    registro.cerrar()
+
+    # Si los conteos guardados se usan, las líneas ya contadas no se releen
+    meta = json.loads((tmp_path / ARCHIVO_META).read_text())
+    assert meta["total"] == 6
+    meta["por_tipo"] = {"marcado": 6}
+    (tmp_path / ARCHIVO_META).write_text(json.dumps(meta))
+    assert RegistroLogs(str(tmp_path)).por_tipo == {"marcado": 6}
+
+
+def test_reabrir_tras_caida_cuenta_solo_lo_posterior(tmp_path):
+    registro = RegistroLogs(str(tmp_path), por_segmento=4)
+    _llenar(registro, 3)
+    registro.cerrar()
+    for n in range(3, 9):
+        registro.agregar(_log(n))
+    # Sin cerrar: registro.json se quedó en total=3
+
+    reabierto = RegistroLogs(str(tmp_path))
+    assert reabierto.total == 9
+    assert reabierto.por_tipo == {"error": 3, "info": 6}
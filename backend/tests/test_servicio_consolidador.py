@@ -0,0 +1,68 @@
+"""
+Servicio pre-calentado del consolidador
+=======================================
+
+ServicioConsolidador con un script mínimo: salida y código del trabajo, y un
+trabajo que llega durante una precarga lenta no espera más de
+espera_precarga (ServicioNoDisponible -> la API usa un subproceso).
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from app.services.servicio_consolidador import ServicioConsolidador, ServicioNoDisponible, servicio_disponible
+
+pytestmark = pytest.mark.skipif(not servicio_disponible(), reason="requiere fork y sockets Unix")
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+SCRIPT = """
+import os, sys, time
+if os.environ.get('CONSOLIDADOR_SOLO_PRECARGA') == '1':
+    time.sleep(float(os.environ.get('SEGUNDOS_PRECARGA', '0')))
+    sys.exit(0)
+print('trabajo', os.environ.get('NOMBRE'))
+sys.exit(int(os.environ.get('CODIGO', '0')))
+"""
+
+
+@pytest.fixture
+def servicio(tmp_path):
+    script = tmp_path / 'script.py'
+    script.write_text(SCRIPT, encoding='utf-8')
+    servicio = ServicioConsolidador(str(script), str(tmp_path / 's.sock'), BACKEND, espera_precarga=0.5)
+    yield servicio
+    servicio.detener()
+
+
+def _salida(proceso) -> list:
+    return list(iter(proceso.stdout.readline, ''))
+
+
+def test_ejecutar_entrega_salida_y_codigo(servicio, tmp_path):
+    proceso = servicio.ejecutar(dict(os.environ, NOMBRE='uno', CODIGO='3'), cwd=str(tmp_path))
+
+    assert _salida(proceso) == ['trabajo uno\n']
+    assert proceso.wait(timeout=10) == 3
+
+
+def test_trabajo_durante_precarga_no_espera_sin_limite(servicio, tmp_path):
+    servicio.iniciar()
+    precarga = threading.Thread(target=servicio.precargar, args=(dict(os.environ, SEGUNDOS_PRECARGA='4'),))
+    precarga.start()
+    time.sleep(0.5)
+
+    inicio = time.time()
+    with pytest.raises(ServicioNoDisponible):
+        servicio.ejecutar(dict(os.environ, NOMBRE='dos'), cwd=str(tmp_path))
+    assert time.time() - inicio < 3
+    # El servidor sigue atendiendo mientras precarga
+    assert servicio._peticion({'accion': 'ping'}, timeout=2)['precargas'] == 0
+
+    precarga.join()
+    proceso = servicio.ejecutar(dict(os.environ, NOMBRE='dos'), cwd=str(tmp_path))
+    assert _salida(proceso) == ['trabajo dos\n']
+    assert proceso.wait(timeout=10) == 0
@@ -0,0 +1,124 @@
+"""
+Tests de transferencias SFTP
+============================
+
+descargar_reanudable: una conexión que se cae a mitad de archivo se retoma
+desde el último byte escrito; los errores del archivo remoto no se
+reintentan y los totales se acumulan en MetricasTransferencias.
+"""
+
+import io
+import os
+
+import pytest
+
+from app.services.transferencias_sftp import MetricasTransferencias, Transferencia, descargar_reanudable
+
+CONTENIDO = bytes(range(256)) * 40
+
+
+class _ArchivoRemoto:
+    def __init__(self, datos: bytes, falla_en):
+        self.datos = datos
+        self.falla_en = falla_en
+        self.posicion = 0
+        self.MAX_REQUEST_SIZE = 32768
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def seek(self, posicion):
+        self.posicion = posicion
+
+    def prefetch(self, tamano, pendientes):
+        pass
+
+    def read(self, cantidad):
+        if self.falla_en is not None and self.posicion >= self.falla_en:
+            raise EOFError("conexión cerrada")
+        fin = self.posicion + cantidad
+        if self.falla_en is not None:
+            fin = min(fin, self.falla_en)
+        datos = self.datos[self.posicion:fin]
+        self.posicion += len(datos)
+        return datos
+
+
+class _Sftp:
+    """Sesión cuyo archivo se corta en `falla_en` bytes (None = no se corta)."""
+
+    def __init__(self, falla_en=None, datos: bytes = CONTENIDO):
+        self.falla_en = falla_en
+        self.datos = datos
+        self.aperturas = []
+
+    def stat(self, remoto):
+        if remoto != '/anexo.xlsx':
+            raise FileNotFoundError(remoto)
+        return os.stat_result((0,) * 6 + (len(self.datos),) + (0,) * 3)
+
+    def open(self, remoto, modo):
+        archivo = _ArchivoRemoto(self.datos, self.falla_en)
+        self.aperturas.append(archivo)
+        return archivo
+
+
+def _sesiones(*sesiones):
+    pendientes = list(sesiones)
+    return lambda: pendientes.pop(0)
+
+
+def test_descarga_completa_sin_reanudar():
+    destino = io.BytesIO()
+    transferencia = descargar_reanudable(_sesiones(_Sftp()), '/anexo.xlsx', destino, tamano_lectura=100)
+    assert destino.getvalue() == CONTENIDO
+    assert transferencia.bytes == len(CONTENIDO) and transferencia.reanudaciones == 0
+
+
+def test_caida_a_mitad_de_archivo_reanuda_desde_lo_escrito():
+    primera, segunda, tercera = _Sftp(falla_en=3000), _Sftp(falla_en=7000), _Sftp()
+    reanudaciones = []
+    destino = io.BytesIO()
+
+    transferencia = descargar_reanudable(
+        _sesiones(primera, segunda, tercera), '/anexo.xlsx', destino, tamano_lectura=100,
+        al_reanudar=lambda posicion, error: reanudaciones.append((posicion, type(error)))
+    )
+
+    assert destino.getvalue() == CONTENIDO
+    assert reanudaciones == [(3000, EOFError), (7000, EOFError)]
+    assert transferencia.reanudaciones == 2
+    # Cada sesión nueva empieza donde quedó la anterior
+    assert [a.posicion for a in segunda.aperturas] == [7000]
+    assert [a.posicion for a in tercera.aperturas] == [len(CONTENIDO)]
+
+
+def test_archivo_inexistente_no_se_reintenta():
+    llamadas = []
+
+    def sesion():
+        llamadas.append(1)
+        return _Sftp()
+
+    with pytest.raises(FileNotFoundError):
+        descargar_reanudable(sesion, '/no_existe.xlsx', io.BytesIO())
+    assert len(llamadas) == 1
+
+
+def test_sin_avance_agota_los_reintentos():
+    with pytest.raises(EOFError):
+        descargar_reanudable(lambda: _Sftp(falla_en=0), '/anexo.xlsx', io.BytesIO(), reintentos=2)
+
+
+def test_metricas_acumulan_transferencias_y_workers():
+    metricas = MetricasTransferencias()
+    metricas.registrar(Transferencia('/a', 2048, 2.0, reanudaciones=1))
+    metricas.registrar(Transferencia('/b', 1024, 1.0))
+    metricas.sumar({'archivos': 2, 'bytes': 1024, 'segundos': 1.0})
+    assert metricas.instantanea() == {
+        'archivos': 4, 'bytes': 4096, 'segundos': 4.0, 'kb_s': 1.0, 'reanudaciones': 1
+    }
+    assert Transferencia('/c', 0, 0.0).to_dict()['kb_s'] == 0.0
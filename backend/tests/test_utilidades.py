@@ -0,0 +1,76 @@
+"""
+Tests de lectura de libros
+==========================
+
+WorkbookSession: un solo handle sirve hojas, encabezados y filas, igual
+desde una ruta que desde bytes en memoria (descarga sin archivo temporal).
+"""
+
+import io
+import shutil
+
+import pytest
+
+openpyxl = pytest.importorskip('openpyxl')
+
+from app.core.t25.utilidades import WorkbookSession, detectar_formato_real, leer_hoja_raw, obtener_hojas
+
+FILAS = [['CUPS', 'DESCRIPCION', 'TARIFA'], ['890201', 'CONSULTA', 35000], ['902210', 'HEMOGRAMA', 12000.5]]
+
+
+@pytest.fixture
+def libro(tmp_path):
+    wb = openpyxl.Workbook()
+    wb.active.title = 'PORTADA'
+    wb.active.append(['ANEXO 1'])
+    hoja = wb.create_sheet('SERVICIOS')
+    for fila in FILAS:
+        hoja.append(fila)
+    ruta = tmp_path / 'anexo.xlsx'
+    wb.save(ruta)
+    return str(ruta)
+
+
+def test_sesion_desde_ruta(libro):
+    with WorkbookSession(libro) as sesion:
+        assert sesion.formato == 'xlsx' and sesion.motor == 'openpyxl'
+        assert sesion.hojas == ['PORTADA', 'SERVICIOS']
+        assert sesion.leer_encabezado('SERVICIOS', n_filas=1) == [FILAS[0]]
+        assert sesion.leer_hoja('SERVICIOS') == FILAS
+        # Hoja inexistente: lista vacía, el libro sigue abierto
+        assert sesion.leer_hoja('NO EXISTE') == []
+        assert sesion.abierto
+    assert not sesion.abierto
+    assert sesion.leer_hoja('SERVICIOS') == []
+
+
+def _en_memoria(ruta: str) -> io.BytesIO:
+    with open(ruta, 'rb') as f:
+        return io.BytesIO(f.read())
+
+
+def test_sesion_desde_memoria_igual_que_desde_ruta(libro):
+    contenido = _en_memoria(libro)
+    assert detectar_formato_real(contenido) == 'xlsx'
+    with WorkbookSession('ANEXO 1.xlsx', contenido=contenido) as sesion:
+        assert sesion.motor == 'openpyxl'
+        assert sesion.hojas == obtener_hojas(libro)
+        assert sesion.leer_hoja('SERVICIOS', max_filas=2) == leer_hoja_raw(libro, 'SERVICIOS', max_filas=2)
+
+
+def test_extension_no_soportada_falla_igual_en_memoria(libro, tmp_path):
+    mal_nombrado = tmp_path / 'anexo.dat'
+    shutil.copy(libro, mal_nombrado)
+    with WorkbookSession(str(mal_nombrado)) as desde_disco:
+        assert not desde_disco.abierto
+    with WorkbookSession('anexo.dat', contenido=_en_memoria(libro)) as desde_memoria:
+        assert not desde_memoria.abierto
+
+
+def test_libro_ilegible_no_abre(tmp_path):
+    ruta = tmp_path / 'roto.xlsx'
+    ruta.write_bytes(b'no es un libro')
+    with WorkbookSession(str(ruta)) as sesion:
+        assert sesion.formato == 'unknown'
+        assert not sesion.abierto and sesion.hojas == []
+        assert sesion.leer_hoja('SERVICIOS') == []
@@ -0,0 +1,95 @@
+"""
+Tests del WebSocket de logs
+===========================
+
+Suscriptor: estado/progreso se coalescen al último, los logs más viejos se
+descartan al llenarse la cola y el cliente recibe un único aviso
+"logs_omitidos" con el índice desde el que pedirlos.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip('fastapi')
+
+from app.websockets.logs import ConnectionManager, Suscriptor
+
+
+def _log(indice: int) -> dict:
+    return {"tipo": "log", "indice": indice, "data": {"mensaje": f"linea {indice}"}}
+
+
+def _drenar(suscriptor: Suscriptor, cantidad: int) -> list:
+    async def leer():
+        return [await suscriptor.obtener() for _ in range(cantidad)]
+    return asyncio.run(leer())
+
+
+def test_estado_y_progreso_se_coalescen_al_ultimo():
+    suscriptor = Suscriptor()
+    suscriptor.agregar({"tipo": "progreso", "progreso": 10})
+    suscriptor.agregar(_log(0))
+    suscriptor.agregar({"tipo": "progreso", "progreso": 20})
+    suscriptor.agregar({"tipo": "estado", "hechos": 1})
+    suscriptor.agregar({"tipo": "progreso", "progreso": 30})
+    suscriptor.agregar({"tipo": "estado", "hechos": 2})
+
+    mensajes = _drenar(suscriptor, 3)
+    # El progreso conserva su lugar en la cola pero sale con el último valor
+    assert mensajes == [
+        {"tipo": "progreso", "progreso": 30},
+        _log(0),
+        {"tipo": "estado", "hechos": 2},
+    ]
+    assert not suscriptor.pendientes and not suscriptor.ultimo
+
+
+def test_progreso_ya_entregado_se_vuelve_a_encolar():
+    suscriptor = Suscriptor()
+    suscriptor.agregar({"tipo": "progreso", "progreso": 10})
+    assert _drenar(suscriptor, 1) == [{"tipo": "progreso", "progreso": 10}]
+    suscriptor.agregar({"tipo": "progreso", "progreso": 20})
+    assert _drenar(suscriptor, 1) == [{"tipo": "progreso", "progreso": 20}]
+
+
+def test_cola_llena_descarta_logs_viejos_y_avisa_una_vez():
+    suscriptor = Suscriptor(max_pendientes=3)
+    suscriptor.agregar({"tipo": "estado", "hechos": 0})
+    for indice in range(6):
+        suscriptor.agregar(_log(indice))
+
+    # El estado ocupa un lugar pero nunca se descarta: quedan los logs 4 y 5
+    mensajes = _drenar(suscriptor, 4)
+    assert mensajes[0] == {"tipo": "logs_omitidos", "cantidad": 4, "desde": 0}
+    assert mensajes[1] == {"tipo": "estado", "hechos": 0}
+    assert [m["indice"] for m in mensajes[2:]] == [4, 5]
+    assert suscriptor.omitidos == 0 and suscriptor.omitidos_desde is None
+
+
+def test_fin_no_se_descarta_con_la_cola_llena():
+    suscriptor = Suscriptor(max_pendientes=2)
+    suscriptor.agregar(_log(0))
+    suscriptor.agregar(_log(1))
+    suscriptor.agregar({"tipo": "fin", "estado": "completado"})
+
+    mensajes = _drenar(suscriptor, 3)
+    assert mensajes[0] == {"tipo": "logs_omitidos", "cantidad": 1, "desde": 0}
+    assert mensajes[1:] == [_log(1), {"tipo": "fin", "estado": "completado"}]
+
+
+def test_obtener_espera_a_que_se_publique():
+    async def escenario():
+        manager = ConnectionManager()
+        manager.iniciar(asyncio.get_running_loop())
+        suscriptor = Suscriptor()
+        manager.suscriptores["job"] = {object(): suscriptor}
+
+        lectura = asyncio.create_task(suscriptor.obtener())
+        await asyncio.sleep(0)
+        assert not lectura.done()
+        # Publicación desde otro hilo, como hacen los lectores del consolidador
+        await asyncio.to_thread(manager.publicar_desde_hilo, manager.send_log, "job", {"mensaje": "hola"}, 7)
+        return await asyncio.wait_for(lectura, 5)
+
+    assert asyncio.run(escenario()) == {"tipo": "log", "indice": 7, "data": {"mensaje": "hola"}}
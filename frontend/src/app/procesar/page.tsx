@@ -20,6 +20,7 @@ import {
 } from 'lucide-react';
 import Link from 'next/link';
 import { API_BASE } from '@/config/api';
+import { JobMetricas } from '@/types';
 
 interface LogEntry {
   timestamp: string;
@@ -32,6 +33,13 @@ interface ContratoInfo {
   razon_social: string;
 }
 
+const formatearEta = (segundos: number) => {
+  const s = Math.round(segundos);
+  if (s < 60) return `${s}s`;
+  if (s < 3600) return `${Math.floor(s / 60)}m ${s % 60}s`;
+  return `${Math.floor(s / 3600)}h ${Math.floor((s % 3600) / 60)}m`;
+};
+
 // Componente de Log
 const LogLine = ({ log }: { log: LogEntry }) => {
   const getLogStyle = (mensaje: string) => {
@@ -67,6 +75,7 @@ export default function ProcesarPage() {
   const [jobId, setJobId] = useState<string | null>(null);
   const [jobEstado, setJobEstado] = useState<string | null>(null);
   const [progreso, setProgreso] = useState(0);
+  const [metricas, setMetricas] = useState<JobMetricas | null>(null);
   const [mensaje, setMensaje] = useState('');
   const [logs, setLogs] = useState<LogEntry[]>([]);
   const [archivosGenerados, setArchivosGenerados] = useState<string[]>([]);
@@ -123,8 +132,8 @@ export default function ProcesarPage() {
         const res = await fetch(`${API_BASE}/procesar/logs/${jId}?desde=${lastLogIndexRef.current}`);
         const data = await res.json();
         if (data.logs?.length > 0) { setLogs(prev => [...prev, ...data.logs]); lastLogIndexRef.current += data.logs.length; }
-        setProgreso(data.progreso); setMensaje(data.mensaje); setJobEstado(data.estado);
-        if (['completado', 'error', 'cancelado'].includes(data.estado)) {
+        setProgreso(data.progreso); setMensaje(data.mensaje); setJobEstado(data.estado); setMetricas(data.metricas ?? null);
+        if (['completado', 'error', 'cancelado'].includes(data.estado) && lastLogIndexRef.current >= (data.total_logs ?? 0)) {
           clearInterval(pollingRef.current!); pollingRef.current = null;
           if (data.archivos_generados) setArchivosGenerados(data.archivos_generados);
         }
@@ -283,7 +292,7 @@ export default function ProcesarPage() {
                 {archivosGenerados.map((a) => (
                   <a key={a} href={`${API_BASE}/descargas/archivo/${a}`} className="flex items-center gap-2 p-2.5 rounded-xl bg-green-50 dark:bg-green-500/10 text-green-700 dark:text-green-400 text-xs hover:bg-green-100 dark:hover:bg-green-500/20" download>
                     <FileSpreadsheet className="w-4 h-4" />
-                    <span className="truncate flex-1">{a}</span>
+                    <span className="truncate flex-1">{a.split('/').pop()}</span>
                   </a>
                 ))}
               </div>
@@ -321,6 +330,12 @@ export default function ProcesarPage() {
                     </div>
                     <span className="text-white font-mono text-sm">{Math.round(progreso)}%</span>
                   </div>
+                  {metricas && jobEstado === 'en_proceso' && (
+                    <div className="mt-1 text-gray-400 font-mono text-xs">
+                      {metricas.hechos}/{metricas.total} contratos · {metricas.filas_por_s.toLocaleString()} filas/s
+                      {metricas.eta_s !== null && ` · ETA ${formatearEta(metricas.eta_s)}`}
+                    </div>
+                  )}
                 </div>
               )}
             </div>
@@ -65,6 +65,17 @@ export interface LogEntry {
   mensaje: string;
 }
 
+export interface JobMetricas {
+  hechos: number;
+  total: number;
+  transcurrido_s: number;
+  filas_por_s: number;
+  archivos_por_s: number;
+  bytes_sftp_por_s: number;
+  segundos_por_contrato: number | null;
+  eta_s: number | null;
+}
+
 export interface JobEstado {
   job_id: string;
   estado: 'pendiente' | 'en_proceso' | 'completado' | 'error' | 'cancelado';
@@ -81,6 +92,7 @@ export interface JobEstado {
   archivos_generados: string[];
   errores: string[];
   estadisticas: Record<string, number>;
+  metricas?: JobMetricas | null;
   total_logs?: number;
 }
 
@@ -91,6 +103,7 @@ export interface JobLogs {
   progreso: number;
   mensaje: string;
   contrato_actual: string;
+  metricas?: JobMetricas | null;
   total_logs: number;
   logs: LogEntry[];
   archivos_generados: string[];